@@ -0,0 +1,29 @@
+"""add_request_hash_to_idempotency_keys
+
+Revision ID: a9f4c2e7b813
+Revises: e7a3b9d4c215
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f4c2e7b813'
+down_revision: Union[str, None] = 'e7a3b9d4c215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # У уже сохраненных ключей хеша нет — для них тело не сверяется
+    op.add_column('idempotency_keys', sa.Column('request_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('idempotency_keys', 'request_hash')
@@ -0,0 +1,33 @@
+"""add_updated_at_to_shift_reports
+
+Revision ID: b3e1c9a47d20
+Revises: 057c40fe6222
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e1c9a47d20'
+down_revision: Union[str, None] = '057c40fe6222'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'shift_reports',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    # Для существующих строк версия = время создания
+    op.execute("UPDATE shift_reports SET updated_at = COALESCE(created_at, now())")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shift_reports', 'updated_at')
@@ -6,6 +6,14 @@ from .writeoff_transfer import router as writeoff_transfer_router
 from .telegram_webhook import router as telegram_webhook_router
 from .inventory_management import router as inventory_management_router
 from .daily_inventory_v2 import router as daily_inventory_v2_router
+from .metrics import router as metrics_router
+from .admin import router as admin_router
+from .uploads import router as uploads_router
+from .locations import router as locations_router
+from .sync import router as sync_router
+from .events import router as events_router
+from .shifts import router as shifts_router
+from .photos import router as photos_router
 from fastapi import APIRouter
 
 api_router = APIRouter()
@@ -15,4 +23,12 @@ api_router.include_router(report_on_goods_router, prefix="/report-on-goods", tag
 api_router.include_router(writeoff_transfer_router, prefix="/writeoff-transfer", tags=["writeoff-transfer"])
 api_router.include_router(telegram_webhook_router, prefix="/telegram", tags=["Telegram"])
 api_router.include_router(inventory_management_router, prefix="/inventory-management", tags=["Inventory Management"])
-api_router.include_router(daily_inventory_v2_router, prefix="/daily-inventory-v2", tags=["Daily Inventory V2"])
\ No newline at end of file
+api_router.include_router(daily_inventory_v2_router, prefix="/daily-inventory-v2", tags=["Daily Inventory V2"])
+api_router.include_router(metrics_router, tags=["Metrics"])
+api_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
+api_router.include_router(uploads_router, prefix="/uploads", tags=["Uploads"])
+api_router.include_router(locations_router, prefix="/locations", tags=["Locations"])
+api_router.include_router(sync_router, prefix="/sync", tags=["Sync"])
+api_router.include_router(events_router, prefix="/events", tags=["Events"])
+api_router.include_router(shifts_router, prefix="/shifts", tags=["Shifts"])
+api_router.include_router(photos_router, prefix="/photos", tags=["Photos"])
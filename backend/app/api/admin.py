@@ -0,0 +1,86 @@
+import hmac
+import json
+import logging
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+
+from app.core import db_helper, location_registry
+from app.core.config import settings
+from app.core.locations import RELOAD_CHANNEL
+from app.core.pg_notify import notify
+from app.core.query_profiler import CONTROL_CHANNEL, apply_profiler_changes, profiler
+from app.schemas import ProfilerSettingsUpdate
+
+logger = logging.getLogger(__name__)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Пускает только с верным X-Admin-Token; без ADMIN_TOKEN в настройках эндпоинты закрыты"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Админ-эндпоинты отключены")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Неверный токен администратора")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _profiler_state(limit: int = 50, order_by: str = "total_ms") -> dict:
+    state = profiler.snapshot(limit=limit, order_by=order_by)
+    state["config"]["echo"] = bool(db_helper.engine.echo)
+    return state
+
+
+@router.get("/db-profiler", summary="Статистика профилировщика SQL")
+async def get_db_profiler(
+        limit: int = Query(50, ge=1, le=500),
+        order_by: Literal["total_ms", "count", "max_ms", "avg_ms"] = Query("total_ms"),
+):
+    """
+    Текущие настройки профилировщика, топ отпечатков запросов и найденные N+1.
+    """
+    return _profiler_state(limit=limit, order_by=order_by)
+
+
+async def _broadcast_profiler_changes(changes: dict) -> None:
+    """Применяет изменения в этом воркере и через NOTIFY — в остальных"""
+    apply_profiler_changes(changes)
+    async with db_helper.session_factory() as session:
+        await notify(session, CONTROL_CHANNEL, json.dumps(changes))
+        await session.commit()
+
+
+@router.patch("/db-profiler", summary="Настройка профилировщика SQL")
+async def update_db_profiler(data: ProfilerSettingsUpdate):
+    """
+    Включает/выключает профилировщик, меняет порог медленных запросов и N+1.
+    Действует сразу во всех воркерах, без рестарта.
+    """
+    changes = data.model_dump(exclude_none=True)
+    await _broadcast_profiler_changes(changes)
+
+    logger.info(f"Настройки профилировщика SQL изменены: {changes}")
+    return _profiler_state()
+
+
+@router.delete("/db-profiler/stats", summary="Сброс статистики профилировщика")
+async def reset_db_profiler():
+    """
+    Сбрасывает статистику во всех воркерах.
+    """
+    await _broadcast_profiler_changes({"reset": True})
+    return {"ok": True}
+
+
+@router.post("/locations/reload", summary="Перечитать реестр локаций")
+async def reload_locations():
+    """
+    Перечитывает LOCATIONS_FILE в этом воркере и через NOTIFY — в остальных.
+    """
+    location_registry.reload()
+    async with db_helper.session_factory() as session:
+        await notify(session, RELOAD_CHANNEL)
+        await session.commit()
+    logger.info("Реестр локаций перечитан")
+    return location_registry.as_dict()
@@ -4,7 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.core import get_db
+from app.core import get_db, get_read_db
+from app.core.responses import FastJSONResponse
 from app.crud.daily_inventory_v2 import DailyInventoryV2CRUD
 from app.schemas.daily_inventory_v2 import DailyInventoryV2Create, DailyInventoryV2Response
 
@@ -57,7 +58,7 @@ async def get_inventories_list(
         shift_type: Optional[str] = Query(None, description="Фильтр по типу смены"),
         skip: int = Query(0, ge=0, description="Пропустить записей"),
         limit: int = Query(100, ge=1, le=1000, description="Максимум записей"),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_read_db)
 ):
     """Получить список инвентаризаций с фильтрацией"""
     inventories, total = await inventory_v2_crud.get_inventory_list(
@@ -78,12 +79,12 @@ async def get_inventories_list(
             "updated_at": inventory.updated_at
         })
 
-    return {
+    return FastJSONResponse({
         "inventories": inventory_list,
         "total": total,
         "skip": skip,
         "limit": limit
-    }
+    })
 
 
 @router.delete(
@@ -112,7 +113,7 @@ async def delete_inventory(
 )
 async def get_inventory_stats(
         location: Optional[str] = Query(None, description="Фильтр по локации"),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_read_db)
 ):
     """Получить статистику по инвентаризациям"""
     try:
@@ -0,0 +1,87 @@
+import asyncio
+from typing import AsyncIterator, FrozenSet, Optional
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.core import location_registry
+from app.core.metrics import SSE_CONNECTIONS
+from app.core.report_events import report_events
+
+router = APIRouter()
+
+REPORT_TYPES = frozenset({
+    "shift_report",
+    "report_on_goods",
+    "writeoff_transfer",
+    "daily_inventory",
+    "daily_inventory_v2",
+})
+
+# Комментарий-пинг держит соединение открытым через прокси и показывает обрыв клиенту
+HEARTBEAT_INTERVAL = 15
+# Пауза переподключения EventSource, мс
+RETRY_MS = 3000
+
+
+def _parse_types(types: Optional[str]) -> Optional[FrozenSet[str]]:
+    if not types:
+        return None
+    parsed = frozenset(part.strip() for part in types.split(",") if part.strip())
+    unknown = parsed - REPORT_TYPES
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные типы отчетов: {', '.join(sorted(unknown))}"
+        )
+    return parsed or None
+
+
+async def _stream(location: Optional[str], types: Optional[FrozenSet[str]]) -> AsyncIterator[bytes]:
+    # Подписка внутри генератора: отписка в finally гарантирована, даже если клиент ушел сразу
+    subscription = report_events.subscribe(location=location, types=types)
+    SSE_CONNECTIONS.inc()
+    closing = asyncio.ensure_future(report_events.closing.wait())
+    next_event: Optional[asyncio.Future] = None
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        while not closing.done():
+            if next_event is None:
+                next_event = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait({next_event, closing}, timeout=HEARTBEAT_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+            if next_event in done:
+                event, next_event = next_event.result(), None
+                yield b"event: " + event["event"].encode() + b"\ndata: " + orjson.dumps(event) + b"\n\n"
+            elif not done:
+                yield b": ping\n\n"
+    finally:
+        closing.cancel()
+        if next_event is not None:
+            next_event.cancel()
+        report_events.unsubscribe(subscription)
+        SSE_CONNECTIONS.dec()
+
+
+@router.get(
+    "/reports",
+    summary="Поток событий отчетов (SSE)",
+    description="""
+    Server-Sent Events вместо опроса `/list`: `created`, `deleted` и `status_changed`
+    с полями `type`, `id`, `location` (и `status` для смены статуса).
+
+    - **location**: только события этой локации (код, адрес или подпись; `all` — все)
+    - **types**: типы отчетов через запятую (`shift_report,report_on_goods,...`)
+
+    Событие `resync` означает, что часть событий могла потеряться — список нужно перечитать.
+    """
+)
+async def stream_report_events(
+        location: Optional[str] = Query(None, description="Локация"),
+        types: Optional[str] = Query(None, description="Типы отчетов через запятую"),
+):
+    return StreamingResponse(
+        _stream(location_registry.normalize(location), _parse_types(types)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
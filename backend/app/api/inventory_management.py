@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
 from app.core import get_db
+from app.core.catalog_cache import catalog_cache
+from app.core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
 from app.crud.inventory_item import inventory_crud
 from app.schemas.inventory_item import (
     InventoryItemCreate,
@@ -21,16 +23,22 @@ router = APIRouter()
     description="Получает список всех товаров с возможностью фильтрации"
 )
 async def get_items(
+    request: Request,
+    response: Response,
     is_active: Optional[bool] = Query(None, description="Активные товары"),
     skip: int = Query(0, ge=0, description="Пропустить записей"),
     limit: int = Query(100, ge=1, le=1000, description="Максимум записей"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Получить список товаров с фильтрацией"""
-    items, total = await inventory_crud.get_items(
-        db, is_active=is_active, skip=skip, limit=limit
-    )
-    return InventoryItemList(items=items, total=total)
+    """Получить список товаров с фильтрацией (из кеша справочника)"""
+    catalog = await catalog_cache.get(db)
+    etag = make_etag("inventory_items", catalog.version, request.url.query)
+    if is_not_modified(request, etag, catalog.last_modified):
+        return not_modified(etag, catalog.last_modified)
+
+    items = catalog.sorted_items(is_active)
+    response.headers.update(cache_headers(etag, catalog.last_modified))
+    return InventoryItemList(items=items[skip:skip + limit], total=len(items))
 
 
 @router.get(
@@ -43,7 +51,7 @@ async def get_item(
     db: AsyncSession = Depends(get_db)
 ):
     """Получить товар по ID"""
-    item = await inventory_crud.get_item(db, item_id)
+    item = (await catalog_cache.get(db)).items.get(item_id)
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
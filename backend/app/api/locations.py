@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Request
+
+from app.core import location_registry
+from app.core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
+from app.core.responses import FastJSONResponse
+
+router = APIRouter()
+
+
+@router.get("", summary="Список локаций")
+async def get_locations(request: Request):
+    """
+    Локации из реестра: адреса, коды и подписи для кассовых и остальных отчетов.
+    Фронтенд строит по ним списки выбора вместо зашитых констант.
+    """
+    etag = make_etag("locations", location_registry.version)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(location_registry.as_dict(), headers=cache_headers(etag))
@@ -0,0 +1,99 @@
+import logging
+
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Request, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import get_db
+from app.core.database import release_connection
+from app.crud import UploadedPhotoCRUD
+from app.schemas import PhotoUploadCreate, PhotoUploadResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+uploaded_photo_crud = UploadedPhotoCRUD()
+
+
+@router.post(
+    "",
+    response_model=PhotoUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Загрузить фото целиком",
+    description="""
+    Загружает фото до отправки отчета, пока кассир заполняет форму. Полученный `id` передается
+    в `photo_id` / `receipt_photo_id` (`/shift-reports/create`) или `photo_ids` (`/report-on-goods/create`),
+    и отправка отчета становится небольшим запросом без файлов. Для плохой связи — `/photos/uploads`.
+    """,
+)
+async def upload_photo(
+        file: UploadFile = File(..., description="Фото"),
+        db: AsyncSession = Depends(get_db),
+):
+    photo = await uploaded_photo_crud.upload(db, file)
+    return uploaded_photo_crud.to_response(photo)
+
+
+@router.post(
+    "/uploads",
+    response_model=PhotoUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Начать загрузку фото частями",
+    description="""
+    Загрузка с докачкой. Ответ содержит `id` и `chunk_size`; дальше части отправляются
+    `PATCH /photos/uploads/{id}` по порядку. После последней части фото готово (`status: ready`).
+    """,
+)
+async def start_photo_upload(data: PhotoUploadCreate, db: AsyncSession = Depends(get_db)):
+    photo = await uploaded_photo_crud.start(db, data)
+    return uploaded_photo_crud.to_response(photo)
+
+
+@router.get(
+    "/uploads/{photo_id}",
+    response_model=PhotoUploadResponse,
+    summary="Состояние загрузки",
+    description="После обрыва связи: `received` — смещение, с которого продолжить загрузку.",
+)
+async def get_photo_upload(photo_id: str, db: AsyncSession = Depends(get_db)):
+    photo = await uploaded_photo_crud.get(db, photo_id)
+    return uploaded_photo_crud.to_response(photo)
+
+
+@router.patch(
+    "/uploads/{photo_id}",
+    response_model=PhotoUploadResponse,
+    summary="Отправить часть фото",
+    description="""
+    Тело запроса — байты части, заголовок `Upload-Offset` — ее смещение в файле. Все части, кроме
+    последней, ровно `chunk_size` байт. Если смещение не совпадает с уже принятым (часть отправлена
+    повторно или потерялась), ответ `409` с актуальным смещением в заголовке `Upload-Offset`.
+    """,
+)
+async def upload_photo_chunk(
+        photo_id: str,
+        request: Request,
+        upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+        db: AsyncSession = Depends(get_db),
+):
+    photo = await uploaded_photo_crud.get(db, photo_id)
+    limit = photo.chunk_size
+    # Тело от медленного клиента читается без занятого соединения
+    await release_connection(db)
+
+    # Часть не больше chunk_size загрузки: заведомо большое тело не читаем,
+    # а без Content-Length читаем не дальше этого размера
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        if not content_length.isdigit():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неверный Content-Length")
+        if int(content_length) > limit:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Часть слишком большая")
+
+    content = bytearray()
+    async for chunk in request.stream():
+        content.extend(chunk)
+        if len(content) > limit:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Часть слишком большая")
+
+    photo = await uploaded_photo_crud.append_chunk(db, photo_id, upload_offset, bytes(content))
+    return uploaded_photo_crud.to_response(photo)
@@ -1,29 +1,22 @@
 from datetime import datetime, date
 import logging
 
-from fastapi import APIRouter, status, Form, Depends, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, status, Form, Depends, HTTPException, UploadFile, File, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, desc, select, func
 from app.crud import ReportOnGoodCRUD
 from app.schemas import ReportOnGoodsCreate, ReportOnGoodsResponse, KuxnyaJson, BarJson, UpakovkyJson
 from typing import Optional, List
 import json
-from app.core import get_db
+from app.core import get_db, get_read_db, location_registry
+from app.core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
+from app.core.projections import include_items, json_length
+from app.core.responses import FastJSONResponse
+from app.core.logging_config import PAYLOAD_LOGGER_NAME
 from app.models import ReportOnGoods
 
-logger = logging.getLogger("report_on_goods")
-
-# Коды локаций -> полные адреса
-LOCATION_MAP = {
-    'gagarina': 'Гагарина 48/1',
-    'abdulhakima': 'Абдулхакима Исмаилова 51',
-    'gaydara': 'Гайдара Гаджиева 7Б',
-}
-
-def normalize_location(loc: Optional[str]) -> Optional[str]:
-    if not loc or loc == 'all':
-        return None
-    return LOCATION_MAP.get(loc, loc)
+logger = logging.getLogger(__name__)
+payload_logger = logging.getLogger(PAYLOAD_LOGGER_NAME)
 
 router = APIRouter()
 repg = ReportOnGoodCRUD()
@@ -132,6 +125,7 @@ async def create_report_on_goods(
             example='[{"name": "Стаканы пластиковые", "count": 100, "unit": "шт"}, {"name": "Салфетки", "count": 50, "unit": "упаковка"}]'
         ),
         photos: Optional[List[UploadFile]] = File(None, description="Фотографии товаров/накладных"),
+        photo_ids: Optional[List[str]] = Form(None, description="ID фото, загруженных заранее через /photos (поле повторяется)"),
         shift_type: str = Form(..., regex="^(morning|night)$", description="Тип смены", example="morning"),
         cashier_name: str = Form(..., description="ФИО кассира", example="Иванов Иван"),
         custom_date: Optional[str] = Form(None, description="Опциональная дата и время в формате ISO (YYYY-MM-DDTHH:MM)", example="2025-11-14T10:30"),
@@ -174,10 +168,13 @@ async def create_report_on_goods(
     - `unit`: единица измерения (обязательно)
     """
     logger.info(
-        f"[CREATE] Входящий запрос: location={location}, shift_type={shift_type}, "
-        f"cashier_name={cashier_name}, custom_date={custom_date}, "
-        f"kuxnya_json={kuxnya_json}, bar_json={bar_json}, upakovki_json={upakovki_json}, "
-        f"photos_count={len(photos) if photos else 0}"
+        "[CREATE] Входящий запрос: location=%s, shift_type=%s, cashier_name=%s, custom_date=%s, photos_count=%s, photo_ids=%s",
+        location, shift_type, cashier_name, custom_date, len(photos) if photos else 0, len(photo_ids) if photo_ids else 0,
+    )
+    # Сырые JSON бывают большими, поэтому пишутся в app.payload с выборкой
+    payload_logger.info(
+        "[CREATE] kuxnya_json=%s, bar_json=%s, upakovki_json=%s",
+        kuxnya_json, bar_json, upakovki_json,
     )
 
     try:
@@ -340,10 +337,10 @@ async def create_report_on_goods(
         logger.info(
             f"[CREATE] Данные подготовлены: kuxnya={len(kuxnya_list)} шт, "
             f"bar={len(bar_list)} шт, upakovki={len(upakovky_list)} шт, "
-            f"photos={len(photos_data)} шт"
+            f"photos={len(photos_data)} шт, photo_ids={len(photo_ids or [])} шт"
         )
 
-        result = await repg.create_report_on_good(db, report_on_goods_data, photos=photos_data)
+        result = await repg.create_report_on_good(db, report_on_goods_data, photos=photos_data, photo_ids=photo_ids)
 
         logger.info(f"[CREATE] Отчет успешно создан: id={result.id}, location={result.location}")
         return result
@@ -418,22 +415,34 @@ async def send_photo(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail=str(e))
 
 
+def _goods_items(items: Optional[list]) -> List[dict]:
+    """Позиции раздела в формате списка: название, количество, единица"""
+    return [
+        {"name": item.get("name", ""), "count": item.get("count", 0), "unit": item.get("unit", "")}
+        for item in items or []
+    ]
+
+
 @router.get(
     "/list",
     summary="Получить список отчетов приема товаров",
-    description="Возвращает список отчетов приема товаров с пагинацией и фильтрацией по дате и локации"
+    description="Возвращает список отчетов приема товаров с пагинацией и фильтрацией по дате и локации. "
+                "Позиции и ссылки на фото — только с include=items"
 )
 async def get_receiving_reports_list(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Дата начала периода (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Дата окончания периода (YYYY-MM-DD)"),
     location: Optional[str] = Query(None, description="Фильтр по локации"),
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(10, ge=1, le=100, description="Количество элементов на странице"),
-    db: AsyncSession = Depends(get_db)
+    include: Optional[str] = Query(None, description="items — добавить позиции и ссылки на фото"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получает список отчетов приема товаров с пагинацией и фильтрацией.
     """
+    with_items = include_items(include)
     try:
         # Условия фильтрации
         conditions = []
@@ -447,99 +456,89 @@ async def get_receiving_reports_list(
             conditions.append(ReportOnGoods.date <= end_datetime)
 
         if location:
-            norm_loc = normalize_location(location)
+            norm_loc = location_registry.normalize(location)
             if norm_loc:
                 conditions.append(ReportOnGoods.location == norm_loc)
 
-        # Подсчет общего количества
-        count_stmt = select(func.count(ReportOnGoods.id))
+        # Подсчет общего количества; отчеты не меняются, поэтому версия выборки — count и max(id)
+        count_stmt = select(func.count(ReportOnGoods.id), func.max(ReportOnGoods.id))
         if conditions:
             count_stmt = count_stmt.where(and_(*conditions))
         count_result = await db.execute(count_stmt)
-        total_count = count_result.scalar() or 0
+        total_count, max_id = count_result.one()
+        total_count = total_count or 0
+
+        etag = make_etag("report_on_goods", total_count, max_id, request.url.query)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
 
         # Пагинация
         offset = (page - 1) * per_page
 
-        # Основной запрос
-        stmt = select(ReportOnGoods)
+        # Основной запрос: колонки карточки и число позиций; JSON с позициями — только с include=items
+        columns = [
+            ReportOnGoods.id,
+            ReportOnGoods.location,
+            ReportOnGoods.date,
+            ReportOnGoods.cashier_name,
+            ReportOnGoods.shift_type,
+            (
+                json_length(ReportOnGoods.kuxnya)
+                + json_length(ReportOnGoods.bar)
+                + json_length(ReportOnGoods.upakovki_xoz)
+            ).label("goods_count"),
+            json_length(ReportOnGoods.photos_urls, "photos_count"),
+        ]
+        if with_items:
+            columns += [ReportOnGoods.kuxnya, ReportOnGoods.bar, ReportOnGoods.upakovki_xoz, ReportOnGoods.photos_urls]
+        stmt = select(*columns)
         if conditions:
             stmt = stmt.where(and_(*conditions))
         stmt = stmt.order_by(desc(ReportOnGoods.date)).offset(offset).limit(per_page)
 
         result = await db.execute(stmt)
-        reports = result.scalars().all()
 
         # Формируем ответ
         reports_list = []
-        for report in reports:
-            # Подсчитываем общее количество товаров
-            goods_count = 0
-            total_items = []
-            
-            # Обрабатываем кухню
-            kuxnya_items = []
-            if report.kuxnya:
-                for item in report.kuxnya:
-                    kuxnya_items.append({
-                        "name": item.get("name", ""),
-                        "count": item.get("count", 0),
-                        "unit": item.get("unit", "")
-                    })
-                goods_count += len(report.kuxnya)
-                total_items.extend(kuxnya_items)
-
-            # Обрабатываем бар
-            bar_items = []
-            if report.bar:
-                for item in report.bar:
-                    bar_items.append({
-                        "name": item.get("name", ""),
-                        "count": item.get("count", 0),
-                        "unit": item.get("unit", "")
-                    })
-                goods_count += len(report.bar)
-                total_items.extend(bar_items)
-
-            # Обрабатываем упаковки/хоз
-            upakovki_items = []
-            if report.upakovki_xoz:
-                for item in report.upakovki_xoz:
-                    upakovki_items.append({
-                        "name": item.get("name", ""),
-                        "count": item.get("count", 0),
-                        "unit": item.get("unit", "")
-                    })
-                goods_count += len(report.upakovki_xoz)
-                total_items.extend(upakovki_items)
-
-            reports_list.append({
-                "id": report.id,
-                "location": report.location,
-                "date": report.date.isoformat() if report.date else None,
-                "cashier_name": report.cashier_name,
-                "shift_type": report.shift_type,
-                "goods_count": goods_count,
-                "supplier": getattr(report, 'supplier', None),
-                "created_at": report.date.isoformat() if report.date else None,
-                "kuxnya": kuxnya_items,
-                "bar": bar_items,
-                "upakovki_xoz": upakovki_items,  # Для внутреннего имени
-                "upakovki": upakovki_items,  # Алиас для фронтенда
-                "photos_urls": report.photos_urls if getattr(report, 'photos_urls', None) is not None else [],
-                 "total_items": total_items
-            })
+        for row in result:
+            report_date = row.date.isoformat() if row.date else None
+            report_data = {
+                "id": row.id,
+                "location": row.location,
+                "date": report_date,
+                "cashier_name": row.cashier_name,
+                "shift_type": row.shift_type,
+                "goods_count": row.goods_count,
+                "photos_count": row.photos_count,
+                "supplier": None,
+                "created_at": report_date,
+            }
+
+            if with_items:
+                kuxnya_items = _goods_items(row.kuxnya)
+                bar_items = _goods_items(row.bar)
+                upakovki_items = _goods_items(row.upakovki_xoz)
+                report_data.update({
+                    "kuxnya": kuxnya_items,
+                    "bar": bar_items,
+                    "upakovki_xoz": upakovki_items,  # Для внутреннего имени
+                    "upakovki": upakovki_items,  # Алиас для фронтенда
+                    "photos_urls": row.photos_urls if row.photos_urls is not None else [],
+                    "total_items": kuxnya_items + bar_items + upakovki_items,
+                })
+
+            reports_list.append(report_data)
 
-        return {
+        return FastJSONResponse({
             "reports": reports_list,
             "total": total_count,
             "page": page,
             "per_page": per_page,
             "total_pages": (total_count + per_page - 1) // per_page
-        }
+        }, headers=cache_headers(etag))
 
     except Exception as e:
-        print(f"❌ Ошибка получения списка отчетов приема товаров: {str(e)}")
+        logger.error(f"❌ Ошибка получения списка отчетов приема товаров: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка получения списка отчетов"
@@ -553,7 +552,8 @@ async def get_receiving_reports_list(
 )
 async def get_receiving_report(
     report_id: int,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получает детальную информацию об отчете приема товаров по ID.
@@ -567,7 +567,11 @@ async def get_receiving_report(
                 detail="Отчет не найден"
             )
 
-        return {
+        etag = make_etag("report_on_goods", report.id, report.date)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
+        return FastJSONResponse({
             "id": report.id,
             "location": report.location,
             "date": report.date.isoformat() if report.date else None,
@@ -581,12 +585,12 @@ async def get_receiving_report(
              "supplier": getattr(report, 'supplier', None),
              "created_at": report.date.isoformat() if report.date else None,
              "updated_at": None
-         }
+         }, headers=cache_headers(etag))
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Ошибка получения отчета приема товаров: {str(e)}")
+        logger.error(f"❌ Ошибка получения отчета приема товаров: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка получения отчета"
@@ -617,7 +621,7 @@ async def delete_report_on_goods(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Ошибка при удалении отчета приема товара {report_id}: {e}")
+        logger.error(f"❌ Ошибка при удалении отчета приема товара {report_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка при удалении отчета"
@@ -1,50 +1,65 @@
+import logging
 from typing import Optional, List
 import json
 from datetime import datetime, date
 from decimal import InvalidOperation
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import and_, desc, select, func
 from app.schemas import ShiftReportCreate, ShiftReportResponse, IncomeEntry, ExpenseEntry
 from app.crud import ShiftReportCRUD
-from app.core import get_db
+from app.core import get_db, get_read_db, location_registry
+from app.core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
+from app.core.projections import include_items, money
+from app.core.responses import FastJSONResponse
 from app.models import ShiftReport
-
-# Коды локаций -> полные адреса
-LOCATION_MAP = {
-    'gagarina': 'Гагарина 48/1',
-    'abdulhakima': 'Абдулхакима Исмаилова 51',
-    'gaydara': 'Гайдара Гаджиева 7Б',
-}
-
-def normalize_location(loc: Optional[str]) -> Optional[str]:
-    if not loc or loc == 'all':
-        return None
-    return LOCATION_MAP.get(loc, loc)
+from app.services import FileService
+
+logger = logging.getLogger(__name__)
+file_service = FileService()
+
+# Колонки карточки в списке отчетов смены; суммы — float прямо из SQL
+LIST_COLUMNS = (
+    ShiftReport.id,
+    ShiftReport.location,
+    ShiftReport.shift_type,
+    ShiftReport.cashier_name,
+    ShiftReport.date,
+    money(ShiftReport.total_revenue),
+    money(ShiftReport.returns),
+    money(ShiftReport.acquiring),
+    money(ShiftReport.qr_code),
+    money(ShiftReport.online_app),
+    money(ShiftReport.yandex_food),
+    money(ShiftReport.yandex_food_no_system),
+    money(ShiftReport.primehill),
+    money(ShiftReport.total_acquiring),
+    money(ShiftReport.total_income),
+    money(ShiftReport.total_expenses),
+    money(ShiftReport.fact_cash),
+    money(ShiftReport.calculated_amount),
+    money(ShiftReport.surplus_shortage, "difference"),
+    ShiftReport.created_at,
+    ShiftReport.photo_path,
+    ShiftReport.receipt_photo_path,
+)
+# Детали, которые отдаются только с include=items
+DETAIL_COLUMNS = (
+    ShiftReport.income_entries,
+    ShiftReport.expense_entries,
+    ShiftReport.comments,
+)
 
 def get_photo_url(photo_path: str) -> Optional[str]:
     """Формирует корректный URL для фотографии из пути к файлу"""
     if not photo_path:
         return None
-    try:
-        # Если путь уже начинается с /, возвращаем как есть (это уже правильный URL)
-        if photo_path.startswith('/'):
-            return photo_path
-
-        # Если путь начинается с uploads/, убираем uploads/ и добавляем /uploads/
-        if photo_path.startswith('uploads/'):
-            return f"/{photo_path}"
-
-        # Если это только имя файла, добавляем полный путь
-        if '/' not in photo_path:
-            return f"/uploads/shift_reports/{photo_path}"
-
-        # В остальных случаях добавляем /uploads/ в начало
-        return f"/uploads/{photo_path}"
-    except Exception:
-        # Если не удается обработать путь, возвращаем как есть
-        return photo_path
+    # Если это только имя файла, фото лежит в shift_reports
+    if '/' not in photo_path:
+        return f"/uploads/shift_reports/{photo_path}"
+    # Остальные пути (uploads/..., ./uploads/..., /uploads/...) — URL того же вида при любом хранилище
+    return file_service.get_file_url(photo_path)
 
 
 router = APIRouter()
@@ -98,11 +113,13 @@ async def create_shift_report(
             example='[{"description": "Покупка канцтоваров", "amount": 125}]'
         ),
 
-        # Фото
-        photo: UploadFile = File(..., description="Фото кассового отчета"),
+        # Фото: файлом или id фото, загруженного заранее через /photos
+        photo: Optional[UploadFile] = File(None, description="Фото кассового отчета (если не передан photo_id)"),
+        photo_id: Optional[str] = Form(None, description="ID фото кассового отчета из /photos"),
 
         # НОВОЕ: Фото чека с магазина (НЕОБЯЗАТЕЛЬНО)
         receipt_photo: Optional[UploadFile] = File(None, description="Фото чека с магазина (необязательно)"),
+        receipt_photo_id: Optional[str] = Form(None, description="ID фото чека из /photos (необязательно)"),
 
         comments: Optional[str] = Form(default=None, description="Комментарии"),
 
@@ -118,6 +135,17 @@ async def create_shift_report(
 
     Если есть проблемы с Telegram, отчет все равно будет создан в БД.
     """
+    if bool(photo) == bool(photo_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Передайте фото кассового отчета файлом (photo) или id загруженного фото (photo_id)"
+        )
+    if receipt_photo and receipt_photo_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Передайте фото чека файлом (receipt_photo) или id загруженного фото (receipt_photo_id), не оба"
+        )
+
     try:
         # Парсим и валидируем входные данные
         income_entries = _parse_income_entries(income_entries_json)
@@ -139,7 +167,7 @@ async def create_shift_report(
                     # Если не удалось распарсить, пробуем ISO формат
                     parsed_shift_date = datetime.fromisoformat(shift_date.replace('Z', '+00:00'))
             except Exception as e:
-                print(f"⚠️ Ошибка парсинга даты смены: {shift_date}, ошибка: {e}")
+                logger.warning(f"⚠️ Ошибка парсинга даты смены: {shift_date}, ошибка: {e}")
                 # Если не удалось распарсить, используем None (будет установлена текущая дата)
 
         # Создаем объект данных
@@ -163,7 +191,9 @@ async def create_shift_report(
         )
 
         # Создаем отчет в базе данных
-        report = await shift_report_crud.create_shift_report(db, report_data, photo, receipt_photo)
+        report = await shift_report_crud.create_shift_report(
+            db, report_data, photo, receipt_photo, photo_id=photo_id, receipt_photo_id=receipt_photo_id
+        )
 
         return report
 
@@ -172,7 +202,7 @@ async def create_shift_report(
         raise
     except SQLAlchemyError as e:
         # Ошибки базы данных
-        print(f"❌ Ошибка БД при создании отчета: {str(e)}")
+        logger.error(f"❌ Ошибка БД при создании отчета: {str(e)}")
         try:
             await db.rollback()
         except:
@@ -183,7 +213,7 @@ async def create_shift_report(
         )
     except Exception as e:
         # Все остальные ошибки
-        print(f"❌ Неожиданная ошибка при создании отчета: {str(e)}")
+        logger.error(f"❌ Неожиданная ошибка при создании отчета: {str(e)}")
         try:
             await db.rollback()
         except:
@@ -289,19 +319,23 @@ def _parse_expense_entries(expense_entries_json: Optional[str]) -> List[ExpenseE
 @router.get(
     "/list",
     summary="Получить список отчетов смены",
-    description="Возвращает список отчетов смены с пагинацией и фильтрацией по дате и локации"
+    description="Возвращает список отчетов смены с пагинацией и фильтрацией по дате и локации. "
+                "Приходы, расходы и комментарий — только с include=items"
 )
 async def get_shift_reports_list(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Дата начала периода (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Дата окончания периода (YYYY-MM-DD)"),
     location: Optional[str] = Query(None, description="Фильтр по локации"),
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(10, ge=1, le=100, description="Количество элементов на странице"),
-    db: AsyncSession = Depends(get_db)
+    include: Optional[str] = Query(None, description="items — добавить приходы, расходы и комментарий"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получает список отчетов смены с пагинацией и фильтрацией.
     """
+    with_items = include_items(include)
     try:
         # Условия фильтрации
         conditions = []
@@ -315,71 +349,60 @@ async def get_shift_reports_list(
             conditions.append(ShiftReport.created_at <= end_datetime)
 
         if location:
-            norm_loc = normalize_location(location)
+            norm_loc = location_registry.normalize(location)
             if norm_loc:
                 conditions.append(ShiftReport.location == norm_loc)
 
-        # Подсчет общего количества записей
-        count_stmt = select(func.count(ShiftReport.id))
+        # Подсчет общего количества записей; этот же агрегат — версия выборки для ETag
+        count_stmt = select(func.count(ShiftReport.id), func.max(ShiftReport.id), func.max(ShiftReport.updated_at))
         if conditions:
             count_stmt = count_stmt.where(and_(*conditions))
         count_result = await db.execute(count_stmt)
-        total_count = count_result.scalar() or 0
+        total_count, max_id, last_modified = count_result.one()
+        total_count = total_count or 0
+
+        etag = make_etag("shift_reports", total_count, max_id, last_modified, request.url.query)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
 
         # Пагинация
         offset = (page - 1) * per_page
 
-        # Основной запрос
-        stmt = select(ShiftReport)
+        # Основной запрос: только колонки карточки, без загрузки сущностей
+        columns = LIST_COLUMNS + DETAIL_COLUMNS if with_items else LIST_COLUMNS
+        stmt = select(*columns)
         if conditions:
             stmt = stmt.where(and_(*conditions))
         # Сортируем по дате смены (указанной кассиром), а не по времени создания записи
         stmt = stmt.order_by(desc(ShiftReport.date)).offset(offset).limit(per_page)
 
         result = await db.execute(stmt)
-        reports = result.scalars().all()
 
         # Формируем ответ
         reports_list = []
-        for report in reports:
-            reports_list.append({
-                "id": report.id,
-                "location": report.location,
-                "shift_type": report.shift_type,
-                "cashier_name": report.cashier_name,
-                "date": report.date.isoformat() if report.date else None,
-                "total_revenue": float(report.total_revenue) if report.total_revenue else 0,
-                "returns": float(report.returns) if report.returns else 0,
-                "acquiring": float(report.acquiring) if report.acquiring else 0,
-                "qr_code": float(report.qr_code) if report.qr_code else 0,
-                "online_app": float(report.online_app) if report.online_app else 0,
-                "yandex_food": float(report.yandex_food) if report.yandex_food else 0,
-                "yandex_food_no_system": float(report.yandex_food_no_system) if report.yandex_food_no_system else 0,
-                "primehill": float(report.primehill) if report.primehill else 0,
-                "total_acquiring": float(report.total_acquiring) if report.total_acquiring else 0,
-                "total_income": float(report.total_income) if report.total_income else 0,
-                "total_expenses": float(report.total_expenses) if report.total_expenses else 0,
-                "fact_cash": float(report.fact_cash) if report.fact_cash else 0,
-                "calculated_amount": float(report.calculated_amount) if report.calculated_amount else 0,
-                "difference": float(report.surplus_shortage) if report.surplus_shortage else 0,
-                "income_entries": report.income_entries if report.income_entries else [],
-                "expense_entries": report.expense_entries if report.expense_entries else [],
-                "comments": report.comments,
-                "created_at": report.created_at.isoformat() if report.created_at else None,
-                "photo_url": get_photo_url(report.photo_path),
-                "receipt_photo_url": get_photo_url(report.receipt_photo_path) if report.receipt_photo_path else None,
-            })
-
-        return {
+        for row in result:
+            report = dict(row._mapping)
+            photo_path = report.pop("photo_path")
+            receipt_photo_path = report.pop("receipt_photo_path")
+            report["date"] = row.date.isoformat() if row.date else None
+            report["created_at"] = row.created_at.isoformat() if row.created_at else None
+            report["photo_url"] = get_photo_url(photo_path)
+            report["receipt_photo_url"] = get_photo_url(receipt_photo_path) if receipt_photo_path else None
+            if with_items:
+                report["income_entries"] = row.income_entries or []
+                report["expense_entries"] = row.expense_entries or []
+            reports_list.append(report)
+
+        return FastJSONResponse({
             "reports": reports_list,
             "total": total_count,
             "page": page,
             "per_page": per_page,
             "total_pages": (total_count + per_page - 1) // per_page
-        }
+        }, headers=cache_headers(etag, last_modified))
 
     except Exception as e:
-        print(f"❌ Ошибка получения списка отчетов смены: {str(e)}")
+        logger.error(f"❌ Ошибка получения списка отчетов смены: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка получения списка отчетов"
@@ -393,7 +416,8 @@ async def get_shift_reports_list(
 )
 async def get_shift_report(
     report_id: int,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получает детальную информацию об отчете смены по ID.
@@ -407,7 +431,11 @@ async def get_shift_report(
                 detail="Отчет не найден"
             )
 
-        return {
+        etag = make_etag("shift_report", report.id, report.status, report.updated_at)
+        if is_not_modified(request, etag, report.updated_at):
+            return not_modified(etag, report.updated_at)
+
+        return FastJSONResponse({
             "id": report.id,
             "location": report.location,
             "shift_type": report.shift_type,
@@ -434,7 +462,7 @@ async def get_shift_report(
             "receipt_photo_url": get_photo_url(report.receipt_photo_path) if report.receipt_photo_path else None,
             "created_at": report.created_at.isoformat() if report.created_at else None,
             "updated_at": report.updated_at.isoformat() if report.updated_at else None
-        }
+        }, headers=cache_headers(etag, report.updated_at))
 
         # Удаляем отчет из БД
         await shift_report_crud.remove(db, id=report_id)
@@ -445,7 +473,7 @@ async def get_shift_report(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Ошибка при удалении отчета {report_id}: {str(e)}")
+        logger.error(f"❌ Ошибка при удалении отчета {report_id}: {str(e)}")
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -482,7 +510,7 @@ async def delete_shift_report(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Ошибка при удалении отчета {report_id}: {str(e)}")
+        logger.error(f"❌ Ошибка при удалении отчета {report_id}: {str(e)}")
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,43 @@
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import get_db, location_registry
+from app.core.http_cache import cache_headers, is_not_modified, not_modified
+from app.core.responses import FastJSONResponse
+from app.crud.shift_summary import shift_summary_crud
+
+router = APIRouter()
+
+
+@router.get(
+    "/{location:path}/{shift_date}/{shift_type}",
+    summary="Сводка по смене",
+    description="""
+    Все отчеты одной смены одним запросом: кассовый отчет, инвентаризации, прием товаров,
+    списания и перемещения (в том числе в эту точку).
+
+    - **location**: код, адрес или синоним локации из `/locations`
+    - **shift_date**: дата смены (YYYY-MM-DD, по Москве)
+    - **shift_type**: `morning` или `night`
+
+    Для каждого типа — компактные записи с итогами; полный отчет — по его `id`.
+    """
+)
+async def get_shift_summary(
+    request: Request,
+    location: str = Path(..., description="Код, адрес или синоним локации"),
+    shift_date: date = Path(..., description="Дата смены"),
+    shift_type: Literal["morning", "night"] = Path(..., description="Тип смены"),
+    db: AsyncSession = Depends(get_db)
+):
+    resolved = location_registry.get(location)
+    if resolved is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Локация не найдена: {location}")
+
+    summary, etag = await shift_summary_crud.get_summary(db, resolved, shift_date, shift_type)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(summary, headers=cache_headers(etag))
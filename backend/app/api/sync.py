@@ -0,0 +1,62 @@
+import logging
+
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import UploadFile
+
+from app.core import get_db
+from app.core.config import settings
+from app.crud import SyncBatchCRUD
+from app.schemas import SyncBatchResponse, SyncManifest
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+sync_batch_crud = SyncBatchCRUD()
+
+
+@router.post(
+    "/batch",
+    response_model=SyncBatchResponse,
+    summary="Пакетная отправка отчетов",
+    description="""
+    Принимает отчеты разных типов, накопленные устройством без связи, одним multipart-запросом.
+
+    - **manifest**: JSON `{"items": [{"client_id", "type", "data", "files"}]}`, где `data` — поля схемы
+      создания отчета этого типа (для актов дополнительно `writeoff_or_transfer`), а `files` — имена
+      частей запроса с фотографиями.
+    - Остальные части — файлы с этими именами.
+
+    Отчеты, прошедшие проверку, сохраняются одной транзакцией; отклоненные возвращаются со статусом
+    `invalid` и причиной, их можно исправить и отправить повторно. Отправка в Telegram идет в фоне.
+    """,
+)
+async def sync_batch(
+        request: Request,
+        manifest: str = Form(..., description="JSON со списком отчетов"),
+        db: AsyncSession = Depends(get_db),
+):
+    try:
+        parsed = SyncManifest.model_validate_json(manifest)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Некорректный manifest: {e.errors(include_url=False)}"
+        )
+
+    if len(parsed.items) > settings.SYNC_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Не более {settings.SYNC_BATCH_MAX_ITEMS} отчетов в одном пакете"
+        )
+
+    # Форма уже разобрана FastAPI при чтении manifest, повторный вызов берет ее из кеша запроса
+    form = await request.form()
+    files = {name: value for name, value in form.multi_items() if isinstance(value, UploadFile)}
+
+    results = await sync_batch_crud.sync_batch(db, parsed.items, files)
+    return SyncBatchResponse(
+        created=sum(1 for result in results if result.status == "created"),
+        results=results
+    )
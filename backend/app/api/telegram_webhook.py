@@ -1,37 +1,36 @@
-from fastapi import APIRouter, Request, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+from fastapi import APIRouter, Request
 from app.schemas.telegram import TelegramUpdate
 from app.services import TelegramService
-from app.core import get_db
 import json
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 telegram_service = TelegramService()
 
 
 @router.post("/webhook", summary="Telegram webhook endpoint")
-async def telegram_webhook(
-        update: TelegramUpdate,
-        db: AsyncSession = Depends(get_db)
-):
+async def telegram_webhook(update: TelegramUpdate):
     """
     Обработчик веб-хуков от Telegram.
 
     Принимает обновления от Telegram API и обрабатывает команды пользователей.
+    Команды бота не обращаются к БД, поэтому сессия здесь не открывается.
     """
     try:
         # Обрабатываем сообщение
         if update.message:
-            await telegram_service.handle_message(update.message, db)
+            await telegram_service.handle_message(update.message)
 
         # Обрабатываем callback query (нажатия на inline кнопки)
         if update.callback_query:
-            await telegram_service.handle_callback_query(update.callback_query, db)
+            await telegram_service.handle_callback_query(update.callback_query)
 
         return {"ok": True}
 
     except Exception as e:
-        print(f"❌ Ошибка обработки webhook: {str(e)}")
+        logger.error(f"❌ Ошибка обработки webhook: {str(e)}")
         # Возвращаем OK чтобы Telegram не повторял запрос
         return {"ok": True}
 
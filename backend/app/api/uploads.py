@@ -0,0 +1,90 @@
+import mimetypes
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.core.config import settings
+from app.services import FileService
+
+router = APIRouter()
+file_service = FileService()
+
+# Имена файлов — UUID и никогда не перезаписываются, поэтому кэшировать можно навсегда
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _variant_widths() -> set:
+    return {int(width) for width in settings.UPLOAD_VARIANT_WIDTHS.split(",") if width.strip()}
+
+
+def _strong_etag(size: int, mtime_ns: int) -> str:
+    return f'"{size:x}-{mtime_ns:x}"'
+
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"], summary="Файл из uploads")
+async def get_upload(
+        file_path: str,
+        request: Request,
+        w: Optional[int] = Query(None, description="Ширина превью (из UPLOAD_VARIANT_WIDTHS)"),
+):
+    """
+    Отдает загруженный файл с долгим кэшированием, ETag и поддержкой Range.
+    С параметром `w` отдает уменьшенную копию изображения (создается при первом обращении).
+    """
+    key = file_service.upload_key(file_path)
+
+    if w is not None:
+        if w not in _variant_widths():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Недопустимая ширина. Разрешены: {settings.UPLOAD_VARIANT_WIDTHS}"
+            )
+        key = await file_service.get_image_variant(key, w)
+
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    if_none_match = request.headers.get("if-none-match")
+
+    path = file_service.storage.local_path(key)
+    if path is None:
+        return await _stream_object(key, request, if_none_match, media_type)
+
+    stat_result = path.stat()
+    etag = _strong_etag(stat_result.st_size, stat_result.st_mtime_ns)
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.UPLOADS_ACCEL_REDIRECT_PREFIX:
+        # Тело отдает nginx через sendfile, воркер Python файл не читает
+        headers["X-Accel-Redirect"] = settings.UPLOADS_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(key)
+        return Response(headers=headers, media_type=media_type)
+
+    return FileResponse(path, headers=headers, media_type=media_type, stat_result=stat_result)
+
+
+async def _stream_object(key: str, request: Request, if_none_match: Optional[str], media_type: str) -> Response:
+    """
+    Отдача из объектного хранилища: Range и If-None-Match уходят в хранилище,
+    тело передается клиенту частями, не собираясь в памяти.
+    """
+    stored = await file_service.storage.open(key, request.headers.get("range"), if_none_match)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл не найден")
+
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": stored.etag}
+    if stored.not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Length"] = str(stored.size)
+    status_code = status.HTTP_200_OK
+    if stored.content_range:
+        headers["Content-Range"] = stored.content_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+
+    return StreamingResponse(
+        stored.body, status_code=status_code, headers=headers, media_type=stored.content_type or media_type
+    )
@@ -1,26 +1,20 @@
+import logging
 from datetime import date, datetime, time
 from zoneinfo import ZoneInfo
-from fastapi import APIRouter, status, Form, Depends, HTTPException, Query
+from fastapi import APIRouter, status, Form, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, or_, desc, select, func
 from app.crud import WriteoffTransferCRUD
 from app.schemas import WriteoffTransferCreate, WriteoffTransferResponse, WriteoffEntry, TransferEntry
 from typing import Optional, List
 import json
-from app.core import get_db, LOCATIONS
+from app.core import get_db, get_read_db, location_registry
+from app.core.http_cache import cache_headers, is_not_modified, make_etag, not_modified
+from app.core.projections import include_items, json_length
+from app.core.responses import FastJSONResponse
 from app.models import WriteoffTransfer
 
-# Коды локаций -> полные адреса
-LOCATION_MAP = {
-    'gagarina': 'Гагарина 48/1',
-    'abdulhakima': 'Абдулхакима Исмаилова 51',
-    'gaydara': 'Гайдара Гаджиева 7Б',
-}
-
-def normalize_location(loc: Optional[str]) -> Optional[str]:
-    if not loc or loc == 'all':
-        return None
-    return LOCATION_MAP.get(loc, loc)
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 writeoff_transfer_crud = WriteoffTransferCRUD()
@@ -237,12 +231,41 @@ async def create_writeoff_transfer(
         )
 
 
+# Колонки карточки в списках актов; число списаний считается в SQL
+LIST_COLUMNS = (
+    WriteoffTransfer.id,
+    WriteoffTransfer.location,
+    WriteoffTransfer.location_to,
+    WriteoffTransfer.cashier_name,
+    WriteoffTransfer.shift_type,
+    WriteoffTransfer.date,
+    WriteoffTransfer.created_date,
+    json_length(WriteoffTransfer.writeoffs, "writeoffs_count"),
+)
+
+
+def _report_card(row, report_type: Optional[str], items_count: int) -> dict:
+    return {
+        "id": row.id,
+        "location": row.location,
+        "cashier_name": row.cashier_name,
+        "shift_type": row.shift_type,
+        "type": report_type,
+        # Отправляем дату отчёта (указанную пользователем), а не время создания записи
+        "date": row.date.isoformat() if row.date else None,
+        "created_at": row.created_date.isoformat() if row.created_date else None,
+        "items_count": items_count,
+    }
+
+
 @router.get(
     "/list",
     summary="Получить список отчетов списания/перемещения",
-    description="Возвращает список отчетов списания и перемещения с пагинацией и фильтрацией по дате, локации и типу"
+    description="Возвращает список отчетов списания и перемещения с пагинацией и фильтрацией по дате, локации и типу. "
+                "Позиции — только с include=items"
 )
 async def get_writeoff_transfer_reports_list(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Дата начала периода (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Дата окончания периода (YYYY-MM-DD)"),
     location: Optional[str] = Query(None, description="Фильтр по локации (код или полный адрес)"),
@@ -251,11 +274,13 @@ async def get_writeoff_transfer_reports_list(
     type: Optional[str] = Query(None, description="Тип отчета: writeoff или transfer"),
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(10, ge=1, le=100, description="Количество элементов на странице"),
-    db: AsyncSession = Depends(get_db)
+    include: Optional[str] = Query(None, description="items — добавить позиции списаний и перемещений"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получает список отчетов списания/перемещения с пагинацией и фильтрацией.
     """
+    with_items = include_items(include)
     try:
         # Условия фильтрации
         conditions = []
@@ -270,18 +295,18 @@ async def get_writeoff_transfer_reports_list(
 
         # Фильтр по любой из локаций (если передан общий параметр)
         if location:
-            norm = normalize_location(location)
+            norm = location_registry.normalize(location)
             if norm:
                 conditions.append(or_(WriteoffTransfer.location == norm, WriteoffTransfer.location_to == norm))
 
         # Отдельные фильтры по source/destination
         if location_from:
-            norm_from = normalize_location(location_from)
+            norm_from = location_registry.normalize(location_from)
             if norm_from:
                 conditions.append(WriteoffTransfer.location == norm_from)
 
         if location_to:
-            norm_to = normalize_location(location_to)
+            norm_to = location_registry.normalize(location_to)
             if norm_to:
                 conditions.append(WriteoffTransfer.location_to == norm_to)
 
@@ -297,63 +322,57 @@ async def get_writeoff_transfer_reports_list(
             conditions.append(WriteoffTransfer.location_to.isnot(None))
 
 
-        # Подсчет общего количества записей
-        count_stmt = select(func.count(WriteoffTransfer.id))
+        # Подсчет общего количества записей; акты не меняются, поэтому версия выборки — count и max(id)
+        count_stmt = select(func.count(WriteoffTransfer.id), func.max(WriteoffTransfer.id))
         if conditions:
             count_stmt = count_stmt.where(and_(*conditions))
         count_result = await db.execute(count_stmt)
-        total_count = count_result.scalar() or 0
+        total_count, max_id = count_result.one()
+        total_count = total_count or 0
+
+        etag = make_etag("writeoff_transfer", total_count, max_id, request.url.query)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
 
         # Пагинация
         offset = (page - 1) * per_page
 
-        # Основной запрос
-        stmt = select(WriteoffTransfer)
+        # Основной запрос: колонки карточки и число позиций; JSON с позициями — только с include=items
+        columns = [*LIST_COLUMNS, json_length(WriteoffTransfer.transfers, "transfers_count")]
+        if with_items:
+            columns += [WriteoffTransfer.writeoffs, WriteoffTransfer.transfers]
+        stmt = select(*columns)
         if conditions:
             stmt = stmt.where(and_(*conditions))
         stmt = stmt.order_by(desc(WriteoffTransfer.created_date)).offset(offset).limit(per_page)
 
         result = await db.execute(stmt)
-        reports = result.scalars().all()
 
         # Формируем ответ
         reports_list = []
-        for report in reports:
+        for row in result:
             report_type = None
-            writeoffs_items = []
-            transfers_items = []
 
-            # Обрабатываем списания
-            if report.writeoffs and len(report.writeoffs) > 0:
+            # Списания
+            if row.writeoffs_count > 0:
                 report_type = "writeoff"
-                writeoffs_items = report.writeoffs
 
-            # Обрабатываем перемещения
-            if report.transfers and len(report.transfers) > 0:
+            # Перемещения
+            if row.transfers_count > 0:
                 if report_type:
                     report_type = "mixed"
                 else:
                     report_type = "transfer"
-                transfers_items = report.transfers
 
             # Формируем базовые данные отчета
-            report_data = {
-                "id": report.id,
-                "location": report.location,
-                "cashier_name": report.cashier_name,
-                "shift_type": report.shift_type,
-                "type": report_type,
-                # Отправляем дату отчёта (указанную пользователем), а не время создания записи
-                "date": report.date.isoformat() if report.date else None,
-                "created_at": report.created_date.isoformat() if report.created_date else None,
-                "writeoffs": writeoffs_items,
-                "transfers": transfers_items,
-                "items_count": len(writeoffs_items) + len(transfers_items)
-            }
+            report_data = _report_card(row, report_type, row.writeoffs_count + row.transfers_count)
+            if with_items:
+                report_data["writeoffs"] = row.writeoffs if row.writeoffs_count else []
+                report_data["transfers"] = row.transfers if row.transfers_count else []
 
             # Для transfers обязательно добавляем location_to
-            if report_type in ["transfer", "mixed"] and report.location_to:
-                report_data["location_to"] = report.location_to
+            if report_type in ["transfer", "mixed"] and row.location_to:
+                report_data["location_to"] = row.location_to
 
             # Для writeoffs location_to не нужно (или null)
             if report_type == "writeoff":
@@ -361,16 +380,16 @@ async def get_writeoff_transfer_reports_list(
 
             reports_list.append(report_data)
 
-        return {
+        return FastJSONResponse({
             "reports": reports_list,
             "total": total_count,
             "page": page,
             "per_page": per_page,
             "total_pages": (total_count + per_page - 1) // per_page
-        }
+        }, headers=cache_headers(etag))
 
     except Exception as e:
-        print(f"❌ Ошибка получения списка отчетов списания/перемещения: {str(e)}")
+        logger.error(f"❌ Ошибка получения списка отчетов списания/перемещения: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка получения списка отчетов"
@@ -383,17 +402,20 @@ async def get_writeoff_transfer_reports_list(
     description="Возвращает список списаний за указанный период времени (с учётом часов и минут)"
 )
 async def get_writeoffs_by_period(
+    request: Request,
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(50, ge=1, le=100, description="Количество элементов на странице"),
     start_datetime: Optional[str] = Query(None, description="Дата и время начала периода (ISO формат: YYYY-MM-DDTHH:MM)"),
     end_datetime: Optional[str] = Query(None, description="Дата и время окончания периода (ISO формат: YYYY-MM-DDTHH:MM)"),
     location: Optional[str] = Query(None, description="Фильтр по локации (код или полный адрес)"),
-    db: AsyncSession = Depends(get_db)
+    include: Optional[str] = Query(None, description="items — добавить позиции списаний"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получает список списаний за указанный период времени с учётом часов и минут.
     Показывает только списания (type=writeoff), исключая перемещения.
     """
+    with_items = include_items(include)
     try:
         conditions = []
 
@@ -432,53 +454,50 @@ async def get_writeoffs_by_period(
 
         # Фильтр по локации
         if location:
-            norm = normalize_location(location)
+            norm = location_registry.normalize(location)
             if norm:
                 conditions.append(WriteoffTransfer.location == norm)
 
-        # Подсчет общего количества записей
-        count_stmt = select(func.count(WriteoffTransfer.id))
+        # Подсчет общего количества записей; акты не меняются, поэтому версия выборки — count и max(id)
+        count_stmt = select(func.count(WriteoffTransfer.id), func.max(WriteoffTransfer.id))
         if conditions:
             count_stmt = count_stmt.where(and_(*conditions))
         count_result = await db.execute(count_stmt)
-        total_count = count_result.scalar() or 0
+        total_count, max_id = count_result.one()
+        total_count = total_count or 0
+
+        etag = make_etag("writeoff_period", total_count, max_id, request.url.query)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
 
         # Пагинация
         offset = (page - 1) * per_page
 
         # Основной запрос - сортируем по дате отчёта (указанной пользователем)
-        stmt = select(WriteoffTransfer)
+        columns = list(LIST_COLUMNS)
+        if with_items:
+            columns.append(WriteoffTransfer.writeoffs)
+        stmt = select(*columns)
         if conditions:
             stmt = stmt.where(and_(*conditions))
         stmt = stmt.order_by(desc(WriteoffTransfer.date)).offset(offset).limit(per_page)
 
         result = await db.execute(stmt)
-        reports = result.scalars().all()
 
         # Формируем ответ
         reports_list = []
-        for report in reports:
-            writeoffs_items = report.writeoffs if report.writeoffs else []
-
-            report_data = {
-                "id": report.id,
-                "location": report.location,
-                "cashier_name": report.cashier_name,
-                "shift_type": report.shift_type,
-                "type": "writeoff",
-                "date": report.date.isoformat() if report.date else None,
-                "created_at": report.created_date.isoformat() if report.created_date else None,
-                "writeoffs": writeoffs_items,
-                "items_count": len(writeoffs_items)
-            }
+        for row in result:
+            report_data = _report_card(row, "writeoff", row.writeoffs_count)
+            if with_items:
+                report_data["writeoffs"] = row.writeoffs or []
 
             # Добавляем location_to если есть (для совместимости)
-            if report.location_to:
-                report_data["location_to"] = report.location_to
+            if row.location_to:
+                report_data["location_to"] = row.location_to
 
             reports_list.append(report_data)
 
-        return {
+        return FastJSONResponse({
             "reports": reports_list,
             "total": total_count,
             "page": page,
@@ -488,12 +507,12 @@ async def get_writeoffs_by_period(
                 "start": start_datetime,
                 "end": end_datetime
             }
-        }
+        }, headers=cache_headers(etag))
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Ошибка получения списаний за период: {str(e)}")
+        logger.error(f"❌ Ошибка получения списаний за период: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка получения списаний за период"
@@ -507,7 +526,8 @@ async def get_writeoffs_by_period(
 )
 async def get_writeoff_transfer_report(
     report_id: int,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Получает детальную информацию об отчете списания/перемещения по ID.
@@ -521,6 +541,10 @@ async def get_writeoff_transfer_report(
                 detail="Отчет не найден"
             )
 
+        etag = make_etag("writeoff_transfer", report.id, report.created_date)
+        if is_not_modified(request, etag, report.created_date):
+            return not_modified(etag, report.created_date)
+
         # Определяем тип отчета
         report_type = None
         if report.writeoffs and len(report.writeoffs) > 0:
@@ -531,7 +555,7 @@ async def get_writeoff_transfer_report(
             else:
                 report_type = "transfer"
 
-        return {
+        return FastJSONResponse({
             "id": report.id,
             "location": report.location,
             "location_to": report.location_to,
@@ -540,16 +564,15 @@ async def get_writeoff_transfer_report(
             "type": report_type,
             "writeoffs": report.writeoffs if report.writeoffs else [],
             "transfers": report.transfers if report.transfers else [],
-            "report_date": report.report_date.isoformat() if report.report_date else None,
-            "report_time": report.report_time.isoformat() if report.report_time else None,
+            "date": report.date.isoformat() if report.date else None,
             "created_at": report.created_date.isoformat() if report.created_date else None,
             "updated_at": None
-        }
+        }, headers=cache_headers(etag, report.created_date))
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Ошибка получения отчета списания/перемещения: {str(e)}")
+        logger.error(f"❌ Ошибка получения отчета списания/перемещения: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка получения отчета"
@@ -593,7 +616,7 @@ async def delete_writeoff_transfer_report(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Ошибка при удалении отчета списания/перемещения {report_id}: {str(e)}")
+        logger.error(f"❌ Ошибка при удалении отчета списания/перемещения {report_id}: {str(e)}")
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -15,20 +15,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.database import DatabaseHelper
+from app.core.logging_config import setup_logging
 from app.models import ShiftReport, ReportOnGoods
 from app.models.daily_inventory import DailyInventory
 from app.models.daily_inventory_v2 import DailyInventoryV2
 from app.models.writeoff_transfer import WriteOffReport, TransferReport
 
 # Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('cleanup.log'),
-        logging.StreamHandler()
-    ]
-)
+setup_logging(logging.FileHandler('cleanup.log'))
 logger = logging.getLogger(__name__)
 
 # Инициализация базы данных
@@ -39,6 +33,9 @@ db_helper = DatabaseHelper(
     echo_pool=settings.DB_ECHO_POOL,
     max_overflow=settings.DB_MAX_OVERFLOW,
     pool_size=settings.DB_POOL_SIZE,
+    name="cleanup",
+    pool_mode=settings.DB_POOL_MODE,
+    pool_recycle=settings.DB_POOL_RECYCLE,
 )
 
 
@@ -108,38 +105,15 @@ async def cleanup_old_records() -> None:
 
 async def cleanup_old_files() -> None:
     """
-    Удаляет старые файлы из директории uploads.
+    Удаляет старые файлы из хранилища uploads (диск или S3).
     """
-    import os
-    import glob
-    from pathlib import Path
-    
+    from app.services.storage import file_storage
+
     logger.info("Начинаем очистку старых файлов")
-    
-    cutoff_timestamp = (datetime.now() - timedelta(days=90)).timestamp()
-    uploads_dir = Path("uploads")
-    
-    if not uploads_dir.exists():
-        logger.warning("Директория uploads не найдена")
-        return
-    
-    total_deleted_files = 0
-    
-    # Перебираем все поддиректории в uploads
-    for subdir in uploads_dir.iterdir():
-        if subdir.is_dir():
-            # Ищем все файлы в поддиректории
-            for file_path in subdir.glob("*"):
-                if file_path.is_file():
-                    try:
-                        # Проверяем дату модификации файла
-                        if file_path.stat().st_mtime < cutoff_timestamp:
-                            file_path.unlink()  # Удаляем файл
-                            logger.info(f"Удален файл: {file_path}")
-                            total_deleted_files += 1
-                    except Exception as e:
-                        logger.error(f"Ошибка при удалении файла {file_path}: {str(e)}")
-    
+
+    cutoff = datetime.now() - timedelta(days=90)
+    total_deleted_files = await file_storage.delete_older_than(cutoff)
+
     logger.info(f"Очистка файлов завершена. Удалено файлов: {total_deleted_files}")
 
 
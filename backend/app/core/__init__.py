@@ -1,4 +1,4 @@
-from .database import db_helper, get_db
-from .constants import LOCATIONS
+from .database import db_helper, get_db, get_read_db, release_connection
+from .locations import location_registry
 
-__all__ = ["db_helper", "get_db", "LOCATIONS"]
\ No newline at end of file
+__all__ = ["db_helper", "get_db", "get_read_db", "location_registry", "release_connection"]
@@ -0,0 +1,106 @@
+"""
+Реестр фоновых задач (отправка отчетов в Telegram после ответа клиенту).
+
+Голый asyncio.create_task держит задачу только слабой ссылкой цикла —
+задачу без ссылки сборщик мусора может удалить на полпути. Здесь каждая
+задача хранится в множестве до завершения, число одновременно работающих
+ограничено семафором (остальные ждут слота, не занимая соединения пула),
+а у каждой задачи есть предельное время выполнения.
+
+При остановке lifespan вызывает drain(): новые задачи еще принимаются
+(их могут создать последние запросы), текущие дорабатывают до дедлайна,
+оставшиеся отменяются — и только потом закрывается пул БД. Пока идет
+остановка, is_draining=True: код с повторными попытками должен отказаться
+от медленных повторов и вернуть управление.
+"""
+import asyncio
+import logging
+import time
+from typing import Coroutine, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import BACKGROUND_TASKS_ABANDONED, BACKGROUND_TASKS_WAITING
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTaskManager:
+    def __init__(self, max_concurrency: int, task_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.task_timeout = task_timeout
+        self._tasks: Set[asyncio.Task] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._draining = False
+
+    @property
+    def is_draining(self) -> bool:
+        return self._draining
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def spawn(self, kind: str, coro: Coroutine, timeout: Optional[float] = None) -> asyncio.Task:
+        """Запускает корутину в фоне; ссылка на задачу хранится до ее завершения"""
+        task = asyncio.create_task(self._run(kind, coro, timeout or self.task_timeout), name=f"background:{kind}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, kind: str, coro: Coroutine, timeout: float) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        BACKGROUND_TASKS_WAITING.labels(kind).inc()
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            coro.close()
+            BACKGROUND_TASKS_ABANDONED.labels(kind, "shutdown").inc()
+            raise
+        finally:
+            BACKGROUND_TASKS_WAITING.labels(kind).dec()
+
+        try:
+            await asyncio.wait_for(coro, timeout=timeout)
+        except asyncio.TimeoutError:
+            BACKGROUND_TASKS_ABANDONED.labels(kind, "timeout").inc()
+            logger.warning(f"⏰ Фоновая задача {kind} прервана по таймауту {timeout} сек")
+        except asyncio.CancelledError:
+            BACKGROUND_TASKS_ABANDONED.labels(kind, "shutdown").inc()
+            raise
+        except Exception:
+            # Задачи сами логируют свои ошибки; сюда доходят только непредвиденные
+            logger.exception(f"❌ Необработанная ошибка фоновой задачи {kind}")
+        finally:
+            self._semaphore.release()
+
+    async def drain(self, timeout: float) -> None:
+        """Ждет завершения фоновых задач до дедлайна, оставшиеся отменяет"""
+        self._draining = True
+        if not self._tasks:
+            return
+
+        logger.info(f"⏳ Ожидаем завершения фоновых задач: {len(self._tasks)} (до {timeout} сек)")
+        deadline = time.monotonic() + timeout
+        # Задачи, созданные во время ожидания, тоже дожидаемся
+        while self._tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+
+        pending = set(self._tasks)
+        if pending:
+            logger.warning(f"⚠️  Отменяем фоновые задачи, не успевшие завершиться: {len(pending)}")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        else:
+            logger.info("✅ Фоновые задачи завершены")
+
+
+background_tasks = BackgroundTaskManager(
+    max_concurrency=settings.BACKGROUND_MAX_CONCURRENCY,
+    task_timeout=settings.BACKGROUND_TASK_TIMEOUT,
+)
@@ -0,0 +1,107 @@
+"""
+Кеш справочника товаров инвентаризации в памяти процесса.
+
+Справочник маленький и меняется редко, а читается на каждой инвентаризации
+(проверка id), на каждом просмотре и отправке в Telegram (названия и единицы)
+и при каждом открытии формы. Снимок загружается целиком одним запросом и
+живет до инвалидации. InventoryItemCRUD после изменения товара сбрасывает
+свой кеш и в той же транзакции делает pg_notify, остальные воркеры получают
+уведомление через pg_listener и сбрасывают свои. TTL страхует на случай, когда
+соединение LISTEN потеряно и уведомление не дошло.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pg_notify import notify, pg_listener
+from app.models.inventory_item import InventoryItem
+from app.schemas.inventory_item import InventoryItemResponse
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "inventory_catalog"
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Неизменяемый снимок справочника: товары по id и версия содержимого"""
+    items: Dict[int, InventoryItemResponse]
+    version: str
+    last_modified: Optional[datetime]
+    loaded_at: float
+
+    def active_ids(self) -> set:
+        return {item_id for item_id, item in self.items.items() if item.is_active}
+
+    def sorted_items(self, is_active: Optional[bool] = None) -> List[InventoryItemResponse]:
+        items = [item for item in self.items.values() if is_active is None or item.is_active == is_active]
+        return sorted(items, key=lambda item: item.name)
+
+
+def _content_version(items: List[InventoryItemResponse]) -> str:
+    """Версия по содержимому: одинакова во всех воркерах при одинаковых данных"""
+    raw = ";".join(f"{item.id}:{item.updated_at.isoformat()}:{int(item.is_active)}" for item in items)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+class InventoryCatalogCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: Optional[CatalogSnapshot] = None
+        # Номер поколения растет при каждой инвалидации: загрузка, начатая
+        # до сброса, не должна положить в кеш устаревший снимок
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        """Текущий снимок; при отсутствии или истечении TTL загружается через переданную сессию"""
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+
+            generation = self._generation
+            result = await db.execute(select(InventoryItem).order_by(InventoryItem.id))
+            items = [InventoryItemResponse.model_validate(item) for item in result.scalars().all()]
+            snapshot = CatalogSnapshot(
+                items={item.id: item for item in items},
+                version=_content_version(items),
+                last_modified=max((item.updated_at for item in items), default=None),
+                loaded_at=time.monotonic(),
+            )
+            if generation == self._generation:
+                self._snapshot = snapshot
+            logger.debug("Справочник товаров загружен: %s позиций, версия %s", len(items), snapshot.version)
+            return snapshot
+
+    @staticmethod
+    async def notify(db: AsyncSession, item_id: int) -> None:
+        """Уведомление остальным воркерам; уйдет только вместе с коммитом"""
+        await notify(db, NOTIFY_CHANNEL, str(item_id))
+
+    def _on_notification(self, payload: str) -> None:
+        logger.debug("Справочник товаров изменен (товар %s), сбрасываем кеш", payload)
+        self.invalidate()
+
+
+catalog_cache = InventoryCatalogCache(ttl=settings.CATALOG_CACHE_TTL)
+pg_listener.subscribe(NOTIFY_CHANNEL, catalog_cache._on_notification, on_reconnect=catalog_cache.invalidate)
@@ -0,0 +1,89 @@
+"""
+Предохранитель (circuit breaker) для внешних вызовов.
+
+closed — вызовы идут как обычно, подряд идущие сбои считаются.
+open — после failure_threshold сбоев подряд вызовы сразу отклоняются,
+не дожидаясь сетевого таймаута.
+half_open — через reset_timeout секунд пропускается один пробный вызов:
+успех замыкает цепь, сбой снова размыкает ее на reset_timeout.
+
+Состояние свое в каждом воркере: воркер сам видит, доступен ли сервис.
+"""
+import logging
+import time
+from typing import Callable, List
+
+from app.core.metrics import CIRCUIT_BREAKER_REJECTED, CIRCUIT_BREAKER_STATE
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Значения gauge состояния
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._on_close: List[Callable[[], None]] = []
+        CIRCUIT_BREAKER_STATE.labels(name).set(_STATE_VALUES[CLOSED])
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def on_close(self, callback: Callable[[], None]) -> None:
+        """Колбэк на восстановление: цепь снова замкнулась после сбоев"""
+        self._on_close.append(callback)
+
+    def available(self) -> bool:
+        """Пропустит ли предохранитель вызов сейчас (не занимая пробный слот)"""
+        if self._state == CLOSED:
+            return True
+        if self._state == OPEN:
+            return time.monotonic() - self._opened_at >= self.reset_timeout
+        return False
+
+    def allow_request(self) -> bool:
+        """Разрешение на вызов; в open по истечении паузы пропускает один пробный"""
+        if self._state == CLOSED:
+            return True
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+            logger.info(f"🔌 {self.name}: пробный запрос после паузы {self.reset_timeout} сек")
+            return True
+        CIRCUIT_BREAKER_REJECTED.labels(self.name).inc()
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._state != CLOSED:
+            self._set_state(CLOSED)
+            logger.info(f"✅ {self.name}: сервис снова доступен")
+            for callback in self._on_close:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"❌ {self.name}: ошибка обработчика восстановления: {str(e)}")
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+            logger.warning(
+                f"⚠️  {self.name}: сервис недоступен ({self._failures} сбоев подряд), "
+                f"вызовы отклоняются {self.reset_timeout} сек"
+            )
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_BREAKER_STATE.labels(self.name).set(_STATE_VALUES[state])
@@ -0,0 +1,191 @@
+"""
+Сжатие ответов с учетом типа содержимого.
+
+Сжимаются только текстовые типы (JSON, HTML, текст, метрики), и только если
+тело больше порога для своего типа. Картинки из /uploads и прочие уже
+сжатые форматы отдаются как есть. Brotli используется, если установлен пакет
+brotli и клиент его принимает, иначе gzip.
+"""
+import gzip
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен
+    brotli = None
+
+# Пороги по типу содержимого: мелкие ответы дешевле отдать без сжатия
+MIN_SIZE_BY_TYPE: Dict[str, int] = {
+    "application/json": settings.COMPRESSION_MIN_SIZE,
+    "text/html": settings.COMPRESSION_MIN_SIZE,
+    "text/plain": settings.COMPRESSION_MIN_SIZE,
+    "text/css": settings.COMPRESSION_MIN_SIZE,
+    "application/javascript": settings.COMPRESSION_MIN_SIZE,
+    # /metrics и /openapi.json большие и хорошо жмутся
+    "application/openmetrics-text": 512,
+}
+
+# Пути, ответы которых никогда не сжимаются (статика с фото)
+SKIP_PATH_PREFIXES: Tuple[str, ...] = ("/uploads",)
+
+
+def _media_type(headers: List[Tuple[bytes, bytes]]) -> str:
+    for name, value in headers:
+        if name.lower() == b"content-type":
+            return value.decode("latin-1").split(";", 1)[0].strip().lower()
+    return ""
+
+
+def _min_size(media_type: str) -> Optional[int]:
+    """Порог для типа или None, если тип не сжимается"""
+    if media_type in MIN_SIZE_BY_TYPE:
+        return MIN_SIZE_BY_TYPE[media_type]
+    if media_type.startswith("text/") and media_type != "text/event-stream":
+        return settings.COMPRESSION_MIN_SIZE
+    if media_type.endswith("+json"):
+        return settings.COMPRESSION_MIN_SIZE
+    return None
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Кодировка по Accept-Encoding: br, если доступен, иначе gzip; q=0 означает отказ"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        params = params.strip().replace(" ", "")
+        quality = 1.0
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                pass
+        if name and quality > 0:
+            accepted.add(name)
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Потоковый компрессор с одинаковым интерфейсом для gzip и brotli"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31: gzip-заголовок и контрольная сумма
+            self._obj = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI middleware сжатия ответов gzip/brotli"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(SKIP_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send, encoding: str):
+        self._send = send
+        self.encoding = encoding
+        self.start_message: Optional[dict] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = message.get("headers", [])
+            min_size = _min_size(_media_type(headers))
+            already_encoded = any(name.lower() == b"content-encoding" for name, _ in headers)
+            if min_size is None or already_encoded or message["status"] in (204, 304):
+                self.passthrough = True
+                await self._send(message)
+                return
+            self.min_size = min_size
+            # Заголовки отправляем вместе с первым куском тела, когда станет ясно, сжимаем ли
+            self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and self.start_message is not None:
+            if not more_body:
+                # Все тело целиком: сжимаем только если оно больше порога
+                if len(body) >= self.min_size:
+                    body = compress_body(body, self.encoding)
+                    self._set_headers(len(body))
+                await self._send(self.start_message)
+                self.start_message = None
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            # Потоковый ответ: длина заранее неизвестна, сжимаем кусками
+            self.compressor = _Compressor(self.encoding)
+            self._set_headers(None)
+            await self._send(self.start_message)
+            self.start_message = None
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.flush()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _set_headers(self, length: Optional[int]) -> None:
+        headers = [
+            (name, value) for name, value in self.start_message.get("headers", [])
+            if name.lower() != b"content-length"
+        ]
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        self.start_message["headers"] = headers
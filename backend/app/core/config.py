@@ -12,10 +12,33 @@ class Settings(BaseSettings):
     DB_ECHO_POOL: bool = False
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_SIZE: int = 10
+    # direct — напрямую в Postgres; pgbouncer — через PgBouncer в режиме transaction:
+    # без кеша подготовленных выражений, с pre_ping и пересозданием соединений раз в DB_POOL_RECYCLE сек
+    DB_POOL_MODE: str = 'direct'
+    DB_POOL_RECYCLE: int = 1800
+    # Адрес Postgres в обход PgBouncer для LISTEN (в режиме transaction подписка не работает); пусто — DB_HOST/DB_PORT
+    DB_DIRECT_HOST: str = ''
+    DB_DIRECT_PORT: int = 0
+    # Профилировщик SQL (переключается через /admin/db-profiler без рестарта)
+    DB_PROFILER_ENABLED: bool = False
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
+    # Реплика для тяжелых чтений (списки, статистика, просмотр отчета); пустой URL — все на primary.
+    # При отставании больше DB_REPLICA_MAX_LAG сек или недоступности чтение уходит на primary
+    DB_REPLICA_URL: str = ""
+    DB_REPLICA_MAX_LAG: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL: int = 5
 
     # Telegram настройки
     TELEGRAM_BOT_TOKEN: str = ""
     TELEGRAM_CHAT_ID: str = ""
+    # Базовый URL Bot API (переопределяется для нагрузочных тестов с заглушкой)
+    TELEGRAM_API_URL: str = "https://api.telegram.org"
+    # Предохранитель Telegram: сбоев подряд до размыкания, пауза до пробного запроса (сек)
+    # и сколько отправок держать в очереди до восстановления связи
+    TELEGRAM_BREAKER_FAILURES: int = 5
+    TELEGRAM_BREAKER_RESET_TIMEOUT: int = 30
+    TELEGRAM_RETRY_QUEUE_SIZE: int = 500
 
     # ID тем (подгрупп) в Telegram чате
     KASSA_GAGARINA_48_TOPIC_ID: int = 0
@@ -28,9 +51,74 @@ class Settings(BaseSettings):
 
     PEREMESHENIYA: int = 468
 
+    # JSON-файл реестра локаций (см. app/core/locations.py); пустой — три кафе с темами из *_TOPIC_ID выше
+    LOCATIONS_FILE: str = ""
+
     # URL мини-приложения
     MINI_APP_URL: str = "https://your-domain.com/mini-app"
 
+    # Логирование
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json или text
+    # Уровни по модулям: "app.crud=DEBUG,aiohttp=WARNING"
+    LOG_LEVELS: str = ""
+    # Доля записей логгера app.payload (сырые данные форм), которая попадает в вывод
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01
+
+    # Сжатие ответов (gzip, brotli при установленном пакете brotli)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Раздача /uploads: ширины превью для ?w= и префикс internal-location nginx для X-Accel-Redirect
+    # (пустой — файл отдает сам FastAPI)
+    UPLOAD_VARIANT_WIDTHS: str = "160,320,640,1280"
+    UPLOADS_ACCEL_REDIRECT_PREFIX: str = ""
+
+    # Хранилище загрузок: local — папка UPLOAD_DIR, s3 — S3-совместимый бакет (нужен extra s3 с aioboto3).
+    # URL файлов в обоих случаях /uploads/<ключ>
+    STORAGE_BACKEND: str = "local"
+    UPLOAD_DIR: str = "./uploads"
+    S3_ENDPOINT_URL: str = ""  # пустой — AWS; для MinIO http://minio:9000
+    S3_BUCKET: str = "reportbot-uploads"
+    S3_REGION: str = ""
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    S3_PREFIX: str = ""
+    # Размер части multipart-загрузки (не меньше 5 МБ) и сколько частей грузить параллельно
+    S3_PART_SIZE_MB: int = 8
+    S3_MAX_CONCURRENCY: int = 4
+
+    # Предварительная загрузка фото (/photos): предел размера (МБ), размер части при загрузке
+    # частями (КБ) и через сколько часов удаляются фото, так и не прикрепленные к отчету
+    PHOTO_UPLOAD_MAX_MB: int = 20
+    PHOTO_UPLOAD_CHUNK_KB: int = 512
+    PHOTO_UPLOAD_TTL_HOURS: int = 24
+
+    # Кеш справочника товаров: сбрасывается по LISTEN/NOTIFY, TTL (сек) — страховка при потере уведомлений
+    CATALOG_CACHE_TTL: int = 300
+
+    # Кеш сводки смены /shifts (сек); сбрасывается событиями отчетов
+    SHIFT_SUMMARY_CACHE_TTL: int = 30
+
+    # Максимум отчетов в одном запросе /sync/batch
+    SYNC_BATCH_MAX_ITEMS: int = 50
+
+    # Idempotency-Key: сколько часов хранится ответ и через сколько секунд
+    # незавершенный запрос считается брошенным и ключ можно захватить снова
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LOCK_TIMEOUT: int = 120
+
+    # Фоновые задачи (отправка в Telegram): одновременно работающих, предел одной задачи (сек)
+    # и сколько секунд при остановке дожидаться незавершенных
+    BACKGROUND_MAX_CONCURRENCY: int = 20
+    BACKGROUND_TASK_TIMEOUT: int = 120
+    BACKGROUND_DRAIN_TIMEOUT: int = 25
+
+    # Токен для /admin эндпоинтов (заголовок X-Admin-Token); пустой — эндпоинты отключены
+    ADMIN_TOKEN: str = ""
+
     # Веб-хук настройки
     WEBHOOK_URL: str = ""  # Будет установлен автоматически
     WEBHOOK_SECRET_TOKEN: str = ""  # Опционально для безопасности
@@ -1,6 +0,0 @@
-# Определения локаций
-LOCATIONS = [
-    "Гагарина 48/1",
-    "Абдулхакима Исмаилова 51",
-    "Гайдара Гаджиева 7Б",
-]
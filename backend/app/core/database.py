@@ -1,12 +1,151 @@
-from typing import AsyncGenerator
+import asyncio
+import logging
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
+from uuid import uuid4
+
+import orjson
+from sqlalchemy import Select, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncEngine,
     async_sessionmaker,
     AsyncSession,
 )
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_TIMEOUTS,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_READ_ROUTED,
+    DB_REPLICA_LAG,
+    instrument_engine,
+    instrument_pool,
+    register_pool,
+)
+from app.core.query_profiler import instrument_profiler
+from app.core.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# Отставание реплики в секундах. Когда все полученное WAL уже применено, реплика
+# догнала primary: время последней транзакции тогда говорит лишь о том, что
+# записей давно не было. На primary (реплика не в recovery) функции дают NULL — 0
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def json_serializer(value: Any) -> str:
+    """
+    Кодирование JSON-колонок через orjson вместо json.dumps.
+
+    Кодек asyncpg, который ставит SQLAlchemy, ждет str. Decimal и set
+    приводятся так же, как в ответах API.
+    """
+    return dumps(value).decode()
+
+
+# Декодер asyncpg получает строку JSON из протокола, orjson.loads разбирает ее
+# в разы быстрее json.loads — заметно на списках с сотнями позиций в отчете
+json_deserializer = orjson.loads
+
+
+POOL_MODE_DIRECT = "direct"
+POOL_MODE_PGBOUNCER = "pgbouncer"
+
+
+def _prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def pool_profile(mode: str, recycle: int = 1800) -> Dict[str, Any]:
+    """
+    Параметры движка под способ подключения.
+
+    В режиме transaction PgBouncer отдает каждую транзакцию любому серверному
+    соединению. Подготовленное выражение, закешированное на клиентском
+    соединении, на другом сервере не найдется, а имя вида __asyncpg_stmt_1__
+    может совпасть с чужим. Поэтому кеши asyncpg и SQLAlchemy отключены, а имена
+    выражений уникальны. pre_ping отсеивает соединения, которые PgBouncer
+    закрыл по server_idle_timeout, recycle не дает держать их дольше его лимитов.
+    """
+    if mode == POOL_MODE_DIRECT:
+        return {}
+    if mode == POOL_MODE_PGBOUNCER:
+        return {
+            "pool_pre_ping": True,
+            "pool_recycle": recycle,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _prepared_statement_name,
+            },
+        }
+    raise ValueError(f"Неизвестный режим пула: {mode} (ожидается {POOL_MODE_DIRECT} или {POOL_MODE_PGBOUNCER})")
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий ожидание свободного соединения"""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.metrics_name).observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # dispose() движка пересоздает пул, имя и регистрацию в метриках переносим на новый
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        register_pool(self.metrics_name, pool)
+        return pool
+
+
+def _is_read(clause: Any) -> bool:
+    """SELECT без FOR UPDATE; текстовый SQL считаем записью"""
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+class RoutingSession(Session):
+    """
+    Сессия чтения: SELECT — на реплику, запись и чтение после нее — на primary.
+
+    Базу для чтения выбирает первый SELECT: реплику, если она успевает за
+    primary, иначе primary. Остальные запросы обработчика идут туда же —
+    count и страница списка видят один снимок. Запись (flush, INSERT/UPDATE/
+    DELETE, SELECT ... FOR UPDATE, текстовый SQL) всегда идет на primary и
+    закрепляет сессию на нем: следующее чтение увидит записанное.
+    """
+
+    def __init__(self, *args, db_helper: "DatabaseHelper", **kwargs):
+        super().__init__(*args, **kwargs)
+        self._db_helper = db_helper
+        self._target: Optional[str] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or not _is_read(clause):
+            self._target = PRIMARY
+        elif self._target is None:
+            self._target = REPLICA if self._db_helper.replica_ready else PRIMARY
+            DB_READ_ROUTED.labels(self._target).inc()
+
+        if self._target == REPLICA:
+            return self._db_helper.replica_engine.sync_engine
+        return self._db_helper.engine.sync_engine
 
 
 class DatabaseHelper:
@@ -17,6 +156,11 @@ class DatabaseHelper:
         echo_pool: bool = False,
         max_overflow: int = 10,
         pool_size: int = 20,
+        name: str = "primary",
+        replica_url: str = "",
+        replica_max_lag: float = 5.0,
+        pool_mode: str = POOL_MODE_DIRECT,
+        pool_recycle: int = 1800,
     ) -> None:
         """
         Инициализирует новый экземпляр DatabaseHelper с указанными параметрами подключения.
@@ -28,14 +172,21 @@ class DatabaseHelper:
                              которые могут быть установлены с базой данных
         :param pool_size: Количество соединений в пуле, которые могут использоваться
                          одновременно
+        :param name: Имя пула в метриках
+        :param replica_url: URL реплики для сессий чтения; пустой — чтение с primary
+        :param replica_max_lag: Отставание реплики (сек), при котором чтение уходит на primary
+        :param pool_mode: direct — напрямую в Postgres, pgbouncer — через PgBouncer (transaction)
+        :param pool_recycle: Время жизни соединения (сек) в режиме pgbouncer
         """
-        self.engine: AsyncEngine = create_async_engine(
-            url=url,
+        engine_options = dict(
             echo=echo,
             echo_pool=echo_pool,
             max_overflow=max_overflow,
             pool_size=pool_size,
+            **pool_profile(pool_mode, pool_recycle),
         )
+        self.engine: AsyncEngine = self._create_engine(url, name, **engine_options)
+
         self.session_factory = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
@@ -43,9 +194,74 @@ class DatabaseHelper:
             expire_on_commit=False,
         )
 
+        self.replica_engine: Optional[AsyncEngine] = None
+        self.replica_max_lag = replica_max_lag
+        # None — реплика не проверена или недоступна
+        self.replica_lag: Optional[float] = None
+        self.read_session_factory = self.session_factory
+        if replica_url:
+            self.replica_engine = self._create_engine(replica_url, REPLICA, **engine_options)
+            self.read_session_factory = async_sessionmaker(
+                bind=self.engine,
+                sync_session_class=RoutingSession,
+                db_helper=self,
+                autoflush=False,
+                autocommit=False,
+                expire_on_commit=False,
+            )
+
+    @staticmethod
+    def _create_engine(url: str, name: str, **options: Any) -> AsyncEngine:
+        engine = create_async_engine(
+            url=url,
+            poolclass=InstrumentedAsyncQueuePool,
+            json_serializer=json_serializer,
+            json_deserializer=json_deserializer,
+            **options,
+        )
+        engine.pool.metrics_name = name
+        instrument_engine(engine.sync_engine)
+        instrument_pool(engine.sync_engine, name)
+        instrument_profiler(engine.sync_engine)
+        register_pool(name, engine.pool)
+        return engine
+
+    @property
+    def replica_ready(self) -> bool:
+        """Реплика доступна и отстает не больше допустимого"""
+        return self.replica_lag is not None and self.replica_lag <= self.replica_max_lag
+
+    async def check_replica(self, timeout: float = 5.0) -> None:
+        """Замеряет отставание реплики; по нему сессии чтения выбирают базу"""
+        if self.replica_engine is None:
+            return
+
+        was_ready = self.replica_ready
+        try:
+            self.replica_lag = float(await asyncio.wait_for(self._replica_lag(), timeout=timeout))
+        except Exception as e:
+            self.replica_lag = None
+            if was_ready:
+                logger.warning(f"⚠️  Реплика недоступна, чтение переключено на primary: {str(e)}")
+        DB_REPLICA_LAG.set(-1 if self.replica_lag is None else self.replica_lag)
+
+        if self.replica_ready and not was_ready:
+            logger.info(f"✅ Чтение переключено на реплику (отставание {self.replica_lag:.1f} сек)")
+        elif was_ready and self.replica_lag is not None and not self.replica_ready:
+            logger.warning(
+                f"⚠️  Реплика отстает на {self.replica_lag:.1f} сек "
+                f"(допустимо {self.replica_max_lag} сек), чтение переключено на primary"
+            )
+
+    async def _replica_lag(self) -> float:
+        async with self.replica_engine.connect() as connection:
+            return await connection.scalar(REPLICA_LAG_SQL)
+
     async def dispose(self) -> None:
         """Закрывает все соединения и освобождает ресурсы движка базы данных"""
         await self.engine.dispose()
+        if self.replica_engine is not None:
+            await self.replica_engine.dispose()
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         """
@@ -56,6 +272,15 @@ class DatabaseHelper:
         async with self.session_factory() as session:
             yield session
 
+    async def read_session_getter(self) -> AsyncGenerator[AsyncSession, None]:
+        """
+        Сессии для эндпоинтов чтения: с репликой — маршрутизирующие, без нее — обычные.
+
+        :return: Асинхронный итератор, возвращающий сессии базы данных
+        """
+        async with self.read_session_factory() as session:
+            yield session
+
 
 # Создание экземпляра DatabaseHelper с настройками из конфигурации
 db_helper = DatabaseHelper(
@@ -64,9 +289,46 @@ db_helper = DatabaseHelper(
     echo_pool=settings.DB_ECHO_POOL,
     max_overflow=settings.DB_MAX_OVERFLOW,
     pool_size=settings.DB_POOL_SIZE,
+    replica_url=settings.DB_REPLICA_URL,
+    replica_max_lag=settings.DB_REPLICA_MAX_LAG,
+    pool_mode=settings.DB_POOL_MODE,
+    pool_recycle=settings.DB_POOL_RECYCLE,
 )
 
 
 async def get_db():
+    """
+    Сессия БД на запрос. Соединение из пула берется на первом SQL-запросе,
+    а не при создании сессии, и возвращается в пул на commit/rollback или
+    при закрытии сессии после обработчика.
+    """
     async for session in db_helper.session_getter():
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_read_db():
+    """
+    Сессия БД для эндпоинтов чтения (списки, статистика, просмотр отчета).
+
+    Если задана реплика и она успевает за primary, SELECT идут на нее; запись
+    через эту сессию все равно уходит на primary. Обработчики, которые пишут,
+    и чтение, результат которого кешируется в памяти (справочник товаров),
+    используют get_db.
+    """
+    async for session in db_helper.read_session_getter():
+        yield session
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """
+    Возвращает соединение сессии в пул после чтения.
+
+    Первый SELECT открывает транзакцию, и соединение остается занятым до ее
+    конца — даже если дальше обработчик только пишет файлы или ходит в
+    Telegram. Вызывать после чтения, перед медленной работой: следующий запрос
+    через эту же сессию возьмет соединение заново. Сессию с несохраненными
+    изменениями не трогает.
+    """
+    if db.in_transaction() and not (db.new or db.dirty or db.deleted):
+        # expire_on_commit=False: загруженные объекты остаются доступны
+        await db.commit()
\ No newline at end of file
@@ -0,0 +1,292 @@
+"""
+Заголовок Idempotency-Key для эндпоинтов создания отчетов.
+
+Первый запрос с ключом «захватывает» его строкой в idempotency_keys и
+выполняется как обычно; успешный ответ сохраняется в ту же строку.
+Повтор с тем же ключом получает сохраненный ответ прямо из middleware:
+тело запроса только хешируется, фото не пишутся на диск, отчет не создается
+и не уходит в Telegram. Вместе с ответом хранится sha256 тела первого
+запроса: тот же ключ с другим телом — это другая отправка, она получает 422,
+а не чужой ответ. Пока первый запрос выполняется, повтор получает 409.
+Ошибочные ответы не сохраняются — после исправления можно повторить с тем
+же ключом. Ключи живут IDEMPOTENCY_TTL_HOURS и удаляются ежедневной очисткой.
+"""
+import hashlib
+import logging
+import re
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import JSONResponse, Response
+
+from app.core.config import settings
+from app.core.metrics import db_timed
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+IDEMPOTENT_PATHS = frozenset({
+    "/shift-reports/create",
+    "/report-on-goods/create",
+    "/report-on-goods/send-photo",
+    "/writeoff-transfer/create",
+    "/daily-inventory-v2/create",
+    "/daily_inventory/create",
+    "/sync/batch",
+})
+
+# Ответы больше этого размера не сохраняются (ответы создания — единицы КБ)
+MAX_STORED_BODY = 256 * 1024
+
+_KEY_RE = re.compile(r"^[A-Za-z0-9_.:\-]{1,64}$")
+
+
+class IdempotencyStore:
+    """Операции с таблицей idempotency_keys"""
+
+    @db_timed
+    async def claim(self, db: AsyncSession, key: str, endpoint: str) -> bool:
+        """
+        Захватывает ключ одним INSERT ... ON CONFLICT. Существующая строка
+        перехватывается, только если она просрочена или «зависла» без ответа
+        дольше IDEMPOTENCY_LOCK_TIMEOUT (процесс упал посреди запроса).
+        """
+        ttl = timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        lock_timeout = timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+        stmt = pg_insert(IdempotencyKey).values(key=key, endpoint=endpoint)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={
+                "endpoint": endpoint,
+                "request_hash": None,
+                "status_code": None,
+                "content_type": None,
+                "response_body": None,
+                "created_at": func.now(),
+            },
+            where=or_(
+                IdempotencyKey.created_at < func.now() - ttl,
+                and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.created_at < func.now() - lock_timeout),
+            ),
+        ).returning(IdempotencyKey.key)
+        result = await db.execute(stmt)
+        claimed = result.scalar_one_or_none() is not None
+        await db.commit()
+        return claimed
+
+    @db_timed
+    async def get(self, db: AsyncSession, key: str) -> Optional[IdempotencyKey]:
+        result = await db.execute(select(IdempotencyKey).where(IdempotencyKey.key == key))
+        return result.scalar_one_or_none()
+
+    @db_timed
+    async def complete(
+        self,
+        db: AsyncSession,
+        key: str,
+        status_code: int,
+        content_type: str,
+        body: bytes,
+        request_hash: Optional[str] = None,
+    ) -> None:
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(
+                status_code=status_code,
+                content_type=content_type,
+                response_body=body,
+                request_hash=request_hash,
+            )
+        )
+        await db.commit()
+
+    @db_timed
+    async def release(self, db: AsyncSession, key: str) -> None:
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        await db.commit()
+
+    @db_timed
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """Удаляет просроченные ключи; вызывается из ежедневной очистки"""
+        ttl = timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < func.now() - ttl))
+        await db.commit()
+        return result.rowcount
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for header_name, value in scope["headers"]:
+        if header_name == name:
+            return value.decode("latin-1")
+    return None
+
+
+class _BodyHasher:
+    """
+    sha256 тела запроса по мере чтения. Граница multipart случайна в каждом
+    запросе браузера, поэтому она вырезается: повтор той же формы дает тот же
+    хеш. Хвост короче границы придерживается до следующей части тела.
+    """
+
+    def __init__(self, content_type: Optional[str]):
+        self._hash = hashlib.sha256()
+        self._boundary = _multipart_boundary(content_type)
+        self._pending = b""
+        self.complete = False
+
+    def update(self, chunk: bytes) -> None:
+        if not self._boundary:
+            self._hash.update(chunk)
+            return
+        data = (self._pending + chunk).replace(self._boundary, b"")
+        split = max(len(data) - len(self._boundary) + 1, 0)
+        self._hash.update(data[:split])
+        self._pending = data[split:]
+
+    def hexdigest(self) -> str:
+        self._hash.update(self._pending)
+        self._pending = b""
+        return self._hash.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware: повтор запроса с тем же Idempotency-Key получает сохраненный ответ"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in IDEMPOTENT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        key = _header(scope, IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not _KEY_RE.match(key):
+            response = JSONResponse(
+                {"detail": "Idempotency-Key: 1-64 символа из латиницы, цифр и _.:-"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        from app.core import db_helper
+
+        endpoint = scope["path"]
+        try:
+            async with db_helper.session_factory() as db:
+                claimed = await idempotency_store.claim(db, key, endpoint)
+                stored = None if claimed else await idempotency_store.get(db, key)
+        except Exception as e:
+            # Без базы идемпотентность не гарантировать; сам запрос, скорее всего, тоже упадет
+            logger.warning(f"⚠️  Idempotency-Key не проверен: {str(e)}")
+            await self.app(scope, receive, send)
+            return
+
+        if not claimed:
+            await self._replay(scope, receive, send, key, endpoint, stored)
+            return
+
+        status_code = 500
+        content_type = "application/json"
+        chunks: List[bytes] = []
+        hasher = _BodyHasher(_header(scope, b"content-type"))
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                hasher.update(message.get("body", b""))
+                hasher.complete = not message.get("more_body", False)
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = _content_type(message.get("headers", [])) or content_type
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            body = b"".join(chunks)
+            store = 200 <= status_code < 300 and len(body) <= MAX_STORED_BODY
+            # Тело, дочитанное не до конца, не с чем сверять — такой ключ повторяется без проверки
+            request_hash = hasher.hexdigest() if hasher.complete else None
+            try:
+                async with db_helper.session_factory() as db:
+                    if store:
+                        await idempotency_store.complete(db, key, status_code, content_type, body, request_hash)
+                    else:
+                        await idempotency_store.release(db, key)
+            except Exception as e:
+                logger.warning(f"⚠️  Ответ для Idempotency-Key {key} не сохранен: {str(e)}")
+
+    @staticmethod
+    async def _replay(scope, receive, send, key: str, endpoint: str, stored: Optional[IdempotencyKey]) -> None:
+        if stored is None or stored.status_code is None:
+            # Строку могли удалить между claim и get, либо первый запрос еще идет
+            response = JSONResponse(
+                {"detail": "Запрос с этим Idempotency-Key еще выполняется"},
+                status_code=409,
+                headers={"Retry-After": "2"},
+            )
+        elif stored.endpoint != endpoint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key уже использован для другого эндпоинта"}, status_code=422
+            )
+        elif stored.request_hash and await _read_body_hash(scope, receive) != stored.request_hash:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key уже использован для запроса с другими данными"}, status_code=422
+            )
+        else:
+            logger.info(f"🔁 Повтор запроса {endpoint} с Idempotency-Key {key}: отдан сохраненный ответ")
+            response = Response(
+                content=stored.response_body,
+                status_code=stored.status_code,
+                media_type=stored.content_type,
+                headers={REPLAYED_HEADER: "true"},
+            )
+        await response(scope, receive, send)
+
+
+def _content_type(headers: List[Tuple[bytes, bytes]]) -> Optional[str]:
+    for name, value in headers:
+        if name.lower() == b"content-type":
+            return value.decode("latin-1")
+    return None
+
+
+def _multipart_boundary(content_type: Optional[str]) -> Optional[bytes]:
+    if not content_type or not content_type.lower().startswith("multipart/"):
+        return None
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+async def _read_body_hash(scope, receive) -> Optional[str]:
+    """Дочитывает тело повтора и возвращает его хеш; None, если клиент отключился"""
+    hasher = _BodyHasher(_header(scope, b"content-type"))
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        hasher.update(message.get("body", b""))
+        if not message.get("more_body", False):
+            return hasher.hexdigest()
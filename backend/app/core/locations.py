@@ -0,0 +1,179 @@
+"""
+Реестр локаций (кафе): коды, адреса, синонимы и темы Telegram.
+
+Источник — JSON-файл из LOCATIONS_FILE, а если он не задан — темы из
+переменных окружения *_TOPIC_ID для трех исходных кафе. При загрузке
+реестр собирается в словари, поэтому нормализация фильтра и выбор темы —
+один поиск по ключу без перебора. Новая точка добавляется в файл и
+подхватывается через POST /admin/locations/reload во всех воркерах.
+
+Формат файла:
+    {
+      "locations": [
+        {"code": "gagarina", "address": "Гагарина 48/1", "aliases": ["Гагарина"],
+         "topics": {"kassa": 12, "otchet": 34}}
+      ],
+      "topics": {"Перемещения": 468}
+    }
+"""
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.pg_notify import pg_listener
+
+logger = logging.getLogger(__name__)
+
+RELOAD_CHANNEL = "locations_reload"
+
+# Каналы отчетов и префиксы, с которыми фронтенд сохраняет локацию.
+# Порядок важен: тема первого канала отдается для адреса без префикса
+CHANNEL_PREFIXES: Tuple[Tuple[str, str], ...] = (
+    ("kassa", "Касса - "),
+    ("otchet", "Отчет - "),
+)
+
+# Значение фильтра «все локации»
+ALL_LOCATIONS = "all"
+
+
+@dataclass(frozen=True)
+class Location:
+    code: str
+    address: str
+    aliases: Tuple[str, ...] = ()
+    topics: Dict[str, int] = field(default_factory=dict)
+
+    def labels(self) -> Dict[str, str]:
+        """Подписи локации по каналам: {'kassa': 'Касса - Гагарина 48/1', ...}"""
+        return {channel: f"{prefix}{self.address}" for channel, prefix in CHANNEL_PREFIXES}
+
+
+def _key(value: str) -> str:
+    return " ".join(value.split()).casefold()
+
+
+def _default_config() -> dict:
+    """Исходные три кафе с темами из переменных окружения"""
+    return {
+        "locations": [
+            {
+                "code": "gagarina",
+                "address": "Гагарина 48/1",
+                "topics": {"kassa": settings.KASSA_GAGARINA_48_TOPIC_ID, "otchet": settings.OTCHET_GAGARINA_48_TOPIC_ID},
+            },
+            {
+                "code": "abdulhakima",
+                "address": "Абдулхакима Исмаилова 51",
+                "topics": {"kassa": settings.KASSA_ABDULHAMID_51_TOPIC_ID, "otchet": settings.OTCHET_ABDULHAMID_51_TOPIC_ID},
+            },
+            {
+                "code": "gaydara",
+                "address": "Гайдара Гаджиева 7Б",
+                "topics": {"kassa": settings.KASSA_GAIDAR_7B_TOPIC_ID, "otchet": settings.OTCHET_GAIDAR_7B_TOPIC_ID},
+            },
+        ],
+        "topics": {"Перемещения": settings.PEREMESHENIYA},
+    }
+
+
+class LocationRegistry:
+    def __init__(self):
+        self.locations: List[Location] = []
+        self._by_key: Dict[str, Location] = {}
+        self._addresses: Dict[str, str] = {}
+        self._topics: Dict[str, int] = {}
+        self._special_topics: Dict[str, int] = {}
+        self.version = ""
+
+    def load(self, config: dict) -> None:
+        """Собирает словари поиска; текущие подменяются целиком, так что читатели не видят полусобранный реестр"""
+        locations = [
+            Location(
+                code=entry["code"],
+                address=entry["address"],
+                aliases=tuple(entry.get("aliases", ())),
+                topics={channel: int(topic) for channel, topic in entry.get("topics", {}).items()},
+            )
+            for entry in config.get("locations", [])
+        ]
+        special_topics = {name: int(topic) for name, topic in config.get("topics", {}).items()}
+
+        by_key: Dict[str, Location] = {}
+        addresses: Dict[str, str] = {}
+        topics: Dict[str, int] = {}
+        for location in locations:
+            for name in (location.code, location.address, *location.aliases):
+                by_key[_key(name)] = location
+                addresses[_key(name)] = location.address
+            labels = location.labels()
+            for channel, _ in CHANNEL_PREFIXES:
+                by_key[_key(labels[channel])] = location
+                topics[_key(labels[channel])] = location.topics.get(channel, 0)
+            # Адрес без префикса (перемещения, старые записи) уходит в тему первого канала
+            default_topic = location.topics.get(CHANNEL_PREFIXES[0][0], 0)
+            for name in (location.code, location.address, *location.aliases):
+                topics.setdefault(_key(name), default_topic)
+        for name, topic in special_topics.items():
+            topics[_key(name)] = topic
+
+        self.locations = locations
+        self._by_key = by_key
+        self._addresses = addresses
+        self._topics = topics
+        self._special_topics = special_topics
+        self.version = hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+        logger.info(f"📍 Реестр локаций загружен: {', '.join(location.address for location in locations)}")
+
+    def reload(self) -> None:
+        """Перечитывает LOCATIONS_FILE; при ошибке в файле остается прежний реестр"""
+        if not settings.LOCATIONS_FILE:
+            self.load(_default_config())
+            return
+        try:
+            config = json.loads(Path(settings.LOCATIONS_FILE).read_text(encoding="utf-8"))
+            self.load(config)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"❌ Ошибка загрузки реестра локаций из {settings.LOCATIONS_FILE}: {str(e)}")
+            if not self.locations:
+                self.load(_default_config())
+
+    @property
+    def addresses(self) -> List[str]:
+        return [location.address for location in self.locations]
+
+    def get(self, value: str) -> Optional[Location]:
+        """Локация по коду, адресу, синониму или подписи с префиксом"""
+        return self._by_key.get(_key(value))
+
+    def normalize(self, value: Optional[str]) -> Optional[str]:
+        """Фильтр из запроса: 'all' и пусто — без фильтра, код или синоним — адрес, остальное как есть"""
+        if not value or value == ALL_LOCATIONS:
+            return None
+        return self._addresses.get(_key(value), value)
+
+    def topic_id(self, value: str) -> Optional[int]:
+        """ID темы Telegram для сохраненной локации; None, если тема не задана"""
+        topic_id = self._topics.get(_key(value), 0)
+        return topic_id if topic_id > 0 else None
+
+    def as_dict(self) -> dict:
+        """Описание для фронтенда: адреса и подписи по каналам"""
+        return {
+            "locations": [
+                {"code": location.code, "address": location.address, "aliases": list(location.aliases)}
+                for location in self.locations
+            ],
+            "cashier_locations": [location.labels()["kassa"] for location in self.locations],
+            "report_locations": [location.labels()["otchet"] for location in self.locations],
+            "special": list(self._special_topics),
+        }
+
+
+location_registry = LocationRegistry()
+location_registry.reload()
+pg_listener.subscribe(RELOAD_CHANNEL, lambda payload: location_registry.reload())
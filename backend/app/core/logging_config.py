@@ -0,0 +1,186 @@
+"""
+Настройка логирования приложения.
+
+Обработчики не пишут в stdout из потока запроса: QueueHandler кладет запись
+в очередь, а QueueListener в отдельном потоке форматирует и выводит ее.
+Формат — JSON (одна запись на строку) или текст, уровни задаются по модулям,
+к каждой записи добавляется request_id текущего HTTP-запроса.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+# Логгер для объемных данных (сырые JSON из форм, тела сообщений): пишется с выборкой
+PAYLOAD_LOGGER_NAME = "app.payload"
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# request_id наследуется задачами из asyncio.create_task, поэтому фоновая
+# отправка в Telegram логируется с тем же id, что и исходный запрос
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Стандартные атрибуты LogRecord; все остальное считается полями из extra
+_RESERVED_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__.keys()
+) | {"message", "asctime", "request_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Проставляет request_id в запись в момент логирования"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только долю записей; ошибки проходят всегда"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_text:
+            data["exc_info"] = record.exc_text
+        elif record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    QueueHandler, который не склеивает traceback с сообщением:
+    трейс сохраняется в exc_text и попадает в отдельное поле JSON.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _parse_levels(raw: str) -> Dict[str, str]:
+    """'app.crud=DEBUG,aiohttp=WARNING' -> {'app.crud': 'DEBUG', 'aiohttp': 'WARNING'}"""
+    levels = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(*extra_handlers: logging.Handler) -> None:
+    """
+    Переводит корневой логгер на очередь. Повторный вызов ничего не делает.
+
+    :param extra_handlers: Дополнительные обработчики (например, файл для cleanup_scheduler)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    handlers = [stream_handler, *extra_handlers]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, level in _parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    logging.getLogger(PAYLOAD_LOGGER_NAME).addFilter(SamplingFilter(settings.LOG_PAYLOAD_SAMPLE_RATE))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Дописывает оставшиеся в очереди записи и останавливает поток вывода"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+
+
+class RequestIdMiddleware:
+    """ASGI middleware: берет X-Request-ID из запроса или генерирует новый и возвращает его в ответе"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex[:16]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode(), request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
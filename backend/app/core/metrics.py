@@ -0,0 +1,383 @@
+"""
+Метрики Prometheus для планирования мощностей.
+
+Покрывают горячие пути: HTTP-запросы по маршрутам, SQL-запросы по CRUD-методам,
+ожидание соединения из пула и его заполненность, отставание реплики, вызовы
+Telegram API и предохранитель, фоновые задачи, открытые потоки SSE, объем
+загружаемых файлов и время их записи на диск.
+"""
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Бакеты под наши задержки: от единиц миллисекунд (SELECT по id) до минуты (медиа-группы в Telegram)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 10 * 1024 ** 2, 20 * 1024 ** 2)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "reportbot_http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "reportbot_http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_QUERY_DURATION = Histogram(
+    "reportbot_db_query_duration_seconds",
+    "Время выполнения SQL-запроса по CRUD-методу",
+    ["operation"],
+    buckets=DB_BUCKETS,
+)
+DB_OPERATION_DURATION = Histogram(
+    "reportbot_db_operation_duration_seconds",
+    "Полное время CRUD-метода",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "reportbot_db_pool_checkout_wait_seconds",
+    "Ожидание соединения из пула",
+    ["pool"],
+    buckets=DB_BUCKETS,
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "reportbot_db_pool_checkout_timeouts_total",
+    "Таймауты ожидания соединения из пула",
+    ["pool"],
+)
+DB_POOL_CONNECTIONS_OPENED = Counter(
+    "reportbot_db_pool_connections_opened_total",
+    "Новые соединения пула (рост без роста нагрузки — пересоздание по pool_recycle или обрывы)",
+    ["pool"],
+)
+DB_POOL_INVALIDATED = Counter(
+    "reportbot_db_pool_invalidated_total",
+    "Соединения, выброшенные из пула: pre_ping не прошел или соединение оборвалось",
+    ["pool"],
+)
+DB_REPLICA_LAG = Gauge(
+    "reportbot_db_replica_lag_seconds",
+    "Отставание реплики по последней проверке (-1 — реплика недоступна)",
+    multiprocess_mode="livemax",
+)
+DB_READ_ROUTED = Counter(
+    "reportbot_db_read_sessions_total",
+    "Сессии чтения по базе, куда их направил маршрутизатор",
+    ["target"],
+)
+
+TELEGRAM_CALL_DURATION = Histogram(
+    "reportbot_telegram_call_duration_seconds",
+    "Время вызова Telegram Bot API",
+    ["api_method", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+CIRCUIT_BREAKER_STATE = Gauge(
+    "reportbot_circuit_breaker_state",
+    "Состояние предохранителя внешнего сервиса: 0 — замкнут, 1 — пробный запрос, 2 — разомкнут",
+    ["name"],
+    multiprocess_mode="livemax",
+)
+CIRCUIT_BREAKER_REJECTED = Counter(
+    "reportbot_circuit_breaker_rejected_total",
+    "Вызовы, отклоненные разомкнутым предохранителем",
+    ["name"],
+)
+TELEGRAM_RETRY_QUEUE = Gauge(
+    "reportbot_telegram_retry_queue",
+    "Отправки в Telegram, отложенные до восстановления связи",
+    multiprocess_mode="livesum",
+)
+TELEGRAM_RETRY_DROPPED = Counter(
+    "reportbot_telegram_retry_dropped_total",
+    "Отложенные отправки, вытесненные из переполненной очереди",
+)
+
+BACKGROUND_TASKS_ACTIVE = Gauge(
+    "reportbot_background_tasks_active",
+    "Фоновые задачи в работе",
+    ["kind"],
+    multiprocess_mode="livesum",
+)
+BACKGROUND_TASKS_TOTAL = Counter(
+    "reportbot_background_tasks_total",
+    "Завершенные фоновые задачи",
+    ["kind", "outcome"],
+)
+BACKGROUND_TASKS_WAITING = Gauge(
+    "reportbot_background_tasks_waiting",
+    "Фоновые задачи в ожидании свободного слота",
+    ["kind"],
+    multiprocess_mode="livesum",
+)
+BACKGROUND_TASKS_ABANDONED = Counter(
+    "reportbot_background_tasks_abandoned_total",
+    "Фоновые задачи, прерванные по таймауту или при остановке",
+    ["kind", "reason"],
+)
+
+SSE_CONNECTIONS = Gauge(
+    "reportbot_sse_connections",
+    "Открытые потоки событий отчетов (SSE)",
+    multiprocess_mode="livesum",
+)
+
+UPLOAD_BYTES = Histogram(
+    "reportbot_upload_bytes",
+    "Размер сохраняемых файлов",
+    ["subfolder"],
+    buckets=SIZE_BUCKETS,
+)
+FILE_WRITE_DURATION = Histogram(
+    "reportbot_file_write_duration_seconds",
+    "Время записи файла на диск",
+    ["subfolder"],
+    buckets=DB_BUCKETS,
+)
+
+# Текущая CRUD-операция: по ней SQL-запросы раскладываются в DB_QUERY_DURATION
+current_db_operation: ContextVar[str] = ContextVar("current_db_operation", default="other")
+
+
+# HTTP
+
+class PrometheusMiddleware:
+    """ASGI middleware: гистограмма времени ответа по шаблону маршрута"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.labels(method).dec()
+            HTTP_REQUEST_DURATION.labels(method, _route_label(scope), str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    """Шаблон маршрута вместо сырого пути, чтобы не плодить серии на каждый id"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return "unmatched"
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Тело ответа /metrics; при нескольких воркерах собирает данные из PROMETHEUS_MULTIPROC_DIR"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Состояние пула живет в памяти процесса, его отдаем отдельно
+        registry.register(_pool_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+# БАЗА ДАННЫХ
+
+def db_timed(func: Callable) -> Callable:
+    """
+    Декоратор асинхронных CRUD-методов: меряет метод целиком и помечает
+    выполняемые внутри SQL-запросы именем «Класс.метод».
+    """
+    operation = func.__qualname__
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = current_db_operation.set(operation)
+        outcome = "error"
+        started = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            DB_OPERATION_DURATION.labels(operation, outcome).observe(time.perf_counter() - started)
+            current_db_operation.reset(token)
+
+    return wrapper
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Вешает на синхронный движок замер времени каждого SQL-запроса"""
+
+    # Время старта хранится на контексте выполнения, а не в conn.info: у упавшего
+    # запроса after_cursor_execute не вызывается, и контекст просто выбрасывается
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_start_time = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_start_time", None)
+        if started is None:
+            return
+        DB_QUERY_DURATION.labels(current_db_operation.get()).observe(time.perf_counter() - started)
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    """Счетчики открытых и выброшенных соединений пула движка (переживают dispose)"""
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTIONS_OPENED.labels(name).inc()
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATED.labels(name).inc()
+
+
+class PoolCollector(Collector):
+    """Заполненность пулов соединений, считывается в момент опроса /metrics"""
+
+    def __init__(self):
+        self._pools: Dict[str, Pool] = {}
+
+    def register(self, name: str, pool: Pool) -> None:
+        self._pools[name] = pool
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        checked_out = GaugeMetricFamily(
+            "reportbot_db_pool_checked_out", "Соединения, выданные из пула", labels=["pool"]
+        )
+        idle = GaugeMetricFamily(
+            "reportbot_db_pool_idle", "Свободные соединения в пуле", labels=["pool"]
+        )
+        capacity = GaugeMetricFamily(
+            "reportbot_db_pool_capacity", "pool_size + max_overflow", labels=["pool"]
+        )
+        saturation = GaugeMetricFamily(
+            "reportbot_db_pool_saturation", "Доля занятых соединений от емкости пула", labels=["pool"]
+        )
+
+        for name, pool in self._pools.items():
+            # Статистика есть только у QueuePool и наследников
+            if not hasattr(pool, "checkedout"):
+                continue
+            total = pool.size() + max(pool._max_overflow, 0)
+            used = pool.checkedout()
+            checked_out.add_metric([name], used)
+            idle.add_metric([name], pool.checkedin())
+            capacity.add_metric([name], total)
+            saturation.add_metric([name], used / total if total else 0)
+
+        yield checked_out
+        yield idle
+        yield capacity
+        yield saturation
+
+
+_pool_collector = PoolCollector()
+REGISTRY.register(_pool_collector)
+
+
+def register_pool(name: str, pool: Pool) -> None:
+    _pool_collector.register(name, pool)
+
+
+# TELEGRAM
+
+class TelegramCall:
+    """Итог одного вызова Bot API; по умолчанию считается исключением"""
+
+    def __init__(self):
+        self.outcome = "exception"
+
+    def set_status(self, status: int) -> None:
+        self.outcome = "ok" if status == 200 else "http_error"
+
+
+@contextmanager
+def observe_telegram_call(api_method: str) -> Iterator[TelegramCall]:
+    call = TelegramCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        TELEGRAM_CALL_DURATION.labels(api_method, call.outcome).observe(time.perf_counter() - started)
+
+
+# ФОНОВЫЕ ЗАДАЧИ
+
+def tracked_background_task(kind: str) -> Callable:
+    """Декоратор фоновой корутины: число активных задач и итог по виду"""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            BACKGROUND_TASKS_ACTIVE.labels(kind).inc()
+            outcome = "error"
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            finally:
+                BACKGROUND_TASKS_ACTIVE.labels(kind).dec()
+                BACKGROUND_TASKS_TOTAL.labels(kind, outcome).inc()
+
+        return wrapper
+
+    return decorator
+
+
+# ФАЙЛЫ
+
+@contextmanager
+def observe_file_write(subfolder: str, size: Optional[int]) -> Iterator[None]:
+    if size is not None:
+        UPLOAD_BYTES.labels(subfolder).observe(size)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        FILE_WRITE_DURATION.labels(subfolder).observe(time.perf_counter() - started)
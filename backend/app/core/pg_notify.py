@@ -0,0 +1,104 @@
+"""
+Уведомления между воркерами через Postgres LISTEN/NOTIFY.
+
+Один процесс держит одно выделенное соединение asyncpg и раздает
+уведомления подписчикам по каналам. Отправка — pg_notify в транзакции
+вызывающего: уведомление уходит только вместе с коммитом. После
+переподключения подписчики получают on_reconnect, так как уведомления,
+пришедшие без соединения, потеряны.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед переподключением LISTEN после обрыва
+LISTEN_RECONNECT_DELAY = 5
+
+
+async def notify(db: AsyncSession, channel: str, payload: str = "") -> None:
+    """pg_notify в текущей транзакции сессии"""
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": payload},
+    )
+
+
+class PgNotifyListener:
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[str], None]]] = {}
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(
+            self,
+            channel: str,
+            handler: Callable[[str], None],
+            on_reconnect: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Подписка на канал; вызывается при импорте модуля-подписчика, до start()"""
+        self._handlers.setdefault(channel, []).append(handler)
+        if on_reconnect is not None:
+            self._reconnect_handlers.append(on_reconnect)
+
+    def _dispatch(self, connection, pid, channel, payload) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception(f"❌ Ошибка обработчика уведомления {channel}")
+
+    async def _listen_forever(self) -> None:
+        import asyncpg
+
+        while True:
+            connection = None
+            try:
+                # LISTEN держит серверное соединение, поэтому идет мимо PgBouncer
+                connection = await asyncpg.connect(
+                    host=settings.DB_DIRECT_HOST or settings.DB_HOST,
+                    port=settings.DB_DIRECT_PORT or settings.DB_PORT,
+                    user=settings.DB_USER,
+                    password=settings.DB_PASSWORD,
+                    database=settings.DB_NAME,
+                )
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                for channel in self._handlers:
+                    await connection.add_listener(channel, self._dispatch)
+                for handler in self._reconnect_handlers:
+                    handler()
+                logger.info(f"📡 LISTEN: {', '.join(self._handlers)}")
+                await closed.wait()
+                logger.warning("⚠️  Соединение LISTEN закрыто, переподключаемся")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️  Ошибка подписки LISTEN: {str(e)}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(LISTEN_RECONNECT_DELAY)
+
+    def start(self) -> None:
+        if self._task is None and self._handlers and "asyncpg" in settings.DB_DRIVER:
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+pg_listener = PgNotifyListener()
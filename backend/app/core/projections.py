@@ -0,0 +1,39 @@
+"""
+Проекции колонок для списков отчетов.
+
+Списки выбирают только колонки карточки, а не ORM-сущности целиком: строки
+приходят кортежами, минуя identity map, а JSON с позициями (приходы/расходы,
+товары, списания) читается, только если клиент попросил `include=items`.
+Суммы приводятся к float в SQL, количество позиций считается там же.
+"""
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Float, cast, func
+
+INCLUDE_ITEMS = "items"
+
+
+def include_items(include: Optional[str]) -> bool:
+    """Разбор параметра include; пока поддерживается только `items`"""
+    if not include:
+        return False
+    parts = {part.strip() for part in include.split(",") if part.strip()}
+    unknown = parts - {INCLUDE_ITEMS}
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные значения include: {', '.join(sorted(unknown))}"
+        )
+    return INCLUDE_ITEMS in parts
+
+
+def money(column, label: Optional[str] = None):
+    """Numeric-колонка как float, NULL — 0"""
+    return func.coalesce(cast(column, Float), 0.0).label(label or column.key)
+
+
+def json_length(column, label: Optional[str] = None):
+    """Длина JSON-массива, NULL — 0"""
+    expression = func.coalesce(func.json_array_length(column), 0)
+    return expression.label(label) if label else expression
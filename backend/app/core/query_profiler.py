@@ -0,0 +1,232 @@
+"""
+Профилировщик SQL-запросов.
+
+Слушает события движка SQLAlchemy и, пока включен, собирает по отпечаткам
+запросов (SQL без значений параметров) число вызовов, суммарное и максимальное
+время — глобально и в рамках одного HTTP-запроса. Повторы одного отпечатка
+внутри запроса помечаются как возможный N+1, запросы дольше порога пишутся
+в лог вместе с параметрами. Включается и настраивается через /admin без рестарта;
+изменение настроек и сброс статистики рассылаются остальным воркерам через NOTIFY.
+"""
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import current_db_operation
+from app.core.pg_notify import pg_listener
+
+logger = logging.getLogger(__name__)
+
+# Ограничение на число отпечатков в глобальной статистике, чтобы не расти бесконечно
+MAX_FINGERPRINTS = 500
+# Длина repr параметров в логе медленных запросов
+MAX_PARAMS_REPR = 1000
+# Канал NOTIFY для изменений из /admin/db-profiler
+CONTROL_CHANNEL = "db_profiler"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"\$\d+|%\([^)]+\)s|:\w+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """SQL без литералов и параметров: одинаковые по форме запросы дают один отпечаток"""
+    sql = _WHITESPACE_RE.sub(" ", statement).strip()
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _IN_LIST_RE.sub("(...)", sql)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    operations: set = field(default_factory=set)
+
+    def add(self, duration_ms: float, operation: str) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.operations.add(operation)
+
+    def as_dict(self, statement: str) -> Dict[str, Any]:
+        return {
+            "fingerprint": statement,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max_ms, 3),
+            "operations": sorted(self.operations),
+        }
+
+
+@dataclass
+class ProfilerConfig:
+    enabled: bool = False
+    slow_query_ms: float = 200.0
+    n_plus_one_threshold: int = 5
+
+
+class QueryProfiler:
+    def __init__(self, config: ProfilerConfig):
+        self.config = config
+        self.stats: Dict[str, QueryStats] = {}
+        self.n_plus_one: Dict[str, Dict[str, Any]] = {}
+        self._request: ContextVar[Optional[Dict[str, QueryStats]]] = ContextVar("query_profile", default=None)
+
+    def reset(self) -> None:
+        self.stats.clear()
+        self.n_plus_one.clear()
+
+    def apply(self, changes: Dict[str, Any]) -> None:
+        """Применяет изменения из /admin/db-profiler: поля ProfilerConfig и reset"""
+        if changes.get("reset"):
+            self.reset()
+        for name, value in changes.items():
+            if name in ProfilerConfig.__dataclass_fields__:
+                setattr(self.config, name, value)
+
+    def record(self, statement: str, parameters: Any, duration_ms: float) -> None:
+        key = fingerprint(statement)
+        operation = current_db_operation.get()
+
+        stats = self.stats.get(key)
+        # При переполнении новый отпечаток не попадает только в глобальную статистику:
+        # N+1 по запросу и лог медленных запросов работают по-прежнему
+        if stats is None and len(self.stats) < MAX_FINGERPRINTS:
+            stats = self.stats[key] = QueryStats()
+        if stats is not None:
+            stats.add(duration_ms, operation)
+
+        request_stats = self._request.get()
+        if request_stats is not None:
+            request_stats.setdefault(key, QueryStats()).add(duration_ms, operation)
+
+        if duration_ms >= self.config.slow_query_ms:
+            params = repr(parameters)
+            logger.warning(
+                "Медленный запрос %.1f мс (%s): %s",
+                duration_ms, operation, statement,
+                extra={"duration_ms": round(duration_ms, 3), "db_operation": operation,
+                       "parameters": params[:MAX_PARAMS_REPR]},
+            )
+
+    def start_request(self):
+        if not self.config.enabled:
+            return None
+        return self._request.set({})
+
+    def finish_request(self, token, route: str) -> Optional[Dict[str, Any]]:
+        """Сводка по запросу; повторяющиеся отпечатки отмечаются как N+1"""
+        if token is None:
+            return None
+        request_stats = self._request.get() or {}
+        self._request.reset(token)
+
+        suspects = [
+            stats.as_dict(key) for key, stats in request_stats.items()
+            if stats.count >= self.config.n_plus_one_threshold
+        ]
+        summary = {
+            "route": route,
+            "queries": sum(stats.count for stats in request_stats.values()),
+            "total_ms": round(sum(stats.total_ms for stats in request_stats.values()), 3),
+            "n_plus_one": suspects,
+        }
+        if suspects:
+            logger.warning(
+                "Возможный N+1 в %s: %s",
+                route, ", ".join(f"{s['count']}× {s['operations']}" for s in suspects),
+                extra={"db_profile": summary},
+            )
+            for suspect in suspects:
+                self.n_plus_one[suspect["fingerprint"]] = {"route": route, **suspect}
+        else:
+            logger.debug("Профиль SQL %s", route, extra={"db_profile": summary})
+        return summary
+
+    def snapshot(self, limit: int = 50, order_by: str = "total_ms") -> Dict[str, Any]:
+        items = [stats.as_dict(key) for key, stats in self.stats.items()]
+        items.sort(key=lambda item: item[order_by], reverse=True)
+        return {
+            "config": dict(self.config.__dict__),
+            "fingerprints": items[:limit],
+            "n_plus_one": list(self.n_plus_one.values()),
+        }
+
+
+profiler = QueryProfiler(
+    ProfilerConfig(
+        enabled=settings.DB_PROFILER_ENABLED,
+        slow_query_ms=settings.DB_SLOW_QUERY_MS,
+        n_plus_one_threshold=settings.DB_N_PLUS_ONE_THRESHOLD,
+    )
+)
+
+
+def apply_profiler_changes(changes: Dict[str, Any]) -> None:
+    """Изменения профилировщика и echo движка в этом воркере"""
+    profiler.apply(changes)
+    if changes.get("echo") is not None:
+        from app.core import db_helper
+
+        db_helper.engine.echo = changes["echo"]
+
+
+def _on_control_notification(payload: str) -> None:
+    apply_profiler_changes(json.loads(payload))
+
+
+pg_listener.subscribe(CONTROL_CHANNEL, _on_control_notification)
+
+
+def instrument_profiler(engine: Engine) -> None:
+    """Подключает профилировщик к синхронному движку"""
+
+    # Старт — на ExecutionContext: если запрос упал, after не придет, и замер уйдет вместе с контекстом
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if profiler.config.enabled and context is not None:
+            context._profiler_start_time = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Профилировщик могли включить между before и after: тогда замера нет
+        started = getattr(context, "_profiler_start_time", None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        profiler.record(statement, parameters, duration_ms)
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware: собирает профиль SQL на время HTTP-запроса"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = profiler.start_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            profiler.finish_request(token, f"{scope['method']} {route.path if route else scope['path']}")
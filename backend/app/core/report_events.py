@@ -0,0 +1,128 @@
+"""
+Живая лента событий отчетов для админ-панели (Server-Sent Events).
+
+CRUD при создании, удалении и смене статуса отчета делает pg_notify в той
+же транзакции, поэтому событие уходит только вместе с коммитом и только
+если он удался. Каждый воркер получает уведомления через pg_listener и
+раздает их своим подключенным клиентам, отфильтровав по локации и типу.
+После переподключения LISTEN клиенты получают событие resync: часть
+уведомлений могла потеряться, и список нужно перечитать.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional, Set
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.locations import location_registry
+from app.core.pg_notify import notify, pg_listener
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "report_events"
+
+EVENT_CREATED = "created"
+EVENT_DELETED = "deleted"
+EVENT_STATUS_CHANGED = "status_changed"
+EVENT_RESYNC = "resync"
+
+# Очередь одного клиента; медленный клиент при переполнении получает resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+async def publish_report_event(
+        db: AsyncSession,
+        event: str,
+        report_type: str,
+        report_id: int,
+        location: Optional[str],
+        **extra: Any,
+) -> None:
+    """Событие отчета; уйдет подписчикам только вместе с коммитом сессии"""
+    payload = {"event": event, "type": report_type, "id": report_id, "location": location, "ts": time.time(), **extra}
+    await notify(db, NOTIFY_CHANNEL, orjson.dumps(payload).decode())
+
+
+def _location_code(value: Optional[str]) -> Optional[str]:
+    """Код локации из реестра (подпись с префиксом и адрес дают один код); иначе — сама строка"""
+    if not value:
+        return None
+    location = location_registry.get(value)
+    return location.code if location else value
+
+
+@dataclass(eq=False)
+class Subscription:
+    location: Optional[str] = None
+    types: Optional[FrozenSet[str]] = None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+
+    def __post_init__(self):
+        self._location_code = _location_code(self.location)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if event["event"] == EVENT_RESYNC:
+            return True
+        if self.types is not None and event.get("type") not in self.types:
+            return False
+        if self._location_code is None:
+            return True
+        # Перемещение видно и в точке отправления, и в точке назначения
+        return self._location_code in (_location_code(event.get("location")), _location_code(event.get("location_to")))
+
+    def put(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать: выбрасываем накопленное и просим перечитать список
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"event": EVENT_RESYNC})
+
+
+class ReportEventHub:
+    """Раздача событий подписчикам текущего процесса"""
+
+    def __init__(self):
+        self._subscriptions: Set[Subscription] = set()
+        # Выставляется при остановке приложения: открытые потоки SSE завершаются сами
+        self.closing = asyncio.Event()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, location: Optional[str] = None, types: Optional[FrozenSet[str]] = None) -> Subscription:
+        subscription = Subscription(location=location, types=types)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def close(self) -> None:
+        """Завершает открытые потоки: иначе остановка ждет, пока клиенты отключатся"""
+        self.closing.set()
+
+    def broadcast(self, event: Dict[str, Any]) -> None:
+        for subscription in self._subscriptions:
+            if subscription.matches(event):
+                subscription.put(event)
+
+    def _on_notification(self, payload: str) -> None:
+        try:
+            event = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            logger.warning(f"⚠️  Некорректное событие отчета: {payload[:200]}")
+            return
+        self.broadcast(event)
+
+    def _on_reconnect(self) -> None:
+        self.broadcast({"event": EVENT_RESYNC})
+
+
+report_events = ReportEventHub()
+pg_listener.subscribe(NOTIFY_CHANNEL, report_events._on_notification, on_reconnect=report_events._on_reconnect)
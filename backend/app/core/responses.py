@@ -0,0 +1,32 @@
+"""
+Быстрая сериализация ответов через orjson.
+
+datetime/date/UUID orjson кодирует сам, Decimal приводится так же, как в
+jsonable_encoder FastAPI (целое — int, иначе float), поэтому JSON на выходе
+не меняется. Эндпоинты, отдающие большие списки, возвращают FastJSONResponse
+напрямую и тем самым минуют рекурсивный обход jsonable_encoder.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -5,6 +5,9 @@ from .report_on_good import ReportOnGoodCRUD
 from .writeoff_transfer import WriteoffTransferCRUD
 from .inventory_item import InventoryItemCRUD
 from .daily_inventory_v2 import DailyInventoryV2CRUD
+from .sync_batch import SyncBatchCRUD
+from .shift_summary import ShiftSummaryCRUD
+from .uploaded_photo import UploadedPhotoCRUD
 
 __all__ = [
     'ShiftReportCRUD',
@@ -12,5 +15,8 @@ __all__ = [
     'ReportOnGoodCRUD',
     'WriteoffTransferCRUD',
     'InventoryItemCRUD',
-    'DailyInventoryV2CRUD'
+    'DailyInventoryV2CRUD',
+    'SyncBatchCRUD',
+    'ShiftSummaryCRUD',
+    'UploadedPhotoCRUD'
 ]
\ No newline at end of file
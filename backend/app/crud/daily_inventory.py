@@ -1,20 +1,28 @@
+import logging
+from functools import partial
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from app.schemas import DailyInventoryCreate
 from app.models import DailyInventory
 from app.services import TelegramService
+from app.services.telegram_delivery import telegram_delivery
+from app.core.metrics import db_timed, tracked_background_task
+from app.core.report_events import EVENT_CREATED, publish_report_event
 import asyncio
 import datetime
 from zoneinfo import ZoneInfo
 
+logger = logging.getLogger(__name__)
+
 class DailyInventoryCrud:
     def __init__(self):
         try:
             self.telegram_service = TelegramService()
         except Exception as e:
-            print(f"⚠️  Ошибка инициализации Telegram сервиса: {str(e)}")
+            logger.warning(f"⚠️  Ошибка инициализации Telegram сервиса: {str(e)}")
             self.telegram_service = None
 
+    @db_timed
     async def create_daily_inventory(
             self,
             db: AsyncSession,
@@ -54,29 +62,33 @@ class DailyInventoryCrud:
             )
 
             db.add(db_daily_inventory)
+            await db.flush()
+            await publish_report_event(db, EVENT_CREATED, "daily_inventory", db_daily_inventory.id, db_daily_inventory.location)
             await db.commit()
             await db.refresh(db_daily_inventory)
 
-            print(f"✅ Отчет инвентаризации создан в БД с ID: {db_daily_inventory.id}")
+            logger.info(f"✅ Отчет инвентаризации создан в БД с ID: {db_daily_inventory.id}")
 
             # Запускаем отправку в Telegram в фоне
             if self.telegram_service:
-                asyncio.create_task(self._send_to_telegram_background(db_daily_inventory.id))
+                telegram_delivery.submit("daily_inventory", partial(self._send_to_telegram_background, db_daily_inventory.id))
 
             return db_daily_inventory
 
         except SQLAlchemyError as e:
-            print(f"❌ Ошибка SQLAlchemy при создании отчета инвентаризации: {str(e)}")
+            logger.error(f"❌ Ошибка SQLAlchemy при создании отчета инвентаризации: {str(e)}")
             await db.rollback()
             raise e
         except Exception as e:
-            print(f"❌ Общая ошибка при создании отчета инвентаризации: {str(e)}")
+            logger.error(f"❌ Общая ошибка при создании отчета инвентаризации: {str(e)}")
             await db.rollback()
             raise e
 
+    @tracked_background_task("daily_inventory")
     async def _send_to_telegram_background(self, inventory_id: int):
         """
         Фоновая отправка отчета инвентаризации в Telegram.
+        Возвращает True, если отчет ушел: по этому очередь повторов решает, откладывать ли его.
         """
         from ..core import db_helper
         from sqlalchemy import select
@@ -92,7 +104,7 @@ class DailyInventoryCrud:
                     db_inventory = result.scalar_one_or_none()
 
                     if not db_inventory:
-                        print(f"⚠️  Отчет инвентаризации с ID {inventory_id} не найден для отправки в Telegram")
+                        logger.warning(f"⚠️  Отчет инвентаризации с ID {inventory_id} не найден для отправки в Telegram")
                         return
 
                     # Подготавливаем данные для отправки
@@ -127,18 +139,20 @@ class DailyInventoryCrud:
                     )
 
                     if telegram_success:
-                        print(
+                        logger.info(
                             f"✅ Отчет инвентаризации ID {inventory_id} отправлен в Telegram для локации: {db_inventory.location}")
                     else:
-                        print(
+                        logger.warning(
                             f"⚠️  Отчет инвентаризации ID {inventory_id} создан, но не отправлен в Telegram для локации: {db_inventory.location}")
 
+                    return telegram_success
+
                 except asyncio.TimeoutError:
-                    print(f"⏰ Таймаут при отправке отчета инвентаризации ID {inventory_id} в Telegram")
+                    logger.warning(f"⏰ Таймаут при отправке отчета инвентаризации ID {inventory_id} в Telegram")
                 except Exception as telegram_error:
-                    print(
+                    logger.warning(
                         f"⚠️  Ошибка отправки отчета инвентаризации ID {inventory_id} в Telegram: {str(telegram_error)}")
 
         except Exception as e:
-            print(
+            logger.exception(
                 f"⚠️  Критическая ошибка в фоновой отправке Telegram для отчета инвентаризации ID {inventory_id}: {str(e)}")
\ No newline at end of file
@@ -1,17 +1,24 @@
 # backend/app/crud/daily_inventory_v2.py
+import logging
 from datetime import datetime
+from functools import partial
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, insert, select
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException, status
 from zoneinfo import ZoneInfo
 import asyncio
 
 from app.models.daily_inventory_v2 import DailyInventoryV2
-from app.models.inventory_item import InventoryItem
 from app.schemas.daily_inventory_v2 import DailyInventoryV2Create
 from app.services import TelegramService
+from app.core.catalog_cache import catalog_cache
+from app.services.telegram_delivery import telegram_delivery
+from app.core.metrics import db_timed, tracked_background_task
+from app.core.report_events import EVENT_CREATED, EVENT_DELETED, publish_report_event
+
+logger = logging.getLogger(__name__)
 
 
 class DailyInventoryV2CRUD:
@@ -21,9 +28,45 @@ class DailyInventoryV2CRUD:
         try:
             self.telegram_service = TelegramService()
         except Exception as e:
-            print(f"⚠️  Ошибка инициализации Telegram сервиса: {str(e)}")
+            logger.warning(f"⚠️  Ошибка инициализации Telegram сервиса: {str(e)}")
             self.telegram_service = None
 
+    async def validate_items(self, db: AsyncSession, inventory_data: DailyInventoryV2Create) -> None:
+        """Проверяет по справочнику, что все товары существуют и активны"""
+        item_ids = [entry.item_id for entry in inventory_data.inventory_data]
+        if item_ids:
+            catalog = await catalog_cache.get(db)
+            missing_ids = set(item_ids) - catalog.active_ids()
+
+            if missing_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Товары с ID {list(missing_ids)} не найдены или неактивны"
+                )
+
+    def build_values(self, inventory_data: DailyInventoryV2Create) -> dict:
+        """Значения колонок новой инвентаризации; общие для одиночного создания и пакетной синхронизации"""
+        # Преобразуем данные в JSON формат
+        inventory_json = [
+            {"item_id": entry.item_id, "quantity": entry.quantity}
+            for entry in inventory_data.inventory_data
+        ]
+
+        # Объединяем дату и время от пользователя
+        date = datetime.combine(
+            inventory_data.report_date,
+            inventory_data.report_time
+        )
+
+        return dict(
+            location=inventory_data.location,
+            shift_type=inventory_data.shift_type,
+            cashier_name=inventory_data.cashier_name,
+            date=date,
+            inventory_data=inventory_json
+        )
+
+    @db_timed
     async def create_inventory(
             self,
             db: AsyncSession,
@@ -31,55 +74,20 @@ class DailyInventoryV2CRUD:
     ) -> DailyInventoryV2:
         """Создать новую инвентаризацию с отправкой в Telegram"""
         try:
-            # Проверяем, что все товары существуют
-            item_ids = [entry.item_id for entry in inventory_data.inventory_data]
-            if item_ids:
-                result = await db.execute(
-                    select(InventoryItem.id)
-                    .where(
-                        InventoryItem.id.in_(item_ids),
-                        InventoryItem.is_active == True
-                    )
-                )
-                existing_ids = {row[0] for row in result.fetchall()}
-                missing_ids = set(item_ids) - existing_ids
-
-                if missing_ids:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Товары с ID {list(missing_ids)} не найдены или неактивны"
-                    )
-
-            # Преобразуем данные в JSON формат
-            inventory_json = [
-                {"item_id": entry.item_id, "quantity": entry.quantity}
-                for entry in inventory_data.inventory_data
-            ]
-
-
-            # Объединяем дату и время от пользователя
-            date = datetime.combine(
-                inventory_data.report_date,
-                inventory_data.report_time
-            )
+            await self.validate_items(db, inventory_data)
+            values = self.build_values(inventory_data)
 
-            db_inventory = DailyInventoryV2(
-                location=inventory_data.location,
-                shift_type=inventory_data.shift_type,
-                cashier_name=inventory_data.cashier_name,
-                date=date,
-                inventory_data=inventory_json
-            )
-
-            db.add(db_inventory)
+            # INSERT ... RETURNING отдает строку с created_at/updated_at без refresh
+            result = await db.execute(insert(DailyInventoryV2).values(**values).returning(DailyInventoryV2))
+            db_inventory = result.scalar_one()
+            await publish_report_event(db, EVENT_CREATED, "daily_inventory_v2", db_inventory.id, db_inventory.location)
             await db.commit()
-            await db.refresh(db_inventory)
 
-            print(f"✅ Инвентаризация v2 создана с ID: {db_inventory.id}")
+            logger.info(f"✅ Инвентаризация v2 создана с ID: {db_inventory.id}")
 
             # Запускаем отправку в Telegram в фоне
             if self.telegram_service:
-                asyncio.create_task(self._send_to_telegram_background(db_inventory.id))
+                telegram_delivery.submit("daily_inventory_v2", partial(self._send_to_telegram_background, db_inventory.id, values))
 
             return db_inventory
 
@@ -93,47 +101,75 @@ class DailyInventoryV2CRUD:
                 detail=f"Ошибка создания инвентаризации: {str(e)}"
             )
 
-    async def _send_to_telegram_background(self, inventory_id: int):
+    @tracked_background_task("daily_inventory_v2")
+    async def _send_to_telegram_background(self, inventory_id: int, values: dict):
         """
-        Фоновая отправка отчета инвентаризации v2 в Telegram.
+        Фоновая отправка отчета инвентаризации v2 в Telegram по значениям колонок,
+        переданным из создания: названия товаров берутся из кеша справочника,
+        БД нужна только если кеш устарел.
+        Возвращает True, если отчет ушел: по этому очередь повторов решает, откладывать ли его.
         """
         from ..core import db_helper
 
         try:
-            # Создаем новую сессию БД для фоновой задачи
+            # Сессия не берет соединение, пока справочник в кеше свежий
             async with db_helper.session_factory() as db_session:
-                try:
-                    # Получаем детальную информацию об инвентаризации
-                    detailed_inventory = await self.get_inventory_with_items(db_session, inventory_id)
-
-                    if not detailed_inventory:
-                        print(f"⚠️  Инвентаризация v2 с ID {inventory_id} не найдена для отправки в Telegram")
-                        return
-
-                    # Отправляем в Telegram (с таймаутом)
-                    telegram_success = await asyncio.wait_for(
-                        self.telegram_service.send_daily_inventory_v2_report(detailed_inventory),
-                        timeout=30  # 30 секунд таймаут
-                    )
-
-                    if telegram_success:
-                        print(
-                            f"✅ Инвентаризация v2 ID {inventory_id} отправлена в Telegram для локации: {detailed_inventory['location']}")
-                    else:
-                        print(
-                            f"⚠️  Инвентаризация v2 ID {inventory_id} создана, но не отправлена в Telegram для локации: {detailed_inventory['location']}")
-
-                except asyncio.TimeoutError:
-                    print(f"⏰ Таймаут при отправке инвентаризации v2 ID {inventory_id} в Telegram")
-                except Exception as telegram_error:
-                    print(
-                        f"⚠️  Ошибка отправки инвентаризации v2 ID {inventory_id} в Telegram: {str(telegram_error)}")
+                items = (await catalog_cache.get(db_session)).items
+            detailed_inventory = {"id": inventory_id, **self._with_item_details(values, items)}
+
+            # Отправляем в Telegram (с таймаутом)
+            telegram_success = await asyncio.wait_for(
+                self.telegram_service.send_daily_inventory_v2_report(detailed_inventory),
+                timeout=30  # 30 секунд таймаут
+            )
+
+            if telegram_success:
+                logger.info(
+                    f"✅ Инвентаризация v2 ID {inventory_id} отправлена в Telegram для локации: {values['location']}")
+            else:
+                logger.warning(
+                    f"⚠️  Инвентаризация v2 ID {inventory_id} создана, но не отправлена в Telegram для локации: {values['location']}")
 
+            return telegram_success
+
+        except asyncio.TimeoutError:
+            logger.warning(f"⏰ Таймаут при отправке инвентаризации v2 ID {inventory_id} в Telegram")
         except Exception as e:
-            print(
-                f"⚠️  Критическая ошибка в фоновой отправке Telegram для инвентаризации v2 ID {inventory_id}: {str(e)}"
+            logger.exception(
+                f"⚠️  Ошибка фоновой отправки в Telegram для инвентаризации v2 ID {inventory_id}: {str(e)}"
             )
 
+    @staticmethod
+    def _with_item_details(inventory: Dict[str, Any], items: Dict[int, Any]) -> Dict[str, Any]:
+        """Поля инвентаризации с названиями и единицами товаров из справочника"""
+        detailed_data = []
+        for entry in inventory.get("inventory_data") or []:
+            item_id = entry["item_id"]
+            item = items.get(item_id)
+            if item:
+                detailed_data.append({
+                    "item_id": item_id,
+                    "item_name": item.name,
+                    "item_unit": item.unit,
+                    "quantity": entry["quantity"]
+                })
+            else:
+                detailed_data.append({
+                    "item_id": item_id,
+                    "item_name": "Товар не найден",
+                    "item_unit": "шт",
+                    "quantity": entry["quantity"]
+                })
+
+        return {
+            "location": inventory["location"],
+            "shift_type": inventory["shift_type"],
+            "cashier_name": inventory["cashier_name"],
+            "date": inventory["date"],
+            "inventory_data": detailed_data,
+        }
+
+    @db_timed
     async def get_inventory_with_items(
             self,
             db: AsyncSession,
@@ -151,42 +187,18 @@ class DailyInventoryV2CRUD:
                 return None
 
             # Получаем информацию о товарах
-            if inventory.inventory_data:
-                item_ids = [entry["item_id"] for entry in inventory.inventory_data]
-                items_result = await db.execute(
-                    select(InventoryItem).where(InventoryItem.id.in_(item_ids))
-                )
-                items = {item.id: item for item in items_result.scalars().all()}
-
-                # Объединяем данные
-                detailed_data = []
-                for entry in inventory.inventory_data:
-                    item_id = entry["item_id"]
-                    item = items.get(item_id)
-                    if item:
-                        detailed_data.append({
-                            "item_id": item_id,
-                            "item_name": item.name,
-                            "item_unit": item.unit,
-                            "quantity": entry["quantity"]
-                        })
-                    else:
-                        detailed_data.append({
-                            "item_id": item_id,
-                            "item_name": "Товар не найден",
-                            "item_unit": "шт",
-                            "quantity": entry["quantity"]
-                        })
-            else:
-                detailed_data = []
-
-            return {
-                "id": inventory.id,
+            items = (await catalog_cache.get(db)).items if inventory.inventory_data else {}
+            fields = {
                 "location": inventory.location,
                 "shift_type": inventory.shift_type,
                 "cashier_name": inventory.cashier_name,
                 "date": inventory.date,
-                "inventory_data": detailed_data,
+                "inventory_data": inventory.inventory_data,
+            }
+
+            return {
+                "id": inventory.id,
+                **self._with_item_details(fields, items),
                 "created_at": inventory.created_at,
                 "updated_at": inventory.updated_at
             }
@@ -197,6 +209,7 @@ class DailyInventoryV2CRUD:
                 detail=f"Ошибка получения инвентаризации: {str(e)}"
             )
 
+    @db_timed
     async def get_inventory_list(
             self,
             db: AsyncSession,
@@ -209,7 +222,7 @@ class DailyInventoryV2CRUD:
         try:
             # Базовый запрос
             query = select(DailyInventoryV2)
-            count_query = select(DailyInventoryV2).count()
+            count_query = select(func.count(DailyInventoryV2.id))
 
             # Применяем фильтры
             if location:
@@ -239,6 +252,7 @@ class DailyInventoryV2CRUD:
                 detail=f"Ошибка получения списка инвентаризаций: {str(e)}"
             )
 
+    @db_timed
     async def delete_inventory(self, db: AsyncSession, inventory_id: int) -> bool:
         """Удалить инвентаризацию"""
         try:
@@ -251,9 +265,10 @@ class DailyInventoryV2CRUD:
                 return False
 
             await db.delete(inventory)
+            await publish_report_event(db, EVENT_DELETED, "daily_inventory_v2", inventory_id, inventory.location)
             await db.commit()
 
-            print(f"✅ Инвентаризация v2 удалена: ID {inventory_id}")
+            logger.info(f"✅ Инвентаризация v2 удалена: ID {inventory_id}")
             return True
 
         except SQLAlchemyError as e:
@@ -1,4 +1,5 @@
-from sqlalchemy import select, func
+import logging
+from sqlalchemy import func, insert, select
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from fastapi import HTTPException, status
 from datetime import datetime
@@ -7,11 +8,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.inventory_item import InventoryItem
 from app.schemas.inventory_item import InventoryItemCreate, InventoryItemUpdate
+from app.core.catalog_cache import catalog_cache
+from app.core.metrics import db_timed
+
+logger = logging.getLogger(__name__)
 
 
 class InventoryItemCRUD:
     """CRUD операции для товаров инвентаризации"""
 
+    @db_timed
     async def create_item(
             self,
             db: AsyncSession,
@@ -19,17 +25,20 @@ class InventoryItemCRUD:
     ) -> InventoryItem:
         """Создать новый товар"""
         try:
-            db_item = InventoryItem(
-                name=item_data.name,
-                unit=item_data.unit,
-                is_active=item_data.is_active
+            # INSERT ... RETURNING отдает строку с created_at/updated_at без refresh
+            result = await db.execute(
+                insert(InventoryItem).values(
+                    name=item_data.name,
+                    unit=item_data.unit,
+                    is_active=item_data.is_active
+                ).returning(InventoryItem)
             )
-
-            db.add(db_item)
+            db_item = result.scalar_one()
+            await catalog_cache.notify(db, db_item.id)
             await db.commit()
-            await db.refresh(db_item)
+            catalog_cache.invalidate()
 
-            print(f"✅ Товар создан: {db_item.name}")
+            logger.info(f"✅ Товар создан: {db_item.name}")
             return db_item
 
         except IntegrityError:
@@ -45,6 +54,7 @@ class InventoryItemCRUD:
                 detail=f"Ошибка создания товара: {str(e)}"
             )
 
+    @db_timed
     async def get_item(self, db: AsyncSession, item_id: int) -> Optional[InventoryItem]:
         """Получить товар по ID"""
         try:
@@ -58,6 +68,7 @@ class InventoryItemCRUD:
                 detail=f"Ошибка получения товара: {str(e)}"
             )
 
+    @db_timed
     async def get_items(
             self,
             db: AsyncSession,
@@ -95,6 +106,7 @@ class InventoryItemCRUD:
                 detail=f"Ошибка получения списка товаров: {str(e)}"
             )
 
+    @db_timed
     async def update_item(
             self,
             db: AsyncSession,
@@ -117,10 +129,12 @@ class InventoryItemCRUD:
                 setattr(db_item, field, value)
 
             db_item.updated_at = datetime.utcnow()
+            await catalog_cache.notify(db, item_id)
             await db.commit()
             await db.refresh(db_item)
+            catalog_cache.invalidate()
 
-            print(f"✅ Товар обновлен: {db_item.name}")
+            logger.info(f"✅ Товар обновлен: {db_item.name}")
             return db_item
 
         except IntegrityError:
@@ -136,6 +150,7 @@ class InventoryItemCRUD:
                 detail=f"Ошибка обновления товара: {str(e)}"
             )
 
+    @db_timed
     async def delete_item(self, db: AsyncSession, item_id: int) -> bool:
         """Удалить товар (мягкое удаление - деактивация)"""
         try:
@@ -151,9 +166,11 @@ class InventoryItemCRUD:
             db_item.is_active = False
             db_item.updated_at = datetime.utcnow()
 
+            await catalog_cache.notify(db, item_id)
             await db.commit()
+            catalog_cache.invalidate()
 
-            print(f"✅ Товар деактивирован: {db_item.name}")
+            logger.info(f"✅ Товар деактивирован: {db_item.name}")
             return True
 
         except SQLAlchemyError as e:
@@ -1,25 +1,32 @@
-from typing import Dict, List, Any, Optional
+import logging
+import mimetypes
+from functools import partial
+from pathlib import PurePosixPath
+from typing import Dict, List, Any, Optional, Sequence
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from app.schemas import ReportOnGoodsCreate
 from app.models import ReportOnGoods
 from app.services import TelegramService
 from app.services.file_service import FileService
+from app.services.telegram_delivery import telegram_delivery
+from app.crud.uploaded_photo import UploadedPhotoCRUD
+from app.core.metrics import db_timed
+from app.core.report_events import EVENT_CREATED, EVENT_DELETED, publish_report_event
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class ReportOnGoodCRUD:
     def __init__(self):
         self.telegram_service = TelegramService()
         self.file_service = FileService()
+        self.uploaded_photos = UploadedPhotoCRUD()
 
-    async def create_report_on_good(
-            self,
-            db: AsyncSession,
-            report_data: ReportOnGoodsCreate,
-            photos: List[Dict[str, Any]]
-    ):
+    def build_values(self, report_data: ReportOnGoodsCreate) -> dict:
+        """Значения колонок нового отчета; общие для одиночного создания и пакетной синхронизации"""
         def smart_count(val):
             """1.0 -> 1, 0.45 -> 0.45"""
             return int(val) if val == int(val) else val
@@ -48,7 +55,7 @@ class ReportOnGoodCRUD:
                 'unit': upakovki.unit,
             })
 
-        db_report = ReportOnGoods(
+        return dict(
             location=report_data.location,
             shift_type=report_data.shift_type,
             cashier_name=report_data.cashier_name,
@@ -57,42 +64,91 @@ class ReportOnGoodCRUD:
             upakovki_xoz=upakovki_dict,
         )
 
-        db.add(db_report)
-        # Сохраняем фотографии на диск и обновляем поле photos_urls
-        photos_urls = []
+    @db_timed
+    async def create_report_on_good(
+            self,
+            db: AsyncSession,
+            report_data: ReportOnGoodsCreate,
+            photos: List[Dict[str, Any]],
+            photo_ids: Optional[List[str]] = None
+    ):
+        values = self.build_values(report_data)
+
+        # Сохраняем фотографии из запроса в хранилище до первого обращения к БД:
+        # запись файлов не держит соединение
+        saved_urls = []
         try:
             if photos:
                 for p in photos:
                     # p ожидается как dict с keys: filename, content, content_type
-                    saved_path = self.file_service.save_file_bytes(p['content'], p.get('filename', 'photo.jpg'), subfolder='report_on_goods')
+                    saved_path = await self.file_service.save_file_bytes(p['content'], p.get('filename', 'photo.jpg'), subfolder='report_on_goods')
                     file_url = self.file_service.get_file_url(saved_path)
-                    photos_urls.append(file_url)
-                db_report.photos_urls = photos_urls
+                    saved_urls.append(file_url)
 
         except Exception as e:
-            print(f"⚠️ Ошибка сохранения фото отчёта приема товаров: {e}")
+            logger.warning(f"⚠️ Ошибка сохранения фото отчёта приема товаров: {e}")
+
+        # Фото, загруженные заранее (/photos), прикрепляются в транзакции отчета и идут первыми
+        stored_paths = await self.uploaded_photos.claim(db, photo_ids) if photo_ids else []
+        photos_urls = [self.file_service.get_file_url(path) for path in stored_paths] + saved_urls
+
+        if photos_urls:
+            values['photos_urls'] = photos_urls
 
+        # INSERT ... RETURNING возвращает строку вместе с серверной датой — без refresh
+        result = await db.execute(insert(ReportOnGoods).values(**values).returning(ReportOnGoods))
+        db_report = result.scalar_one()
+        await publish_report_event(db, EVENT_CREATED, "report_on_goods", db_report.id, db_report.location)
         await db.commit()
-        await db.refresh(db_report)
 
-        # Отправляем в Telegram
+        # Отправляем в Telegram в фоне; пока Telegram недоступен, отправка ждет в очереди повторов
+        telegram_delivery.submit("report_on_goods", partial(
+            self.send_to_telegram, {**values, 'photos_urls': photos_urls}, photos, stored_paths
+        ))
+
+        return db_report
+
+    async def send_to_telegram(
+            self, values: Dict[str, Any], photos: List[Dict[str, Any]], stored_paths: Sequence[str] = ()
+    ) -> bool:
+        """
+        Отправка отчета в Telegram по значениям колонок; ошибки только логируются, True — отчет ушел.
+        Фото, загруженные заранее (stored_paths), читаются из хранилища только здесь.
+        """
         try:
+            if stored_paths:
+                photos = await self._read_stored_photos(stored_paths) + list(photos or [])
+
             report_dict = {
-                'location': db_report.location,
-                'cashier_name': db_report.cashier_name,
-                'shift_type': db_report.shift_type,
-                'kuxnya': db_report.kuxnya,
-                'bar': db_report.bar,
-                'upakovki_xoz': db_report.upakovki_xoz,
-                'photos_urls': photos_urls,
+                'location': values['location'],
+                'cashier_name': values['cashier_name'],
+                'shift_type': values['shift_type'],
+                'kuxnya': values['kuxnya'],
+                'bar': values['bar'],
+                'upakovki_xoz': values['upakovki_xoz'],
+                'photos_urls': values.get('photos_urls') or [],
             }
 
-            await self.telegram_service.send_goods_report(report_dict, photos=photos)
+            return await self.telegram_service.send_goods_report(report_dict, photos=photos)
 
         except Exception as e:
-            print(f"Ошибка отправки отчета товаров в Telegram: {str(e)}")
+            logger.error(f"Ошибка отправки отчета товаров в Telegram: {str(e)}")
+            return False
 
-        return db_report
+    async def _read_stored_photos(self, paths: Sequence[str]) -> List[Dict[str, Any]]:
+        photos = []
+        for path in paths:
+            content = await self.file_service.read_file(path)
+            if content is None:
+                logger.warning(f"Файл фотографии не найден: {path}")
+                continue
+            filename = PurePosixPath(path).name
+            photos.append({
+                "filename": filename,
+                "content": content,
+                "content_type": mimetypes.guess_type(filename)[0] or "image/jpeg"
+            })
+        return photos
 
     async def send_photo(self, location: str, photos: List[Dict[str, Any]]):
         try:
@@ -100,6 +156,7 @@ class ReportOnGoodCRUD:
         except Exception as e:
             raise HTTPException(status_code=401, detail=str(e))
 
+    @db_timed
     async def get(self, db: AsyncSession, id: int) -> Optional[ReportOnGoods]:
         """Получение отчета приема товаров по ID"""
         try:
@@ -107,9 +164,10 @@ class ReportOnGoodCRUD:
             result = await db.execute(stmt)
             return result.scalar_one_or_none()
         except Exception as e:
-            print(f"❌ Ошибка получения отчета приема товара {id}: {str(e)}")
+            logger.error(f"❌ Ошибка получения отчета приема товара {id}: {str(e)}")
             return None
 
+    @db_timed
     async def remove(self, db: AsyncSession, id: int) -> bool:
         """Удаление отчета приема товаров по ID"""
         try:
@@ -119,8 +177,9 @@ class ReportOnGoodCRUD:
 
             if report:
                 await db.delete(report)
+                await publish_report_event(db, EVENT_DELETED, "report_on_goods", id, report.location)
                 return True
             return False
         except Exception as e:
-            print(f"❌ Ошибка удаления отчета приема товара {id}: {str(e)}")
+            logger.error(f"❌ Ошибка удаления отчета приема товара {id}: {str(e)}")
             return False
@@ -1,224 +1,258 @@
+import logging
 from fastapi import UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from sqlalchemy.exc import SQLAlchemyError
 from app.models import ShiftReport
 from app.schemas import ShiftReportCreate
 from app.services import ReportCalculator, TelegramService
 from app.services import FileService
-from typing import Optional
+from app.services.telegram_delivery import telegram_delivery
+from app.crud.uploaded_photo import UploadedPhotoCRUD
+from app.core.metrics import db_timed, tracked_background_task
+from app.core.report_events import EVENT_CREATED, EVENT_DELETED, EVENT_STATUS_CHANGED, publish_report_event
+from functools import partial
+from typing import Optional, Tuple
 import asyncio
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+logger = logging.getLogger(__name__)
+
 class ShiftReportCRUD:
     def __init__(self):
         self.calculator = ReportCalculator()
         self.file_service = FileService()
+        self.uploaded_photos = UploadedPhotoCRUD()
         # Инициализация TelegramService в try-catch
         try:
             self.telegram_service = TelegramService()
         except Exception as e:
-            print(f"⚠️  Ошибка инициализации Telegram сервиса: {str(e)}")
+            logger.warning(f"⚠️  Ошибка инициализации Telegram сервиса: {str(e)}")
             self.telegram_service = None
 
     async def create_shift_report(
             self,
             db: AsyncSession,
             report_data: ShiftReportCreate,
-            photo: UploadFile,
-            receipt_photo: Optional[UploadFile] = None
+            photo: Optional[UploadFile],
+            receipt_photo: Optional[UploadFile] = None,
+            photo_id: Optional[str] = None,
+            receipt_photo_id: Optional[str] = None
     ) -> ShiftReport:
         """
         Создает новый отчет завершения смены с расчетами.
+        Фото приходит файлом в запросе или id фото, загруженного заранее (/photos).
         Telegram отправка происходит асинхронно и не влияет на создание записи.
         """
         # Создаем отчет в базе данных
-        db_report = await self._create_report_in_db_safe(db, report_data, photo, receipt_photo)
+        db_report, values = await self._create_report_in_db_safe(
+            db, report_data, photo, receipt_photo, photo_id, receipt_photo_id
+        )
 
         # Запускаем отправку в Telegram в фоне (не ждем результата)
         if self.telegram_service and db_report:
-            asyncio.create_task(self._send_to_telegram_background(db_report.id))
+            telegram_delivery.submit("shift_report", partial(self._send_to_telegram_background, db_report.id, values))
 
         return db_report
 
+    def build_values(
+            self,
+            report_data: ShiftReportCreate,
+            photo_path: str,
+            receipt_photo_path: Optional[str] = None
+    ) -> dict:
+        """
+        Значения колонок нового отчета смены: дата, сверка и JSON-поля.
+        Используется и при создании одного отчета, и при пакетной синхронизации.
+        """
+        # Используем переданную дату смены или текущее время по МСК
+        if report_data.shift_date:
+            # Если дата передана, используем её и добавляем timezone МСК
+            date = report_data.shift_date.replace(tzinfo=ZoneInfo("Europe/Moscow"))
+        else:
+            # Иначе используем текущее время по МСК
+            date = datetime.now(ZoneInfo("UTC")).astimezone(ZoneInfo("Europe/Moscow"))
+
+        # Рассчитываем сверку (ОБНОВЛЕНО: добавлены новые поля)
+        calculations = self.calculator.calculate_shift_report(
+            total_revenue=report_data.total_revenue,
+            returns=report_data.returns,
+            income_entries=report_data.income_entries,
+            expense_entries=report_data.expense_entries,
+            acquiring=report_data.acquiring,
+            qr_code=report_data.qr_code,
+            online_app=report_data.online_app,
+            yandex_food=report_data.yandex_food,
+            yandex_food_no_system=report_data.yandex_food_no_system,  # НОВОЕ ПОЛЕ
+            primehill=report_data.primehill,  # НОВОЕ ПОЛЕ
+            fact_cash=report_data.fact_cash
+        )
+
+        # Подготавливаем данные для JSON полей
+        income_entries_dict = []
+        for entry in report_data.income_entries:
+            income_entries_dict.append({
+                'amount': float(entry.amount),
+                'comment': entry.comment
+            })
+
+        expense_entries_dict = []
+        for entry in report_data.expense_entries:
+            expense_entries_dict.append({
+                'description': entry.description,
+                'amount': float(entry.amount)
+            })
+
+        # Значения колонок отчета (ОБНОВЛЕНО: добавлены новые поля)
+        return dict(
+            location=report_data.location,
+            shift_type=report_data.shift_type,
+            date=date,
+            cashier_name=report_data.cashier_name,
+            income_entries=income_entries_dict,
+            expense_entries=expense_entries_dict,
+            total_income=calculations["total_income"],
+            total_expenses=calculations["total_expenses"],
+            total_revenue=report_data.total_revenue,
+            returns=report_data.returns,
+            acquiring=report_data.acquiring,
+            qr_code=report_data.qr_code,
+            online_app=report_data.online_app,
+            yandex_food=report_data.yandex_food,
+            yandex_food_no_system=report_data.yandex_food_no_system,  # НОВОЕ ПОЛЕ
+            primehill=report_data.primehill,  # НОВОЕ ПОЛЕ
+            fact_cash=report_data.fact_cash,
+            total_acquiring=calculations["total_acquiring"],
+            calculated_amount=calculations["calculated_amount"],
+            surplus_shortage=calculations["surplus_shortage"],
+            photo_path=photo_path,
+            receipt_photo_path=receipt_photo_path,  # НОВОЕ ПОЛЕ
+            comments=report_data.comments,
+            status="draft"
+        )
+
+    @db_timed
     async def _create_report_in_db_safe(
             self,
             db: AsyncSession,
             report_data: ShiftReportCreate,
-            photo: UploadFile,
-            receipt_photo: Optional[UploadFile] = None
-    ) -> ShiftReport:
+            photo: Optional[UploadFile],
+            receipt_photo: Optional[UploadFile] = None,
+            photo_id: Optional[str] = None,
+            receipt_photo_id: Optional[str] = None
+    ) -> Tuple[ShiftReport, dict]:
         """
         Безопасно создает отчет в базе данных с правильной обработкой транзакций.
+        Возвращает отчет и значения его колонок — по ним собирается сообщение в Telegram.
         """
         db_report = None
 
         try:
-
-            # Используем переданную дату смены или текущее время по МСК
-            if report_data.shift_date:
-                # Если дата передана, используем её и добавляем timezone МСК
-                date = report_data.shift_date.replace(tzinfo=ZoneInfo("Europe/Moscow"))
-            else:
-                # Иначе используем текущее время по МСК
-                date = datetime.now(ZoneInfo("UTC")).astimezone(ZoneInfo("Europe/Moscow"))
-
-            # Сохраняем фото
-            photo_path = self.file_service.save_shift_report_photo(photo)
+            # Сохраняем фото из запроса до первого обращения к БД: запись файла не держит соединение
+            photo_path = await self.file_service.save_shift_report_photo(photo) if photo else None
 
             # НОВОЕ: Сохраняем фото чека, если оно предоставлено
-            receipt_photo_path = None
-            if receipt_photo:
-                receipt_photo_path = self.file_service.save_shift_report_photo(receipt_photo)
-
-            # Рассчитываем сверку (ОБНОВЛЕНО: добавлены новые поля)
-            calculations = self.calculator.calculate_shift_report(
-                total_revenue=report_data.total_revenue,
-                returns=report_data.returns,
-                income_entries=report_data.income_entries,
-                expense_entries=report_data.expense_entries,
-                acquiring=report_data.acquiring,
-                qr_code=report_data.qr_code,
-                online_app=report_data.online_app,
-                yandex_food=report_data.yandex_food,
-                yandex_food_no_system=report_data.yandex_food_no_system,  # НОВОЕ ПОЛЕ
-                primehill=report_data.primehill,  # НОВОЕ ПОЛЕ
-                fact_cash=report_data.fact_cash
-            )
+            receipt_photo_path = await self.file_service.save_shift_report_photo(receipt_photo) if receipt_photo else None
 
-            # Подготавливаем данные для JSON полей
-            income_entries_dict = []
-            for entry in report_data.income_entries:
-                income_entries_dict.append({
-                    'amount': float(entry.amount),
-                    'comment': entry.comment
-                })
-
-            expense_entries_dict = []
-            for entry in report_data.expense_entries:
-                expense_entries_dict.append({
-                    'description': entry.description,
-                    'amount': float(entry.amount)
-                })
-
-            # Создаем отчет (ОБНОВЛЕНО: добавлены новые поля)
-            db_report = ShiftReport(
-                location=report_data.location,
-                shift_type=report_data.shift_type,
-                date=date,
-                cashier_name=report_data.cashier_name,
-                income_entries=income_entries_dict,
-                expense_entries=expense_entries_dict,
-                total_income=calculations["total_income"],
-                total_expenses=calculations["total_expenses"],
-                total_revenue=report_data.total_revenue,
-                returns=report_data.returns,
-                acquiring=report_data.acquiring,
-                qr_code=report_data.qr_code,
-                online_app=report_data.online_app,
-                yandex_food=report_data.yandex_food,
-                yandex_food_no_system=report_data.yandex_food_no_system,  # НОВОЕ ПОЛЕ
-                primehill=report_data.primehill,  # НОВОЕ ПОЛЕ
-                fact_cash=report_data.fact_cash,
-                total_acquiring=calculations["total_acquiring"],
-                calculated_amount=calculations["calculated_amount"],
-                surplus_shortage=calculations["surplus_shortage"],
-                photo_path=photo_path,
-                receipt_photo_path=receipt_photo_path,  # НОВОЕ ПОЛЕ
-                comments=report_data.comments,
-                status="draft"
-            )
+            # Фото, загруженные заранее (/photos), прикрепляются в транзакции отчета
+            claimed = iter(await self.uploaded_photos.claim(db, [i for i in (photo_id, receipt_photo_id) if i]))
+            if photo_id:
+                photo_path = next(claimed)
+            if receipt_photo_id:
+                receipt_photo_path = next(claimed)
+
+            values = self.build_values(report_data, photo_path, receipt_photo_path)
 
-            # Сохраняем отчет в базу данных
-            db.add(db_report)
+            # INSERT ... RETURNING возвращает строку целиком вместе с серверными значениями — без refresh
+            result = await db.execute(insert(ShiftReport).values(**values).returning(ShiftReport))
+            db_report = result.scalar_one()
+            await publish_report_event(db, EVENT_CREATED, "shift_report", db_report.id, db_report.location)
             await db.commit()
-            await db.refresh(db_report)
 
-            print(f"✅ Отчет смены создан в БД с ID: {db_report.id}")
-            return db_report
+            logger.info(f"✅ Отчет смены создан в БД с ID: {db_report.id}")
+            return db_report, values
 
         except SQLAlchemyError as e:
-            print(f"❌ Ошибка SQLAlchemy при создании отчета: {str(e)}")
+            logger.error(f"❌ Ошибка SQLAlchemy при создании отчета: {str(e)}")
             await db.rollback()
             raise e
         except Exception as e:
-            print(f"❌ Общая ошибка при создании отчета: {str(e)}")
+            logger.error(f"❌ Общая ошибка при создании отчета: {str(e)}")
             await db.rollback()
             raise e
 
-    async def _send_to_telegram_background(self, report_id: int):
+    @staticmethod
+    def telegram_payload(values: dict) -> dict:
+        """Данные для сообщения в Telegram из значений колонок отчета (ОБНОВЛЕНО: добавлены новые поля)"""
+        return {
+            'location': values['location'],
+            'cashier_name': values['cashier_name'],
+            'shift_type': values['shift_type'],
+            'date': values['date'],
+            'total_revenue': float(values['total_revenue']),
+            'returns': float(values['returns']),
+            'acquiring': float(values['acquiring']),
+            'qr_code': float(values['qr_code']),
+            'online_app': float(values['online_app']),
+            'yandex_food': float(values['yandex_food']),
+            'yandex_food_no_system': float(values['yandex_food_no_system']),  # НОВОЕ ПОЛЕ
+            'primehill': float(values['primehill']),  # НОВОЕ ПОЛЕ
+            'total_acquiring': float(values['total_acquiring']),
+            'income_entries': values['income_entries'],
+            'total_income': float(values['total_income']),
+            'expense_entries': values['expense_entries'],
+            'total_expenses': float(values['total_expenses']),
+            'calculated_amount': float(values['calculated_amount']),
+            'fact_cash': float(values['fact_cash']),
+            'surplus_shortage': float(values['surplus_shortage']),
+            "comments": values['comments']
+        }
+
+    @tracked_background_task("shift_report")
+    async def _send_to_telegram_background(self, report_id: int, values: dict):
         """
-        Фоновая отправка отчета в Telegram с использованием новой сессии БД.
+        Фоновая отправка отчета в Telegram по значениям колонок, переданным из создания:
+        строка заново не читается, сессия БД открывается только для смены статуса.
+        Возвращает True, если отчет ушел: по этому очередь повторов решает, откладывать ли его.
         """
         from ..core import db_helper
 
+        location = values['location']
         try:
-            # Создаем новую сессию БД для фоновой задачи
-            async with db_helper.session_factory() as db_session:
-                try:
-                    # Получаем отчет из БД
-                    result = await db_session.execute(
-                        select(ShiftReport).where(ShiftReport.id == report_id)
+            # Отправляем в Telegram (с таймаутом)
+            telegram_success = await asyncio.wait_for(
+                self.telegram_service.send_shift_report(
+                    self.telegram_payload(values),
+                    values['photo_path'],
+                    values['receipt_photo_path']  # НОВОЕ: передаем фото чека
+                ),
+                timeout=30  # 30 секунд таймаут
+            )
+
+            # Обновляем статус в новой транзакции
+            if telegram_success:
+                async with db_helper.session_factory() as db_session:
+                    await db_session.execute(
+                        update(ShiftReport).where(ShiftReport.id == report_id).values(status="sent")
                     )
-                    db_report = result.scalar_one_or_none()
-
-                    if not db_report:
-                        print(f"⚠️  Отчет с ID {report_id} не найден для отправки в Telegram")
-                        return
-
-                    # Подготавливаем данные для отправки (ОБНОВЛЕНО: добавлены новые поля)
-                    report_dict = {
-                        'location': db_report.location,
-                        'cashier_name': db_report.cashier_name,
-                        'shift_type': db_report.shift_type,
-                        'date': db_report.date,
-                        'total_revenue': float(db_report.total_revenue),
-                        'returns': float(db_report.returns),
-                        'acquiring': float(db_report.acquiring),
-                        'qr_code': float(db_report.qr_code),
-                        'online_app': float(db_report.online_app),
-                        'yandex_food': float(db_report.yandex_food),
-                        'yandex_food_no_system': float(db_report.yandex_food_no_system),  # НОВОЕ ПОЛЕ
-                        'primehill': float(db_report.primehill),  # НОВОЕ ПОЛЕ
-                        'total_acquiring': float(db_report.total_acquiring),
-                        'income_entries': db_report.income_entries,
-                        'total_income': float(db_report.total_income),
-                        'expense_entries': db_report.expense_entries,
-                        'total_expenses': float(db_report.total_expenses),
-                        'calculated_amount': float(db_report.calculated_amount),
-                        'fact_cash': float(db_report.fact_cash),
-                        'surplus_shortage': float(db_report.surplus_shortage),
-                        "comments": db_report.comments
-                    }
-
-                    # Отправляем в Telegram (с таймаутом)
-                    telegram_success = await asyncio.wait_for(
-                        self.telegram_service.send_shift_report(
-                            report_dict,
-                            db_report.photo_path,
-                            db_report.receipt_photo_path  # НОВОЕ: передаем фото чека
-                        ),
-                        timeout=30  # 30 секунд таймаут
+                    await publish_report_event(
+                        db_session, EVENT_STATUS_CHANGED, "shift_report", report_id, location, status="sent"
                     )
+                    await db_session.commit()
+                logger.info(f"✅ Отчет смены ID {report_id} отправлен в Telegram для локации: {location}")
+            else:
+                logger.warning(
+                    f"⚠️  Отчет смены ID {report_id} создан, но не отправлен в Telegram для локации: {location}")
 
-                    # Обновляем статус в новой транзакции
-                    if telegram_success:
-                        db_report.status = "sent"
-                        await db_session.commit()
-                        print(f"✅ Отчет смены ID {report_id} отправлен в Telegram для локации: {db_report.location}")
-                    else:
-                        print(
-                            f"⚠️  Отчет смены ID {report_id} создан, но не отправлен в Telegram для локации: {db_report.location}")
-
-                except asyncio.TimeoutError:
-                    print(f"⏰ Таймаут при отправке отчета ID {report_id} в Telegram")
-                except Exception as telegram_error:
-                    print(f"⚠️  Ошибка отправки отчета ID {report_id} в Telegram: {str(telegram_error)}")
+            return telegram_success
 
+        except asyncio.TimeoutError:
+            logger.warning(f"⏰ Таймаут при отправке отчета ID {report_id} в Telegram")
         except Exception as e:
-            print(f"⚠️  Критическая ошибка в фоновой отправке Telegram для отчета ID {report_id}: {str(e)}")
+            logger.exception(f"⚠️  Ошибка фоновой отправки в Telegram для отчета ID {report_id}: {str(e)}")
 
+    @db_timed
     async def get_shift_report(
             self,
             db: AsyncSession,
@@ -236,6 +270,7 @@ class ShiftReportCRUD:
             await db.rollback()
             raise e
 
+    @db_timed
     async def update_status(
             self,
             db: AsyncSession,
@@ -253,6 +288,9 @@ class ShiftReportCRUD:
 
             if report:
                 report.status = status
+                await publish_report_event(
+                    db, EVENT_STATUS_CHANGED, "shift_report", report_id, report.location, status=status
+                )
                 await db.commit()
                 await db.refresh(report)
 
@@ -261,6 +299,7 @@ class ShiftReportCRUD:
             await db.rollback()
             raise e
 
+    @db_timed
     async def get(self, db: AsyncSession, id: int) -> Optional[ShiftReport]:
         """Получение отчета по ID"""
         try:
@@ -268,9 +307,10 @@ class ShiftReportCRUD:
             result = await db.execute(stmt)
             return result.scalar_one_or_none()
         except Exception as e:
-            print(f"❌ Ошибка получения отчета {id}: {str(e)}")
+            logger.error(f"❌ Ошибка получения отчета {id}: {str(e)}")
             return None
 
+    @db_timed
     async def remove(self, db: AsyncSession, id: int) -> bool:
         """Удаление отчета по ID"""
         try:
@@ -280,9 +320,10 @@ class ShiftReportCRUD:
 
             if report:
                 await db.delete(report)
+                await publish_report_event(db, EVENT_DELETED, "shift_report", id, report.location)
                 return True
             return False
         except Exception as e:
-            print(f"❌ Ошибка удаления отчета {id}: {str(e)}")
+            logger.error(f"❌ Ошибка удаления отчета {id}: {str(e)}")
             return False
 
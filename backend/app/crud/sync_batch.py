@@ -0,0 +1,227 @@
+import logging
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import DailyInventoryV2, ReportOnGoods, ShiftReport, WriteoffTransfer
+from app.schemas import (
+    DailyInventoryV2Create,
+    ReportOnGoodsCreate,
+    ShiftReportCreate,
+    SyncItem,
+    SyncItemResult,
+    WriteoffTransferCreate,
+)
+from app.services import FileService
+from app.services.telegram_delivery import telegram_delivery
+from app.core.database import release_connection
+from app.core.metrics import db_timed
+from app.core.report_events import EVENT_CREATED, publish_report_event
+from .daily_inventory_v2 import DailyInventoryV2CRUD
+from .report_on_good import ReportOnGoodCRUD
+from .shift_report import ShiftReportCRUD
+from .writeoff_transfer import WriteoffTransferCRUD
+
+logger = logging.getLogger(__name__)
+
+MODELS = {
+    "shift_report": ShiftReport,
+    "report_on_goods": ReportOnGoods,
+    "writeoff_transfer": WriteoffTransfer,
+    "daily_inventory_v2": DailyInventoryV2,
+}
+
+
+class SyncItemError(Exception):
+    """Отчет пакета не прошел проверку; остальные отчеты сохраняются"""
+
+
+@dataclass
+class _PreparedItem:
+    item: SyncItem
+    values: Dict[str, Any]
+    saved_paths: List[str] = field(default_factory=list)
+    # Данные только для отправки в Telegram (тип акта)
+    extra: Dict[str, Any] = field(default_factory=dict)
+    id: Optional[int] = None
+
+
+class SyncBatchCRUD:
+    """Пакетная синхронизация отчетов, накопленных устройством без связи"""
+
+    def __init__(self):
+        self.file_service = FileService()
+        self.shift_report_crud = ShiftReportCRUD()
+        self.report_on_good_crud = ReportOnGoodCRUD()
+        self.writeoff_transfer_crud = WriteoffTransferCRUD()
+        self.daily_inventory_v2_crud = DailyInventoryV2CRUD()
+
+    @db_timed
+    async def sync_batch(
+            self,
+            db: AsyncSession,
+            items: List[SyncItem],
+            files: Dict[str, UploadFile]
+    ) -> List[SyncItemResult]:
+        """
+        Проверяет отчеты и сохраняет файлы по одному, затем вставляет все
+        прошедшие проверку одной транзакцией: по одному INSERT ... RETURNING
+        на тип отчета. Каждый отчет уходит в Telegram своей фоновой задачей.
+        """
+        results: Dict[str, SyncItemResult] = {}
+        prepared: List[_PreparedItem] = []
+
+        for item in items:
+            try:
+                prepared.append(await self._prepare(db, item, files))
+            except SyncItemError as e:
+                results[item.client_id] = SyncItemResult(
+                    client_id=item.client_id, type=item.type, status="invalid", error=str(e)
+                )
+
+        if prepared:
+            try:
+                for report_type, model in MODELS.items():
+                    group = [p for p in prepared if p.item.type == report_type]
+                    if not group:
+                        continue
+                    result = await db.execute(
+                        insert(model).returning(model.id, sort_by_parameter_order=True),
+                        [p.values for p in group],
+                    )
+                    for p, report_id in zip(group, result.scalars().all()):
+                        p.id = report_id
+                for p in prepared:
+                    await publish_report_event(
+                        db, EVENT_CREATED, p.item.type, p.id, p.values.get("location"),
+                        location_to=p.values.get("location_to"),
+                    )
+                await db.commit()
+            except SQLAlchemyError as e:
+                await db.rollback()
+                for p in prepared:
+                    await self._delete_files(p)
+                logger.error(f"❌ Ошибка БД при пакетной синхронизации: {str(e)}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Ошибка базы данных при синхронизации, повторите отправку"
+                )
+
+            for p in prepared:
+                results[p.item.client_id] = SyncItemResult(
+                    client_id=p.item.client_id, type=p.item.type, status="created", id=p.id
+                )
+            logger.info(f"✅ Пакетная синхронизация: создано {len(prepared)} из {len(items)} отчетов")
+            for p in prepared:
+                self._submit_to_telegram(p)
+
+        return [results[item.client_id] for item in items]
+
+    async def _prepare(self, db: AsyncSession, item: SyncItem, files: Dict[str, UploadFile]) -> _PreparedItem:
+        data = dict(item.data)
+        prepared = _PreparedItem(item=item, values={})
+        try:
+            if item.type == "shift_report":
+                report_data = ShiftReportCreate(**data)
+                photo = self._file(item, files, "photo", required=True)
+                receipt_photo = self._file(item, files, "receipt_photo")
+                photo_path = await self.file_service.save_shift_report_photo(photo)
+                prepared.saved_paths.append(photo_path)
+                receipt_photo_path = None
+                if receipt_photo:
+                    receipt_photo_path = await self.file_service.save_shift_report_photo(receipt_photo)
+                    prepared.saved_paths.append(receipt_photo_path)
+                prepared.values = self.shift_report_crud.build_values(report_data, photo_path, receipt_photo_path)
+
+            elif item.type == "report_on_goods":
+                report_data = ReportOnGoodsCreate(**data)
+                photos_urls = []
+                # Байты фото не держим до отправки: в Telegram они читаются из хранилища по saved_paths
+                for photo in self._files(item, files, "photos"):
+                    saved_path = await self.file_service.save_file_bytes(
+                        await photo.read(), photo.filename or "photo.jpg", subfolder="report_on_goods"
+                    )
+                    prepared.saved_paths.append(saved_path)
+                    photos_urls.append(self.file_service.get_file_url(saved_path))
+                prepared.values = {**self.report_on_good_crud.build_values(report_data), "photos_urls": photos_urls}
+
+            elif item.type == "writeoff_transfer":
+                writeoff_or_transfer = data.pop("writeoff_or_transfer", None)
+                report_data = WriteoffTransferCreate(**data)
+                if not writeoff_or_transfer:
+                    writeoff_or_transfer = "Списания" if report_data.writeoffs else "Перемещения"
+                prepared.values = self.writeoff_transfer_crud.build_values(report_data)
+                prepared.extra["writeoff_or_transfer"] = writeoff_or_transfer
+
+            else:
+                inventory_data = DailyInventoryV2Create(**data)
+                await self.daily_inventory_v2_crud.validate_items(db, inventory_data)
+                # Справочник мог загрузиться из БД — не держим соединение, пока сохраняются файлы остальных отчетов
+                await release_connection(db)
+                prepared.values = self.daily_inventory_v2_crud.build_values(inventory_data)
+
+            return prepared
+
+        except ValidationError as e:
+            await self._delete_files(prepared)
+            errors = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            raise SyncItemError(errors)
+        except HTTPException as e:
+            await self._delete_files(prepared)
+            raise SyncItemError(str(e.detail))
+        except SyncItemError:
+            await self._delete_files(prepared)
+            raise
+
+    @staticmethod
+    def _files(item: SyncItem, files: Dict[str, UploadFile], key: str) -> List[UploadFile]:
+        names = item.files.get(key) or []
+        if isinstance(names, str):
+            names = [names]
+        missing = [name for name in names if name not in files]
+        if missing:
+            raise SyncItemError(f"Нет файлов в запросе: {', '.join(missing)}")
+        return [files[name] for name in names]
+
+    def _file(self, item: SyncItem, files: Dict[str, UploadFile], key: str, required: bool = False) -> Optional[UploadFile]:
+        found = self._files(item, files, key)
+        if required and not found:
+            raise SyncItemError(f"Не передан файл {key}")
+        return found[0] if found else None
+
+    async def _delete_files(self, prepared: _PreparedItem) -> None:
+        for path in prepared.saved_paths:
+            await self.file_service.delete_shift_report_photo(path)
+
+    def _submit_to_telegram(self, p: _PreparedItem) -> None:
+        """
+        Отправка отчета пакета в Telegram. Каждый отчет — отдельная задача со своим таймаутом
+        и проверкой предохранителя: медленный Telegram не обрывает остаток пакета, а пока
+        он недоступен, отчеты откладываются в очередь повторов по одному.
+        """
+        if p.item.type == "shift_report":
+            if not self.shift_report_crud.telegram_service:
+                return
+            factory = partial(self.shift_report_crud._send_to_telegram_background, p.id, p.values)
+        elif p.item.type == "report_on_goods":
+            factory = partial(self.report_on_good_crud.send_to_telegram, p.values, [], p.saved_paths)
+        elif p.item.type == "writeoff_transfer":
+            if not self.writeoff_transfer_crud.telegram_service:
+                return
+            factory = partial(
+                self.writeoff_transfer_crud._send_to_telegram_background,
+                p.id, p.values, p.extra["writeoff_or_transfer"]
+            )
+        elif self.daily_inventory_v2_crud.telegram_service:
+            factory = partial(self.daily_inventory_v2_crud._send_to_telegram_background, p.id, p.values)
+        else:
+            return
+        telegram_delivery.submit(p.item.type, factory)
@@ -0,0 +1,275 @@
+import logging
+import math
+import mimetypes
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import release_connection
+from app.core.metrics import db_timed, observe_file_write
+from app.models import UploadedPhoto
+from app.schemas import PhotoUploadCreate, PhotoUploadResponse
+from app.services import FileService
+
+logger = logging.getLogger(__name__)
+
+PHOTOS_SUBFOLDER = "photos"
+# Собранный файл держится в памяти до этого размера, больше — во временном файле
+ASSEMBLE_SPOOL_SIZE = 4 * 1024 * 1024
+
+
+def chunk_key(photo_id: str, index: int) -> str:
+    """Ключ принятой части в хранилище до сборки файла"""
+    return f"incoming/{photo_id}.{index:05d}.part"
+
+
+class UploadedPhotoCRUD:
+    """
+    Фото, загруженные до отправки отчета. Файл принимается целиком (POST /photos)
+    или частями фиксированного размера с докачкой (/photos/uploads); части
+    лежат в хранилище, по последней файл собирается в photos/<id>.<ext>.
+    Отчет забирает фото по id в своей транзакции (claim), повторно его не прикрепить.
+    """
+
+    def __init__(self):
+        self.file_service = FileService()
+
+    def max_size(self) -> int:
+        return settings.PHOTO_UPLOAD_MAX_MB * 1024 * 1024
+
+    def to_response(self, photo: UploadedPhoto) -> PhotoUploadResponse:
+        return PhotoUploadResponse(
+            id=photo.id,
+            status=photo.status,
+            size=photo.size,
+            received=photo.received,
+            chunk_size=photo.chunk_size,
+            url=self.file_service.get_file_url(photo.path) if photo.path else None,
+        )
+
+    def _check_size(self, size: int) -> None:
+        if size > self.max_size():
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Файл слишком большой (максимум {settings.PHOTO_UPLOAD_MAX_MB}MB)"
+            )
+
+    @staticmethod
+    def _photo_key(photo_id: str, filename: str) -> str:
+        return f"{PHOTOS_SUBFOLDER}/{photo_id}{FileService.photo_extension(filename)}"
+
+    @db_timed
+    async def upload(self, db: AsyncSession, photo: UploadFile) -> UploadedPhoto:
+        """Фото целиком одним запросом"""
+        if not photo or not photo.filename:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Файл не загружен")
+        if photo.size is not None:
+            self._check_size(photo.size)
+
+        photo_id = str(uuid.uuid4())
+        key = self._photo_key(photo_id, photo.filename)
+        with observe_file_write(PHOTOS_SUBFOLDER, photo.size):
+            size = await self.file_service.storage.save(key, photo.file, photo.content_type)
+        if size > self.max_size():
+            await self.file_service.storage.delete(key)
+            self._check_size(size)
+
+        result = await db.execute(
+            insert(UploadedPhoto).values(
+                id=photo_id,
+                filename=photo.filename[:255],
+                content_type=photo.content_type,
+                size=size,
+                chunk_size=size,
+                received=size,
+                path=f"uploads/{key}",
+                status="ready",
+            ).returning(UploadedPhoto)
+        )
+        uploaded = result.scalar_one()
+        await db.commit()
+        return uploaded
+
+    @db_timed
+    async def start(self, db: AsyncSession, data: PhotoUploadCreate) -> UploadedPhoto:
+        """Начало загрузки частями: размер части фиксируется на всю загрузку"""
+        FileService.photo_extension(data.filename)
+        self._check_size(data.size)
+
+        result = await db.execute(
+            insert(UploadedPhoto).values(
+                id=str(uuid.uuid4()),
+                filename=data.filename,
+                content_type=data.content_type,
+                size=data.size,
+                chunk_size=settings.PHOTO_UPLOAD_CHUNK_KB * 1024,
+                received=0,
+                status="uploading",
+            ).returning(UploadedPhoto)
+        )
+        uploaded = result.scalar_one()
+        await db.commit()
+        return uploaded
+
+    @db_timed
+    async def get(self, db: AsyncSession, photo_id: str) -> UploadedPhoto:
+        result = await db.execute(select(UploadedPhoto).where(UploadedPhoto.id == photo_id))
+        photo = result.scalar_one_or_none()
+        if photo is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Загрузка не найдена")
+        return photo
+
+    @staticmethod
+    def _offset_conflict(received: int) -> HTTPException:
+        # Клиент продолжает с received: часть уже принята или предыдущая потерялась
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Неверное смещение части, ожидается {received}",
+            headers={"Upload-Offset": str(received)},
+        )
+
+    async def append_chunk(self, db: AsyncSession, photo_id: str, offset: int, content: bytes) -> UploadedPhoto:
+        """
+        Принимает часть с заданного смещения. Смещение должно совпадать с уже принятым
+        объемом: повтор части после обрыва связи получает 409 с актуальным смещением.
+        """
+        photo = await self.get(db, photo_id)
+        if photo.status != "uploading":
+            if offset == photo.size:
+                return photo
+            raise self._offset_conflict(photo.received)
+        if offset != photo.received:
+            raise self._offset_conflict(photo.received)
+
+        # Все загружено, но файл не собран (прошлая сборка оборвалась) — собираем заново
+        if offset == photo.size:
+            return await self._assemble(db, photo)
+
+        expected = min(photo.chunk_size, photo.size - offset)
+        if len(content) != expected:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Размер части {len(content)} байт, ожидается {expected}"
+            )
+
+        # Соединение не держим, пока часть пишется в хранилище
+        await release_connection(db)
+        await self.file_service.storage.save(chunk_key(photo.id, offset // photo.chunk_size), content)
+
+        # Смещение сдвигается, только если его не сдвинул параллельный запрос с той же частью
+        result = await db.execute(
+            update(UploadedPhoto)
+            .where(UploadedPhoto.id == photo.id, UploadedPhoto.received == offset)
+            .values(received=offset + len(content))
+            .returning(UploadedPhoto)
+            .execution_options(populate_existing=True)
+        )
+        updated = result.scalar_one_or_none()
+        await db.commit()
+        if updated is None:
+            photo = await self.get(db, photo_id)
+            raise self._offset_conflict(photo.received)
+
+        if updated.received == updated.size:
+            return await self._assemble(db, updated)
+        return updated
+
+    async def _assemble(self, db: AsyncSession, photo: UploadedPhoto) -> UploadedPhoto:
+        """Собирает файл из частей по порядку и удаляет части"""
+        await release_connection(db)
+        storage = self.file_service.storage
+        chunks = math.ceil(photo.size / photo.chunk_size)
+        key = self._photo_key(photo.id, photo.filename)
+
+        with tempfile.SpooledTemporaryFile(max_size=ASSEMBLE_SPOOL_SIZE) as spool:
+            for index in range(chunks):
+                content = await storage.read(chunk_key(photo.id, index))
+                if content is None:
+                    # Часть потерялась (например, узел без общего хранилища) — клиент докачает с нее
+                    await db.execute(
+                        update(UploadedPhoto)
+                        .where(UploadedPhoto.id == photo.id)
+                        .values(received=index * photo.chunk_size)
+                    )
+                    await db.commit()
+                    raise self._offset_conflict(index * photo.chunk_size)
+                spool.write(content)
+            spool.seek(0)
+            with observe_file_write(PHOTOS_SUBFOLDER, photo.size):
+                await storage.save(key, spool, photo.content_type or mimetypes.guess_type(key)[0])
+
+        result = await db.execute(
+            update(UploadedPhoto)
+            .where(UploadedPhoto.id == photo.id, UploadedPhoto.status == "uploading")
+            .values(status="ready", path=f"uploads/{key}")
+            .returning(UploadedPhoto)
+            .execution_options(populate_existing=True)
+        )
+        assembled = result.scalar_one_or_none()
+        await db.commit()
+
+        await self._delete_chunks(photo, chunks)
+        logger.info(f"📷 Фото {photo.id} собрано из {chunks} частей ({photo.size} байт)")
+        return assembled or await self.get(db, photo.id)
+
+    async def _delete_chunks(self, photo: UploadedPhoto, chunks: Optional[int] = None) -> None:
+        if chunks is None:
+            chunks = math.ceil(photo.size / photo.chunk_size)
+        for index in range(chunks):
+            try:
+                await self.file_service.storage.delete(chunk_key(photo.id, index))
+            except Exception as e:
+                logger.warning(f"⚠️  Не удалось удалить часть {index} фото {photo.id}: {str(e)}")
+
+    @db_timed
+    async def claim(self, db: AsyncSession, photo_ids: List[str]) -> List[str]:
+        """
+        Прикрепляет загруженные фото к создаваемому отчету и возвращает их пути в том же порядке.
+        Выполняется в транзакции отчета: если отчет не сохранится, фото останутся свободными.
+        """
+        if not photo_ids:
+            return []
+        if len(set(photo_ids)) != len(photo_ids):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID фото повторяются")
+
+        result = await db.execute(
+            update(UploadedPhoto)
+            .where(UploadedPhoto.id.in_(photo_ids), UploadedPhoto.status == "ready")
+            .values(status="attached")
+            .returning(UploadedPhoto.id, UploadedPhoto.path)
+        )
+        paths = dict(result.all())
+        missing = [photo_id for photo_id in photo_ids if photo_id not in paths]
+        if missing:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Фото {', '.join(missing)} не найдены, не загружены до конца или уже прикреплены к отчету"
+            )
+        return [paths[photo_id] for photo_id in photo_ids]
+
+    @db_timed
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """
+        Удаляет записи старше PHOTO_UPLOAD_TTL_HOURS. Файлы и части удаляются только
+        у фото, так и не прикрепленных к отчету: прикрепленные остаются в отчете.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.PHOTO_UPLOAD_TTL_HOURS)
+        result = await db.execute(
+            delete(UploadedPhoto).where(UploadedPhoto.created_at < cutoff).returning(UploadedPhoto)
+        )
+        expired = result.scalars().all()
+        await db.commit()
+
+        for photo in expired:
+            if photo.status == "ready" and photo.path:
+                await self.file_service.delete_shift_report_photo(photo.path)
+            elif photo.status == "uploading":
+                await self._delete_chunks(photo)
+        return len(expired)
@@ -1,24 +1,79 @@
+import logging
 from datetime import datetime
+from functools import partial
 from typing import Optional
 from zoneinfo import ZoneInfo
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from app.schemas import WriteoffTransferCreate
 from app.models import WriteoffTransfer
 from app.services import TelegramService
+from app.services.telegram_delivery import telegram_delivery
+from app.core.metrics import db_timed, tracked_background_task
+from app.core.report_events import EVENT_CREATED, EVENT_DELETED, publish_report_event
 import asyncio
 
+logger = logging.getLogger(__name__)
+
 
 class WriteoffTransferCRUD:
     def __init__(self):
         try:
             self.telegram_service = TelegramService()
         except Exception as e:
-            print(f"⚠️  Ошибка инициализации Telegram сервиса: {str(e)}")
+            logger.warning(f"⚠️  Ошибка инициализации Telegram сервиса: {str(e)}")
             self.telegram_service = None
 
+    def build_values(self, report_data: WriteoffTransferCreate) -> dict:
+        """Значения колонок нового акта; общие для одиночного создания и пакетной синхронизации"""
+        # Подготавливаем данные для JSON полей
+        writeoffs_dict = []
+        for writeoff in report_data.writeoffs:
+            writeoffs_dict.append({
+                'name': writeoff.name,
+                'weight': round(writeoff.weight,0)//1,
+                'unit': writeoff.unit,
+                'reason': writeoff.reason
+            })
+
+        transfers_dict = []
+        for transfer in report_data.transfers:
+            transfers_dict.append({
+                'name': transfer.name,
+                'weight': round(transfer.weight, 0)//1,
+                'unit': transfer.unit,
+                'reason': transfer.reason
+            })
+
+        if report_data.report_date is None or report_data.report_time is None:
+            # Если дата/время не указаны, используем текущее время МСК
+            report_datetime = datetime.now(ZoneInfo("UTC")).astimezone(ZoneInfo("Europe/Moscow"))
+        else:
+            # ИСПРАВЛЕНО: Создаём datetime напрямую с МСК timezone
+            report_datetime = datetime(
+                year=report_data.report_date.year,
+                month=report_data.report_date.month,
+                day=report_data.report_date.day,
+                hour=report_data.report_time.hour,
+                minute=report_data.report_time.minute,
+                second=0,
+                microsecond=0,
+                tzinfo=ZoneInfo("Europe/Moscow")
+            )
+
+        return dict(
+            location=report_data.location,
+            location_to=report_data.location_to,  # Добавляем новое поле
+            writeoffs=writeoffs_dict,
+            transfers=transfers_dict,
+            shift_type=report_data.shift_type,
+            cashier_name=report_data.cashier_name,
+            date=report_datetime
+        )
+
+    @db_timed
     async def create_writeoff_transfer(
             self,
             db: AsyncSession,
@@ -30,138 +85,85 @@ class WriteoffTransferCRUD:
         Telegram отправка происходит асинхронно.
         """
         try:
-            # Подготавливаем данные для JSON полей
-            writeoffs_dict = []
-            for writeoff in report_data.writeoffs:
-                writeoffs_dict.append({
-                    'name': writeoff.name,
-                    'weight': round(writeoff.weight,0)//1,
-                    'unit': writeoff.unit,
-                    'reason': writeoff.reason
-                })
-
-            transfers_dict = []
-            for transfer in report_data.transfers:
-                transfers_dict.append({
-                    'name': transfer.name,
-                    'weight': round(transfer.weight, 0)//1,
-                    'unit': transfer.unit,
-                    'reason': transfer.reason
-                })
-
-            if report_data.report_date is None or report_data.report_time is None:
-                # Если дата/время не указаны, используем текущее время МСК
-                report_datetime = datetime.now(ZoneInfo("UTC")).astimezone(ZoneInfo("Europe/Moscow"))
-            else:
-                # ИСПРАВЛЕНО: Создаём datetime напрямую с МСК timezone
-                report_datetime = datetime(
-                    year=report_data.report_date.year,
-                    month=report_data.report_date.month,
-                    day=report_data.report_date.day,
-                    hour=report_data.report_time.hour,
-                    minute=report_data.report_time.minute,
-                    second=0,
-                    microsecond=0,
-                    tzinfo=ZoneInfo("Europe/Moscow")
-                )
-
-            # Создаем запись в БД
-            db_report = WriteoffTransfer(
-                location=report_data.location,
-                location_to=report_data.location_to,  # Добавляем новое поле
-                writeoffs=writeoffs_dict,
-                transfers=transfers_dict,
-                shift_type=report_data.shift_type,
-                cashier_name=report_data.cashier_name,
-                date=report_datetime
+            # Создаем запись в БД: INSERT ... RETURNING отдает строку с серверными значениями без refresh
+            values = self.build_values(report_data)
+            result = await db.execute(insert(WriteoffTransfer).values(**values).returning(WriteoffTransfer))
+            db_report = result.scalar_one()
+            await publish_report_event(
+                db, EVENT_CREATED, "writeoff_transfer", db_report.id, db_report.location, location_to=db_report.location_to
             )
-
-            db.add(db_report)
             await db.commit()
-            await db.refresh(db_report)
 
-            print(f"✅ Акт списания/перемещения создан в БД с ID: {db_report.id}")
+            logger.info(f"✅ Акт списания/перемещения создан в БД с ID: {db_report.id}")
 
             # Запускаем отправку в Telegram в фоне
             if self.telegram_service:
-                asyncio.create_task(self._send_to_telegram_background(db_report.id, writeoff_or_transfer))
+                telegram_delivery.submit("writeoff_transfer", partial(self._send_to_telegram_background, db_report.id, values, writeoff_or_transfer))
 
             return db_report
 
         except SQLAlchemyError as e:
-            print(f"❌ Ошибка SQLAlchemy при создании акта: {str(e)}")
+            logger.error(f"❌ Ошибка SQLAlchemy при создании акта: {str(e)}")
             await db.rollback()
             raise e
         except Exception as e:
-            print(f"❌ Общая ошибка при создании акта: {str(e)}")
+            logger.error(f"❌ Общая ошибка при создании акта: {str(e)}")
             await db.rollback()
             raise e
 
-    async def _send_to_telegram_background(self, report_id: int, writeoff_or_transfer: str):
+    @tracked_background_task("writeoff_transfer")
+    async def _send_to_telegram_background(self, report_id: int, values: dict, writeoff_or_transfer: str):
         """
-        Фоновая отправка акта в Telegram.
+        Фоновая отправка акта в Telegram по значениям колонок, переданным из создания —
+        без повторного чтения строки из БД.
+        Возвращает True, если отчет ушел: по этому очередь повторов решает, откладывать ли его.
         """
-        from ..core import db_helper
-
         try:
-            # Создаем новую сессию БД для фоновой задачи
-            async with db_helper.session_factory() as db_session:
-                try:
-                    # Получаем отчет из БД
-                    result = await db_session.execute(
-                        select(WriteoffTransfer).where(WriteoffTransfer.id == report_id)
-                    )
-                    db_report = result.scalar_one_or_none()
-
-                    if not db_report:
-                        print(f"⚠️  Акт с ID {report_id} не найден для отправки в Telegram")
-                        return
-
-                    # Подготавливаем данные для отправки
-                    # ИСПРАВЛЕНО: Конвертируем datetime в МСК перед извлечением компонентов
-                    msk_datetime = None
-                    if db_report.date:
-                        # Если datetime уже имеет timezone, конвертируем в МСК
-                        if db_report.date.tzinfo is not None:
-                            msk_datetime = db_report.date.astimezone(ZoneInfo("Europe/Moscow"))
-                        else:
-                            # Если timezone нет, добавляем МСК
-                            msk_datetime = db_report.date.replace(tzinfo=ZoneInfo("Europe/Moscow"))
-
-                    report_dict = {
-                        'location': db_report.location,
-                        'location_to': db_report.location_to,
-                        'created_date': db_report.created_date,
-                        'cashier_name': db_report.cashier_name,
-                        'shift_type': db_report.shift_type,
-                        'writeoffs': db_report.writeoffs,
-                        'transfers': db_report.transfers,
-                        "writeoff_or_transfer": writeoff_or_transfer,
-                        "date": msk_datetime,
-                        # Извлекаем компоненты из МСК datetime
-                        "report_date": msk_datetime.date() if msk_datetime else None,
-                        "report_time": msk_datetime.time() if msk_datetime else None,
-                    }
-
-                    # Отправляем в Telegram (с таймаутом)
-                    telegram_success = await asyncio.wait_for(
-                        self.telegram_service.send_writeoff_transfer_report(report_dict),
-                        timeout=30  # 30 секунд таймаут
-                    )
-
-                    if telegram_success:
-                        print(f"✅ Акт списания/перемещения ID {report_id} отправлен в Telegram для локации: {db_report.location}")
-                    else:
-                        print(f"⚠️  Акт списания/перемещения ID {report_id} создан, но не отправлен в Telegram для локации: {db_report.location}")
-
-                except asyncio.TimeoutError:
-                    print(f"⏰ Таймаут при отправке акта ID {report_id} в Telegram")
-                except Exception as telegram_error:
-                    print(f"⚠️  Ошибка отправки акта ID {report_id} в Telegram: {str(telegram_error)}")
+            # Подготавливаем данные для отправки
+            # ИСПРАВЛЕНО: Конвертируем datetime в МСК перед извлечением компонентов
+            msk_datetime = None
+            report_date = values.get('date')
+            if report_date:
+                # Если datetime уже имеет timezone, конвертируем в МСК
+                if report_date.tzinfo is not None:
+                    msk_datetime = report_date.astimezone(ZoneInfo("Europe/Moscow"))
+                else:
+                    # Если timezone нет, добавляем МСК
+                    msk_datetime = report_date.replace(tzinfo=ZoneInfo("Europe/Moscow"))
+
+            report_dict = {
+                'location': values['location'],
+                'location_to': values.get('location_to'),
+                'cashier_name': values['cashier_name'],
+                'shift_type': values['shift_type'],
+                'writeoffs': values['writeoffs'],
+                'transfers': values['transfers'],
+                "writeoff_or_transfer": writeoff_or_transfer,
+                "date": msk_datetime,
+                # Извлекаем компоненты из МСК datetime
+                "report_date": msk_datetime.date() if msk_datetime else None,
+                "report_time": msk_datetime.time() if msk_datetime else None,
+            }
+
+            # Отправляем в Telegram (с таймаутом)
+            telegram_success = await asyncio.wait_for(
+                self.telegram_service.send_writeoff_transfer_report(report_dict),
+                timeout=30  # 30 секунд таймаут
+            )
+
+            if telegram_success:
+                logger.info(f"✅ Акт списания/перемещения ID {report_id} отправлен в Telegram для локации: {values['location']}")
+            else:
+                logger.warning(f"⚠️  Акт списания/перемещения ID {report_id} создан, но не отправлен в Telegram для локации: {values['location']}")
+
+            return telegram_success
 
+        except asyncio.TimeoutError:
+            logger.warning(f"⏰ Таймаут при отправке акта ID {report_id} в Telegram")
         except Exception as e:
-            print(f"⚠️  Критическая ошибка в фоновой отправке Telegram для акта ID {report_id}: {str(e)}")
+            logger.exception(f"⚠️  Ошибка фоновой отправки в Telegram для акта ID {report_id}: {str(e)}")
 
+    @db_timed
     async def get(self, db: AsyncSession, id: int) -> Optional[WriteoffTransfer]:
         """Получение отчета списания/перемещения по ID"""
         try:
@@ -169,9 +171,10 @@ class WriteoffTransferCRUD:
             result = await db.execute(stmt)
             return result.scalar_one_or_none()
         except Exception as e:
-            print(f"❌ Ошибка получения отчета списания/перемещения {id}: {str(e)}")
+            logger.error(f"❌ Ошибка получения отчета списания/перемещения {id}: {str(e)}")
             return None
 
+    @db_timed
     async def remove(self, db: AsyncSession, id: int) -> bool:
         """Удаление отчета списания/перемещения по ID"""
         try:
@@ -181,9 +184,12 @@ class WriteoffTransferCRUD:
 
             if report:
                 await db.delete(report)
+                await publish_report_event(
+                    db, EVENT_DELETED, "writeoff_transfer", id, report.location, location_to=report.location_to
+                )
                 return True
             return False
         except Exception as e:
-            print(f"❌ Ошибка удаления отчета списания/перемещения {id}: {str(e)}")
+            logger.error(f"❌ Ошибка удаления отчета списания/перемещения {id}: {str(e)}")
             return False
 
@@ -1,6 +1,13 @@
+from app.core.logging_config import RequestIdMiddleware, setup_logging
+
+# Логирование настраивается до импорта роутеров: CRUD-объекты создаются при импорте и уже пишут в лог
+setup_logging()
+
+import asyncio
+import signal
+import threading
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from app.api import api_router
 from fastapi.middleware.cors import CORSMiddleware
 from app.services import TelegramService
@@ -9,13 +16,23 @@ import logging
 from datetime import datetime, timedelta
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import text
-from app.core.database import DatabaseHelper
-
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
+from app.core.pg_notify import pg_listener
+from app.core.background import background_tasks
+from app.services.telegram_delivery import telegram_delivery
+from app.services.storage import file_storage
+from app.crud import UploadedPhotoCRUD
+from app.core.database import DatabaseHelper, db_helper as app_db_helper
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware, idempotency_store
+from app.core.metrics import PrometheusMiddleware
+from app.core.query_profiler import QueryProfilerMiddleware
+from app.core.report_events import report_events
+from app.core.responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
 cleanup_logger = logging.getLogger("cleanup")
-cleanup_logger.setLevel(logging.INFO)
 
 # Инициализация базы данных для очистки
 database_url = f"{settings.DB_DRIVER}://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
@@ -25,7 +42,11 @@ db_helper = DatabaseHelper(
     echo_pool=settings.DB_ECHO_POOL,
     max_overflow=settings.DB_MAX_OVERFLOW,
     pool_size=settings.DB_POOL_SIZE,
+    name="cleanup",
+    pool_mode=settings.DB_POOL_MODE,
+    pool_recycle=settings.DB_POOL_RECYCLE,
 )
+uploaded_photo_crud = UploadedPhotoCRUD()
 
 # Глобальная переменная для планировщика
 scheduler = None
@@ -81,33 +102,27 @@ async def cleanup_old_records() -> None:
 
 
 async def cleanup_old_files() -> None:
-    """Удаляет старые файлы из директории uploads."""
-    from pathlib import Path
-
+    """Удаляет старые файлы из хранилища uploads (диск или S3)."""
     cleanup_logger.info("🧹 Начинаем очистку старых файлов")
 
-    cutoff_timestamp = (datetime.now() - timedelta(days=90)).timestamp()
-    uploads_dir = Path("uploads")
+    cutoff = datetime.now() - timedelta(days=90)
+    total_deleted_files = await file_storage.delete_older_than(cutoff)
 
-    if not uploads_dir.exists():
-        cleanup_logger.warning("⚠️ Директория uploads не найдена")
-        return
+    cleanup_logger.info(f"✅ Очистка файлов завершена. Удалено файлов: {total_deleted_files}")
 
-    total_deleted_files = 0
 
-    for subdir in uploads_dir.iterdir():
-        if subdir.is_dir():
-            for file_path in subdir.glob("*"):
-                if file_path.is_file():
-                    try:
-                        if file_path.stat().st_mtime < cutoff_timestamp:
-                            file_path.unlink()
-                            cleanup_logger.info(f"🗑️ Удален файл: {file_path}")
-                            total_deleted_files += 1
-                    except Exception as e:
-                        cleanup_logger.error(f"❌ Ошибка при удалении файла {file_path}: {str(e)}")
+async def cleanup_idempotency_keys() -> None:
+    """Удаляет просроченные ключи Idempotency-Key."""
+    async for session in db_helper.session_getter():
+        deleted = await idempotency_store.purge_expired(session)
+        cleanup_logger.info(f"🗑️ Удалено просроченных ключей идемпотентности: {deleted}")
 
-    cleanup_logger.info(f"✅ Очистка файлов завершена. Удалено файлов: {total_deleted_files}")
+
+async def cleanup_uploaded_photos() -> None:
+    """Удаляет фото, загруженные заранее и не прикрепленные к отчету, и брошенные загрузки."""
+    async for session in db_helper.session_getter():
+        deleted = await uploaded_photo_crud.purge_expired(session)
+        cleanup_logger.info(f"🗑️ Удалено записей предварительной загрузки фото: {deleted}")
 
 
 async def daily_cleanup_task() -> None:
@@ -117,32 +132,55 @@ async def daily_cleanup_task() -> None:
     try:
         await cleanup_old_records()
         await cleanup_old_files()
+        await cleanup_idempotency_keys()
+        await cleanup_uploaded_photos()
         cleanup_logger.info("✅ Ежедневная очистка выполнена успешно")
     except Exception as e:
         cleanup_logger.error(f"❌ Ошибка при выполнении ежедневной очистки: {str(e)}")
 
 
+def close_streams_on_exit() -> None:
+    """
+    uvicorn по SIGTERM ждет завершения открытых ответов и только потом вызывает shutdown
+    lifespan, а поток SSE сам не кончается. Поэтому потоки закрываются уже по сигналу:
+    к обработчику uvicorn добавляется report_events.close().
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(report_events.close)
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения"""
     global scheduler
 
     # Startup
-    print("🚀 Запуск ReportBot API...")
+    logger.info("🚀 Запуск ReportBot API...")
 
     # Инициализируем Telegram сервис
     telegram_service = TelegramService()
 
     # Устанавливаем веб-хук если задан URL
     if settings.WEBHOOK_URL:
-        print(f"🔗 Установка веб-хука: {settings.WEBHOOK_URL}")
+        logger.info(f"🔗 Установка веб-хука: {settings.WEBHOOK_URL}")
         success = await telegram_service.set_webhook(settings.WEBHOOK_URL)
         if success:
-            print("✅ Веб-хук установлен успешно")
+            logger.info("✅ Веб-хук установлен успешно")
         else:
-            print("❌ Ошибка установки веб-хука")
+            logger.error("❌ Ошибка установки веб-хука")
     else:
-        print("⚠️  WEBHOOK_URL не задан, веб-хук не установлен")
+        logger.warning("⚠️  WEBHOOK_URL не задан, веб-хук не установлен")
 
     # Запускаем планировщик очистки
     scheduler = AsyncIOScheduler()
@@ -154,40 +192,83 @@ async def lifespan(app: FastAPI):
         replace_existing=True,
         max_instances=1,
     )
+    # Пробная отправка из очереди повторов, пока Telegram недоступен
+    scheduler.add_job(
+        func=telegram_delivery.retry_deferred,
+        trigger=IntervalTrigger(seconds=settings.TELEGRAM_BREAKER_RESET_TIMEOUT),
+        id='telegram_retry',
+        name='Повтор отложенных отправок в Telegram',
+        replace_existing=True,
+        max_instances=1,
+    )
+    # Замер отставания реплики: сессии чтения переключаются на primary, если она не успевает
+    if app_db_helper.replica_engine is not None:
+        await app_db_helper.check_replica()
+        if not app_db_helper.replica_ready:
+            logger.warning("⚠️  Реплика недоступна или отстает, чтение пока идет с primary")
+        scheduler.add_job(
+            func=app_db_helper.check_replica,
+            trigger=IntervalTrigger(seconds=settings.DB_REPLICA_CHECK_INTERVAL),
+            id='replica_lag_check',
+            name='Проверка отставания реплики',
+            replace_existing=True,
+            max_instances=1,
+        )
     scheduler.start()
-    print("🧹 Планировщик очистки запущен (ежедневно в 00:00)")
+    logger.info("🧹 Планировщик очистки запущен (ежедневно в 00:00)")
+
+    # Подписка на уведомления от других воркеров (справочник товаров, локации)
+    pg_listener.start()
+    close_streams_on_exit()
 
-    print("✅ ReportBot API запущен успешно!")
+    logger.info("✅ ReportBot API запущен успешно!")
 
     yield
 
     # Shutdown
-    print("🛑 Остановка ReportBot API...")
+    logger.info("🛑 Остановка ReportBot API...")
+    report_events.close()
     if scheduler:
         scheduler.shutdown()
-        print("🧹 Планировщик очистки остановлен")
+        logger.info("🧹 Планировщик очистки остановлен")
+
+    # Отправки в Telegram дорабатывают до закрытия пула, иначе отчеты останутся без статуса
+    await background_tasks.drain(settings.BACKGROUND_DRAIN_TIMEOUT)
+    if telegram_delivery.pending:
+        logger.warning(f"⚠️  Не отправлены в Telegram (очередь повторов): {telegram_delivery.pending}")
+
+    await pg_listener.stop()
+    await file_storage.close()
 
     await db_helper.dispose()
-    print("✅ ReportBot API остановлен")
+    await app_db_helper.dispose()
+    logger.info("✅ ReportBot API остановлен")
 
 
 app = FastAPI(
     title="ReportBot API",
     description="API для создания отчетов кафе с интеграцией Telegram",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Внутри CORS и сжатия: сохраняется исходный ответ, повтор проходит через них как обычный
+app.add_middleware(IdempotencyMiddleware)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "ETag", "Last-Modified", "Idempotent-Replayed"],
 )
+app.add_middleware(QueryProfilerMiddleware)
+app.add_middleware(PrometheusMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 # Подключаем API роуты с префиксом /api
 app.include_router(api_router)
 
-# Подключаем загрузки
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
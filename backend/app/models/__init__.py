@@ -6,6 +6,8 @@ from .report_on_goods import ReportOnGoods
 from .writeoff_transfer import WriteoffTransfer
 from .inventory_item import InventoryItem
 from .daily_inventory_v2 import DailyInventoryV2
+from .idempotency_key import IdempotencyKey
+from .uploaded_photo import UploadedPhoto
 
 __all__ = [
     "Base",
@@ -14,5 +16,7 @@ __all__ = [
     "ReportOnGoods",
     "WriteoffTransfer",
     "InventoryItem",
-    "DailyInventoryV2"
+    "DailyInventoryV2",
+    "IdempotencyKey",
+    "UploadedPhoto"
 ]
\ No newline at end of file
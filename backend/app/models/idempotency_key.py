@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, LargeBinary, SmallInteger, func
+from .base import Base
+
+
+class IdempotencyKey(Base):
+    """Сохраненный ответ на запрос с заголовком Idempotency-Key"""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)  # Значение заголовка от клиента
+    endpoint = Column(String(64), nullable=False)  # Путь, для которого выдан ключ
+    request_hash = Column(String(64), nullable=True)  # sha256 тела запроса, сохраняется вместе с ответом
+
+    # Пока запрос выполняется, ответа нет (status_code IS NULL)
+    status_code = Column(SmallInteger, nullable=True)
+    content_type = Column(String(100), nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
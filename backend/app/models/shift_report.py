@@ -44,6 +44,8 @@ class ShiftReport(Base):
 
     # Метаданные
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Меняется вместе со статусом; по нему строятся ETag детали и списка
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     status = Column(String(20), nullable=False, default="draft")  # "draft", "sent"
 
     comments = Column(Text, nullable=True)
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, func
+from .base import Base
+
+
+class UploadedPhoto(Base):
+    """Фото, загруженное до отправки отчета (/photos); отчет ссылается на него по id"""
+    __tablename__ = "uploaded_photos"
+
+    id = Column(String(36), primary_key=True)  # UUID, выдается клиенту
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=True)
+
+    # Загрузка частями: заявленный размер, размер части и сколько байт уже принято (смещение для докачки)
+    size = Column(Integer, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    received = Column(Integer, nullable=False, default=0)
+
+    path = Column(Text, nullable=True)  # uploads/<ключ>, когда файл собран
+    status = Column(String(16), nullable=False, default="uploading")  # "uploading", "ready", "attached"
+
+    # По created_at удаляются брошенные загрузки и фото без отчета
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
@@ -15,6 +15,9 @@ from .daily_inventory_v2 import (
     DailyInventoryV2Response,
     InventoryDataEntry
 )
+from .admin import ProfilerSettingsUpdate
+from .sync import SyncItem, SyncManifest, SyncItemResult, SyncBatchResponse
+from .uploaded_photo import PhotoUploadCreate, PhotoUploadResponse
 
 __all__ = [
     'ShiftReportCreate',
@@ -42,5 +45,12 @@ __all__ = [
     'InventoryItemList',
     'DailyInventoryV2Create',
     'DailyInventoryV2Response',
-    'InventoryDataEntry'
+    'InventoryDataEntry',
+    'ProfilerSettingsUpdate',
+    'SyncItem',
+    'SyncManifest',
+    'SyncItemResult',
+    'SyncBatchResponse',
+    'PhotoUploadCreate',
+    'PhotoUploadResponse'
 ]
\ No newline at end of file
@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class ProfilerSettingsUpdate(BaseModel):
+    """Изменение настроек профилировщика SQL; не переданные поля не меняются"""
+    enabled: Optional[bool] = None
+    slow_query_ms: Optional[float] = Field(None, ge=0)
+    n_plus_one_threshold: Optional[int] = Field(None, ge=2)
+    echo: Optional[bool] = Field(None, description="Включить echo движка (все SQL в лог)")
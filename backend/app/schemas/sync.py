@@ -0,0 +1,59 @@
+from typing import Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field, validator
+
+SyncItemType = Literal["shift_report", "report_on_goods", "writeoff_transfer", "daily_inventory_v2"]
+
+
+class SyncItem(BaseModel):
+    """Отчет из очереди устройства"""
+    client_id: str = Field(..., min_length=1, max_length=64, description="ID отчета на устройстве")
+    type: SyncItemType = Field(..., description="Тип отчета")
+    data: Dict[str, Any] = Field(..., description="Поля отчета в формате схемы *Create соответствующего типа")
+    files: Dict[str, Union[str, List[str]]] = Field(
+        default_factory=dict,
+        description="Имена частей multipart с файлами: photo/receipt_photo для смены, photos для приема товаров"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "client_id": "draft-1718000000000",
+                "type": "shift_report",
+                "data": {
+                    "location": "Касса - Гагарина 48/1",
+                    "shift_type": "morning",
+                    "cashier_name": "Иванов Иван",
+                    "total_revenue": 15000,
+                    "fact_cash": 5100
+                },
+                "files": {"photo": "file-0"}
+            }
+        }
+
+
+class SyncManifest(BaseModel):
+    """Содержимое поля manifest пакетной синхронизации"""
+    items: List[SyncItem] = Field(..., min_length=1)
+
+    @validator('items')
+    def validate_unique_client_ids(cls, v):
+        """client_id в пакете должны быть уникальны: по ним сопоставляются результаты"""
+        client_ids = [item.client_id for item in v]
+        if len(set(client_ids)) != len(client_ids):
+            raise ValueError('client_id отчетов в пакете повторяются')
+        return v
+
+
+class SyncItemResult(BaseModel):
+    """Итог по одному отчету пакета"""
+    client_id: str
+    type: str
+    status: Literal["created", "invalid"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class SyncBatchResponse(BaseModel):
+    """Ответ пакетной синхронизации"""
+    created: int
+    results: List[SyncItemResult]
@@ -0,0 +1,24 @@
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class PhotoUploadCreate(BaseModel):
+    """Начало загрузки фото частями"""
+    filename: str = Field(..., min_length=1, max_length=255, description="Имя файла (по нему проверяется тип)")
+    content_type: Optional[str] = Field(default=None, max_length=100)
+    size: int = Field(..., gt=0, description="Размер файла в байтах")
+
+    class Config:
+        json_schema_extra = {
+            "example": {"filename": "IMG_0042.jpg", "content_type": "image/jpeg", "size": 3145728}
+        }
+
+
+class PhotoUploadResponse(BaseModel):
+    """Состояние загрузки: id для отчета, сколько байт принято, размер следующей части"""
+    id: str = Field(description="ID фото — передается в photo_id / photo_ids при создании отчета")
+    status: Literal["uploading", "ready", "attached"]
+    size: int
+    received: int = Field(description="Принято байт; следующая часть отправляется с этого смещения")
+    chunk_size: int = Field(description="Размер части (последняя может быть меньше)")
+    url: Optional[str] = Field(default=None, description="URL фото, когда оно загружено целиком")
@@ -1,19 +1,42 @@
-import os
+import asyncio
+import io
 import uuid
 from pathlib import Path
+from typing import Optional
 from fastapi import HTTPException, UploadFile
 
+from app.core.metrics import observe_file_write
+from app.services.storage import UPLOADS_URL_PREFIX, FileStorage, file_storage, storage_key, variant_key
 
-class FileService:
-    def __init__(self, upload_folder: str = "./uploads"):
-        self.upload_folder = Path(upload_folder)
-        self.upload_folder.mkdir(exist_ok=True)
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow необязателен: без него превью не строятся, отдается оригинал
+    Image = None
+
+ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
 
-        # Создаем папку для фото отчетов смен
-        self.shift_reports_folder = self.upload_folder / "shift_reports"
-        self.shift_reports_folder.mkdir(exist_ok=True)
 
-    def save_shift_report_photo(self, photo: UploadFile) -> str:
+class FileService:
+    """
+    Сохранение и раздача загруженных фото поверх хранилища (диск или S3, см. app.services.storage).
+    Пути, которые возвращают методы сохранения и которые хранятся в БД, имеют вид uploads/<ключ>.
+    """
+
+    def __init__(self, storage: Optional[FileStorage] = None):
+        self.storage = storage or file_storage
+
+    @staticmethod
+    def photo_extension(filename: str, default: str = '') -> str:
+        """Расширение файла фото; недопустимый тип — 400"""
+        file_ext = Path(filename).suffix.lower() or default
+        if file_ext not in ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Недопустимый тип файла. Разрешены: {', '.join(ALLOWED_EXTENSIONS)}"
+            )
+        return file_ext
+
+    async def save_shift_report_photo(self, photo: UploadFile) -> str:
         """
         Сохраняет фото отчета смены и возвращает путь к файлу.
         """
@@ -22,93 +45,123 @@ class FileService:
             if not photo or not photo.filename:
                 raise HTTPException(status_code=400, detail="Файл не загружен")
 
-            # Проверяем тип файла
-            allowed_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
-            file_ext = Path(photo.filename).suffix.lower()
-
-            if file_ext not in allowed_extensions:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Недопустимый тип файла. Разрешены: {', '.join(allowed_extensions)}"
-                )
+            key = f"shift_reports/{uuid.uuid4()}{self.photo_extension(photo.filename)}"
 
-            # Генерируем уникальное имя файла
-            file_name = f"{uuid.uuid4()}{file_ext}"
-            file_path = self.shift_reports_folder / file_name  # Исправлено!
-
-            # Сохраняем файл
-            with open(file_path, "wb") as buffer:
-                content = photo.file.read()
-                buffer.write(content)
+            # Файл читается из временного файла запроса частями, целиком в память не загружается
+            with observe_file_write("shift_reports", photo.size):
+                await self.storage.save(key, photo.file, photo.content_type)
 
             # Сбрасываем указатель файла на начало для возможного повторного использования
             photo.file.seek(0)
 
-            # Возвращаем относительный путь
-            return str(file_path)
+            return f"uploads/{key}"
 
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
             raise HTTPException(status_code=500, detail=f"Ошибка сохранения файла: {str(e)}")
 
-    def save_file_bytes(self, content: bytes, original_filename: str, subfolder: str = "report_on_goods") -> str:
+    async def save_file_bytes(self, content: bytes, original_filename: str, subfolder: str = "report_on_goods") -> str:
         """
-        Сохраняет файл из байтов в указанную поддиректорию uploads и возвращает абсолютный путь к файлу.
+        Сохраняет файл из байтов в указанную поддиректорию uploads и возвращает путь к файлу.
         """
         try:
-            allowed_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
-            file_ext = Path(original_filename).suffix.lower() or '.jpg'
-
-            if file_ext not in allowed_extensions:
-                # допускаем сохранение, но по безопасности можно выбросить ошибку
-                raise HTTPException(status_code=400, detail=f"Недопустимый тип файла. Разрешены: {', '.join(allowed_extensions)}")
-
-            folder = self.upload_folder / subfolder
-            folder.mkdir(parents=True, exist_ok=True)
-
-            file_name = f"{uuid.uuid4()}{file_ext}"
-            file_path = folder / file_name
+            key = f"{subfolder}/{uuid.uuid4()}{self.photo_extension(original_filename, '.jpg')}"
 
-            with open(file_path, 'wb') as f:
-                f.write(content)
+            with observe_file_write(subfolder, len(content)):
+                await self.storage.save(key, content)
 
-            return str(file_path)
+            return f"uploads/{key}"
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
             raise HTTPException(status_code=500, detail=f"Ошибка сохранения файла: {str(e)}")
 
-    def get_shift_report_photo_url(self, file_path: str) -> str:
+    async def get_shift_report_photo_url(self, file_path: str) -> str:
         """
         Возвращает URL для доступа к фото отчета.
         """
-        if not os.path.exists(file_path):
+        key = storage_key(file_path)
+        if not key or not await self.storage.exists(key):
             raise HTTPException(status_code=404, detail="Файл не найден")
-
-        # Возвращаем относительный путь для API
-        relative_path = Path(file_path).relative_to(self.upload_folder)
-        return f"/uploads/{relative_path}"
+        return self.get_file_url(file_path)
 
     def get_file_url(self, file_path: str) -> str:
         """
-        Возвращает относительный URL для доступа к файлу внутри uploads.
+        Возвращает относительный URL для доступа к файлу внутри uploads: /uploads/<ключ>
+        при любом хранилище. Путь вне uploads возвращается как есть.
         """
-        try:
-            relative_path = Path(file_path).relative_to(self.upload_folder)
-            return f"/uploads/{relative_path}"
-        except Exception:
-            # Если не удалось вычислить относительный путь, возвращаем исходную строку
+        if file_path.startswith('/') and not file_path.startswith(UPLOADS_URL_PREFIX):
             return file_path
+        key = storage_key(file_path)
+        return f"{UPLOADS_URL_PREFIX}{key}" if key else file_path
 
-    def delete_shift_report_photo(self, file_path: str) -> bool:
+    async def read_file(self, file_path: str) -> Optional[bytes]:
+        """
+        Содержимое сохраненного файла по пути или URL; None, если файла нет.
+        """
+        key = storage_key(file_path)
+        return await self.storage.read(key) if key else None
+
+    async def delete_shift_report_photo(self, file_path: str) -> bool:
         """
         Удаляет фото отчета.
         """
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
+            key = storage_key(file_path)
+            # Вместе с оригиналом хранилище удаляет его превью
+            return await self.storage.delete(key) if key else False
         except Exception:
-            return False
\ No newline at end of file
+            return False
+
+    def upload_key(self, relative_path: str) -> str:
+        """
+        Ключ файла из пути запроса /uploads/...; выход за пределы uploads — 404.
+        """
+        key = storage_key(relative_path)
+        if not key:
+            raise HTTPException(status_code=404, detail="Файл не найден")
+        return key
+
+    async def get_image_variant(self, key: str, width: int) -> str:
+        """
+        Ключ уменьшенной копии изображения шириной width рядом с оригиналом (<имя>.w<width><расширение>).
+        Создается при первом обращении; если Pillow нет, оригинал не шире width или не читается, возвращается
+        ключ оригинала. Отсутствующий оригинал — 404.
+        """
+        if Image is None:
+            return key
+
+        target = variant_key(key, width)
+        if await self.storage.exists(target):
+            return target
+
+        content = await self.storage.read(key)
+        if content is None:
+            raise HTTPException(status_code=404, detail="Файл не найден")
+
+        resized = await asyncio.to_thread(self._resize, content, width)
+        if resized is None:
+            return key
+        await self.storage.save(target, resized)
+        return target
+
+    @staticmethod
+    def _resize(content: bytes, width: int) -> Optional[bytes]:
+        try:
+            with Image.open(io.BytesIO(content)) as original:
+                image_format = original.format
+                image = ImageOps.exif_transpose(original)
+                if image.width <= width:
+                    return None
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+                if image_format == 'JPEG' and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')
+
+            buffer = io.BytesIO()
+            resized.save(buffer, format=image_format, quality=82, optimize=True)
+            return buffer.getvalue()
+        except (OSError, ValueError):
+            # Битый или не поддерживаемый файл отдаем как есть
+            return None
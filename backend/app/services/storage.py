@@ -0,0 +1,429 @@
+"""
+Хранилище загруженных файлов: локальный диск или S3-совместимое (MinIO и т.п.).
+
+Файл адресуется ключом — путем внутри uploads (shift_reports/<uuid>.jpg).
+URL для клиента всегда /uploads/<ключ> (FileService.get_file_url), а раздает
+его /uploads из любого бэкенда, поэтому URL в БД не зависят от того, где
+лежат файлы. С S3 у API нет локального состояния: узлы за балансировщиком
+видят одни и те же фото.
+
+S3 пишется потоком: файл читается частями по S3_PART_SIZE_MB, части
+загружаются параллельно (до S3_MAX_CONCURRENCY одновременно), в памяти
+одновременно не больше этого числа частей. Файл меньше одной части уходит
+одним put_object.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import Any, AsyncIterator, BinaryIO, List, Optional, Union
+
+from app.core.config import settings
+
+try:
+    import aioboto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # aioboto3 нужен только для STORAGE_BACKEND=s3
+    aioboto3 = None
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_URL_PREFIX = "/uploads/"
+# Чтение источника при записи на диск
+CHUNK_SIZE = 1024 * 1024
+
+Source = Union[bytes, BinaryIO]
+
+
+def storage_key(path: str) -> Optional[str]:
+    """
+    Ключ файла из сохраненного пути или URL: uploads/x/y.jpg, ./uploads/x/y.jpg,
+    /uploads/x/y.jpg и x/y.jpg дают x/y.jpg. Выход за пределы uploads — None.
+    """
+    value = path.replace("\\", "/").lstrip("/")
+    while value.startswith("./"):
+        value = value[2:]
+    if value.startswith("uploads/"):
+        value = value[len("uploads/"):]
+    parts = PurePosixPath(value).parts
+    if not parts or any(part in ("..", ".") for part in parts):
+        return None
+    return "/".join(parts)
+
+
+def variant_key(key: str, width: int) -> str:
+    """Ключ превью шириной width: рядом с оригиналом, <имя>.w<width><расширение>"""
+    path = PurePosixPath(key)
+    return str(path.with_name(f"{path.stem}.w{width}{path.suffix}"))
+
+
+@dataclass
+class StoredObject:
+    """Объект для отдачи клиенту: метаданные и поток тела"""
+    size: int
+    etag: str
+    content_type: Optional[str] = None
+    content_range: Optional[str] = None
+    not_modified: bool = False
+    body: Optional[AsyncIterator[bytes]] = None
+
+
+class FileStorage(ABC):
+    """Интерфейс хранилища; ключи — пути внутри uploads"""
+
+    @abstractmethod
+    async def save(self, key: str, source: Source, content_type: Optional[str] = None) -> int:
+        """Записывает файл целиком (источник читается потоком), возвращает размер"""
+
+    @abstractmethod
+    async def read(self, key: str) -> Optional[bytes]:
+        """Содержимое файла; None, если файла нет"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Есть ли файл с таким ключом"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        """Удаляет файл вместе с его превью; False, если файла не было"""
+
+    @abstractmethod
+    async def delete_older_than(self, cutoff: datetime) -> int:
+        """Удаляет файлы, записанные раньше cutoff; возвращает их число"""
+
+    @abstractmethod
+    async def open(
+            self, key: str, byte_range: Optional[str] = None, if_none_match: Optional[str] = None
+    ) -> Optional[StoredObject]:
+        """Поток файла для ответа клиенту (Range и If-None-Match — как в HTTP); None, если файла нет"""
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Путь на диске, если файл лежит локально, — его отдают FileResponse/nginx"""
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalStorage(FileStorage):
+    """Файлы в локальной папке (по умолчанию ./uploads, в docker-compose — общий том)"""
+
+    def __init__(self, root: str = "./uploads"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    async def save(self, key: str, source: Source, content_type: Optional[str] = None) -> int:
+        return await asyncio.to_thread(self._write, self._path(key), source)
+
+    @staticmethod
+    def _write(path: Path, source: Source) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Пишем во временный файл и переименовываем: параллельные запросы не увидят недописанный файл
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        size = 0
+        try:
+            with open(tmp_path, "wb") as target:
+                if isinstance(source, bytes):
+                    target.write(source)
+                    size = len(source)
+                else:
+                    while chunk := source.read(CHUNK_SIZE):
+                        target.write(chunk)
+                        size += len(chunk)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return size
+
+    async def read(self, key: str) -> Optional[bytes]:
+        path = self.local_path(key)
+        if path is None:
+            return None
+        return await asyncio.to_thread(path.read_bytes)
+
+    async def exists(self, key: str) -> bool:
+        return self.local_path(key) is not None
+
+    async def delete(self, key: str) -> bool:
+        path = self._path(key)
+        if not path.is_file():
+            return False
+        path.unlink(missing_ok=True)
+        for variant in path.parent.glob(f"{path.stem}.w*{path.suffix}"):
+            variant.unlink(missing_ok=True)
+        return True
+
+    async def delete_older_than(self, cutoff: datetime) -> int:
+        return await asyncio.to_thread(self._delete_older_than, cutoff.timestamp())
+
+    def _delete_older_than(self, cutoff_timestamp: float) -> int:
+        deleted = 0
+        for subdir in self.root.iterdir():
+            if not subdir.is_dir():
+                continue
+            for file_path in subdir.glob("*"):
+                if not file_path.is_file():
+                    continue
+                try:
+                    if file_path.stat().st_mtime < cutoff_timestamp:
+                        file_path.unlink()
+                        logger.info(f"🗑️ Удален файл: {file_path}")
+                        deleted += 1
+                except Exception as e:
+                    logger.error(f"❌ Ошибка при удалении файла {file_path}: {str(e)}")
+        return deleted
+
+    async def open(
+            self, key: str, byte_range: Optional[str] = None, if_none_match: Optional[str] = None
+    ) -> Optional[StoredObject]:
+        # Существующий файл отдается по local_path (FileResponse/nginx), сюда доходит только отсутствующий
+        return None
+
+    def local_path(self, key: str) -> Optional[Path]:
+        root = self.root.resolve()
+        path = (root / key).resolve()
+        if not path.is_relative_to(root) or not path.is_file():
+            return None
+        return path
+
+
+class S3Storage(FileStorage):
+    """S3-совместимое хранилище; один клиент aioboto3 на процесс, закрывается при остановке"""
+
+    def __init__(
+            self,
+            bucket: str,
+            endpoint_url: Optional[str] = None,
+            region: Optional[str] = None,
+            access_key: Optional[str] = None,
+            secret_key: Optional[str] = None,
+            prefix: str = "",
+            part_size: int = 8 * 1024 * 1024,
+            max_concurrency: int = 4,
+    ):
+        if aioboto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 требует пакет aioboto3 (poetry install --extras s3)")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        # Меньше 5 МБ S3 не принимает части (кроме последней)
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.max_concurrency = max_concurrency
+        self._client_kwargs = dict(
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+            config=BotoConfig(max_pool_connections=max(10, max_concurrency * 2)),
+        )
+        self._session = aioboto3.Session()
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client = None
+        self._client_lock = asyncio.Lock()
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def _get_client(self):
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    stack = AsyncExitStack()
+                    self._client = await stack.enter_async_context(self._session.client("s3", **self._client_kwargs))
+                    self._exit_stack = stack
+        return self._client
+
+    @staticmethod
+    def _is_missing(error: "ClientError") -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    async def save(self, key: str, source: Source, content_type: Optional[str] = None) -> int:
+        client = await self._get_client()
+        object_key = self._object_key(key)
+        extra = {"ContentType": content_type} if content_type else {}
+
+        first = source[:self.part_size] if isinstance(source, bytes) else await asyncio.to_thread(source.read, self.part_size)
+        if len(first) < self.part_size:
+            await client.put_object(Bucket=self.bucket, Key=object_key, Body=first, **extra)
+            return len(first)
+
+        upload = await client.create_multipart_upload(Bucket=self.bucket, Key=object_key, **extra)
+        upload_id = upload["UploadId"]
+        try:
+            parts = await self._upload_parts(client, object_key, upload_id, source, first)
+            await client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag, _ in parts]},
+            )
+        except BaseException:
+            try:
+                await client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+            except Exception as e:
+                logger.warning(f"⚠️  Не удалось отменить multipart-загрузку {object_key}: {str(e)}")
+            raise
+        return sum(size for _, _, size in parts)
+
+    async def _upload_parts(self, client, object_key: str, upload_id: str, source: Source, first: bytes) -> List[Any]:
+        """Параллельная загрузка частей; следующая часть читается, только когда есть свободный слот"""
+        slots = asyncio.Semaphore(self.max_concurrency)
+        tasks: List[asyncio.Task] = []
+
+        async def upload_part(number: int, chunk: bytes):
+            try:
+                response = await client.upload_part(
+                    Bucket=self.bucket, Key=object_key, UploadId=upload_id, PartNumber=number, Body=chunk
+                )
+                return number, response["ETag"], len(chunk)
+            finally:
+                slots.release()
+
+        try:
+            number, chunk, offset = 1, first, len(first)
+            while chunk:
+                await slots.acquire()
+                # Упавшая часть обрывает загрузку сразу, не дочитывая источник до конца
+                for task in tasks:
+                    if task.done() and task.exception() is not None:
+                        raise task.exception()
+                tasks.append(asyncio.create_task(upload_part(number, chunk)))
+                number += 1
+                if isinstance(source, bytes):
+                    chunk = source[offset:offset + self.part_size]
+                    offset += len(chunk)
+                else:
+                    chunk = await asyncio.to_thread(source.read, self.part_size)
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def read(self, key: str) -> Optional[bytes]:
+        client = await self._get_client()
+        try:
+            response = await client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+        async with response["Body"] as body:
+            return await body.read()
+
+    async def exists(self, key: str) -> bool:
+        client = await self._get_client()
+        try:
+            await client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if self._is_missing(e):
+                return False
+            raise
+
+    async def delete(self, key: str) -> bool:
+        if not await self.exists(key):
+            return False
+        client = await self._get_client()
+        path = PurePosixPath(key)
+        variant_prefix = self._object_key(str(path.with_name(f"{path.stem}.w")))
+        keys = [self._object_key(key)]
+        async for obj in self._list(variant_prefix):
+            if obj["Key"].endswith(path.suffix):
+                keys.append(obj["Key"])
+        await self._delete_keys(client, keys)
+        return True
+
+    async def delete_older_than(self, cutoff: datetime) -> int:
+        if cutoff.tzinfo is None:
+            cutoff = cutoff.astimezone(timezone.utc)
+        client = await self._get_client()
+        old_keys = [obj["Key"] async for obj in self._list(self.prefix) if obj["LastModified"] < cutoff]
+        await self._delete_keys(client, old_keys)
+        for object_key in old_keys:
+            logger.info(f"🗑️ Удален файл: s3://{self.bucket}/{object_key}")
+        return len(old_keys)
+
+    async def _list(self, prefix: str) -> AsyncIterator[dict]:
+        client = await self._get_client()
+        paginator = client.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                yield obj
+
+    async def _delete_keys(self, client, keys: List[str]) -> None:
+        # delete_objects принимает до 1000 ключей за запрос
+        for start in range(0, len(keys), 1000):
+            batch = keys[start:start + 1000]
+            await client.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": [{"Key": k} for k in batch], "Quiet": True}
+            )
+
+    async def open(
+            self, key: str, byte_range: Optional[str] = None, if_none_match: Optional[str] = None
+    ) -> Optional[StoredObject]:
+        client = await self._get_client()
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if byte_range:
+            params["Range"] = byte_range
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        try:
+            response = await client.get_object(**params)
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            if e.response.get("Error", {}).get("Code") == "304":
+                etag = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {}).get("etag", if_none_match)
+                return StoredObject(size=0, etag=etag, not_modified=True)
+            raise
+
+        async def body() -> AsyncIterator[bytes]:
+            async with response["Body"] as stream:
+                async for chunk in stream.iter_chunks(CHUNK_SIZE):
+                    yield chunk
+
+        return StoredObject(
+            size=response["ContentLength"],
+            etag=response["ETag"],
+            content_type=response.get("ContentType"),
+            content_range=response.get("ContentRange"),
+            body=body(),
+        )
+
+    async def close(self) -> None:
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            self._client = None
+
+
+def create_storage() -> FileStorage:
+    """Хранилище по STORAGE_BACKEND"""
+    backend = settings.STORAGE_BACKEND
+    if backend == "local":
+        return LocalStorage(settings.UPLOAD_DIR)
+    if backend == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key=settings.S3_ACCESS_KEY,
+            secret_key=settings.S3_SECRET_KEY,
+            prefix=settings.S3_PREFIX,
+            part_size=settings.S3_PART_SIZE_MB * 1024 * 1024,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+        )
+    raise ValueError(f"Неизвестный STORAGE_BACKEND: {backend} (ожидается local или s3)")
+
+
+file_storage = create_storage()
@@ -0,0 +1,125 @@
+"""
+Доставка отчетов в Telegram с предохранителем и очередью повторов.
+
+Пока api.telegram.org недоступен, каждая отправка ждала бы сетевого
+таймаута (до 60 сек на медиагруппу), держа сессию БД и файлы. Предохранитель
+размыкается после нескольких сбоев подряд: новые отправки не запускаются,
+а откладываются в очередь. Очередь хранит фабрики корутин: они замыкают
+значения колонок, переданные из создания отчета, и строку заново не читают
+(кроме старой инвентаризации); статус отчета повтор обновляет, как и первая
+попытка. Очередь живет в памяти процесса и при рестарте теряется.
+
+Отчет может уходить несколькими сообщениями (фото, альбомы, продолжение
+текста). Вместе с фабрикой хранится DeliveryProgress с id уже доставленных
+частей, и повтор отправляет только оставшиеся — без дублей в чате. Id части
+задает отправитель («album:1», «continuation:0:0»), а не порядок в попытке:
+часть, пропущенная в первой попытке, не сдвигает остальные.
+
+Раз в паузу предохранителя retry_deferred() пускает первую отложенную отправку
+пробным запросом; как только цепь замыкается, остальные уходят в фон.
+"""
+import logging
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Optional, Set, Tuple
+
+from app.core.background import background_tasks
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.metrics import TELEGRAM_RETRY_DROPPED, TELEGRAM_RETRY_QUEUE
+
+logger = logging.getLogger(__name__)
+
+# Фабрика отправки: корутина возвращает True, если отчет ушел в Telegram
+SendFactory = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class DeliveryProgress:
+    """Части отчета, уже доставленные в Telegram, по id части"""
+    delivered: Set[str] = field(default_factory=set)
+
+    async def send_part(self, part_id: str, send: Callable[[], Awaitable[bool]]) -> bool:
+        """Отправляет часть, если она не ушла в прошлой попытке"""
+        if part_id in self.delivered:
+            return True
+        ok = await send()
+        if ok:
+            self.delivered.add(part_id)
+        return ok
+
+
+# Прогресс текущей отправки; TelegramService отмечает в нем каждую часть
+current_delivery: ContextVar[Optional[DeliveryProgress]] = ContextVar("telegram_delivery", default=None)
+
+
+class TelegramDelivery:
+    def __init__(self, breaker: CircuitBreaker, max_queue: int):
+        self.breaker = breaker
+        self._queue: Deque[Tuple[str, SendFactory, DeliveryProgress]] = deque()
+        self.max_queue = max_queue
+        breaker.on_close(self._flush)
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def submit(self, kind: str, factory: SendFactory) -> None:
+        """Отправка в фоне; при разомкнутом предохранителе — сразу в очередь"""
+        if not self.breaker.available():
+            self._defer(kind, factory, DeliveryProgress())
+            return
+        background_tasks.spawn(kind, self.run(kind, factory))
+
+    async def run(self, kind: str, factory: SendFactory, progress: Optional[DeliveryProgress] = None) -> bool:
+        """Одна попытка отправки; не ушедшая из-за недоступности Telegram откладывается"""
+        progress = progress or DeliveryProgress()
+        if not self.breaker.available():
+            self._defer(kind, factory, progress)
+            return False
+
+        token = current_delivery.set(progress)
+        try:
+            sent = await factory()
+        finally:
+            current_delivery.reset(token)
+        # Ошибку самого отчета (400 от API, нет файла) повтор не исправит — откладываем
+        # только то, что не ушло, пока Telegram недоступен
+        if not sent and not self.breaker.available():
+            self._defer(kind, factory, progress)
+        return bool(sent)
+
+    async def retry_deferred(self) -> None:
+        """Периодический пробный запрос, пока в очереди есть отложенные отправки"""
+        if self._queue and self.breaker.available() and not background_tasks.is_draining:
+            kind, factory, progress = self._queue.popleft()
+            TELEGRAM_RETRY_QUEUE.dec()
+            background_tasks.spawn(kind, self.run(kind, factory, progress))
+
+    def _defer(self, kind: str, factory: SendFactory, progress: DeliveryProgress) -> None:
+        if len(self._queue) >= self.max_queue:
+            dropped_kind, _, _ = self._queue.popleft()
+            TELEGRAM_RETRY_QUEUE.dec()
+            TELEGRAM_RETRY_DROPPED.inc()
+            logger.warning(f"⚠️  Очередь повторов Telegram переполнена, отброшена отправка {dropped_kind}")
+        self._queue.append((kind, factory, progress))
+        TELEGRAM_RETRY_QUEUE.inc()
+        logger.info(f"📥 Telegram недоступен, отправка {kind} отложена (в очереди: {len(self._queue)})")
+
+    def _flush(self) -> None:
+        if not self._queue or background_tasks.is_draining:
+            return
+        logger.info(f"📤 Telegram снова доступен, отправляем отложенные: {len(self._queue)}")
+        while self._queue:
+            kind, factory, progress = self._queue.popleft()
+            TELEGRAM_RETRY_QUEUE.dec()
+            background_tasks.spawn(kind, self.run(kind, factory, progress))
+
+
+telegram_breaker = CircuitBreaker(
+    "telegram",
+    failure_threshold=settings.TELEGRAM_BREAKER_FAILURES,
+    reset_timeout=settings.TELEGRAM_BREAKER_RESET_TIMEOUT,
+)
+telegram_delivery = TelegramDelivery(telegram_breaker, max_queue=settings.TELEGRAM_RETRY_QUEUE_SIZE)
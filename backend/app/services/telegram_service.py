@@ -1,63 +1,46 @@
 # backend/app/services/telegram_service.py
-from datetime import datetime
-from zoneinfo import ZoneInfo
+import logging
 import aiohttp
-from typing import Optional, Dict, Any, List
-from pathlib import Path
+from typing import Optional, Dict, Any, List, Awaitable, Callable
 import json
 import socket
-from sqlalchemy.ext.asyncio import AsyncSession
 import io
 from app.core.config import settings
+from app.core.locations import location_registry
+from app.core.logging_config import PAYLOAD_LOGGER_NAME
+from app.core.metrics import observe_telegram_call
 from app.schemas.telegram import TelegramMessage
+from app.services import telegram_templates as templates
+from app.services.storage import file_storage, storage_key
+from app.services.telegram_delivery import current_delivery, telegram_breaker
+
+logger = logging.getLogger(__name__)
+payload_logger = logging.getLogger(PAYLOAD_LOGGER_NAME)
 
 
 class TelegramService:
     def __init__(self):
         self.bot_token = settings.TELEGRAM_BOT_TOKEN
         self.chat_id = settings.TELEGRAM_CHAT_ID
-        self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.base_url = f"{settings.TELEGRAM_API_URL.rstrip('/')}/bot{self.bot_token}"
         self.mini_app_url = settings.MINI_APP_URL
 
         # Проверяем, что токен и chat_id заданы
         if not self.bot_token or self.bot_token == "your_bot_token_here":
-            print("⚠️  ВНИМАНИЕ: TELEGRAM_BOT_TOKEN не задан! Отправка в Telegram отключена.")
+            logger.warning("⚠️  ВНИМАНИЕ: TELEGRAM_BOT_TOKEN не задан! Отправка в Telegram отключена.")
             self.enabled = False
         elif not self.chat_id or self.chat_id == "your_group_chat_id_here":
-            print("⚠️  ВНИМАНИЕ: TELEGRAM_CHAT_ID не задан! Отправка в Telegram отключена.")
+            logger.warning("⚠️  ВНИМАНИЕ: TELEGRAM_CHAT_ID не задан! Отправка в Telegram отключена.")
             self.enabled = False
         else:
             self.enabled = True
-            print(f"✅ Telegram сервис инициализирован. Chat ID: {self.chat_id}")
+            logger.info(f"✅ Telegram сервис инициализирован. Chat ID: {self.chat_id}")
 
     def get_topic_id_by_location(self, location: str) -> Optional[int]:
-        """Получает ID темы по локации"""
-        # Маппинг локаций на темы
-        location_topics = {
-            "Касса - Гагарина 48/1": settings.KASSA_GAGARINA_48_TOPIC_ID,
-            "Касса - Абдулхакима Исмаилова 51": settings.KASSA_ABDULHAMID_51_TOPIC_ID,
-            "Касса - Гайдара Гаджиева 7Б": settings.KASSA_GAIDAR_7B_TOPIC_ID,
-
-            "Отчет - Гагарина 48/1": settings.OTCHET_GAGARINA_48_TOPIC_ID,
-            "Отчет - Абдулхакима Исмаилова 51": settings.OTCHET_ABDULHAMID_51_TOPIC_ID,
-            "Отчет - Гайдара Гаджиева 7Б": settings.OTCHET_GAIDAR_7B_TOPIC_ID,
-
-            "Перемещения": settings.PEREMESHENIYA,
-        }
-
-        # Пробуем найти точное совпадение
-        if location in location_topics:
-            topic_id = location_topics[location]
-            return topic_id if topic_id > 0 else None
-
-        # Если не найдено точное совпадение, ищем по части названия
-        for loc_key, topic_id in location_topics.items():
-            if location.lower() in loc_key.lower() or loc_key.lower() in location.lower():
-                return topic_id if topic_id > 0 else None
+        """Получает ID темы по локации (из реестра локаций)"""
+        return location_registry.topic_id(location)
 
-        return None
-
-    async def handle_message(self, message: TelegramMessage, db: AsyncSession):
+    async def handle_message(self, message: TelegramMessage):
         """Обрабатывает входящие сообщения от пользователей"""
         if not self.enabled:
             return
@@ -80,9 +63,9 @@ class TelegramService:
                 await self._handle_status_command(chat_id)
 
         except Exception as e:
-            print(f"❌ Ошибка обработки сообщения: {str(e)}")
+            logger.error(f"❌ Ошибка обработки сообщения: {str(e)}")
 
-    async def handle_callback_query(self, callback_query: Dict[str, Any], db: AsyncSession):
+    async def handle_callback_query(self, callback_query: Dict[str, Any]):
         """Обрабатывает нажатия на inline кнопки"""
         if not self.enabled:
             return
@@ -96,7 +79,7 @@ class TelegramService:
                 await self._answer_callback_query(query_id, "Открываю приложение...")
 
         except Exception as e:
-            print(f"❌ Ошибка обработки callback query: {str(e)}")
+            logger.error(f"❌ Ошибка обработки callback query: {str(e)}")
 
     async def _handle_start_command(self, chat_id: int, user_id: Optional[int]):
         """Обрабатывает команду /start"""
@@ -128,7 +111,7 @@ class TelegramService:
             await self._send_message_with_keyboard(chat_id, welcome_message, keyboard)
 
         except Exception as e:
-            print(f"❌ Ошибка отправки приветствия: {str(e)}")
+            logger.error(f"❌ Ошибка отправки приветствия: {str(e)}")
 
     async def _handle_help_command(self, chat_id: int):
         """Обрабатывает команду /help"""
@@ -194,15 +177,10 @@ class TelegramService:
 
             timeout = aiohttp.ClientTimeout(total=10, connect=5)
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, data=data) as response:
-                    if response.status != 200:
-                        response_text = await response.text()
-                        print(f"Telegram API ошибка (клавиатура): {response.status} - {response_text}")
-                    return response.status == 200
+            return await self._post(url, data, timeout, "sendMessage", "клавиатура")
 
         except Exception as e:
-            print(f"Ошибка отправки сообщения с клавиатурой: {str(e)}")
+            logger.error(f"Ошибка отправки сообщения с клавиатурой: {str(e)}")
             return False
 
     async def _answer_callback_query(self, query_id: str, text: str = ""):
@@ -217,12 +195,14 @@ class TelegramService:
 
             timeout = aiohttp.ClientTimeout(total=5, connect=3)
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, data=data) as response:
-                    return response.status == 200
+            with observe_telegram_call("answerCallbackQuery") as call:
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.post(url, data=data) as response:
+                        call.set_status(response.status)
+                        return response.status == 200
 
         except Exception as e:
-            print(f"Ошибка ответа на callback query: {str(e)}")
+            logger.error(f"Ошибка ответа на callback query: {str(e)}")
             return False
 
     # Методы для настройки веб-хуков
@@ -238,22 +218,24 @@ class TelegramService:
 
             timeout = aiohttp.ClientTimeout(total=10, connect=5)
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, data=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get('ok'):
-                            print(f"✅ Веб-хук установлен: {webhook_url}")
-                            return True
+            with observe_telegram_call("setWebhook") as call:
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.post(url, data=data) as response:
+                        call.set_status(response.status)
+                        if response.status == 200:
+                            result = await response.json()
+                            if result.get('ok'):
+                                logger.info(f"✅ Веб-хук установлен: {webhook_url}")
+                                return True
+                            else:
+                                logger.error(f"❌ Ошибка установки веб-хука: {result.get('description')}")
                         else:
-                            print(f"❌ Ошибка установки веб-хука: {result.get('description')}")
-                    else:
-                        response_text = await response.text()
-                        print(f"❌ HTTP ошибка при установке веб-хука: {response.status} - {response_text}")
-                    return False
+                            response_text = await response.text()
+                            logger.error(f"❌ HTTP ошибка при установке веб-хука: {response.status} - {response_text}")
+                        return False
 
         except Exception as e:
-            print(f"❌ Исключение при установке веб-хука: {str(e)}")
+            logger.error(f"❌ Исключение при установке веб-хука: {str(e)}")
             return False
 
     async def delete_webhook(self) -> bool:
@@ -263,19 +245,21 @@ class TelegramService:
 
             timeout = aiohttp.ClientTimeout(total=10, connect=5)
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get('ok'):
-                            print("✅ Веб-хук удален")
-                            return True
-                        else:
-                            print(f"❌ Ошибка удаления веб-хука: {result.get('description')}")
-                    return False
+            with observe_telegram_call("deleteWebhook") as call:
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.post(url) as response:
+                        call.set_status(response.status)
+                        if response.status == 200:
+                            result = await response.json()
+                            if result.get('ok'):
+                                logger.info("✅ Веб-хук удален")
+                                return True
+                            else:
+                                logger.error(f"❌ Ошибка удаления веб-хука: {result.get('description')}")
+                        return False
 
         except Exception as e:
-            print(f"❌ Ошибка удаления веб-хука: {str(e)}")
+            logger.error(f"❌ Ошибка удаления веб-хука: {str(e)}")
             return False
 
     async def get_webhook_info(self) -> Dict[str, Any]:
@@ -285,16 +269,18 @@ class TelegramService:
 
             timeout = aiohttp.ClientTimeout(total=10, connect=5)
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get('ok'):
-                            return result.get('result', {})
-                    return {}
+            with observe_telegram_call("getWebhookInfo") as call:
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.get(url) as response:
+                        call.set_status(response.status)
+                        if response.status == 200:
+                            result = await response.json()
+                            if result.get('ok'):
+                                return result.get('result', {})
+                        return {}
 
         except Exception as e:
-            print(f"❌ Ошибка получения информации о веб-хуке: {str(e)}")
+            logger.error(f"❌ Ошибка получения информации о веб-хуке: {str(e)}")
             return {}
 
     # ОБНОВЛЕННЫЕ МЕТОДЫ ДЛЯ ОТПРАВКИ ОТЧЕТОВ
@@ -302,117 +288,124 @@ class TelegramService:
     async def send_shift_report(self, report_data: Dict[str, Any], photo_path: str, receipt_photo_path: Optional[str] = None) -> bool:
         """Отправляет отчет смены в Telegram"""
         if not self.enabled:
-            print("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
+            logger.debug("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
             return False
 
         try:
             topic_id = self.get_topic_id_by_location(report_data.get('location', ''))
 
             # Форматируем сообщение
-            message = self._format_shift_report_message(report_data)
+            message = templates.render_shift_report(report_data)
+
+            # Подпись к фото ограничена 1024 символами, остаток отчета уходит следом текстом
+            caption, continuation = templates.split_caption(message)
 
             # ОБНОВЛЕНО: Если есть фото чека, отправляем как медиа-группу
-            if receipt_photo_path and Path(receipt_photo_path).exists():
+            if receipt_photo_path and await self._photo_exists(receipt_photo_path):
                 # Отправляем оба фото как медиа-группу
-                success = await self._send_shift_report_media_group(message, photo_path, receipt_photo_path, topic_id)
+                success = await self._send_part(
+                    "photo", lambda: self._send_shift_report_media_group(caption, photo_path, receipt_photo_path, topic_id)
+                )
             else:
                 # Отправляем только основное фото с подписью
-                success = await self._send_photo_with_caption(message, photo_path, topic_id)
+                success = await self._send_part(
+                    "photo", lambda: self._send_photo_with_caption(caption, photo_path, topic_id)
+                )
+
+            for index, part in enumerate(continuation):
+                if success:
+                    success = await self._send_message(self.chat_id, part, topic_id, part_id=f"continuation:{index}")
 
             if success:
-                print(f"✅ Отчет смены отправлен в Telegram для локации: {report_data.get('location')}")
+                logger.info(f"✅ Отчет смены отправлен в Telegram для локации: {report_data.get('location')}")
             else:
-                print(f"⚠️  Отчет смены создан, но не отправлен в Telegram для локации: {report_data.get('location')}")
+                logger.warning(f"⚠️  Отчет смены создан, но не отправлен в Telegram для локации: {report_data.get('location')}")
 
             return success
 
         except Exception as e:
-            print(f"⚠️  Отчет смены создан, но ошибка отправки в Telegram: {str(e)}")
+            logger.warning(f"⚠️  Отчет смены создан, но ошибка отправки в Telegram: {str(e)}")
             return False
 
     async def send_daily_inventory_report(self, report_data: Dict[str, Any]) -> bool:
         """Отправляет отчет старой инвентаризации в Telegram (для обратной совместимости)"""
         if not self.enabled:
-            print("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
+            logger.debug("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
             return False
 
         try:
             topic_id = self.get_topic_id_by_location(report_data.get('location', ''))
 
             # Форматируем сообщение
-            message = self._format_daily_inventory_message(report_data)
+            message = templates.render_daily_inventory(report_data)
 
             # Отправляем сообщение
             success = await self._send_message(self.chat_id, message, topic_id)
 
             if success:
-                print(f"✅ Отчет инвентаризации отправлен в Telegram для локации: {report_data.get('location')}")
+                logger.info(f"✅ Отчет инвентаризации отправлен в Telegram для локации: {report_data.get('location')}")
             else:
-                print(
+                logger.warning(
                     f"⚠️  Отчет инвентаризации создан, но не отправлен в Telegram для локации: {report_data.get('location')}")
 
             return success
 
         except Exception as e:
-            print(f"⚠️  Отчет инвентаризации создан, но ошибка отправки в Telegram: {str(e)}")
+            logger.warning(f"⚠️  Отчет инвентаризации создан, но ошибка отправки в Telegram: {str(e)}")
             return False
 
     async def send_daily_inventory_v2_report(self, inventory_data: Dict[str, Any]) -> bool:
         """НОВЫЙ МЕТОД: Отправляет отчет новой инвентаризации v2 в Telegram"""
         if not self.enabled:
-            print("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
+            logger.debug("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
             return False
 
         try:
             topic_id = self.get_topic_id_by_location(inventory_data.get('location', ''))
 
             # Форматируем сообщение для новой системы
-            message = self._format_daily_inventory_v2_message(inventory_data)
+            message = templates.render_daily_inventory_v2(inventory_data)
 
             # Отправляем сообщение
             success = await self._send_message(self.chat_id, message, topic_id)
 
             if success:
-                print(f"✅ Отчет инвентаризации v2 отправлен в Telegram для локации: {inventory_data.get('location')}")
+                logger.info(f"✅ Отчет инвентаризации v2 отправлен в Telegram для локации: {inventory_data.get('location')}")
             else:
-                print(
+                logger.warning(
                     f"⚠️  Отчет инвентаризации v2 создан, но не отправлен в Telegram для локации: {inventory_data.get('location')}")
 
             return success
 
         except Exception as e:
-            print(f"⚠️  Отчет инвентаризации v2 создан, но ошибка отправки в Telegram: {str(e)}")
+            logger.warning(f"⚠️  Отчет инвентаризации v2 создан, но ошибка отправки в Telegram: {str(e)}")
             return False
 
     async def send_goods_report(self, report_data: Dict[str, Any], photos: List[Dict[str, Any]]) -> bool:
         """Отправляет отчет приема товаров в Telegram с фотографиями"""
         if not self.enabled:
-            print("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
+            logger.debug("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
             return False
 
         try:
             topic_id = self.get_topic_id_by_location(report_data.get('location', ''))
 
             # Форматируем сообщение
-            message = self._format_goods_report_message(report_data)
+            message = templates.render_goods_report(report_data)
 
             # Если фотографий нет - отправляем только текстовое сообщение
             if not photos:
                 success = await self._send_message(self.chat_id, message, topic_id)
 
                 if success:
-                    print(f"✅ Отчет приема товаров отправлен в Telegram для локации: {report_data.get('location')}")
+                    logger.info(f"✅ Отчет приема товаров отправлен в Telegram для локации: {report_data.get('location')}")
                 else:
-                    print(
+                    logger.warning(
                         f"⚠️  Отчет приема товаров создан, но не отправлен в Telegram для локации: {report_data.get('location')}")
 
                 return success
 
-            continuation_caption = (
-                "📎 <b>Продолжение фото</b>\n"
-                "(относится к посту выше)"
-            )
-
+            caption, continuation = templates.split_caption(message)
             overall_success = True
 
             # Telegram ограничивает sendMediaGroup максимум 10 медиа.
@@ -420,41 +413,49 @@ class TelegramService:
             for batch_index in range(0, len(photos), 10):
                 batch = photos[batch_index:batch_index + 10]
                 is_first_batch = batch_index == 0
-                batch_caption = message if is_first_batch else continuation_caption
+                batch_caption = caption if is_first_batch else templates.CONTINUATION_CAPTION
+
+                part_id = f"album:{batch_index // 10}"
 
                 if len(batch) == 1:
-                    ok = await self._send_photo_with_caption_from_bytes(
+                    ok = await self._send_part(part_id, lambda: self._send_photo_with_caption_from_bytes(
                         batch_caption,
                         batch[0]['content'],
                         batch[0].get('filename', 'photo.jpg'),
                         topic_id
-                    )
+                    ))
                 else:
-                    ok = await self._send_media_group_with_caption(
+                    ok = await self._send_part(part_id, lambda: self._send_media_group_with_caption(
                         batch_caption,
                         batch,
                         topic_id
-                    )
+                    ))
 
                 if not ok:
                     overall_success = False
 
+                # Продолжение длинного отчета — сразу после первого альбома
+                if is_first_batch and ok:
+                    for index, part in enumerate(continuation):
+                        if not await self._send_message(self.chat_id, part, topic_id, part_id=f"continuation:{index}"):
+                            overall_success = False
+
             if overall_success:
-                print(f"✅ Отчет приема товаров отправлен в Telegram для локации: {report_data.get('location')}")
+                logger.info(f"✅ Отчет приема товаров отправлен в Telegram для локации: {report_data.get('location')}")
             else:
-                print(
+                logger.warning(
                     f"⚠️  Отчет приема товаров создан, но не отправлен в Telegram для локации: {report_data.get('location')}")
 
             return overall_success
 
         except Exception as e:
-            print(f"⚠️  Отчет приема товаров создан, но ошибка отправки в Telegram: {str(e)}")
+            logger.warning(f"⚠️  Отчет приема товаров создан, но ошибка отправки в Telegram: {str(e)}")
             return False
 
     async def send_writeoff_transfer_report(self, report_data: Dict[str, Any]) -> bool:
         """Отправляет акт списания/перемещения в Telegram"""
         if not self.enabled:
-            print("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
+            logger.debug("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
             return False
 
         try:
@@ -463,380 +464,81 @@ class TelegramService:
             else:
                 topic_id = self.get_topic_id_by_location("Перемещения")
 
-            # Форматируем сообщение
-            message = self._format_writeoff_transfer_message(report_data)
+            payload_logger.info("Данные акта списания/перемещения: %s", report_data)
+            message = templates.render_writeoff_transfer(report_data)
 
             # Отправляем сообщение
             success = await self._send_message(self.chat_id, message, topic_id)
 
             if success:
-                print(f"✅ Акт списания/перемещения отправлен в Telegram для локации: {report_data.get('location')}")
+                logger.info(f"✅ Акт списания/перемещения отправлен в Telegram для локации: {report_data.get('location')}")
             else:
-                print(
+                logger.warning(
                     f"⚠️  Акт списания/перемещения создан, но не отправлен в Telegram для локации: {report_data.get('location')}")
 
             return success
 
         except Exception as e:
-            print(f"⚠️  Акт списания/перемещения создан, но ошибка отправки в Telegram: {str(e)}")
+            logger.warning(f"⚠️  Акт списания/перемещения создан, но ошибка отправки в Telegram: {str(e)}")
             return False
 
-    # МЕТОДЫ ФОРМАТИРОВАНИЯ СООБЩЕНИЙ
-
-    def _format_shift_report_message(self, data: Dict[str, Any]) -> str:
-        """Форматирует сообщение отчета смены"""
-        shift_emoji = "🌅" if data.get('shift_type') == 'morning' else "🌙"
-
-        # Получаем дату отчета из данных или используем текущую
-        user_date = data.get('date')
-        if user_date:
-            # Если date - это datetime объект
-            if hasattr(user_date, 'strftime'):
-                # ИСПРАВЛЕНО: Дата уже в МСК timezone из БД, просто форматируем без конверсии
-                # Если есть timezone info, используем astimezone для корректного отображения
-                if user_date.tzinfo is not None:
-                    # Конвертируем в МСК если это не МСК
-                    msk_date = user_date.astimezone(ZoneInfo("Europe/Moscow"))
-                    formatted_date = msk_date.strftime('%d.%m.%Y %H:%M')
-                else:
-                    # Если timezone нет, просто форматируем
-                    formatted_date = user_date.strftime('%d.%m.%Y %H:%M')
-            # Если date - это строка
-            elif isinstance(user_date, str):
-                try:
-                    # Пытаемся парсить ISO формат
-                    parsed_date = datetime.fromisoformat(user_date.replace('Z', '+00:00'))
-                    msk_date = parsed_date.astimezone(ZoneInfo("Europe/Moscow"))
-                    formatted_date = msk_date.strftime('%d.%m.%Y %H:%M')
-                except:
-                    formatted_date = user_date
-            else:
-                formatted_date = str(user_date)
-        else:
-            # Fallback: используем текущую дату по МСК
-            formatted_date = datetime.now(ZoneInfo("UTC")).astimezone(ZoneInfo("Europe/Moscow")).strftime('%d.%m.%Y %H:%M')
-
-        message = f""" <b>ОТЧЁТ ЗАВЕРШЕНИЯ СМЕНЫ</b> {shift_emoji}
-
-📍 <b>Локация:</b> {data.get('location', 'Не указана')}
-👤 <b>Кассир:</b> {data.get('cashier_name', 'Не указан')}
-📅 <b>Смена:</b> {'Утренняя' if data.get('shift_type') == 'morning' else 'Ночная'}
-🕐 <b>Дата/время:</b> {formatted_date}
-
-📊 <b>Информация из iiko:</b>
-- Общая выручка: <b>{int(data.get('total_revenue', 0))}₽</b>
-- Возвраты: <b>{int(data.get('returns', 0))}₽</b>
-
-💳 <b>Безналичные платежи:</b>
-- Эквайринг: <b>{int(data.get('acquiring', 0))}₽</b>
-- QR код: <b>{int(data.get('qr_code', 0))}₽</b>
-- Онлайн приложение: <b>{int(data.get('online_app', 0))}₽</b>
-- Яндекс Еда: <b>{int(data.get('yandex_food', 0))}₽</b>
-- Яндекс Еда (вручную): <b>{int(data.get('yandex_food_no_system', 0))}₽</b>
-- Primehill: <b>{int(data.get('primehill', 0))}₽</b>
-<b>Итого эквайринг: {int(data.get('total_acquiring', 0))}₽</b>
-
-📈 <b>Внесения:</b>
-"""
-
-        # Добавляем приходы
-        income_entries = data.get('income_entries', [])
-        if income_entries:
-            for entry in income_entries:
-                message += f"• {entry.get('comment', 'Без комментария')}: <b>{int(entry.get('amount', 0))}₽</b>\n"
-        else:
-            message += "• Приходов нет\n"
-
-        message += f"<b>Итого внесений: {int(data.get('total_income', 0))}₽</b>\n\n"
-
-        message += "📉 <b>Расходы:</b>\n"
-
-        # Добавляем расходы
-        expense_entries = data.get('expense_entries', [])
-        if expense_entries:
-            for entry in expense_entries:
-                message += f"• {entry.get('description', 'Без описания')}: <b>{int(entry.get('amount', 0))}₽</b>\n"
-        else:
-            message += "• Расходов нет\n"
-
-        message += f"<b>Итого расходы: {int(data.get('total_expenses', 0))}₽</b>\n\n"
-
-        # Расчеты
-        calculated = int(data.get('calculated_amount', 0))
-        fact_cash = int(data.get('fact_cash', 0))
-        surplus_shortage = int(data.get('surplus_shortage', 0))
-
-        message += f"""➡️ <b>Должно быть:</b> {calculated}₽
-
-💵 <b>Фактически в кассе:</b> {fact_cash}₽
-💰 <b>Расчетная сумма:</b> {calculated}₽
+    # ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ОТПРАВКИ
 
-"""
+    async def _post(self, url: str, data: Any, timeout: aiohttp.ClientTimeout, api_method: str, label: str) -> bool:
+        """
+        POST в Bot API через предохранитель: пока Telegram недоступен,
+        вызов сразу возвращает False, не дожидаясь сетевого таймаута.
+        """
+        if not telegram_breaker.allow_request():
+            logger.debug(f"🔌 Telegram недоступен, {api_method} ({label}) не отправлен")
+            return False
 
-        if surplus_shortage > 0:
-            message += f"✅ <b>Излишек: +{surplus_shortage}₽</b>\n"
-        elif surplus_shortage < 0:
-            message += f"❌ <b>Недостача: {surplus_shortage}₽</b>\n"
-        else:
-            message += f"✅ <b>Сходится: {surplus_shortage}₽</b>\n"
-
-        message += f"<b>КОММЕНТАРИИ: {data.get('comments') if data.get('comments') else 'Отсутствуют'}</b>"
-
-        return message
-
-    def _format_daily_inventory_v2_message(self, data: Dict[str, Any]) -> str:
-        """НОВЫЙ МЕТОД: Форматирует сообщение новой инвентаризации v2"""
-        shift_emoji = "🌅" if data.get('shift_type') == 'morning' else "🌙"
-
-        # ИЗМЕНЕНО: Используем дату из данных пользователя вместо текущего времени
-        user_date = data.get('date')
-        if user_date:
-            # Если date - это datetime объект
-            if hasattr(user_date, 'strftime'):
-                formatted_date = user_date.strftime('%d.%m.%Y %H:%M')
-            # Если date - это строка
-            elif isinstance(user_date, str):
-                try:
-                    # Пытаемся парсить ISO формат
-
-                    parsed_date = datetime.fromisoformat(user_date.replace('Z', '+00:00'))
-                    formatted_date = parsed_date.strftime('%d.%m.%Y %H:%M')
-                except:
-                    formatted_date = user_date
-            else:
-                formatted_date = str(user_date)
-        else:
-            # Fallback на текущее время
-            formatted_date = datetime.now(ZoneInfo("UTC")).astimezone(ZoneInfo("Europe/Moscow")).strftime(
-                '%d.%m.%Y %H:%M')
-
-        message = f"""📦 <b>ЕЖЕДНЕВНАЯ ИНВЕНТАРИЗАЦИЯ</b> {shift_emoji}
-
-📍 <b>Локация:</b> {data.get('location', 'Не указана')}
-👤 <b>Кассир:</b> {data.get('cashier_name', 'Не указан')}
-📅 <b>Смена:</b> {'Утренняя' if data.get('shift_type') == 'morning' else 'Ночная'}
-🕐 <b>Время проведения:</b> {formatted_date}
-
-    """
-
-        # Получаем данные инвентаризации
-        inventory_data = data.get('inventory_data', [])
-
-        if not inventory_data:
-            message += "<b>Товары не указаны</b>"
-            return message
-
-        # Группируем товары по категориям
-        categories = {}
-
-        for item in inventory_data:
-            category = item.get('item_category', 'Прочее')
-            item_name = item.get('item_name', 'Неизвестный товар')
-            quantity = item.get('quantity', 0)
-            unit = item.get('item_unit', 'шт')
-
-            if category not in categories:
-                categories[category] = []
-
-            categories[category].append({
-                'name': item_name,
-                'quantity': quantity,
-                'unit': unit
-            })
-
-        # Эмодзи для категорий
-        category_emojis = {
-            'напитки': '🥤',
-            'еда': '🍽️',
-            'кухня': '🍳',
-            'бар': '🍹',
-            'упаковки': '📦',
-            'хоз': '🧽',
-            'хозтовары': '🧽',
-            'прочее': '📋'
-        }
-
-        # Добавляем товары по категориям
-        for category, items in categories.items():
-            emoji = category_emojis.get(category.lower(), '📋')
-            message += f"{emoji} <b>{category.upper()}:</b>\n"
-
-            for item in items:
-                message += f"• {item['name']}: <b>{item['quantity']} {item['unit']}</b>\n"
-
-            message += "\n"
-
-        return message
-
-    def _format_goods_report_message(self, data: Dict[str, Any]) -> str:
-        """Форматирует сообщение отчета приема товаров"""
-
-        # Получаем дату отчета из данных или используем текущую
-        user_date = data.get('date')
-        if user_date:
-            # Если date - это datetime объект
-            if hasattr(user_date, 'strftime'):
-                # Если есть timezone info, используем astimezone для корректного отображения
-                if user_date.tzinfo is not None:
-                    # Конвертируем в МСК если это не МСК
-                    msk_date = user_date.astimezone(ZoneInfo("Europe/Moscow"))
-                    formatted_date = msk_date.strftime('%d.%m.%Y %H:%M')
-                else:
-                    # Если timezone нет, просто форматируем
-                    formatted_date = user_date.strftime('%d.%m.%Y %H:%M')
-            # Если date - это строка
-            elif isinstance(user_date, str):
-                try:
-                    # Пытаемся парсить ISO формат
-                    parsed_date = datetime.fromisoformat(user_date.replace('Z', '+00:00'))
-                    msk_date = parsed_date.astimezone(ZoneInfo("Europe/Moscow"))
-                    formatted_date = msk_date.strftime('%d.%m.%Y %H:%M')
-                except:
-                    formatted_date = user_date
-            else:
-                formatted_date = str(user_date)
-        else:
-            # Fallback: используем текущую дату по МСК
-            formatted_date = datetime.now(ZoneInfo("UTC")).astimezone(ZoneInfo("Europe/Moscow")).strftime('%d.%m.%Y %H:%M')
-
-        message = f"""📋 <b>ОТЧЁТ ПРИЁМА ТОВАРА</b>
-
-📍 <b>Локация:</b> {data.get('location', 'Не указана')}
-🕐 <b>Дата:</b> {formatted_date}
-👤 <b>Кассир:</b> {data.get('cashier_name', 'Не указан')}
-📅 <b>Смена:</b> {'Утренняя' if data.get('shift_type') == 'morning' else 'Ночная'}
-"""
-
-        # Кухня (Поставщики - Пункты 1 и 2)
-        kuxnya = data.get('kuxnya', [])
-        if kuxnya:
-            message += "\n<b>Основное и Напитки</b>\n"
-            for item in kuxnya:
-                name = item.get('name', 'Не указано')
-                count = item.get('count', 0)
-                unit = item.get('unit', 'шт')
-                message += f"• {name} — <b>{count}</b>\n"
-
-        # Бар (Напитки - Пункт 2)
-        bar = data.get('bar', [])
-        if bar:
-            message += "🍹 <b>Перемещение с другой точки к вам:</b>\n"
-            for item in bar:
-                name = item.get('name', 'Не указано')
-                count = item.get('count', 0)
-                unit = item.get('unit', 'шт')
-                message += f"• {name} — <b>{count} {unit}</b>\n"
-
-        # Упаковки/хоз (Покупки с магазина - Пункт 4)
-        upakovki = data.get('upakovki_xoz', [])
-        if upakovki:
-            message += "\n🛒 <b>Покупки с магазина:</b>\n"
-            for item in upakovki:
-                name = item.get('name', 'Не указано')
-                count = item.get('count', 0)
-                unit = item.get('unit', 'шт')
-                message += f"• {name} — <b>{count} {unit}</b>\n"
-
-        # Информация о фотографиях
-        photos_count = len(data.get('photos_urls', []))
-        if photos_count > 0:
-            message += f"\n📸 <b>Фотографий накладных:</b> {photos_count}\n"
-
-        return message
-
-    def _format_writeoff_transfer_message(self, data: Dict[str, Any]) -> str:
-        """Форматирует сообщение акта списания/перемещения"""
-
-        # Обрабатываем дату и время отчета из отдельных полей
-        report_date = data.get('report_date')
-        report_time = data.get('report_time')
-
-        if report_date and report_time:
-            # Если есть и дата, и время отчета
-            try:
-                if hasattr(report_date, 'strftime') and hasattr(report_time, 'strftime'):
-                    # Если это объекты date и time
-                    formatted_date = f"{report_date.strftime('%d.%m.%Y')} {report_time.strftime('%H:%M')}"
-                else:
-                    # Если это строки
-                    formatted_date = f"{report_date} {report_time}"
-            except:
-                formatted_date = f"{report_date} {report_time}"
-        elif report_date:
-            # Если есть только дата отчета
-            try:
-                if hasattr(report_date, 'strftime'):
-                    formatted_date = report_date.strftime('%d.%m.%Y')
-                else:
-                    formatted_date = str(report_date)
-            except:
-                formatted_date = str(report_date)
+        try:
+            with observe_telegram_call(api_method) as call:
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.post(url, data=data) as response:
+                        call.set_status(response.status)
+                        status = response.status
+                        if status != 200:
+                            response_text = await response.text()
+                            logger.error(f"Telegram API ошибка ({label}): {status} - {response_text}")
+        except BaseException:
+            # Сеть, таймаут и отмена внешним wait_for — тоже сбой: иначе пробный
+            # запрос полуоткрытого предохранителя так и не завершится
+            telegram_breaker.record_failure()
+            raise
+
+        # 429 и 5xx — Telegram перегружен или недоступен; прочие 4xx — ошибка самого запроса
+        if status == 429 or status >= 500:
+            telegram_breaker.record_failure()
         else:
-            # Fallback: используем дату создания записи или текущее время
-            user_date = data.get('date')
-            if user_date:
-                # Если date - это datetime объект
-                if hasattr(user_date, 'strftime'):
-                    formatted_date = user_date.strftime('%d.%m.%Y %H:%M')
-                # Если date - это строка
-                elif isinstance(user_date, str):
-                    try:
-                        # Пытаемся парсить ISO формат
-                        parsed_date = datetime.fromisoformat(user_date.replace('Z', '+00:00'))
-                        formatted_date = parsed_date.strftime('%d.%m.%Y %H:%M')
-                    except:
-                        formatted_date = user_date
-                else:
-                    formatted_date = str(user_date)
-            else:
-                # Fallback на текущее время если дата не указана
-                formatted_date = datetime.now(ZoneInfo("UTC")).astimezone(ZoneInfo("Europe/Moscow")).strftime(
-                    '%d.%m.%Y %H:%M')
-
-        # Определяем локацию назначения для перемещений
-        location_to = data.get('location_to', '')
-        location_info = data.get('location', 'Не указана')
-        print(data)
-        if location_to:
-            location_info += f" → {location_to}"
-
-        message = f"""📋 <b>АКТ {data.get('writeoff_or_transfer', 'СПИСАНИЯ/ПЕРЕМЕЩЕНИЯ')}</b>
-
-📍 <b>Локация:</b> {location_info}
-👤 <b>Кассир:</b> {data.get('cashier_name', 'Не указан')}
-📅 <b>Смена:</b> {'Утренняя' if data.get('shift_type') == 'morning' else 'Ночная'}
-📆 <b>Дата отчета:</b> {formatted_date}
-"""
-
-        # Списания
-        writeoffs = data.get('writeoffs', [])
-        if writeoffs:
-            message += "\n🗑 <b>СПИСАНИЕ:</b>\n"
-            for item in writeoffs:
-                name = item.get('name', 'Не указано')
-                weight = int(item.get('weight', 0))
-                unit = item.get('unit', 'кг')
-                reason = item.get('reason', 'Не указано')
-                message += f"• {name} — <b>{weight} {unit}</b> — {reason}\n"
-            message += "\n"
-
-        # Перемещения
-        transfers = data.get('transfers', [])
-        if transfers:
-            message += "\n🔄 <b>ПЕРЕМЕЩЕНИЕ:</b>\n"
-            if location_to:
-                message += f"📍 <b>Направление:</b>С {data.get('location', '')} НА → {location_to}\n\n"
-
-            for item in transfers:
-                name = item.get('name', 'Не указано')
-                message += f"• {name}\n"
-
-        return message
-
-    # ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ОТПРАВКИ
+            telegram_breaker.record_success()
+        return status == 200
+
+    @staticmethod
+    async def _send_part(part_id: str, send: Callable[[], Awaitable[bool]]) -> bool:
+        """
+        Одна часть отчета (фото, альбом, сообщение) с постоянным в пределах отчета id.
+        При повторе отложенной отправки части, доставленные в прошлой попытке,
+        пропускаются (см. DeliveryProgress).
+        """
+        progress = current_delivery.get()
+        if progress is None:
+            return await send()
+        return await progress.send_part(part_id, send)
+
+    async def _send_message(
+        self, chat_id: int, text: str, topic_id: Optional[int] = None, part_id: str = "message"
+    ) -> bool:
+        """Отправляет текстовое сообщение; длиннее 4096 символов — несколькими сообщениями по порядку"""
+        for index, part in enumerate(templates.split_message(text)):
+            if not await self._send_part(
+                f"{part_id}:{index}", lambda: self._send_message_part(chat_id, part, topic_id)
+            ):
+                return False
+        return True
 
-    async def _send_message(self, chat_id: int, text: str, topic_id: Optional[int] = None) -> bool:
-        """Отправляет текстовое сообщение"""
+    async def _send_message_part(self, chat_id: int, text: str, topic_id: Optional[int] = None) -> bool:
         try:
             url = f"{self.base_url}/sendMessage"
 
@@ -851,20 +553,26 @@ class TelegramService:
 
             timeout = aiohttp.ClientTimeout(total=10, connect=5)
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, data=data) as response:
-                    if response.status != 200:
-                        response_text = await response.text()
-                        print(f"Telegram API ошибка (текст): {response.status} - {response_text}")
-                    return response.status == 200
+            return await self._post(url, data, timeout, "sendMessage", "текст")
 
         except (aiohttp.ClientError, socket.gaierror, OSError) as e:
-            print(f"Ошибка сети при отправке сообщения в Telegram: {str(e)}")
+            logger.error(f"Ошибка сети при отправке сообщения в Telegram: {str(e)}")
             return False
         except Exception as e:
-            print(f"Неожиданная ошибка при отправке сообщения в Telegram: {str(e)}")
+            logger.error(f"Неожиданная ошибка при отправке сообщения в Telegram: {str(e)}")
             return False
 
+    @staticmethod
+    async def _read_photo(photo_path: str) -> Optional[bytes]:
+        """Фото из хранилища загрузок по сохраненному пути; None, если файла нет"""
+        key = storage_key(photo_path)
+        return await file_storage.read(key) if key else None
+
+    @staticmethod
+    async def _photo_exists(photo_path: str) -> bool:
+        key = storage_key(photo_path)
+        return bool(key) and await file_storage.exists(key)
+
     async def _send_photo_with_caption(self, caption: str, photo_path: str, topic_id: Optional[int] = None) -> bool:
         """Отправляет фото с подписью"""
         try:
@@ -879,32 +587,27 @@ class TelegramService:
             if topic_id:
                 data.add_field('message_thread_id', str(topic_id))
 
-            # Проверяем существование файла
-            if not Path(photo_path).exists():
-                print(f"Файл фотографии не найден: {photo_path}")
+            # Читаем файл из хранилища
+            photo_content = await self._read_photo(photo_path)
+            if photo_content is None:
+                logger.warning(f"Файл фотографии не найден: {photo_path}")
                 return False
 
             # Добавляем файл
-            with open(photo_path, 'rb') as photo_file:
-                data.add_field('photo', photo_file, filename='report.jpg', content_type='image/jpeg')
+            data.add_field('photo', io.BytesIO(photo_content), filename='report.jpg', content_type='image/jpeg')
 
-                timeout = aiohttp.ClientTimeout(total=30, connect=10)
+            timeout = aiohttp.ClientTimeout(total=30, connect=10)
 
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    async with session.post(url, data=data) as response:
-                        if response.status != 200:
-                            response_text = await response.text()
-                            print(f"Telegram API ошибка (фото): {response.status} - {response_text}")
-                        return response.status == 200
+            return await self._post(url, data, timeout, "sendPhoto", "фото")
 
         except (aiohttp.ClientError, socket.gaierror, OSError) as e:
-            print(f"Ошибка сети при отправке фото в Telegram: {str(e)}")
+            logger.error(f"Ошибка сети при отправке фото в Telegram: {str(e)}")
             return False
         except FileNotFoundError:
-            print(f"Файл фотографии не найден: {photo_path}")
+            logger.warning(f"Файл фотографии не найден: {photo_path}")
             return False
         except Exception as e:
-            print(f"Неожиданная ошибка при отправке фото в Telegram: {str(e)}")
+            logger.error(f"Неожиданная ошибка при отправке фото в Telegram: {str(e)}")
             return False
 
     async def _send_shift_report_media_group(self, caption: str, photo_path: str, receipt_photo_path: str, topic_id: Optional[int] = None) -> bool:
@@ -919,54 +622,49 @@ class TelegramService:
             if topic_id:
                 data.add_field('message_thread_id', str(topic_id))
 
-            # Проверяем существование файлов
-            if not Path(photo_path).exists():
-                print(f"Файл основной фотографии не найден: {photo_path}")
+            # Читаем оба файла из хранилища
+            photo_content = await self._read_photo(photo_path)
+            if photo_content is None:
+                logger.warning(f"Файл основной фотографии не найден: {photo_path}")
                 return False
-            if not Path(receipt_photo_path).exists():
-                print(f"Файл фото чека не найден: {receipt_photo_path}")
+            receipt_content = await self._read_photo(receipt_photo_path)
+            if receipt_content is None:
+                logger.warning(f"Файл фото чека не найден: {receipt_photo_path}")
                 return False
 
-            # Открываем оба файла
-            with open(photo_path, 'rb') as photo_file, open(receipt_photo_path, 'rb') as receipt_file:
-                # Добавляем файлы
-                data.add_field('photo1', photo_file, filename='report.jpg', content_type='image/jpeg')
-                data.add_field('photo2', receipt_file, filename='receipt.jpg', content_type='image/jpeg')
-
-                # Создаем медиа массив
-                media = [
-                    {
-                        "type": "photo",
-                        "media": "attach://photo1",
-                        "caption": caption,
-                        "parse_mode": "HTML"
-                    },
-                    {
-                        "type": "photo",
-                        "media": "attach://photo2"
-                    }
-                ]
+            # Добавляем файлы
+            data.add_field('photo1', io.BytesIO(photo_content), filename='report.jpg', content_type='image/jpeg')
+            data.add_field('photo2', io.BytesIO(receipt_content), filename='receipt.jpg', content_type='image/jpeg')
+
+            # Создаем медиа массив
+            media = [
+                {
+                    "type": "photo",
+                    "media": "attach://photo1",
+                    "caption": caption,
+                    "parse_mode": "HTML"
+                },
+                {
+                    "type": "photo",
+                    "media": "attach://photo2"
+                }
+            ]
 
-                # Добавляем медиа массив как JSON
-                data.add_field('media', json.dumps(media))
+            # Добавляем медиа массив как JSON
+            data.add_field('media', json.dumps(media))
 
-                timeout = aiohttp.ClientTimeout(total=60, connect=15)
+            timeout = aiohttp.ClientTimeout(total=60, connect=15)
 
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    async with session.post(url, data=data) as response:
-                        if response.status != 200:
-                            response_text = await response.text()
-                            print(f"Telegram API ошибка (медиа группа отчёта смены): {response.status} - {response_text}")
-                        return response.status == 200
+            return await self._post(url, data, timeout, "sendMediaGroup", "медиа группа отчёта смены")
 
         except (aiohttp.ClientError, socket.gaierror, OSError) as e:
-            print(f"Ошибка сети при отправке медиа группы отчёта смены в Telegram: {str(e)}")
+            logger.error(f"Ошибка сети при отправке медиа группы отчёта смены в Telegram: {str(e)}")
             return False
         except FileNotFoundError as e:
-            print(f"Файл фотографии не найден: {str(e)}")
+            logger.warning(f"Файл фотографии не найден: {str(e)}")
             return False
         except Exception as e:
-            print(f"Неожиданная ошибка при отправке медиа группы отчёта смены в Telegram: {str(e)}")
+            logger.error(f"Неожиданная ошибка при отправке медиа группы отчёта смены в Telegram: {str(e)}")
             return False
 
     async def _send_photo_with_caption_from_bytes(self, caption: str, photo_bytes: bytes, filename: str,
@@ -990,18 +688,13 @@ class TelegramService:
 
             timeout = aiohttp.ClientTimeout(total=30, connect=10)
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, data=data) as response:
-                    if response.status != 200:
-                        response_text = await response.text()
-                        print(f"Telegram API ошибка (фото из байтов): {response.status} - {response_text}")
-                    return response.status == 200
+            return await self._post(url, data, timeout, "sendPhoto", "фото из байтов")
 
         except (aiohttp.ClientError, socket.gaierror, OSError) as e:
-            print(f"Ошибка сети при отправке фото из байтов в Telegram: {str(e)}")
+            logger.error(f"Ошибка сети при отправке фото из байтов в Telegram: {str(e)}")
             return False
         except Exception as e:
-            print(f"Неожиданная ошибка при отправке фото из байтов в Telegram: {str(e)}")
+            logger.error(f"Неожиданная ошибка при отправке фото из байтов в Telegram: {str(e)}")
             return False
 
     async def _send_media_group_with_caption(self, caption: str, photos: List[Dict[str, Any]],
@@ -1048,33 +741,28 @@ class TelegramService:
 
             timeout = aiohttp.ClientTimeout(total=60, connect=15)
 
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, data=data) as response:
-                    if response.status != 200:
-                        response_text = await response.text()
-                        print(f"Telegram API ошибка (медиа группа): {response.status} - {response_text}")
-                    return response.status == 200
+            return await self._post(url, data, timeout, "sendMediaGroup", "медиа группа")
 
         except (aiohttp.ClientError, socket.gaierror, OSError) as e:
-            print(f"Ошибка сети при отправке медиа группы в Telegram: {str(e)}")
+            logger.error(f"Ошибка сети при отправке медиа группы в Telegram: {str(e)}")
             return False
         except Exception as e:
-            print(f"Неожиданная ошибка при отправке медиа группы в Telegram: {str(e)}")
+            logger.error(f"Неожиданная ошибка при отправке медиа группы в Telegram: {str(e)}")
             return False
 
     async def send_photos_to_location(self, location: str, photos: List[Dict[str, Any]],
                                       message: Optional[str] = None) -> bool:
         """Отправляет фотографии в подгруппу по локации"""
         if not self.enabled:
-            print("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
+            logger.debug("🔕 Telegram отправка отключена (не настроен токен или chat_id)")
             return False
 
         if not photos:
-            print("❌ Список фотографий пуст")
+            logger.error("❌ Список фотографий пуст")
             return False
 
         if len(photos) > 10:
-            print("❌ Превышено максимальное количество фотографий (10)")
+            logger.error("❌ Превышено максимальное количество фотографий (10)")
             return False
 
         try:
@@ -1082,7 +770,7 @@ class TelegramService:
 
             # Если нет сообщения, создаем простое
             if not message:
-                message = f"📸 <b>НЕДОСТАЮЩИЕ ФОТО</b>\n📍 <b>Локация:</b> {location}\n🕐 <b>Время:</b> {datetime.now(ZoneInfo('UTC')).astimezone(ZoneInfo('Europe/Moscow')).strftime('%d.%m.%Y %H:%M')}"
+                message = templates.render_missing_photos(location)
 
             success = False
 
@@ -1103,12 +791,12 @@ class TelegramService:
                 )
 
             if success:
-                print(f"✅ Фотографии отправлены в Telegram для локации: {location}")
+                logger.info(f"✅ Фотографии отправлены в Telegram для локации: {location}")
             else:
-                print(f"⚠️  Ошибка отправки фотографий в Telegram для локации: {location}")
+                logger.warning(f"⚠️  Ошибка отправки фотографий в Telegram для локации: {location}")
 
             return success
 
         except Exception as e:
-            print(f"⚠️  Ошибка отправки фотографий в Telegram: {str(e)}")
+            logger.warning(f"⚠️  Ошибка отправки фотографий в Telegram: {str(e)}")
             return False
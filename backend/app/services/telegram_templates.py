@@ -0,0 +1,426 @@
+"""
+Шаблоны сообщений отчетов для Telegram (parse_mode=HTML).
+
+Шапки — строки формата, собранные один раз при импорте, строки позиций —
+f-строки без промежуточных словарей; справочники эмодзи и подписей —
+константы модуля. Все пользовательские
+поля (локация, ФИО, названия, комментарии) экранируются: символы < > &
+в названии товара иначе ломают разметку, и Telegram отклоняет сообщение.
+
+Сообщение собирается из строк, каждая из которых закрывает свои теги,
+поэтому делить текст по границам строк безопасно: split_message режет
+под лимит 4096 символов, split_caption — под подпись к фото (1024).
+"""
+from datetime import date, datetime
+from html import escape
+from typing import Any, Dict, Iterable, List, Tuple
+from zoneinfo import ZoneInfo
+
+# Лимиты Telegram: текст сообщения и подпись к медиа (в UTF-16 code units)
+MESSAGE_LIMIT = 4096
+CAPTION_LIMIT = 1024
+
+MSK = ZoneInfo("Europe/Moscow")
+DATETIME_FORMAT = "%d.%m.%Y %H:%M"
+DATE_FORMAT = "%d.%m.%Y"
+
+SHIFT_EMOJI = {"morning": "🌅", "night": "🌙"}
+SHIFT_NAMES = {"morning": "Утренняя", "night": "Ночная"}
+
+CATEGORY_EMOJIS = {
+    "напитки": "🥤",
+    "еда": "🍽️",
+    "кухня": "🍳",
+    "бар": "🍹",
+    "упаковки": "📦",
+    "хоз": "🧽",
+    "хозтовары": "🧽",
+    "прочее": "📋",
+}
+
+# Позиции старой инвентаризации: поле модели -> подпись
+DAILY_INVENTORY_SECTIONS = (
+    ("🥤", "НАПИТКИ", (
+        ("il_primo_steklo", "Il Primo (стекло)"),
+        ("voda_gornaya", "Вода горная"),
+        ("dobri_sok_pet", "Добрый сок (ПЭТ)"),
+        ("kuragovi_kompot", "Кураговый компот"),
+        ("napitki_jb", "Напитки JB"),
+        ("energetiky", "Энергетики"),
+        ("kold_bru", "Колд брю"),
+        ("kinza_napitky", "Напитки Кинза"),
+    )),
+    ("🍽️", "ЕДА И ИНГРЕДИЕНТЫ", (
+        ("palli", "Палли"),
+        ("barbeku_dip", "Барбекю дип"),
+        ("bulka_na_shaurmu", "Булка на шаурму"),
+        ("lavash", "Лаваш"),
+        ("lepeshki", "Лепешки"),
+        ("ketchup_dip", "Кетчуп дип"),
+        ("sirny_sous_dip", "Сырный соус дип"),
+        ("kuriza_jareny", "Курица жареная"),
+        ("kuriza_siraya", "Курица сырая"),
+    )),
+)
+
+SHIFT_REPORT_HEADER = (
+    " <b>ОТЧЁТ ЗАВЕРШЕНИЯ СМЕНЫ</b> {shift_emoji}\n"
+    "\n"
+    "📍 <b>Локация:</b> {location}\n"
+    "👤 <b>Кассир:</b> {cashier_name}\n"
+    "📅 <b>Смена:</b> {shift_name}\n"
+    "🕐 <b>Дата/время:</b> {date}\n"
+    "\n"
+    "📊 <b>Информация из iiko:</b>\n"
+    "- Общая выручка: <b>{total_revenue}₽</b>\n"
+    "- Возвраты: <b>{returns}₽</b>\n"
+    "\n"
+    "💳 <b>Безналичные платежи:</b>\n"
+    "- Эквайринг: <b>{acquiring}₽</b>\n"
+    "- QR код: <b>{qr_code}₽</b>\n"
+    "- Онлайн приложение: <b>{online_app}₽</b>\n"
+    "- Яндекс Еда: <b>{yandex_food}₽</b>\n"
+    "- Яндекс Еда (вручную): <b>{yandex_food_no_system}₽</b>\n"
+    "- Primehill: <b>{primehill}₽</b>\n"
+    "<b>Итого эквайринг: {total_acquiring}₽</b>\n"
+    "\n"
+    "📈 <b>Внесения:</b>\n"
+)
+SHIFT_REPORT_TOTALS = (
+    "➡️ <b>Должно быть:</b> {calculated}₽\n"
+    "\n"
+    "💵 <b>Фактически в кассе:</b> {fact_cash}₽\n"
+    "💰 <b>Расчетная сумма:</b> {calculated}₽\n"
+    "\n"
+)
+SHIFT_REPORT_AMOUNTS = (
+    "total_revenue", "returns", "acquiring", "qr_code", "online_app", "yandex_food",
+    "yandex_food_no_system", "primehill", "total_acquiring",
+)
+
+INVENTORY_HEADER = (
+    "📦 <b>ЕЖЕДНЕВНАЯ ИНВЕНТАРИЗАЦИЯ</b> {shift_emoji}\n"
+    "\n"
+    "📍 <b>Локация:</b> {location}\n"
+    "👤 <b>Кассир:</b> {cashier_name}\n"
+    "📅 <b>Смена:</b> {shift_name}\n"
+    "🕐 <b>Время проведения:</b> {date}\n"
+    "\n"
+)
+
+GOODS_REPORT_HEADER = (
+    "📋 <b>ОТЧЁТ ПРИЁМА ТОВАРА</b>\n"
+    "\n"
+    "📍 <b>Локация:</b> {location}\n"
+    "🕐 <b>Дата:</b> {date}\n"
+    "👤 <b>Кассир:</b> {cashier_name}\n"
+    "📅 <b>Смена:</b> {shift_name}\n"
+)
+
+WRITEOFF_TRANSFER_HEADER = (
+    "📋 <b>АКТ {kind}</b>\n"
+    "\n"
+    "📍 <b>Локация:</b> {location}\n"
+    "👤 <b>Кассир:</b> {cashier_name}\n"
+    "📅 <b>Смена:</b> {shift_name}\n"
+    "📆 <b>Дата отчета:</b> {date}\n"
+)
+
+CONTINUATION_CAPTION = "📎 <b>Продолжение фото</b>\n(относится к посту выше)"
+
+
+def esc(value: Any) -> str:
+    """Экранирование пользовательского значения для parse_mode=HTML"""
+    text = value if isinstance(value, str) else str(value)
+    # Быстрый путь: в обычных названиях спецсимволов нет
+    if "<" not in text and ">" not in text and "&" not in text:
+        return text
+    return escape(text, quote=False)
+
+
+def _num(value: Any) -> Any:
+    """Число выводится как есть, строка (ввод вручную) — экранируется"""
+    return esc(value) if isinstance(value, str) else value
+
+
+def _amount(data: Dict[str, Any], key: str) -> int:
+    return int(data.get(key) or 0)
+
+
+def _shift(data: Dict[str, Any]) -> Tuple[str, str]:
+    shift_type = data.get("shift_type")
+    return SHIFT_EMOJI.get(shift_type, SHIFT_EMOJI["night"]), SHIFT_NAMES.get(shift_type, SHIFT_NAMES["night"])
+
+
+def format_datetime(value: Any) -> str:
+    """Дата/время отчета по Москве; без значения — текущее время"""
+    if value is None or value == "":
+        return datetime.now(MSK).strftime(DATETIME_FORMAT)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return esc(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(MSK)
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, date):
+        return value.strftime(DATE_FORMAT)
+    return esc(value)
+
+
+def _common(data: Dict[str, Any]) -> Dict[str, str]:
+    shift_emoji, shift_name = _shift(data)
+    return {
+        "location": esc(data.get("location") or "Не указана"),
+        "cashier_name": esc(data.get("cashier_name") or "Не указан"),
+        "shift_emoji": shift_emoji,
+        "shift_name": shift_name,
+        "date": format_datetime(data.get("date")),
+    }
+
+
+def render_shift_report(data: Dict[str, Any]) -> str:
+    values = _common(data)
+    for key in SHIFT_REPORT_AMOUNTS:
+        values[key] = _amount(data, key)
+    parts = [SHIFT_REPORT_HEADER.format_map(values)]
+
+    income_entries = data.get("income_entries") or []
+    for entry in income_entries:
+        parts.append(f"• {esc(entry.get('comment') or 'Без комментария')}: <b>{_amount(entry, 'amount')}₽</b>\n")
+    if not income_entries:
+        parts.append("• Приходов нет\n")
+    parts.append(f"<b>Итого внесений: {_amount(data, 'total_income')}₽</b>\n\n📉 <b>Расходы:</b>\n")
+
+    expense_entries = data.get("expense_entries") or []
+    for entry in expense_entries:
+        parts.append(f"• {esc(entry.get('description') or 'Без описания')}: <b>{_amount(entry, 'amount')}₽</b>\n")
+    if not expense_entries:
+        parts.append("• Расходов нет\n")
+    parts.append(f"<b>Итого расходы: {_amount(data, 'total_expenses')}₽</b>\n\n")
+
+    parts.append(SHIFT_REPORT_TOTALS.format(calculated=_amount(data, "calculated_amount"), fact_cash=_amount(data, "fact_cash")))
+    surplus_shortage = _amount(data, "surplus_shortage")
+    if surplus_shortage > 0:
+        parts.append(f"✅ <b>Излишек: +{surplus_shortage}₽</b>\n")
+    elif surplus_shortage < 0:
+        parts.append(f"❌ <b>Недостача: {surplus_shortage}₽</b>\n")
+    else:
+        parts.append(f"✅ <b>Сходится: {surplus_shortage}₽</b>\n")
+    parts.append(f"<b>КОММЕНТАРИИ: {esc(data.get('comments') or 'Отсутствуют')}</b>")
+    return "".join(parts)
+
+
+def render_daily_inventory(data: Dict[str, Any]) -> str:
+    """Старая инвентаризация с фиксированным набором позиций"""
+    parts = [INVENTORY_HEADER.format_map(_common(data))]
+    for emoji, title, fields in DAILY_INVENTORY_SECTIONS:
+        parts.append(f"{emoji} <b>{title}:</b>\n")
+        for key, label in fields:
+            parts.append(f"• {label}: <b>{_num(data.get(key) or 0)} шт</b>\n")
+        parts.append("\n")
+    return "".join(parts)
+
+
+def render_daily_inventory_v2(data: Dict[str, Any]) -> str:
+    parts = [INVENTORY_HEADER.format_map(_common(data))]
+
+    inventory_data = data.get("inventory_data") or []
+    if not inventory_data:
+        parts.append("<b>Товары не указаны</b>")
+        return "".join(parts)
+
+    # Группировка по категориям с сохранением порядка первого появления
+    categories: Dict[str, List[str]] = {}
+    for item in inventory_data:
+        category = item.get("item_category") or "Прочее"
+        lines = categories.get(category)
+        if lines is None:
+            lines = categories[category] = []
+        lines.append(
+            f"• {esc(item.get('item_name') or 'Неизвестный товар')}: "
+            f"<b>{_num(item.get('quantity', 0))} {esc(item.get('item_unit') or 'шт')}</b>\n"
+        )
+
+    for category, lines in categories.items():
+        emoji = CATEGORY_EMOJIS.get(category.lower(), "📋")
+        parts.append(f"{emoji} <b>{esc(category.upper())}:</b>\n")
+        parts.extend(lines)
+        parts.append("\n")
+    return "".join(parts)
+
+
+def _goods_lines(items: Iterable[Dict[str, Any]], with_unit: bool) -> List[str]:
+    if with_unit:
+        return [
+            f"• {esc(item.get('name') or 'Не указано')} — "
+            f"<b>{_num(item.get('count', 0))} {esc(item.get('unit') or 'шт')}</b>\n"
+            for item in items
+        ]
+    return [f"• {esc(item.get('name') or 'Не указано')} — <b>{_num(item.get('count', 0))}</b>\n" for item in items]
+
+
+def render_goods_report(data: Dict[str, Any]) -> str:
+    parts = [GOODS_REPORT_HEADER.format_map(_common(data))]
+
+    kuxnya = data.get("kuxnya") or []
+    if kuxnya:
+        parts.append("\n<b>Основное и Напитки</b>\n")
+        parts.extend(_goods_lines(kuxnya, with_unit=False))
+
+    bar = data.get("bar") or []
+    if bar:
+        parts.append("🍹 <b>Перемещение с другой точки к вам:</b>\n")
+        parts.extend(_goods_lines(bar, with_unit=True))
+
+    upakovki = data.get("upakovki_xoz") or []
+    if upakovki:
+        parts.append("\n🛒 <b>Покупки с магазина:</b>\n")
+        parts.extend(_goods_lines(upakovki, with_unit=True))
+
+    photos_count = len(data.get("photos_urls") or [])
+    if photos_count > 0:
+        parts.append(f"\n📸 <b>Фотографий накладных:</b> {photos_count}\n")
+    return "".join(parts)
+
+
+def _writeoff_date(data: Dict[str, Any]) -> str:
+    report_date = data.get("report_date")
+    report_time = data.get("report_time")
+    if report_date and report_time:
+        if hasattr(report_date, "strftime") and hasattr(report_time, "strftime"):
+            return f"{report_date.strftime(DATE_FORMAT)} {report_time.strftime('%H:%M')}"
+        return esc(f"{report_date} {report_time}")
+    if report_date:
+        return report_date.strftime(DATE_FORMAT) if hasattr(report_date, "strftime") else esc(report_date)
+    return format_datetime(data.get("date"))
+
+
+def render_writeoff_transfer(data: Dict[str, Any]) -> str:
+    values = _common(data)
+    values["date"] = _writeoff_date(data)
+    values["kind"] = esc(data.get("writeoff_or_transfer") or "СПИСАНИЯ/ПЕРЕМЕЩЕНИЯ")
+    location_to = data.get("location_to") or ""
+    if location_to:
+        values["location"] += f" → {esc(location_to)}"
+    parts = [WRITEOFF_TRANSFER_HEADER.format_map(values)]
+
+    writeoffs = data.get("writeoffs") or []
+    if writeoffs:
+        parts.append("\n🗑 <b>СПИСАНИЕ:</b>\n")
+        for item in writeoffs:
+            parts.append(
+                f"• {esc(item.get('name') or 'Не указано')} — <b>{int(item.get('weight') or 0)} "
+                f"{esc(item.get('unit') or 'кг')}</b> — {esc(item.get('reason') or 'Не указано')}\n"
+            )
+        parts.append("\n")
+
+    transfers = data.get("transfers") or []
+    if transfers:
+        parts.append("\n🔄 <b>ПЕРЕМЕЩЕНИЕ:</b>\n")
+        if location_to:
+            parts.append(f"📍 <b>Направление:</b>С {esc(data.get('location') or '')} НА → {esc(location_to)}\n\n")
+        for item in transfers:
+            parts.append(f"• {esc(item.get('name') or 'Не указано')}\n")
+    return "".join(parts)
+
+
+def render_missing_photos(location: str) -> str:
+    return (
+        f"📸 <b>НЕДОСТАЮЩИЕ ФОТО</b>\n📍 <b>Локация:</b> {esc(location)}\n"
+        f"🕐 <b>Время:</b> {datetime.now(MSK).strftime(DATETIME_FORMAT)}"
+    )
+
+
+# РАЗБИЕНИЕ ПОД ЛИМИТЫ
+
+def tg_len(text: str) -> int:
+    """Длина в единицах UTF-16 — так считает лимиты Telegram (эмодзи — две единицы)"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _strip_tags(line: str) -> str:
+    out = []
+    in_tag = False
+    for char in line:
+        if char == "<":
+            in_tag = True
+        elif char == ">" and in_tag:
+            in_tag = False
+        elif not in_tag:
+            out.append(char)
+    return "".join(out)
+
+
+def _cut_index(text: str, limit: int) -> int:
+    """Сколько символов text помещается в limit единиц UTF-16"""
+    units = 0
+    for index, char in enumerate(text):
+        units += 2 if ord(char) > 0xFFFF else 1
+        if units > limit:
+            return index
+    return len(text)
+
+
+def _split_long_line(line: str, limit: int) -> List[str]:
+    """Строка длиннее лимита (огромный комментарий): без тегов, по частям, не разрывая &entity;"""
+    text = _strip_tags(line)
+    chunks = []
+    while tg_len(text) > limit:
+        cut = _cut_index(text, limit)
+        amp = text.rfind("&", 0, cut)
+        if amp != -1 and text.find(";", amp, cut) == -1:
+            cut = amp
+        space = text.rfind(" ", 0, cut)
+        if space > cut // 2:
+            cut = space + 1
+        chunks.append(text[:cut])
+        text = text[cut:]
+    chunks.append(text)
+    return chunks
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Делит сообщение на части не длиннее limit по границам строк"""
+    if tg_len(text) <= limit:
+        return [text]
+
+    parts: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for line in text.splitlines(keepends=True):
+        line_len = len(line.encode("utf-16-le")) // 2
+        if line_len > limit:
+            pieces = _split_long_line(line, limit)
+        else:
+            if current and current_len + line_len > limit:
+                parts.append("".join(current).rstrip("\n"))
+                current, current_len = [], 0
+            current.append(line)
+            current_len += line_len
+            continue
+        for piece in pieces:
+            piece_len = tg_len(piece)
+            if current and current_len + piece_len > limit:
+                parts.append("".join(current).rstrip("\n"))
+                current, current_len = [], 0
+            current.append(piece)
+            current_len += piece_len
+    if current:
+        parts.append("".join(current).rstrip("\n"))
+    return [part for part in parts if part.strip()]
+
+
+def split_caption(text: str) -> Tuple[str, List[str]]:
+    """
+    Подпись к фото (до 1024) и продолжение отдельными сообщениями (до 4096).
+    Подпись — первые целые строки текста, остальное уходит следом.
+    """
+    if tg_len(text) <= CAPTION_LIMIT:
+        return text, []
+    caption_parts = split_message(text, CAPTION_LIMIT)
+    caption = caption_parts[0]
+    rest = text[len(caption):].lstrip("\n") if text.startswith(caption) else "\n".join(caption_parts[1:])
+    return caption, split_message(rest) if rest.strip() else []
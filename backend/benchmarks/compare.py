@@ -0,0 +1,80 @@
+"""
+Сравнение двух прогонов нагрузочного теста.
+
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json --fail-over 15
+
+Выводит изменение перцентилей и пропускной способности по каждому сценарию.
+С --fail-over завершается с кодом 1, если p95 любого сценария вырос больше
+чем на указанный процент (удобно для CI).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def _delta_percent(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def _format_delta(delta: Optional[float]) -> str:
+    return "n/a" if delta is None else f"{delta:+.1f}%"
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], fail_over: Optional[float]) -> bool:
+    print(f"baseline:  {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"candidate: {candidate['meta'].get('commit')} ({candidate['meta'].get('timestamp')})")
+    print()
+
+    regressed = False
+    header = f"{'сценарий':28}" + "".join(f"{metric:>26}" for metric in METRICS)
+    print(header)
+    print("-" * len(header))
+
+    for name, new in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if not old:
+            print(f"{name:28} (нет в baseline)")
+            continue
+
+        cells = []
+        for metric in METRICS:
+            delta = _delta_percent(old.get(metric), new.get(metric))
+            cells.append(f"{old.get(metric)} → {new.get(metric)} ({_format_delta(delta)})")
+
+            if fail_over is not None and metric == "p95_ms" and delta is not None and delta > fail_over:
+                regressed = True
+
+        print(f"{name:28}" + "".join(f"{cell:>26}" for cell in cells))
+
+    old_rss = baseline.get("server", {}).get("peak_rss_mb")
+    new_rss = candidate.get("server", {}).get("peak_rss_mb")
+    print()
+    print(f"Пиковый RSS: {old_rss} → {new_rss} MB ({_format_delta(_delta_percent(old_rss, new_rss))})")
+
+    return not regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение результатов нагрузочного теста")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--fail-over", type=float, default=None, help="Допустимый рост p95, %%")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    candidate = json.loads(args.candidate.read_text(encoding="utf-8"))
+
+    if not compare(baseline, candidate, args.fail_over):
+        print(f"\n❌ p95 вырос больше чем на {args.fail_over}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
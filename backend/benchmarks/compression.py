@@ -0,0 +1,72 @@
+"""
+Цена сжатия ответов: CPU на сжатие против сэкономленных байт.
+
+Берет страницы из benchmarks.serialization (в форме ответов /list) и для
+каждого уровня gzip и качества brotli печатает степень сжатия, время сжатия
+одного ответа и пропускную способность компрессора. Помогает выбрать
+COMPRESSION_GZIP_LEVEL / COMPRESSION_BROTLI_QUALITY и порог COMPRESSION_MIN_SIZE.
+
+    python -m benchmarks.compression --rows 100 --items 30 --repeat 50
+"""
+
+import argparse
+import gzip
+import statistics
+import time
+from typing import Callable, List
+
+from app.core.responses import dumps
+from benchmarks.serialization import report_on_goods_page, writeoff_transfer_page
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _measure(func: Callable[[bytes], bytes], body: bytes, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(body)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CPU сжатия против экономии трафика")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    codecs = {f"gzip-{level}": (lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0))
+              for level in (1, 6, 9)}
+    if brotli is not None:
+        codecs.update({f"br-{quality}": (lambda body, quality=quality: brotli.compress(body, quality=quality))
+                       for quality in (1, 4, 6, 11)})
+    else:
+        print("brotli не установлен, сравниваются только уровни gzip\n")
+
+    pages = {
+        "/report-on-goods/list": dumps(report_on_goods_page(args.rows, args.items)),
+        "/writeoff-transfer/list": dumps(writeoff_transfer_page(args.rows, args.items)),
+        # Типичный маленький ответ: проверка, что ниже порога сжатие не окупается
+        "small (detail)": dumps(report_on_goods_page(1, 5)["reports"][0]),
+    }
+
+    print(f"{'ответ':26}{'кодек':>9}{'исходно, KB':>13}{'сжато, KB':>11}{'ratio':>8}{'p50, ms':>10}{'MB/s':>9}")
+    for name, body in pages.items():
+        for codec, compress in codecs.items():
+            compressed = compress(body)
+            p50 = statistics.median(_measure(compress, body, args.repeat))
+            throughput = len(body) / 1024 / 1024 / (p50 / 1000) if p50 else 0
+            print(
+                f"{name:26}{codec:>9}{len(body) / 1024:>13.1f}{len(compressed) / 1024:>11.1f}"
+                f"{len(body) / len(compressed):>8.1f}{p50:>10.3f}{throughput:>9.0f}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
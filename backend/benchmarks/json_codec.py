@@ -0,0 +1,138 @@
+"""
+Микробенчмарк кодека JSON-колонок на уровне asyncpg.
+
+Берет декодеры/кодировщики, которые диалект SQLAlchemy регистрирует в asyncpg
+для json — стандартный (json.loads/json.dumps) и с хуками DatabaseHelper
+(orjson), — и прогоняет через них страницу списка: строки отчетов приема
+товаров и списаний с большими массивами позиций в том виде, в каком их
+отдает протокол Postgres. База не нужна.
+
+    python -m benchmarks.json_codec --rows 100 --items 30 100 300 --repeat 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import json_deserializer, json_serializer
+
+UNITS = ["кг", "шт", "л", "уп"]
+REASONS = ["Просрочка", "Брак", "Порча упаковки"]
+
+Codec = Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]
+
+
+def _items(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"name": f"Товар {i}", "count": round(random.uniform(0.1, 50), 3), "unit": random.choice(UNITS)}
+        for i in range(count)
+    ]
+
+
+def page_columns(rows: int, items: int) -> List[List[Any]]:
+    """JSON-колонки страницы: по строке на отчет, как их читает include=items"""
+    page = []
+    for i in range(rows):
+        if i % 2:
+            # Отчет приема товаров: kuxnya, bar, upakovki_xoz, photos_urls
+            page.append([
+                _items(items),
+                _items(items // 2),
+                _items(items // 3),
+                [f"/uploads/report_on_goods/{i}-{n}.jpg" for n in range(3)],
+            ])
+        else:
+            # Акт списания: writeoffs, transfers
+            page.append([[dict(item, reason=random.choice(REASONS)) for item in _items(items)], []])
+    return page
+
+
+class _CodecCapture:
+    """Подставное соединение: запоминает кодек, который диалект ставит asyncpg"""
+
+    def __init__(self):
+        self._connection = self
+        self.codecs: Dict[str, Dict[str, Any]] = {}
+
+    async def set_type_codec(self, typename, *, encoder, decoder, **kwargs):
+        self.codecs[typename] = {"encoder": encoder, "decoder": decoder}
+
+
+def asyncpg_json_codec(**engine_kwargs: Any) -> Codec:
+    """Кодировщик и декодер колонки json для движка с заданными параметрами"""
+    engine = create_async_engine("postgresql+asyncpg://benchmark@localhost/benchmark", **engine_kwargs)
+    dialect = engine.dialect
+    capture = _CodecCapture()
+    asyncio.run(dialect.setup_asyncpg_json_codec(capture))
+    codec = capture.codecs["json"]
+    # Путь записи: bind-процессор SQLAlchemy (сериализатор диалекта) + кодек asyncpg
+    serialize = dialect._json_serializer or json.dumps
+    encoder = codec["encoder"]
+    return (lambda value: encoder(serialize(value))), codec["decoder"]
+
+
+def _decode_page(decoder: Callable[[bytes], Any], page: List[List[bytes]]) -> None:
+    for row in page:
+        for value in row:
+            decoder(value)
+
+
+def _encode_page(encoder: Callable[[Any], bytes], page: List[List[Any]]) -> None:
+    for row in page:
+        for value in row:
+            encoder(value)
+
+
+def _measure(func: Callable[[], None], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение кодеков JSON-колонок asyncpg")
+    parser.add_argument("--rows", type=int, default=100, help="Строк на странице")
+    parser.add_argument("--items", type=int, nargs="+", default=[30, 100, 300], help="Позиций в каждом отчете")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    std_encode, std_decode = asyncpg_json_codec()
+    fast_encode, fast_decode = asyncpg_json_codec(
+        json_serializer=json_serializer, json_deserializer=json_deserializer
+    )
+
+    print(
+        f"{'позиций':>8}{'страница, KB':>14}{'json чтение':>14}{'orjson':>11}{'ускорение':>11}"
+        f"{'json запись':>14}{'orjson':>11}{'ускорение':>11}"
+    )
+    for items in args.items:
+        columns = page_columns(args.rows, items)
+        # Так колонки приходят из протокола: orjson пишет UTF-8 без \u-экранирования,
+        # поэтому для честного сравнения каждый декодер читает то, что записал сам
+        std_wire = [[std_encode(value) for value in row] for row in columns]
+        fast_wire = [[fast_encode(value) for value in row] for row in columns]
+        assert [[fast_decode(v) for v in row] for row in fast_wire] == columns
+        assert [[fast_decode(v) for v in row] for row in std_wire] == columns
+
+        std_read = _measure(lambda: _decode_page(std_decode, std_wire), args.repeat)
+        fast_read = _measure(lambda: _decode_page(fast_decode, fast_wire), args.repeat)
+        std_write = _measure(lambda: _encode_page(std_encode, columns), args.repeat)
+        fast_write = _measure(lambda: _encode_page(fast_encode, columns), args.repeat)
+        size = sum(len(value) for row in fast_wire for value in row) / 1024
+        print(
+            f"{items:>8}{size:>14.1f}{std_read:>12.2f}ms{fast_read:>9.2f}ms{std_read / fast_read:>10.1f}x"
+            f"{std_write:>12.2f}ms{fast_write:>9.2f}ms{std_write / fast_write:>10.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+Нагрузочный тест эндпоинтов создания отчетов и списков.
+
+Гоняет сценарии с заданной конкурентностью, считает p50/p95/p99, пропускную
+способность и пиковый RSS процесса API, результат сохраняет в JSON, чтобы
+сравнивать прогоны между коммитами (см. benchmarks/compare.py).
+
+Примеры:
+    # Поднять API и заглушку Telegram самостоятельно (нужен локальный Postgres с миграциями)
+    python -m benchmarks.loadtest --spawn --concurrency 20 --requests 500
+
+    # Прогнать против уже запущенного API
+    python -m benchmarks.loadtest --base-url http://localhost:8000 --server-pid 12345
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.telegram_stub import TelegramStub
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+LOCATIONS = [
+    "Гагарина 48/1",
+    "Абдулхакима Исмаилова 51",
+    "Гайдара Гаджиева 7Б",
+]
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    # Возвращает kwargs для session.request (data/json/params)
+    build: Callable[[], Dict[str, Any]]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    # Запросы, оборвавшиеся без ответа (ошибка соединения, таймаут)
+    exceptions: int = 0
+    errors: int = 0
+    duration: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            "count": count,
+            "errors": self.errors,
+            "status_codes": {str(code): n for code, n in sorted(self.statuses.items())},
+            "exceptions": self.exceptions,
+            "duration_s": round(self.duration, 3),
+            "throughput_rps": round(count / self.duration, 2) if self.duration else 0.0,
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 2) if ordered else None,
+            "p50_ms": _percentile_ms(ordered, 50),
+            "p95_ms": _percentile_ms(ordered, 95),
+            "p99_ms": _percentile_ms(ordered, 99),
+            "max_ms": round(ordered[-1] * 1000, 2) if ordered else None,
+        }
+
+
+def _percentile_ms(ordered: List[float], percent: float) -> Optional[float]:
+    """Перцентиль методом ближайшего ранга по отсортированной выборке"""
+    if not ordered:
+        return None
+    rank = min(len(ordered), max(1, math.ceil(percent / 100 * len(ordered))))
+    return round(ordered[rank - 1] * 1000, 2)
+
+
+# ДАННЫЕ ДЛЯ СЦЕНАРИЕВ
+
+def _fake_photo(size_kb: int) -> bytes:
+    """Псевдо-JPEG: сервер проверяет только расширение, содержимое не важно"""
+    return b"\xff\xd8\xff\xe0" + os.urandom(max(size_kb * 1024 - 6, 0)) + b"\xff\xd9"
+
+
+def _goods_items(count: int) -> str:
+    return json.dumps([
+        {"name": f"Товар {i}", "count": random.randint(1, 50), "unit": "шт"}
+        for i in range(count)
+    ], ensure_ascii=False)
+
+
+def build_scenarios(photo: bytes, goods_photos: int, line_items: int, item_ids: List[int]) -> Dict[str, Scenario]:
+    def shift_report() -> Dict[str, Any]:
+        data = aiohttp.FormData()
+        data.add_field("location", random.choice(LOCATIONS))
+        data.add_field("shift_type", random.choice(["morning", "night"]))
+        data.add_field("cashier_name", "Нагрузочный Тест")
+        data.add_field("total_revenue", str(random.randint(10000, 90000)))
+        data.add_field("returns", "200")
+        data.add_field("acquiring", "5000")
+        data.add_field("qr_code", "1500")
+        data.add_field("fact_cash", "5100")
+        data.add_field("income_entries_json", json.dumps([{"amount": 500, "comment": "Внесение"}], ensure_ascii=False))
+        data.add_field("expense_entries_json", json.dumps([{"description": "Канцтовары", "amount": 125}], ensure_ascii=False))
+        data.add_field("photo", photo, filename="report.jpg", content_type="image/jpeg")
+        data.add_field("receipt_photo", photo, filename="receipt.jpg", content_type="image/jpeg")
+        return {"data": data}
+
+    def report_on_goods() -> Dict[str, Any]:
+        data = aiohttp.FormData()
+        data.add_field("location", random.choice(LOCATIONS))
+        data.add_field("shift_type", random.choice(["morning", "night"]))
+        data.add_field("cashier_name", "Нагрузочный Тест")
+        data.add_field("kuxnya_json", _goods_items(line_items))
+        data.add_field("bar_json", _goods_items(line_items))
+        data.add_field("upakovki_json", _goods_items(line_items))
+        for i in range(goods_photos):
+            data.add_field("photos", photo, filename=f"invoice_{i}.jpg", content_type="image/jpeg")
+        return {"data": data}
+
+    def writeoff_transfer() -> Dict[str, Any]:
+        items = json.dumps([
+            {"name": f"Товар {i}", "weight": random.randint(1, 10), "unit": "кг", "reason": "Истёк срок"}
+            for i in range(line_items)
+        ], ensure_ascii=False)
+        data = aiohttp.FormData()
+        data.add_field("location_from", random.choice(LOCATIONS))
+        data.add_field("writeoffs_json", items)
+        data.add_field("shift_type", random.choice(["morning", "night"]))
+        data.add_field("cashier_name", "Нагрузочный Тест")
+        data.add_field("writeoff_or_transfer", "СПИСАНИЯ")
+        return {"data": data}
+
+    def daily_inventory_v2() -> Dict[str, Any]:
+        now = datetime.now()
+        return {"json": {
+            "location": random.choice(LOCATIONS),
+            "shift_type": random.choice(["morning", "night"]),
+            "cashier_name": "Нагрузочный Тест",
+            "report_date": now.date().isoformat(),
+            "report_time": now.strftime("%H:%M:%S"),
+            "inventory_data": [{"item_id": item_id, "quantity": random.randint(0, 30)} for item_id in item_ids],
+        }}
+
+    def list_params(per_page_key: str = "per_page") -> Callable[[], Dict[str, Any]]:
+        return lambda: {"params": {per_page_key: 100}}
+
+    scenarios = [
+        Scenario("shift_reports_create", "POST", "/shift-reports/create", shift_report),
+        Scenario("report_on_goods_create", "POST", "/report-on-goods/create", report_on_goods),
+        Scenario("writeoff_transfer_create", "POST", "/writeoff-transfer/create", writeoff_transfer),
+        Scenario("daily_inventory_v2_create", "POST", "/daily-inventory-v2/create", daily_inventory_v2),
+        Scenario("shift_reports_list", "GET", "/shift-reports/list", list_params()),
+        Scenario("report_on_goods_list", "GET", "/report-on-goods/list", list_params()),
+        Scenario("writeoff_transfer_list", "GET", "/writeoff-transfer/list", list_params()),
+        Scenario("daily_inventory_v2_list", "GET", "/daily-inventory-v2/list", list_params("limit")),
+    ]
+    return {scenario.name: scenario for scenario in scenarios}
+
+
+# ЗАПУСК
+
+async def run_scenario(
+        session: aiohttp.ClientSession,
+        base_url: str,
+        scenario: Scenario,
+        total: int,
+        concurrency: int,
+) -> ScenarioResult:
+    result = ScenarioResult(name=scenario.name)
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            kwargs = scenario.build()
+            started = time.perf_counter()
+            try:
+                async with session.request(scenario.method, base_url + scenario.path, **kwargs) as response:
+                    await response.read()
+                    result.statuses[response.status] += 1
+                    if response.status >= 400:
+                        result.errors += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                result.exceptions += 1
+                result.errors += 1
+                continue
+            result.latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.duration = time.perf_counter() - started
+    return result
+
+
+class RssSampler:
+    """
+    Периодически суммирует VmRSS процесса и его потомков (воркеров uvicorn при --workers > 1)
+    и запоминает максимум (только Linux)
+    """
+
+    def __init__(self, pid: Optional[int], interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _read_kb(pid: int, key: str) -> int:
+        try:
+            with open(f"/proc/{pid}/status") as status_file:
+                for line in status_file:
+                    if line.startswith(key):
+                        return int(line.split()[1])
+        except (OSError, ValueError):
+            pass
+        return 0
+
+    def _process_tree(self) -> List[int]:
+        """PID процесса и всех его потомков по PPid из /proc"""
+        parents: Dict[int, List[int]] = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                ppid = self._read_kb(int(entry), "PPid:")
+                parents.setdefault(ppid, []).append(int(entry))
+
+        tree, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            tree.append(pid)
+            pending.extend(parents.get(pid, []))
+        return tree
+
+    def _total_kb(self, key: str) -> int:
+        return sum(self._read_kb(pid, key) for pid in self._process_tree())
+
+    async def _run(self) -> None:
+        while True:
+            self.peak_kb = max(self.peak_kb, self._total_kb("VmRSS:"))
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self.pid:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Optional[float]:
+        if not self._task:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        # VmHWM - пиковый RSS за всю жизнь процесса; для нескольких процессов сумма пиков
+        # завышает общий пик, поэтому она берется только для одиночного процесса
+        peak_kb = self.peak_kb
+        if len(self._process_tree()) == 1:
+            peak_kb = max(peak_kb, self._read_kb(self.pid, "VmHWM:"))
+        return round(peak_kb / 1024, 1)
+
+
+async def _wait_ready(session: aiohttp.ClientSession, base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base_url}/openapi.json") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.3)
+    raise RuntimeError(f"API не поднялся за {timeout} с: {base_url}")
+
+
+async def _fetch_item_ids(session: aiohttp.ClientSession, base_url: str, limit: int) -> List[int]:
+    async with session.get(f"{base_url}/inventory-management/items", params={"is_active": "true"}) as response:
+        if response.status != 200:
+            return []
+        payload = await response.json()
+    return [item["id"] for item in payload.get("items", [])][:limit]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _spawn_api(port: int, telegram_url: str, workers: int) -> subprocess.Popen:
+    """Запускает uvicorn во временном каталоге (uploads не засоряют репозиторий)"""
+    workdir = tempfile.mkdtemp(prefix="reportbot-bench-")
+    Path(workdir, "uploads").mkdir()
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(BACKEND_DIR),
+        "TELEGRAM_API_URL": telegram_url,
+        "TELEGRAM_BOT_TOKEN": os.environ.get("BENCH_TELEGRAM_TOKEN", "bench-token"),
+        "TELEGRAM_CHAT_ID": os.environ.get("BENCH_TELEGRAM_CHAT_ID", "-1000000000000"),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+    )
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    stub: Optional[TelegramStub] = None
+    server: Optional[subprocess.Popen] = None
+    base_url = args.base_url.rstrip("/")
+    server_pid = args.server_pid
+
+    if args.spawn:
+        stub = TelegramStub(port=args.stub_port, delay_ms=args.stub_delay_ms)
+        await stub.start()
+        server = _spawn_api(args.port, stub.url, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+        server_pid = server.pid
+
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    results: Dict[str, Any] = {}
+    peak_rss_mb = None
+
+    try:
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            await _wait_ready(session, base_url)
+            item_ids = await _fetch_item_ids(session, base_url, args.line_items)
+            scenarios = build_scenarios(
+                photo=_fake_photo(args.photo_kb),
+                goods_photos=args.goods_photos,
+                line_items=args.line_items,
+                item_ids=item_ids,
+            )
+
+            selected = args.scenarios or list(scenarios)
+            unknown = set(selected) - set(scenarios)
+            if unknown:
+                raise SystemExit(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+            sampler = RssSampler(server_pid)
+            sampler.start()
+
+            for name in selected:
+                if name == "daily_inventory_v2_create" and not item_ids:
+                    print(f"⏭  {name}: нет активных товаров, сценарий пропущен")
+                    continue
+                scenario_result = await run_scenario(session, base_url, scenarios[name], args.requests, args.concurrency)
+                results[name] = scenario_result.summary()
+                summary = results[name]
+                print(
+                    f"{name:28} n={summary['count']:<5} err={summary['errors']:<4} "
+                    f"p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms "
+                    f"rps={summary['throughput_rps']}"
+                )
+
+            peak_rss_mb = await sampler.stop()
+    finally:
+        if server:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if stub:
+            await stub.stop()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "base_url": base_url,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "photo_kb": args.photo_kb,
+            "goods_photos": args.goods_photos,
+            "line_items": args.line_items,
+            "workers": args.workers if args.spawn else None,
+            "stub_delay_ms": args.stub_delay_ms if args.spawn else None,
+            "python": platform.python_version(),
+        },
+        "server": {
+            "pid": server_pid,
+            "peak_rss_mb": peak_rss_mb,
+            "telegram_calls": dict(stub.calls) if stub else None,
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест ReportBot API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Адрес уже запущенного API")
+    parser.add_argument("--server-pid", type=int, default=None, help="PID процесса API для замера RSS")
+    parser.add_argument("--spawn", action="store_true", help="Поднять API и заглушку Telegram самостоятельно")
+    parser.add_argument("--port", type=int, default=8765, help="Порт API при --spawn")
+    parser.add_argument("--workers", type=int, default=1, help="Количество воркеров uvicorn при --spawn")
+    parser.add_argument("--stub-port", type=int, default=8081)
+    parser.add_argument("--stub-delay-ms", type=int, default=50, help="Задержка ответа заглушки Telegram")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="Запросов на каждый сценарий")
+    parser.add_argument("--scenarios", nargs="*", help="Запустить только указанные сценарии")
+    parser.add_argument("--photo-kb", type=int, default=512, help="Размер одного фото")
+    parser.add_argument("--goods-photos", type=int, default=3, help="Фото в отчете приема товаров")
+    parser.add_argument("--line-items", type=int, default=20, help="Позиций в каждой категории")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", type=Path, default=None, help="Файл результатов (JSON)")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{report['meta']['commit'] or 'nocommit'}.json"
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(f"Пиковый RSS API: {report['server']['peak_rss_mb']} MB")
+    print(f"Результаты сохранены: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Проверка пула в режиме pgbouncer против локального PgBouncer (transaction).
+
+Много сессий конкурентно гоняют параметризованные запросы и короткие
+транзакции через DatabaseHelper с заданным профилем пула. С профилем
+pgbouncer ошибок быть не должно; с --mode direct тот же прогон падает на
+подготовленных выражениях (DuplicatePreparedStatementError,
+InvalidSQLStatementNameError) — так видно, от чего защищает профиль.
+Печатает ошибки по типам и метрики пула: ожидание соединения, новые и
+выброшенные соединения. Код выхода 1, если были ошибки.
+
+    docker compose -f backend/docker-compose.yml up -d db pgbouncer
+    cd backend
+    python -m benchmarks.pgbouncer_check --concurrency 50 --iterations 200
+    python -m benchmarks.pgbouncer_check --mode direct   # ожидаемо с ошибками
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+
+from sqlalchemy import Integer, String, bindparam, func, literal, select
+
+from app.core.config import settings
+from app.core.database import POOL_MODE_DIRECT, POOL_MODE_PGBOUNCER, DatabaseHelper
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CONNECTIONS_OPENED, DB_POOL_INVALIDATED
+
+POOL_NAME = "pgbouncer_check"
+
+# Несколько разных выражений: каждое готовится заново на серверном соединении,
+# которое PgBouncer выдал под транзакцию
+STATEMENTS = [
+    select(literal(1, Integer) + bindparam("n", type_=Integer)),
+    select(func.length(bindparam("s", type_=String)), bindparam("n", type_=Integer)),
+    select(func.now(), bindparam("n", type_=Integer)),
+]
+
+
+async def worker(helper: DatabaseHelper, worker_id: int, iterations: int, errors: Counter) -> None:
+    for i in range(iterations):
+        try:
+            async with helper.session_factory() as session:
+                statement = STATEMENTS[(worker_id + i) % len(STATEMENTS)]
+                await session.execute(statement, {"n": i, "s": f"w{worker_id}"})
+                await session.commit()
+                # Два запроса одной транзакции должны попасть на одно серверное соединение
+                async with session.begin():
+                    await session.execute(STATEMENTS[0], {"n": i})
+                    await session.execute(STATEMENTS[1], {"n": i, "s": "tx"})
+        except Exception as e:
+            errors[type(getattr(e, "orig", e)).__name__] += 1
+
+
+def _sample(metric, suffix: str) -> float:
+    return sum(
+        sample.value
+        for family in metric.collect()
+        for sample in family.samples
+        if sample.name.endswith(suffix) and sample.labels.get("pool") == POOL_NAME
+    )
+
+
+def main() -> None:
+    default_url = (
+        f"{settings.DB_DRIVER}://{settings.DB_USER}:{settings.DB_PASSWORD}@localhost:6432/{settings.DB_NAME}"
+    )
+    parser = argparse.ArgumentParser(description="Проверка пула соединений через PgBouncer")
+    parser.add_argument("--url", default=default_url, help="URL PgBouncer (по умолчанию localhost:6432)")
+    parser.add_argument("--mode", choices=[POOL_MODE_PGBOUNCER, POOL_MODE_DIRECT], default=POOL_MODE_PGBOUNCER)
+    parser.add_argument("--concurrency", type=int, default=50, help="Конкурентных сессий")
+    parser.add_argument("--iterations", type=int, default=200, help="Итераций на сессию")
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+
+    async def run() -> Counter:
+        helper = DatabaseHelper(
+            url=args.url,
+            pool_size=args.pool_size,
+            max_overflow=args.pool_size,
+            name=POOL_NAME,
+            pool_mode=args.mode,
+        )
+        errors: Counter = Counter()
+        try:
+            await asyncio.gather(*(
+                worker(helper, worker_id, args.iterations, errors) for worker_id in range(args.concurrency)
+            ))
+        finally:
+            await helper.dispose()
+        return errors
+
+    started = time.perf_counter()
+    errors = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    total = args.concurrency * args.iterations
+    wait_sum = _sample(DB_POOL_CHECKOUT_WAIT, "_sum")
+    wait_count = _sample(DB_POOL_CHECKOUT_WAIT, "_count")
+    opened = _sample(DB_POOL_CONNECTIONS_OPENED, "_total")
+    invalidated = _sample(DB_POOL_INVALIDATED, "_total")
+
+    print(f"режим {args.mode}: {total} сессий за {elapsed:.1f} сек, ошибок {sum(errors.values())}")
+    for name, count in errors.most_common():
+        print(f"  {name}: {count}")
+    print(
+        f"ожидание соединения: среднее {wait_sum / wait_count * 1000 if wait_count else 0:.2f} мс "
+        f"на {int(wait_count)} выдач; новых соединений {int(opened)}, выброшено {int(invalidated)}"
+    )
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
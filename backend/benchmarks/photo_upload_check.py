@@ -0,0 +1,135 @@
+"""
+Проверка двухфазной загрузки фото против запущенного API.
+
+Загружает фото частями через /photos/uploads так, как это делает фронтенд
+при плохой связи: повтор уже принятой части получает 409 с актуальным
+смещением в Upload-Offset, часть неверного размера — 400, слишком большая —
+413; после обрыва загрузка продолжается со смещения из GET. По последней
+части файл собирается: URL отдает те же байты. Затем фото прикрепляется
+к отчету приема товаров по photo_ids, повторное прикрепление — 400.
+Отдельно проверяется загрузка целиком (POST /photos). Код выхода 1, если
+что-то не сошлось. Создает один отчет приема товаров в базе.
+
+    cd backend
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.photo_upload_check --base-url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import List
+
+import aiohttp
+
+# Псевдо-JPEG: сервер проверяет только расширение
+JPEG_HEAD = b"\xff\xd8\xff\xe0"
+
+
+async def run(args) -> List[str]:
+    base_url = args.base_url.rstrip("/")
+    failures: List[str] = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"  {'ok ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    content = JPEG_HEAD + os.urandom(args.size_kb * 1024 - len(JPEG_HEAD))
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+
+        async def patch(photo_id: str, offset: int, body: bytes) -> aiohttp.ClientResponse:
+            async with session.patch(
+                f"{base_url}/photos/uploads/{photo_id}", data=body, headers={"Upload-Offset": str(offset)}
+            ) as response:
+                await response.read()
+                return response
+
+        async with session.post(
+            f"{base_url}/photos/uploads", json={"filename": "check.jpg", "content_type": "image/jpeg", "size": len(content)}
+        ) as response:
+            check(response.status == 201, f"начало загрузки частями: {response.status}")
+            upload = await response.json()
+        photo_id, chunk_size = upload["id"], upload["chunk_size"]
+        print(f"загрузка {photo_id}: {len(content)} байт частями по {chunk_size}")
+        check(len(content) > 2 * chunk_size, "файл больше двух частей (иначе уменьшите PHOTO_UPLOAD_CHUNK_KB)")
+
+        response = await patch(photo_id, 0, content[:chunk_size])
+        check(response.status == 200, f"первая часть принята: {response.status}")
+
+        response = await patch(photo_id, 0, content[:chunk_size])
+        check(
+            response.status == 409 and response.headers.get("Upload-Offset") == str(chunk_size),
+            f"повтор части — 409, Upload-Offset {response.headers.get('Upload-Offset')}",
+        )
+        response = await patch(photo_id, chunk_size, content[chunk_size:2 * chunk_size - 1])
+        check(response.status == 400, f"часть короче chunk_size — 400: {response.status}")
+        response = await patch(photo_id, chunk_size, content[chunk_size:2 * chunk_size + 1])
+        check(response.status == 413, f"часть длиннее chunk_size — 413: {response.status}")
+
+        # Обрыв связи: клиент не знает, что принято, и спрашивает смещение
+        async with session.get(f"{base_url}/photos/uploads/{photo_id}") as response:
+            status = await response.json()
+        check(status["received"] == chunk_size and status["status"] == "uploading", f"докачка с {status['received']}")
+
+        offset = status["received"]
+        while offset < len(content):
+            response = await patch(photo_id, offset, content[offset:offset + chunk_size])
+            if response.status != 200:
+                check(False, f"часть со смещения {offset}: {response.status}")
+                break
+            offset += chunk_size
+
+        async with session.get(f"{base_url}/photos/uploads/{photo_id}") as response:
+            status = await response.json()
+        check(status["status"] == "ready" and bool(status["url"]), f"фото собрано: {status['status']}, {status['url']}")
+        if status["url"]:
+            async with session.get(base_url + status["url"]) as response:
+                check(await response.read() == content, "URL отдает те же байты")
+
+        # Загрузка целиком
+        form = aiohttp.FormData()
+        form.add_field("file", content[:10 * 1024], filename="whole.jpg", content_type="image/jpeg")
+        async with session.post(f"{base_url}/photos", data=form) as response:
+            whole = await response.json()
+            check(response.status == 201 and whole.get("status") == "ready", f"загрузка целиком: {response.status}")
+
+        # Прикрепление к отчету: только один раз
+        def report_form() -> aiohttp.FormData:
+            data = aiohttp.FormData()
+            data.add_field("location", args.location)
+            data.add_field("shift_type", "morning")
+            data.add_field("cashier_name", "Проверка Загрузки")
+            data.add_field("kuxnya_json", json.dumps([{"name": "Товар", "count": 1, "unit": "шт"}], ensure_ascii=False))
+            data.add_field("photo_ids", photo_id)
+            data.add_field("photo_ids", whole.get("id", ""))
+            return data
+
+        async with session.post(f"{base_url}/report-on-goods/create", data=report_form()) as response:
+            report = await response.json()
+            check(response.status == 201, f"отчет с photo_ids создан: {response.status}")
+            urls = report.get("photos_urls") or []
+            check(len(urls) == 2 and urls[0] == status["url"], f"фото в отчете по порядку: {urls}")
+        async with session.post(f"{base_url}/report-on-goods/create", data=report_form()) as response:
+            check(response.status == 400, f"повторное прикрепление — 400: {response.status}")
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Проверка загрузки фото частями с докачкой")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--size-kb", type=int, default=1300, help="Размер фото; больше двух частей")
+    parser.add_argument("--location", default="Гагарина 48/1")
+    args = parser.parse_args()
+
+    failures = asyncio.run(run(args))
+    print(f"ошибок: {len(failures)}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Микробенчмарк сериализации ответов списков.
+
+Строит страницы в форме ответов /report-on-goods/list и /writeoff-transfer/list
+и сравнивает прежний путь FastAPI (jsonable_encoder + JSONResponse на json)
+с FastJSONResponse (orjson). База не нужна.
+
+    python -m benchmarks.serialization --rows 100 --items 30 --repeat 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import FastJSONResponse
+
+UNITS = ["кг", "шт", "л", "уп"]
+LOCATIONS = ["Гагарина 48/1", "Абдулхакима Исмаилова 51", "Гайдара Гаджиева 7Б"]
+
+
+def _items(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"name": f"Товар {i}", "count": round(random.uniform(0.1, 50), 3), "unit": random.choice(UNITS)}
+        for i in range(count)
+    ]
+
+
+def report_on_goods_page(rows: int, items: int) -> Dict[str, Any]:
+    reports = []
+    now = datetime.now()
+    for i in range(rows):
+        kuxnya, bar, upakovki = _items(items), _items(items // 2), _items(items // 3)
+        date = (now - timedelta(hours=i)).isoformat()
+        reports.append({
+            "id": i,
+            "location": random.choice(LOCATIONS),
+            "date": date,
+            "cashier_name": "Иванова Анна",
+            "shift_type": "morning",
+            "goods_count": len(kuxnya) + len(bar) + len(upakovki),
+            "supplier": None,
+            "created_at": date,
+            "kuxnya": kuxnya,
+            "bar": bar,
+            "upakovki_xoz": upakovki,
+            "upakovki": upakovki,
+            "photos_urls": [f"/uploads/report_on_goods/{i}-{n}.jpg" for n in range(3)],
+            "total_items": kuxnya + bar + upakovki,
+        })
+    return {"reports": reports, "total": rows * 10, "page": 1, "per_page": rows, "total_pages": 10}
+
+
+def writeoff_transfer_page(rows: int, items: int) -> Dict[str, Any]:
+    reports = []
+    now = datetime.now()
+    for i in range(rows):
+        writeoffs = [dict(item, reason="Просрочка") for item in _items(items)]
+        reports.append({
+            "id": i,
+            "location": random.choice(LOCATIONS),
+            "cashier_name": "Петров Иван",
+            "shift_type": "night",
+            "type": "writeoff",
+            "date": (now - timedelta(hours=i)).isoformat(),
+            "created_at": (now - timedelta(hours=i)).isoformat(),
+            "writeoffs": writeoffs,
+            "transfers": [],
+            "items_count": len(writeoffs),
+            "location_to": None,
+        })
+    return {"reports": reports, "total": rows * 10, "page": 1, "per_page": rows, "total_pages": 10}
+
+
+def _default_path(content: Dict[str, Any]) -> bytes:
+    # То, что FastAPI делает для dict без response_model
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def _orjson_path(content: Dict[str, Any]) -> bytes:
+    return FastJSONResponse(content).body
+
+
+def _measure(func: Callable[[Dict[str, Any]], bytes], content: Dict[str, Any], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(content)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение сериализации ответов списков")
+    parser.add_argument("--rows", type=int, default=100, help="Строк на странице")
+    parser.add_argument("--items", type=int, default=30, help="Позиций в каждом отчете")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    pages = {
+        "/report-on-goods/list": report_on_goods_page(args.rows, args.items),
+        "/writeoff-transfer/list": writeoff_transfer_page(args.rows, args.items),
+    }
+
+    print(f"{'эндпоинт':26}{'размер, KB':>12}{'default p50':>14}{'orjson p50':>13}{'ускорение':>12}")
+    for name, content in pages.items():
+        # Оба пути должны давать байт-в-байт одинаковый JSON
+        assert _default_path(content) == _orjson_path(content), name
+        default = statistics.median(_measure(_default_path, content, args.repeat))
+        fast = statistics.median(_measure(_orjson_path, content, args.repeat))
+        size = len(_orjson_path(content)) / 1024
+        print(f"{name:26}{size:>12.1f}{default:>12.2f}ms{fast:>11.2f}ms{default / fast:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Проверка хранилища STORAGE_BACKEND=s3 против локального MinIO.
+
+Через FileService и S3Storage (как их использует API) записывает маленький
+файл одним put_object и большой — multipart с параллельными частями из
+файлового объекта, читает оба обратно и сверяет хеши, проверяет, что URL
+имеет тот же вид /uploads/<ключ>, что и у локального хранилища, отдачу с
+Range и If-None-Match и удаление вместе с превью. Печатает скорость записи
+и чтения. Код выхода 1, если что-то не сошлось. Бакет создается, если его нет.
+
+    docker compose -f backend/docker-compose.yml up -d minio
+    cd backend
+    python -m benchmarks.storage_check --size-mb 64
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app.services.file_service import FileService
+from app.services.storage import S3Storage, storage_key, variant_key
+
+
+async def _read_stream(storage: S3Storage, key: str, byte_range: Optional[str] = None) -> bytes:
+    stored = await storage.open(key, byte_range=byte_range)
+    return b"".join([chunk async for chunk in stored.body])
+
+
+async def run(args) -> List[str]:
+    storage = S3Storage(
+        bucket=args.bucket,
+        endpoint_url=args.endpoint,
+        region=args.region,
+        access_key=args.access_key,
+        secret_key=args.secret_key,
+        prefix="storage_check",
+        part_size=args.part_size_mb * 1024 * 1024,
+        max_concurrency=args.concurrency,
+    )
+    service = FileService(storage)
+    failures: List[str] = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"  {'ok ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    try:
+        client = await storage._get_client()
+        try:
+            await client.head_bucket(Bucket=args.bucket)
+        except Exception:
+            await client.create_bucket(Bucket=args.bucket)
+
+        # Маленький файл: одним put_object, URL как у локального хранилища
+        small = os.urandom(200 * 1024)
+        path = await service.save_file_bytes(small, "photo.jpg", subfolder="report_on_goods")
+        url = service.get_file_url(path)
+        key = storage_key(path)
+        print(f"маленький файл {len(small) // 1024} КБ: {path}")
+        check(path.startswith("uploads/report_on_goods/"), "путь в БД вида uploads/<ключ>")
+        check(url == f"/uploads/{key}", f"URL {url}")
+        check(await service.read_file(url) == small, "чтение по URL совпадает с записанным")
+
+        stored = await storage.open(key)
+        etag = stored.etag
+        await stored.body.aclose()
+        check(stored.size == len(small), "размер в метаданных")
+        not_modified = await storage.open(key, if_none_match=etag)
+        check(bool(not_modified and not_modified.not_modified), "If-None-Match с тем же ETag — 304")
+        partial = await storage.open(key, byte_range="bytes=100-199")
+        body = b"".join([chunk async for chunk in partial.body])
+        check(body == small[100:200] and bool(partial.content_range), f"Range: {partial.content_range}")
+
+        # Большой файл: multipart из файлового объекта, как UploadFile.file
+        large = os.urandom(args.size_mb * 1024 * 1024)
+        large_key = "shift_reports/storage_check_large.jpg"
+        started = time.perf_counter()
+        written = await storage.save(large_key, io.BytesIO(large), "image/jpeg")
+        write_time = time.perf_counter() - started
+        started = time.perf_counter()
+        read_back = await _read_stream(storage, large_key)
+        read_time = time.perf_counter() - started
+        parts = -(-len(large) // storage.part_size)
+        print(
+            f"большой файл {args.size_mb} МБ ({parts} частей по {storage.part_size // 1024 // 1024} МБ, "
+            f"до {storage.max_concurrency} параллельно): запись {args.size_mb / write_time:.1f} МБ/с, "
+            f"чтение {args.size_mb / read_time:.1f} МБ/с"
+        )
+        check(written == len(large), "размер записанного")
+        check(hashlib.sha256(read_back).digest() == hashlib.sha256(large).digest(), "хеш после чтения совпадает")
+
+        # Удаление вместе с превью
+        await storage.save(variant_key(key, 320), small[:1024])
+        check(await service.delete_shift_report_photo(path), "удаление файла")
+        check(not await storage.exists(key), "файла больше нет")
+        check(not await storage.exists(variant_key(key, 320)), "превью удалено вместе с файлом")
+        check(await storage.read("report_on_goods/missing.jpg") is None, "отсутствующий файл — None")
+
+        deleted = await storage.delete_older_than(datetime.now() + timedelta(minutes=1))
+        check(deleted >= 1 and not await storage.exists(large_key), f"очистка старых файлов: удалено {deleted}")
+    finally:
+        await storage.close()
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Проверка S3-хранилища загрузок на MinIO")
+    parser.add_argument("--endpoint", default="http://localhost:9000")
+    parser.add_argument("--bucket", default="reportbot-uploads")
+    parser.add_argument("--region", default="us-east-1")
+    parser.add_argument("--access-key", default="minioadmin")
+    parser.add_argument("--secret-key", default="minioadmin")
+    parser.add_argument("--size-mb", type=int, default=64, help="Размер большого файла")
+    parser.add_argument("--part-size-mb", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4, help="Частей параллельно")
+    args = parser.parse_args()
+
+    failures = asyncio.run(run(args))
+    print(f"ошибок: {len(failures)}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
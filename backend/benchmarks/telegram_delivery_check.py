@@ -0,0 +1,119 @@
+"""
+Проверка повтора отложенной отправки отчета в Telegram по частям.
+
+Отчет приема товаров с 12 фото (два альбома) и длинным текстом (подпись
+плюс продолжение). Первая попытка: первый альбом не уходит, второй уходит,
+продолжение не отправляется. Повтор с тем же DeliveryProgress должен
+отправить первый альбом и продолжение и не повторять второй альбом.
+Так же для отчета смены: фото не ушло, повтор отправляет фото и продолжение.
+Запросы к Telegram подменяются записью в список, сеть и база не нужны.
+Код выхода 1, если что-то не сошлось.
+
+    python -m benchmarks.telegram_delivery_check
+"""
+
+import asyncio
+import sys
+from typing import List, Set
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.services.telegram_delivery import DeliveryProgress, TelegramDelivery
+from app.services.telegram_service import TelegramService
+
+LONG_LIST = [{"name": f"Товар с длинным названием номер {i}", "count": i} for i in range(80)]
+
+
+class RecordingService(TelegramService):
+    """TelegramService, который вместо запросов записывает части и роняет заданные"""
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = True
+        self.chat_id = 1
+        self.sent: List[str] = []
+        self.failing: Set[str] = set()
+
+    def _record(self, part: str) -> bool:
+        if part in self.failing:
+            return False
+        self.sent.append(part)
+        return True
+
+    async def _send_media_group_with_caption(self, caption, photos, topic_id=None, **kwargs) -> bool:
+        return self._record(f"album:{photos[0]['filename']}")
+
+    async def _send_photo_with_caption_from_bytes(self, caption, photo_bytes, filename, topic_id=None) -> bool:
+        return self._record(f"album:{filename}")
+
+    async def _send_photo_with_caption(self, caption, photo_path, topic_id=None) -> bool:
+        return self._record(f"photo:{photo_path}")
+
+    async def _send_message_part(self, chat_id, text, topic_id=None) -> bool:
+        return self._record("continuation")
+
+
+async def run() -> List[str]:
+    failures: List[str] = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"  {'ok ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    delivery = TelegramDelivery(CircuitBreaker("check", failure_threshold=100, reset_timeout=1), max_queue=10)
+    service = RecordingService()
+
+    print("отчет приема товаров: 2 альбома + продолжение")
+    photos = [{"content": b"jpeg", "filename": f"p{i}.jpg"} for i in range(12)]
+    report = {"location": "Гагарина 48/1", "cashier_name": "Проверка", "kuxnya": LONG_LIST}
+    progress = DeliveryProgress()
+
+    async def send_goods():
+        return await service.send_goods_report(report, photos)
+
+    service.failing = {"album:p0.jpg"}
+    sent = await delivery.run("goods", send_goods, progress)
+    check(not sent, "первая попытка не удалась")
+    check(service.sent == ["album:p10.jpg"], f"в первой попытке ушел только второй альбом: {service.sent}")
+
+    service.failing, service.sent = set(), []
+    sent = await delivery.run("goods", send_goods, progress)
+    check(sent, "повтор удался")
+    check(
+        service.sent[:1] == ["album:p0.jpg"] and "album:p10.jpg" not in service.sent,
+        f"повтор отправил первый альбом и не повторил второй: {service.sent}",
+    )
+    check(service.sent.count("continuation") >= 1, f"продолжение отправлено: {service.sent.count('continuation')}")
+
+    service.sent = []
+    sent = await delivery.run("goods", send_goods, progress)
+    check(sent and not service.sent, f"третья попытка ничего не отправляет: {service.sent}")
+
+    print("отчет смены: фото + продолжение")
+    shift = {"location": "Гагарина 48/1", "cashier_name": "Проверка", "comments": "Комментарий. " * 150}
+    progress = DeliveryProgress()
+
+    async def send_shift():
+        return await service.send_shift_report(shift, "shift.jpg")
+
+    service._photo_exists = lambda path: asyncio.sleep(0, result=False)
+    service.failing, service.sent = {"photo:shift.jpg"}, []
+    check(not await delivery.run("shift", send_shift, progress), f"первая попытка не удалась: {service.sent}")
+    service.failing, service.sent = set(), []
+    check(await delivery.run("shift", send_shift, progress), "повтор удался")
+    check(
+        service.sent[:1] == ["photo:shift.jpg"] and service.sent.count("continuation") >= 1,
+        f"повтор отправил фото и продолжение: {service.sent}",
+    )
+
+    return failures
+
+
+def main() -> None:
+    failures = asyncio.run(run())
+    print(f"ошибок: {len(failures)}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
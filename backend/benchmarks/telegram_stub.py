@@ -0,0 +1,81 @@
+"""
+Заглушка Telegram Bot API для нагрузочных тестов.
+
+Отвечает {"ok": true} на любой метод вида /bot<token>/<method>, при необходимости
+с искусственной задержкой, и считает количество вызовов по методам.
+
+Запуск отдельно:
+    python -m benchmarks.telegram_stub --port 8081 --delay-ms 50
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from typing import Optional
+
+from aiohttp import web
+
+
+class TelegramStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081, delay_ms: int = 0):
+        self.host = host
+        self.port = port
+        self.delay = delay_ms / 1000
+        self.calls: Counter = Counter()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        # Вычитываем тело целиком, чтобы клиент честно отправил фото
+        await request.read()
+        self.calls[method] += 1
+
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        return web.json_response({"ok": True, "result": {"message_id": sum(self.calls.values())}})
+
+    async def start(self) -> None:
+        app = web.Application(client_max_size=200 * 1024 * 1024)
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    stub = TelegramStub(host=args.host, port=args.port, delay_ms=args.delay_ms)
+    await stub.start()
+    print(f"Заглушка Telegram запущена: {stub.url}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await stub.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Заглушка Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--delay-ms", type=int, default=0, help="Задержка ответа каждого метода")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Микробенчмарк форматирования сообщений Telegram.
+
+Сравнивает прежнее форматирование инвентаризации v2 (f-строки с +=,
+словарь эмодзи и разбор даты на каждый вызов) с шаблонами из
+app.services.telegram_templates: отдельно сборку текста и сборку вместе
+с разбиением под лимит 4096. Шаблоны вдобавок экранируют пользовательские
+поля, так что сравнение не в их пользу; цель — убедиться, что экранирование
+и разбиение укладываются в доли миллисекунды даже на сотнях позиций.
+База и Telegram не нужны.
+
+    python -m benchmarks.telegram_templates --items 200 --repeat 500
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+from zoneinfo import ZoneInfo
+
+from app.services import telegram_templates as templates
+
+CATEGORIES = ["Напитки", "Кухня", "Бар", "Упаковки", "Хозтовары", "Прочее"]
+UNITS = ["кг", "шт", "л", "уп"]
+
+
+def inventory(items: int) -> Dict[str, Any]:
+    return {
+        "location": "Отчет - Гагарина 48/1",
+        "cashier_name": "Иванова Анна",
+        "shift_type": "night",
+        "date": datetime.now(ZoneInfo("UTC")).isoformat(),
+        "inventory_data": [
+            {
+                "item_category": random.choice(CATEGORIES),
+                # Каждое десятое название со спецсимволами HTML
+                "item_name": f"Товар {i} <1 л> & Co" if i % 10 == 0 else f"Товар {i}",
+                "quantity": round(random.uniform(0, 50), 2),
+                "item_unit": random.choice(UNITS),
+            }
+            for i in range(items)
+        ],
+    }
+
+
+def legacy_inventory_v2(data: Dict[str, Any]) -> str:
+    """Прежний _format_daily_inventory_v2_message (без экранирования и разбиения)"""
+    shift_emoji = "🌅" if data.get('shift_type') == 'morning' else "🌙"
+    user_date = data.get('date')
+    try:
+        formatted_date = datetime.fromisoformat(user_date.replace('Z', '+00:00')).strftime('%d.%m.%Y %H:%M')
+    except (AttributeError, ValueError):
+        formatted_date = str(user_date)
+
+    message = f"""📦 <b>ЕЖЕДНЕВНАЯ ИНВЕНТАРИЗАЦИЯ</b> {shift_emoji}
+
+📍 <b>Локация:</b> {data.get('location', 'Не указана')}
+👤 <b>Кассир:</b> {data.get('cashier_name', 'Не указан')}
+📅 <b>Смена:</b> {'Утренняя' if data.get('shift_type') == 'morning' else 'Ночная'}
+🕐 <b>Время проведения:</b> {formatted_date}
+
+    """
+    categories = {}
+    for item in data.get('inventory_data', []):
+        category = item.get('item_category', 'Прочее')
+        if category not in categories:
+            categories[category] = []
+        categories[category].append({
+            'name': item.get('item_name', 'Неизвестный товар'),
+            'quantity': item.get('quantity', 0),
+            'unit': item.get('item_unit', 'шт'),
+        })
+    category_emojis = {
+        'напитки': '🥤', 'еда': '🍽️', 'кухня': '🍳', 'бар': '🍹',
+        'упаковки': '📦', 'хоз': '🧽', 'хозтовары': '🧽', 'прочее': '📋',
+    }
+    for category, items in categories.items():
+        emoji = category_emojis.get(category.lower(), '📋')
+        message += f"{emoji} <b>{category.upper()}:</b>\n"
+        for item in items:
+            message += f"• {item['name']}: <b>{item['quantity']} {item['unit']}</b>\n"
+        message += "\n"
+    return message
+
+
+def template_render(data: Dict[str, Any]) -> str:
+    return templates.render_daily_inventory_v2(data)
+
+
+def template_inventory_v2(data: Dict[str, Any]) -> List[str]:
+    return templates.split_message(templates.render_daily_inventory_v2(data))
+
+
+def _measure(func: Callable[[Dict[str, Any]], Any], data: Dict[str, Any], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(data)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение форматирования сообщений Telegram")
+    parser.add_argument("--items", type=int, nargs="+", default=[20, 200, 500], help="Позиций в инвентаризации")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'позиций':>8}{'символов':>10}{'частей':>8}{'прежний p50':>14}{'шаблон p50':>13}{'+ разбиение':>13}")
+    for items in args.items:
+        data = inventory(items)
+        parts = template_inventory_v2(data)
+        # Прежний путь отдавал одно сообщение: больше 4096 символов Telegram его отклонял
+        assert all(templates.tg_len(part) <= templates.MESSAGE_LIMIT for part in parts)
+        legacy = statistics.median(_measure(legacy_inventory_v2, data, args.repeat))
+        render = statistics.median(_measure(template_render, data, args.repeat))
+        split = statistics.median(_measure(template_inventory_v2, data, args.repeat))
+        length = len(legacy_inventory_v2(data))
+        print(f"{items:>8}{length:>10}{len(parts):>8}{legacy:>12.3f}ms{render:>11.3f}ms{split:>11.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -63,6 +63,13 @@ function App() {
   const [validationErrors, setValidationErrors] = useState({});
   const [notification, setNotification] = useState(null);
   const [drafts, setDrafts] = useState([]);
+  // Локации из реестра на бэкенде; константы — запасной вариант, пока ответ не пришел
+  const [locationConfig, setLocationConfig] = useState({
+    locations: LOCATIONS,
+    cashierLocations: CASHIER_LOCATIONS,
+    reportLocations: REPORT_LOCATIONS,
+    peremesheniya: PEREMESHENIYA,
+  });
 
   const location = useLocation();
   const navigate = useNavigate();
@@ -72,6 +79,20 @@ function App() {
     setDrafts(getDrafts());
   }, []);
 
+  // Load locations on app start
+  useEffect(() => {
+    apiService.getLocations()
+      .then((data) => {
+        setLocationConfig({
+          locations: data.locations.map((location) => location.address),
+          cashierLocations: data.cashier_locations,
+          reportLocations: data.report_locations,
+          peremesheniya: data.special,
+        });
+      })
+      .catch((error) => console.error('Error loading locations:', error));
+  }, []);
+
   // Handle route changes
   useEffect(() => {
     if (location.pathname === '/otchet/views') {
@@ -346,10 +367,7 @@ function App() {
     loadDraft,
     saveDraft,
     goToMenu,
-    locations: LOCATIONS,
-    cashierLocations: CASHIER_LOCATIONS,
-    reportLocations: REPORT_LOCATIONS,
-    peremesheniya: PEREMESHENIYA,
+    ...locationConfig,
     apiService
   };
 
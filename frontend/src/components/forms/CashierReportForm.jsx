@@ -5,6 +5,8 @@ import { ValidationAlert } from '../common/ValidationAlert';
 import { ConfirmationModal } from '../common/ConfirmationModal';
 import { useAutoSave } from '../../hooks/useAutoSave';
 import { useFormData } from '../../hooks/useFormData';
+import { usePhotoUploads } from '../../hooks/usePhotoUploads';
+import { useSubmission } from '../../hooks/useSubmission';
 import { getCurrentMSKTime } from '../../utils/dateUtils';
 
 export const CashierReportForm = ({
@@ -53,6 +55,8 @@ export const CashierReportForm = ({
   const { handleNumberInput } = useFormData(validationErrors, setValidationErrors);
   const photoInputRef = useRef(null);
   const receiptPhotoInputRef = useRef(null); // НОВОЕ: ref для поля загрузки фото чека
+  const photoUploads = usePhotoUploads(apiService);
+  const submission = useSubmission();
 
 
   // Загружаем черновик при инициализации
@@ -60,10 +64,18 @@ export const CashierReportForm = ({
     if (currentDraftId) {
       const draftData = loadDraft(currentDraftId);
       if (draftData) {
-        setFormData(draftData);
+        const { submission: draftSubmission, ...data } = draftData;
+        submission.restore(draftSubmission);
+        setFormData(data);
       }
     }
-  }, [currentDraftId, loadDraft]);
+  }, [currentDraftId, loadDraft, submission]);
+
+  // Фото загружаются, пока заполняется остальная форма
+  useEffect(() => {
+    photoUploads.startUpload(formData.photo);
+    photoUploads.startUpload(formData.receiptPhoto);
+  }, [formData.photo, formData.receiptPhoto, photoUploads.startUpload]);
 
   // Функция для автосохранения (теперь включаем фото)
   const autoSaveFunction = useCallback(async (data) => {
@@ -72,9 +84,9 @@ export const CashierReportForm = ({
         data.expenses.some(e => e.name || e.amount) ||
         Object.values(data.iikoData).some(v => v) ||
         data.factCash || data.photo || data.receiptPhoto || data.comments) {
-      await saveDraft('cashier', data);
+      await saveDraft('cashier', { ...data, submission: submission.current() });
     }
-  }, [saveDraft]);
+  }, [saveDraft, submission]);
 
   // Автосохранение каждые 300мс с сохранением фокуса
   useAutoSave(formData, autoSaveFunction, 300);
@@ -290,11 +302,27 @@ export const CashierReportForm = ({
         apiFormData.append('expense_entries_json', JSON.stringify(expenseEntries));
       }
 
-      // Фото
-      apiFormData.append('photo', formData.photo);
+      // Фото: id загруженного заранее, а если загрузка не удалась — сам файл.
+      // Повтор той же отправки уходит с теми же id и тем же ключом
+      if (!submission.forData(formData).photoIds) {
+        const [photo, receiptPhoto] = await Promise.all([
+          photoUploads.photoId(formData.photo),
+          photoUploads.photoId(formData.receiptPhoto),
+        ]);
+        submission.setPhotoIds({ photo, receiptPhoto });
+      }
+      const { key: idempotencyKey, photoIds } = submission.current();
+      const { photo: photoId, receiptPhoto: receiptPhotoId } = photoIds;
+      if (photoId) {
+        apiFormData.append('photo_id', photoId);
+      } else {
+        apiFormData.append('photo', formData.photo);
+      }
 
       // НОВОЕ: Фото чека с магазина (необязательное)
-      if (formData.receiptPhoto) {
+      if (receiptPhotoId) {
+        apiFormData.append('receipt_photo_id', receiptPhotoId);
+      } else if (formData.receiptPhoto) {
         apiFormData.append('receipt_photo', formData.receiptPhoto);
       }
 
@@ -303,17 +331,26 @@ export const CashierReportForm = ({
         apiFormData.append('comments', formData.comments.trim());
       }
 
-      await apiService.createShiftReport(apiFormData);
+      // Ключ попадает в черновик до отправки: повтор после перезагрузки страницы уйдет с ним же
+      await autoSaveFunction(formData);
+      await apiService.createShiftReport(apiFormData, { idempotencyKey });
       clearCurrentDraft(); // Удаляем черновик сразу после успешной отправки
+      photoUploads.reset();
+      submission.reset();
       showNotification('success', 'Отчет отправлен!', 'Отчет смены успешно отправлен и сохранен в системе');
 
     } catch (error) {
       console.error('❌ Ошибка отправки отчета:', error);
+      if (error.status === 400) {
+        // id фото устарели или уже прикреплены — следующая попытка загрузит фото заново
+        photoUploads.reset();
+        submission.reset();
+      }
       showNotification('error', 'Ошибка сервера', `Не удалось отправить отчет: ${error.message}`);
     } finally {
       setIsLoading(false);
     }
-  }, [formData, apiService, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading]);
+  }, [formData, apiService, photoUploads, submission, autoSaveFunction, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading]);
 
   return (
     <>
@@ -5,6 +5,7 @@ import { ValidationAlert } from '../common/ValidationAlert';
 import { ConfirmationModal } from '../common/ConfirmationModal';
 import { useAutoSave } from '../../hooks/useAutoSave';
 import { useFormData } from '../../hooks/useFormData';
+import { useSubmission } from '../../hooks/useSubmission';
 import { getCurrentMSKTime } from '../../utils/dateUtils';
 
 export const InventoryForm = ({
@@ -36,6 +37,7 @@ export const InventoryForm = ({
   const [itemsLoading, setItemsLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const { handleNumberInput } = useFormData(validationErrors, setValidationErrors);
+  const submission = useSubmission();
 
   useEffect(() => {
     if (formData.inventory_data) {
@@ -89,18 +91,20 @@ export const InventoryForm = ({
     if (currentDraftId && availableItems.length > 0) {
       const draftData = loadDraft(currentDraftId);
       if (draftData) {
-        setFormData(draftData);
+        const { submission: draftSubmission, ...data } = draftData;
+        submission.restore(draftSubmission);
+        setFormData(data);
       }
     }
-  }, [currentDraftId, loadDraft, availableItems]);
+  }, [currentDraftId, loadDraft, availableItems, submission]);
 
   // Функция для автосохранения
   const autoSaveFunction = useCallback(async (data) => {
     if (data.location || data.shift || data.conductor || data.report_date || data.report_time ||
         (data.inventory_data && data.inventory_data.some(item => item.quantity > 0))) {
-      await saveDraft('inventory', data);
+      await saveDraft('inventory', { ...data, submission: submission.current() });
     }
-  }, [saveDraft]);
+  }, [saveDraft, submission]);
 
   // Автосохранение каждые 300мс с сохранением фокуса
   useAutoSave(formData, autoSaveFunction, 300);
@@ -216,8 +220,12 @@ export const InventoryForm = ({
         inventory_data: formData.inventory_data.filter(item => item.quantity > 0)
       };
 
-      const result = await apiService.createInventoryReportV2(submitData);
+      // Ключ попадает в черновик до отправки: повтор после перезагрузки страницы уйдет с ним же
+      const { key: idempotencyKey } = submission.forData(submitData);
+      await autoSaveFunction(formData);
+      const result = await apiService.createInventoryReportV2(submitData, { idempotencyKey });
       clearCurrentDraft();
+      submission.reset();
       showNotification('success', 'Инвентаризация отправлена!', 'Отчет ежедневной инвентаризации успешно отправлен и сохранен в базе данных');
 
     } catch (error) {
@@ -226,7 +234,7 @@ export const InventoryForm = ({
     } finally {
       setIsLoading(false);
     }
-  }, [formData, apiService, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading]);
+  }, [formData, apiService, submission, autoSaveFunction, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading]);
 
   return (
     <>
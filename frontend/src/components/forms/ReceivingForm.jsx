@@ -5,6 +5,8 @@ import { ValidationAlert } from '../common/ValidationAlert';
 import { ConfirmationModal } from '../common/ConfirmationModal';
 import { useAutoSave } from '../../hooks/useAutoSave';
 import { useFormData } from '../../hooks/useFormData';
+import { usePhotoUploads } from '../../hooks/usePhotoUploads';
+import { useSubmission } from '../../hooks/useSubmission';
 import { getCurrentMSKTime } from '../../utils/dateUtils';
 
 export const ReceivingForm = ({
@@ -67,16 +69,25 @@ export const ReceivingForm = ({
   const [useCustomDateTime, setUseCustomDateTime] = useState(false);
   const { handleNumberInput } = useFormData(validationErrors, setValidationErrors);
   const nakladniyePhotoInputRef = useRef(null); // оставляем ref, можно переименовать позже
+  const photoUploads = usePhotoUploads(apiService);
+  const submission = useSubmission();
 
   // Загружаем черновик при инициализации
   useEffect(() => {
     if (currentDraftId) {
       const draftData = loadDraft(currentDraftId);
       if (draftData) {
-        setFormData(draftData);
+        const { submission: draftSubmission, ...data } = draftData;
+        submission.restore(draftSubmission);
+        setFormData(data);
       }
     }
-  }, [currentDraftId, loadDraft]);
+  }, [currentDraftId, loadDraft, submission]);
+
+  // Фото загружаются, пока заполняется остальная форма
+  useEffect(() => {
+    formData.photos.forEach((photo) => photoUploads.startUpload(photo));
+  }, [formData.photos, photoUploads.startUpload]);
 
   // Функция для автосохранения
   const autoSaveFunction = useCallback(async (data) => {
@@ -87,9 +98,9 @@ export const ReceivingForm = ({
 
     if (data.location || data.photos?.length > 0 ||
         hasPunkt1Items || hasPunkt2Items || hasPeremeshenieyeItems || hasPokupkiItems) {
-      await saveDraft('receiving', data);
+      await saveDraft('receiving', { ...data, submission: submission.current() });
     }
-  }, [saveDraft]);
+  }, [saveDraft, submission]);
 
   // Автосохранение каждые 300мс с сохранением фокуса
   useAutoSave(formData, autoSaveFunction, 300);
@@ -214,9 +225,18 @@ export const ReceivingForm = ({
         apiFormData.append('custom_date', formData.date);
       }
 
-      // Фотографии накладных
-      formData.photos.forEach((photo) => {
-        apiFormData.append('photos', photo);
+      // Фотографии накладных: id загруженных заранее, а если загрузка не удалась — сами файлы.
+      // Повтор той же отправки уходит с теми же id и тем же ключом
+      if (!submission.forData({ ...formData, useCustomDateTime }).photoIds) {
+        submission.setPhotoIds(await Promise.all(formData.photos.map((photo) => photoUploads.photoId(photo))));
+      }
+      const { key: idempotencyKey, photoIds } = submission.current();
+      formData.photos.forEach((photo, index) => {
+        if (photoIds[index]) {
+          apiFormData.append('photo_ids', photoIds[index]);
+        } else {
+          apiFormData.append('photos', photo);
+        }
       });
 
       // Пункт 1 - Основное (кухня)
@@ -269,18 +289,27 @@ export const ReceivingForm = ({
         apiFormData.append('upakovki_json', JSON.stringify(pokupkiItems));
       }
 
-      await apiService.createReceivingReport(apiFormData);
+      // Ключ попадает в черновик до отправки: повтор после перезагрузки страницы уйдет с ним же
+      await autoSaveFunction(formData);
+      await apiService.createReceivingReport(apiFormData, { idempotencyKey });
+      photoUploads.reset();
+      submission.reset();
 
       showNotification('success', 'Отчет отправлен!', 'Отчет приема товаров успешно отправлен и сохранен в системе');
       clearCurrentDraft();
 
     } catch (error) {
       console.error('❌ Ошибка отправки отчета:', error);
+      if (error.status === 400) {
+        // id фото устарели или уже прикреплены — следующая попытка загрузит фото заново
+        photoUploads.reset();
+        submission.reset();
+      }
       showNotification('error', 'Ошибка сервера', `Не удалось отправить отчет: ${error.message}`);
     } finally {
       setIsLoading(false);
     }
-  }, [formData, apiService, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading, useCustomDateTime]);
+  }, [formData, apiService, photoUploads, submission, autoSaveFunction, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading, useCustomDateTime]);
 
   return (
     <>
@@ -47,6 +47,13 @@ const REPORT_CATEGORIES = [
 	},
 ];
 
+// Тип отчета в событиях /events/reports
+const EVENT_REPORT_TYPES = {
+	'shift-reports': 'shift_report',
+	'report-on-goods': 'report_on_goods',
+	'writeoff-transfer': 'writeoff_transfer',
+};
+
 const LOCATIONS = [
 	{ id: 'all', name: 'Все локации', value: 'all' },
 	{ id: 'gagarina', name: 'Гагарина 48/1', value: 'Гагарина 48/1' },
@@ -142,6 +149,8 @@ const ReportsViewer = ({ goToMenu, apiService }) => {
 			const params = {
 				page: currentPage,
 				per_page: ITEMS_PER_PAGE,
+				// Карточки показывают позиции отчета — без include списки отдают только сводку
+				include: 'items',
 			};
 
 			// Если категория использует datetime, отправляем datetime параметры
@@ -204,6 +213,25 @@ const ReportsViewer = ({ goToMenu, apiService }) => {
 		}
 	}, [currentPage, fetchReports, hasSearched]);
 
+	// Живое обновление: после поиска список перечитывается по событиям с сервера, без опроса
+	useEffect(() => {
+		if (!hasSearched || !currentCategory || typeof EventSource === 'undefined') return undefined;
+
+		let refreshTimer = null;
+		const unsubscribe = apiService.subscribeReportEvents(
+			{ location: selectedLocation, types: [EVENT_REPORT_TYPES[currentCategory.api]] },
+			() => {
+				// Пачку событий (например, пакетную синхронизацию) сводим к одному запросу
+				clearTimeout(refreshTimer);
+				refreshTimer = setTimeout(fetchReports, 500);
+			},
+		);
+		return () => {
+			clearTimeout(refreshTimer);
+			unsubscribe();
+		};
+	}, [hasSearched, currentCategory, selectedLocation, fetchReports, apiService]);
+
 	const formatDate = (dateString) => {
 		return new Date(dateString).toLocaleString('ru-RU', {
 			year: 'numeric',
@@ -223,8 +251,11 @@ const ReportsViewer = ({ goToMenu, apiService }) => {
 		}).format(amount);
 	};
 
+	// Ширина превью в галереях (бэкенд отдает уменьшенную копию по ?w=)
+	const THUMBNAIL_WIDTH = 320;
+
 	// Функция для формирования правильного URL изображения
-	const getImageUrl = (photoUrl) => {
+	const getImageUrl = (photoUrl, width) => {
 		if (!photoUrl) return null;
 
 		// Если URL уже полный (http/https) — возвращаем как есть
@@ -250,6 +281,10 @@ const ReportsViewer = ({ goToMenu, apiService }) => {
 		// Устраняем возможное дублирование /uploads/uploads/
 		path = path.replace(/\/uploads\/uploads\//g, '/uploads/');
 
+		if (width && path.startsWith('/uploads/')) {
+			path = `${path}?w=${width}`;
+		}
+
 		return `${baseUrl}${path}`;
 	};
 
@@ -471,7 +506,7 @@ const ReportsViewer = ({ goToMenu, apiService }) => {
 								<p className="text-xs text-gray-600 mb-1 text-center">Фото отчёта</p>
 								<div className="flex justify-center">
 									<img
-										src={getImageUrl(report.photo_url)}
+										src={getImageUrl(report.photo_url, THUMBNAIL_WIDTH)}
 										alt="Фото отчета"
 										className="max-w-full max-h-32 rounded cursor-pointer hover:opacity-80 transition-opacity border border-gray-200"
 										onClick={() => {
@@ -506,7 +541,7 @@ const ReportsViewer = ({ goToMenu, apiService }) => {
 								<p className="text-xs text-gray-600 mb-1 text-center">Чек с магазина</p>
 								<div className="flex justify-center">
 									<img
-										src={getImageUrl(report.receipt_photo_url)}
+										src={getImageUrl(report.receipt_photo_url, THUMBNAIL_WIDTH)}
 										alt="Фото чека"
 										className="max-w-full max-h-32 rounded cursor-pointer hover:opacity-80 transition-opacity border border-gray-200"
 										onClick={() => {
@@ -678,7 +713,7 @@ const ReportsViewer = ({ goToMenu, apiService }) => {
 									<div key={idx} className="flex justify-center">
 										{imageUrl ? (
 											<img
-												src={imageUrl}
+												src={getImageUrl(photo, THUMBNAIL_WIDTH)}
 												alt={`Фото ${idx + 1}`}
 												className="max-w-full max-h-32 rounded cursor-pointer hover:opacity-80 transition-opacity border border-gray-200"
 												onClick={() => window.open(imageUrl, '_blank')}
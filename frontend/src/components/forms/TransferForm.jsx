@@ -5,6 +5,7 @@ import { ValidationAlert } from '../common/ValidationAlert';
 import { ConfirmationModal } from '../common/ConfirmationModal';
 import { useAutoSave } from '../../hooks/useAutoSave';
 import { useFormData } from '../../hooks/useFormData';
+import { useSubmission } from '../../hooks/useSubmission';
 import { getCurrentMSKTime } from '../../utils/dateUtils';
 
 export const TransferForm = ({
@@ -35,6 +36,7 @@ export const TransferForm = ({
 
   const [showClearModal, setShowClearModal] = useState(false);
   const { handleNumberInput } = useFormData(validationErrors, setValidationErrors);
+  const submission = useSubmission();
 
   // Загружаем черновик при инициализации
   useEffect(() => {
@@ -55,19 +57,21 @@ export const TransferForm = ({
           // Если transfers не массив, создаем новый пустой массив
           draftData.transfers = ['', '', '', ''];
         }
-        setFormData(draftData);
+        const { submission: draftSubmission, ...data } = draftData;
+        submission.restore(draftSubmission);
+        setFormData(data);
       }
     }
-  }, [currentDraftId, loadDraft]);
+  }, [currentDraftId, loadDraft, submission]);
 
   // Функция для автосохранения
   const autoSaveFunction = useCallback(async (data) => {
     const hasTransfers = data.transfers.some(item => item.trim() !== '');
 
     if (data.locationFrom || data.locationTo || hasTransfers) {
-      await saveDraft('transfer', data);
+      await saveDraft('transfer', { ...data, submission: submission.current() });
     }
-  }, [saveDraft]);
+  }, [saveDraft, submission]);
 
   // Автосохранение каждые 300мс с сохранением фокуса
   useAutoSave(formData, autoSaveFunction, 300);
@@ -207,8 +211,12 @@ export const TransferForm = ({
         apiFormData.append('transfers_json', JSON.stringify(transfers));
       }
 
-      const result = await apiService.createWriteOffReport(apiFormData);
+      // Ключ попадает в черновик до отправки: повтор после перезагрузки страницы уйдет с ним же
+      const { key: idempotencyKey } = submission.forData(formData);
+      await autoSaveFunction(formData);
+      const result = await apiService.createWriteOffReport(apiFormData, { idempotencyKey });
       clearCurrentDraft();
+      submission.reset();
       showNotification('success', 'Акт перемещения отправлен!', 'Акт перемещения успешно отправлен и сохранен в системе');
 
     } catch (error) {
@@ -217,7 +225,7 @@ export const TransferForm = ({
     } finally {
       setIsLoading(false);
     }
-  }, [formData, apiService, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading]);
+  }, [formData, apiService, submission, autoSaveFunction, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading]);
 
   return (
     <>
@@ -5,6 +5,7 @@ import { ValidationAlert } from '../common/ValidationAlert';
 import { ConfirmationModal } from '../common/ConfirmationModal';
 import { useAutoSave } from '../../hooks/useAutoSave';
 import { useFormData } from '../../hooks/useFormData';
+import { useSubmission } from '../../hooks/useSubmission';
 import { getCurrentMSKTime } from '../../utils/dateUtils';
 
 export const WriteOffForm = ({
@@ -34,25 +35,28 @@ export const WriteOffForm = ({
 
   const [showClearModal, setShowClearModal] = useState(false);
   const { handleNumberInput } = useFormData(validationErrors, setValidationErrors);
+  const submission = useSubmission();
 
   // Загружаем черновик при инициализации
   useEffect(() => {
     if (currentDraftId) {
       const draftData = loadDraft(currentDraftId);
       if (draftData) {
-        setFormData(draftData);
+        const { submission: draftSubmission, ...data } = draftData;
+        submission.restore(draftSubmission);
+        setFormData(data);
       }
     }
-  }, [currentDraftId, loadDraft]);
+  }, [currentDraftId, loadDraft, submission]);
 
   // Функция для автосохранения
   const autoSaveFunction = useCallback(async (data) => {
     const hasWriteOffs = data.writeOffs.some(item => item.name || item.weight || item.unit || item.reason);
 
     if (data.location || hasWriteOffs || data.report_date || data.report_time) {
-      await saveDraft('writeoff', data);
+      await saveDraft('writeoff', { ...data, submission: submission.current() });
     }
-  }, [saveDraft]);
+  }, [saveDraft, submission]);
 
   // Автосохранение каждые 300мс с сохранением фокуса
   useAutoSave(formData, autoSaveFunction, 300);
@@ -148,8 +152,12 @@ export const WriteOffForm = ({
       const transfers = [];
       apiFormData.append('transfers_json', JSON.stringify(transfers));
 
-      const result = await apiService.createWriteOffReport(apiFormData);
+      // Ключ попадает в черновик до отправки: повтор после перезагрузки страницы уйдет с ним же
+      const { key: idempotencyKey } = submission.forData(formData);
+      await autoSaveFunction(formData);
+      const result = await apiService.createWriteOffReport(apiFormData, { idempotencyKey });
       clearCurrentDraft();
+      submission.reset();
       showNotification('success', 'Акт списания отправлен!', 'Акт списания успешно отправлен и сохранен в системе');
 
     } catch (error) {
@@ -158,7 +166,7 @@ export const WriteOffForm = ({
     } finally {
       setIsLoading(false);
     }
-  }, [formData, apiService, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading]);
+  }, [formData, apiService, submission, autoSaveFunction, showNotification, showValidationErrors, clearCurrentDraft, setIsLoading]);
 
   return (
     <>
@@ -1,4 +1,4 @@
-// Определение локаций - СИНХРОНИЗИРОВАНО С BACKEND
+// Локации по умолчанию: актуальный список приходит с бэкенда (GET /locations)
 export const LOCATIONS = [
   'Гагарина 48/1',
   'Абдулхакима Исмаилова 51',
@@ -2,4 +2,6 @@
 export { useFocusPreservation } from './useFocusPreservation';
 export { useAutoSave } from './useAutoSave';
 export { useFormData } from './useFormData';
-export { default as useInventoryItems } from './useInventoryItems';
\ No newline at end of file
+export { default as useInventoryItems } from './useInventoryItems';
+export { usePhotoUploads } from './usePhotoUploads';
+export { useSubmission } from './useSubmission';
@@ -0,0 +1,37 @@
+import { useCallback, useMemo, useRef } from 'react';
+
+// Фото начинает загружаться сразу после выбора, а при отправке отчета вместо файла
+// передается id загруженного фото. Если предварительная загрузка не удалась,
+// photoId возвращает null и форма отправляет файл, как раньше.
+export const usePhotoUploads = (apiService) => {
+  const uploadsRef = useRef(new Map());
+
+  const startUpload = useCallback((file) => {
+    if (!(file instanceof File)) {
+      return Promise.resolve(null);
+    }
+    let upload = uploadsRef.current.get(file);
+    if (!upload) {
+      upload = apiService.uploadPhoto(file)
+        .then((result) => result.id)
+        .catch((error) => {
+          console.warn('⚠️ Предварительная загрузка фото не удалась, фото уйдет вместе с отчетом:', error);
+          uploadsRef.current.delete(file);
+          return null;
+        });
+      uploadsRef.current.set(file, upload);
+    }
+    return upload;
+  }, [apiService]);
+
+  // id фото для отправки отчета; дожидается загрузки, если она еще идет
+  const photoId = useCallback((file) => (file ? startUpload(file) : Promise.resolve(null)), [startUpload]);
+
+  // Сбрасывается после успешной отправки или когда сервер отклонил id (400): следующая
+  // попытка загрузит фото заново. Повтор после других ошибок идет с теми же id
+  const reset = useCallback(() => {
+    uploadsRef.current = new Map();
+  }, []);
+
+  return useMemo(() => ({ startUpload, photoId, reset }), [startUpload, photoId, reset]);
+};
@@ -0,0 +1,47 @@
+import { useCallback, useMemo, useRef } from 'react';
+import { newIdempotencyKey } from '../services/apiService';
+
+// Отпечаток данных формы. Файлы — по имени, размеру и типу: у File, восстановленного
+// из черновика, другая дата изменения
+const fingerprint = (data) => JSON.stringify(data, (name, value) => (
+  value instanceof File ? `file:${value.name}:${value.size}:${value.type}` : value
+));
+
+// Одна отправка формы: ключ идемпотентности и id фото, с которыми она ушла на сервер.
+// Повтор тех же данных (после ошибки сети или перезагрузки страницы) идет с тем же ключом
+// и теми же id, и сервер вернет сохраненный ответ вместо второго отчета. Если данные
+// изменились, это новая отправка с новым ключом. Форма хранит отправку в черновике
+// (поле submission), чтобы ключ пережил перезагрузку страницы.
+export const useSubmission = () => {
+  const submissionRef = useRef(null);
+
+  // Отправка из черновика
+  const restore = useCallback((submission) => {
+    submissionRef.current = submission || null;
+  }, []);
+
+  const current = useCallback(() => submissionRef.current, []);
+
+  // Отправка для текущих данных формы: прежняя, если данные не менялись, иначе новая
+  const forData = useCallback((data) => {
+    const print = fingerprint(data);
+    if (submissionRef.current?.fingerprint !== print) {
+      submissionRef.current = { key: newIdempotencyKey(), fingerprint: print, photoIds: null };
+    }
+    return submissionRef.current;
+  }, []);
+
+  const setPhotoIds = useCallback((photoIds) => {
+    submissionRef.current = { ...submissionRef.current, photoIds };
+  }, []);
+
+  // После успешной отправки или отказа в id фото (400) следующая попытка — новая отправка
+  const reset = useCallback(() => {
+    submissionRef.current = null;
+  }, []);
+
+  return useMemo(
+    () => ({ restore, current, forData, setPhotoIds, reset }),
+    [restore, current, forData, setPhotoIds, reset]
+  );
+};
@@ -27,7 +27,9 @@ const handleResponse = async (response, operation = 'операция') => {
       errorMessage = `Ошибка парсинга ответа: ${response.status} ${response.statusText}`;
     }
 
-    throw new Error(errorMessage);
+    const error = new Error(errorMessage);
+    error.status = response.status;
+    throw error;
   }
 
   try {
@@ -40,12 +42,29 @@ const handleResponse = async (response, operation = 'операция') => {
   }
 };
 
+// Idempotency-Key — случайный ключ одной отправки формы (см. useSubmission):
+// повтор той же отправки после таймаута или обрыва связи получит с сервера
+// уже сохраненный ответ, а не второй отчет
+export const newIdempotencyKey = () => {
+  if (globalThis.crypto?.randomUUID) {
+    return crypto.randomUUID();
+  }
+  // randomUUID есть только в безопасном контексте (https)
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  return Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
+
+const idempotencyHeaders = (idempotencyKey) => (
+  idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}
+);
+
 export const apiService = {
-  async createShiftReport(formData) {
+  async createShiftReport(formData, { idempotencyKey } = {}) {
     console.log('🚀 Отправляем отчет смены...');
     try {
       const response = await fetch(`${API_BASE_URL}/shift-reports/create`, {
         method: 'POST',
+        headers: idempotencyHeaders(idempotencyKey),
         body: formData
       });
       return await handleResponse(response, 'createShiftReport');
@@ -55,11 +74,12 @@ export const apiService = {
     }
   },
 
-  async createInventoryReport(formData) {
+  async createInventoryReport(formData, { idempotencyKey } = {}) {
     console.log('🚀 Отправляем отчет инвентаризации...');
     try {
       const response = await fetch(`${API_BASE_URL}/daily_inventory/create`, {
         method: 'POST',
+        headers: idempotencyHeaders(idempotencyKey),
         body: formData
       });
       return await handleResponse(response, 'createInventoryReport');
@@ -70,15 +90,17 @@ export const apiService = {
   },
 
   // НОВОЕ: создание инвентаризации v2
-  async createInventoryReportV2(data) {
+  async createInventoryReportV2(data, { idempotencyKey } = {}) {
     console.log('🚀 Отправляем отчет инвентаризации v2...', data);
     try {
+      const body = JSON.stringify(data);
       const response = await fetch(`${API_BASE_URL}/daily-inventory-v2/create`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...idempotencyHeaders(idempotencyKey),
         },
-        body: JSON.stringify(data)
+        body
       });
       return await handleResponse(response, 'createInventoryReportV2');
     } catch (error) {
@@ -87,11 +109,12 @@ export const apiService = {
     }
   },
 
-  async createReceivingReport(formData) {
+  async createReceivingReport(formData, { idempotencyKey } = {}) {
     console.log('🚀 Отправляем отчет приема товаров...');
     try {
       const response = await fetch(`${API_BASE_URL}/report-on-goods/create`, {
         method: 'POST',
+        headers: idempotencyHeaders(idempotencyKey),
         body: formData
       });
       return await handleResponse(response, 'createReceivingReport');
@@ -101,11 +124,12 @@ export const apiService = {
     }
   },
 
-  async createWriteOffReport(formData) {
+  async createWriteOffReport(formData, { idempotencyKey } = {}) {
     console.log('🚀 Отправляем акт списания/перемещения...');
     try {
       const response = await fetch(`${API_BASE_URL}/writeoff-transfer/create`, {
         method: 'POST',
+        headers: idempotencyHeaders(idempotencyKey),
         body: formData
       });
       return await handleResponse(response, 'createWriteOffReport');
@@ -116,7 +140,7 @@ export const apiService = {
   },
 
   // Отправка дополнительных фотографий
-  async sendAdditionalPhotos(location, photos) {
+  async sendAdditionalPhotos(location, photos, { idempotencyKey } = {}) {
     console.log('🚀 Отправляем дополнительные фотографии...');
 
     if (!photos || photos.length === 0) {
@@ -133,6 +157,7 @@ export const apiService = {
 
       const response = await fetch(`${API_BASE_URL}/report-on-goods/send-photo`, {
         method: 'POST',
+        headers: idempotencyHeaders(idempotencyKey),
         body: formData
       });
       return await handleResponse(response, 'sendAdditionalPhotos');
@@ -142,6 +167,49 @@ export const apiService = {
     }
   },
 
+  // Предварительная загрузка фото частями с докачкой: фото уходит на сервер, пока заполняется
+  // форма, а при отправке отчета передается только его id (photo_id / photo_ids)
+  async uploadPhoto(file, { maxRetries = 5 } = {}) {
+    const startResponse = await fetch(`${API_BASE_URL}/photos/uploads`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ filename: file.name, content_type: file.type || null, size: file.size })
+    });
+    let upload = await handleResponse(startResponse, 'uploadPhoto');
+    const getStatus = async () => handleResponse(
+      await fetch(`${API_BASE_URL}/photos/uploads/${upload.id}`), 'uploadPhotoStatus'
+    );
+
+    let failures = 0;
+    while (upload.status === 'uploading') {
+      try {
+        const response = await fetch(`${API_BASE_URL}/photos/uploads/${upload.id}`, {
+          method: 'PATCH',
+          headers: {
+            'Content-Type': 'application/offset+octet-stream',
+            'Upload-Offset': String(upload.received),
+          },
+          body: file.slice(upload.received, upload.received + upload.chunk_size)
+        });
+        // Часть уже принята или потерялась — продолжаем с того смещения, которое знает сервер
+        upload = response.status === 409 ? await getStatus() : await handleResponse(response, 'uploadPhotoChunk');
+        failures = 0;
+      } catch (error) {
+        failures += 1;
+        if (failures > maxRetries) {
+          throw error;
+        }
+        await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** (failures - 1)));
+        try {
+          upload = await getStatus();
+        } catch (statusError) {
+          console.warn('⚠️ Нет связи, повторим загрузку фото:', statusError);
+        }
+      }
+    }
+    return upload;
+  },
+
   // ===== МЕТОДЫ ДЛЯ ПРОСМОТРА ОТЧЕТОВ =====
 
   // Получение отчетов с пагинацией и фильтрацией
@@ -174,6 +242,20 @@ export const apiService = {
     }
   },
 
+  // Поток событий отчетов (SSE) вместо периодического опроса списков.
+  // onEvent получает { event, type, id, location, ... }; возвращает функцию отписки
+  subscribeReportEvents({ location, types } = {}, onEvent) {
+    const queryParams = new URLSearchParams();
+    if (location && location !== 'all') queryParams.append('location', location);
+    if (types && types.length) queryParams.append('types', types.join(','));
+
+    const source = new EventSource(`${API_BASE_URL}/events/reports?${queryParams}`);
+    ['created', 'deleted', 'status_changed', 'resync'].forEach((eventName) => {
+      source.addEventListener(eventName, (message) => onEvent(JSON.parse(message.data)));
+    });
+    return () => source.close();
+  },
+
   // Получение конкретного отчета по ID
   async getReport(reportType, reportId) {
     console.log(`🚀 Получаем отчет ${reportType}/${reportId}...`);
@@ -287,6 +369,51 @@ export const apiService = {
     }
   },
 
+  // Пакетная отправка накопленных без связи отчетов.
+  // items: [{ clientId, type, data, files: { photo: File, receipt_photo: File, photos: [File] } }]
+  async syncBatch(items, { idempotencyKey } = {}) {
+    console.log(`🚀 Синхронизируем пакет из ${items.length} отчетов...`);
+    try {
+      const formData = new FormData();
+      const manifestItems = items.map((item, itemIndex) => {
+        const files = {};
+        Object.entries(item.files || {}).forEach(([key, value]) => {
+          const list = Array.isArray(value) ? value : [value];
+          const names = list.filter(Boolean).map((file, fileIndex) => {
+            const name = `file-${itemIndex}-${key}-${fileIndex}`;
+            formData.append(name, file);
+            return name;
+          });
+          files[key] = Array.isArray(value) ? names : names[0];
+        });
+        return { client_id: item.clientId, type: item.type, data: item.data, files };
+      });
+      formData.append('manifest', JSON.stringify({ items: manifestItems }));
+
+      const response = await fetch(`${API_BASE_URL}/sync/batch`, {
+        method: 'POST',
+        headers: idempotencyHeaders(idempotencyKey),
+        body: formData
+      });
+      return await handleResponse(response, 'syncBatch');
+    } catch (error) {
+      console.error('❌ syncBatch error:', error);
+      throw error;
+    }
+  },
+
+  // Получение реестра локаций
+  async getLocations() {
+    console.log('🚀 Получаем локации...');
+    try {
+      const response = await fetch(`${API_BASE_URL}/locations`);
+      return await handleResponse(response, 'getLocations');
+    } catch (error) {
+      console.error('❌ getLocations error:', error);
+      throw error;
+    }
+  },
+
   // Получение детальной инвентаризации v2
   async getDetailedInventoryV2(inventoryId) {
     console.log(`🚀 Получаем детальную инвентаризацию ${inventoryId}...`);